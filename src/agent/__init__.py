@@ -10,6 +10,14 @@ from agent.instruction import (
     agent_grammar_vocabulary_error_spotter_instruction,
     agent_summary_blank_inference_word_instruction,
     sat_problem_variant_generator_master_agent_instruction,
+    variant_agent_shared_instruction,
+)
+from agent.history import compact_history
+from agent.shared_prefix import append_type_instruction
+from agent.token_usage import record_token_usage, bind_request_token_usage, report_request_token_usage
+from agent.permutations import (
+    build_paragraph_order_response,
+    build_sentence_insertion_response,
 )
 
 model = "gemini-2.0-flash"
@@ -19,7 +27,10 @@ emotion_atmosphere_agent = LlmAgent(
     name="emotion_atmosphere_agent",
     model=model,
     description="심경/분위기 파악 변형 문제를 생성하는 assistant",
-    instruction=agent_emotion_atmosphere_guesser_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_emotion_atmosphere_guesser_instruction),
+    output_key="emotion_atmosphere_agent",
+    after_model_callback=record_token_usage,
 )
 
 # 밑줄 친 표현의 맥락적 의미 파악 문제 생성 에이전트
@@ -27,7 +38,10 @@ implied_meaning_agent = LlmAgent(
     name="implied_meaning_agent",
     model=model,
     description="밑줄 친 표현의 맥락적 의미 파악 변형 문제를 생성하는 assistant",
-    instruction=agent_implied_meaning_finder_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_implied_meaning_finder_instruction),
+    output_key="implied_meaning_agent",
+    after_model_callback=record_token_usage,
 )
 
 # 빈칸 추론(구문) 문제 생성 에이전트
@@ -35,7 +49,10 @@ blank_inference_phrase_agent = LlmAgent(
     name="blank_inference_phrase_agent",
     model=model,
     description="빈칸 추론(구문) 변형 문제를 생성하는 assistant",
-    instruction=agent_blank_inference_phrase_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_blank_inference_phrase_instruction),
+    output_key="blank_inference_phrase_agent",
+    after_model_callback=record_token_usage,
 )
 
 # 글 흐름에 부적절한 문장 찾기 문제 생성 에이전트
@@ -43,7 +60,10 @@ unsuitable_sentence_agent = LlmAgent(
     name="unsuitable_sentence_agent",
     model=model,
     description="글 흐름에 부적절한 문장 찾기 변형 문제를 생성하는 assistant",
-    instruction=agent_unsuitable_sentence_finder_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_unsuitable_sentence_finder_instruction),
+    output_key="unsuitable_sentence_agent",
+    after_model_callback=record_token_usage,
 )
 
 # 글 순서 맞추기 문제 생성 에이전트
@@ -51,7 +71,10 @@ paragraph_order_agent = LlmAgent(
     name="paragraph_order_agent",
     model=model,
     description="글 순서 맞추기 변형 문제를 생성하는 assistant",
-    instruction=agent_paragraph_order_sorter_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_paragraph_order_sorter_instruction),
+    output_key="paragraph_order_agent",
+    after_model_callback=[record_token_usage, build_paragraph_order_response],
 )
 
 # 글 흐름에 맞게 문장 끼워넣기 문제 생성 에이전트
@@ -59,7 +82,10 @@ sentence_insertion_agent = LlmAgent(
     name="sentence_insertion_agent",
     model=model,
     description="글 흐름에 맞게 문장 끼워넣기 변형 문제를 생성하는 assistant",
-    instruction=agent_sentence_insertion_locator_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_sentence_insertion_locator_instruction),
+    output_key="sentence_insertion_agent",
+    after_model_callback=[record_token_usage, build_sentence_insertion_response],
 )
 
 # 어법·어휘 상 틀린 표현 찾기 문제 생성 에이전트
@@ -67,7 +93,10 @@ grammar_vocabulary_error_agent = LlmAgent(
     name="grammar_vocabulary_error_agent",
     model=model,
     description="어법·어휘 상 틀린 표현 찾기 변형 문제를 생성하는 assistant",
-    instruction=agent_grammar_vocabulary_error_spotter_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_grammar_vocabulary_error_spotter_instruction),
+    output_key="grammar_vocabulary_error_agent",
+    after_model_callback=record_token_usage,
 )
 
 # 지문 요약에서의 빈칸 추론(단어) 문제 생성 에이전트
@@ -75,9 +104,26 @@ summary_blank_inference_word_agent = LlmAgent(
     name="summary_blank_inference_word_agent",
     model=model,
     description="지문 요약에서의 빈칸 추론(단어) 변형 문제를 생성하는 assistant",
-    instruction=agent_summary_blank_inference_word_instruction
+    instruction=variant_agent_shared_instruction,
+    before_model_callback=append_type_instruction(agent_summary_blank_inference_word_instruction),
+    output_key="summary_blank_inference_word_agent",
+    after_model_callback=record_token_usage,
 )
 
+# 유형별 에이전트 이름 → 유형별 지침 (배치 모드 등에서 공통 지침과 합쳐 사용)
+VARIANT_TYPE_INSTRUCTIONS = {
+    emotion_atmosphere_agent.name: agent_emotion_atmosphere_guesser_instruction,
+    implied_meaning_agent.name: agent_implied_meaning_finder_instruction,
+    blank_inference_phrase_agent.name: agent_blank_inference_phrase_instruction,
+    unsuitable_sentence_agent.name: agent_unsuitable_sentence_finder_instruction,
+    paragraph_order_agent.name: agent_paragraph_order_sorter_instruction,
+    sentence_insertion_agent.name: agent_sentence_insertion_locator_instruction,
+    grammar_vocabulary_error_agent.name: agent_grammar_vocabulary_error_spotter_instruction,
+    summary_blank_inference_word_agent.name: agent_summary_blank_inference_word_instruction,
+}
+
+# 하위 에이전트는 모두 같은 공통 지침을 시스템 지침으로 쓰고, 유형별 지침은 지문 뒤에 덧붙입니다 (접두 캐시 공유)
+# 각 하위 에이전트는 자신의 이름을 output_key로 결과를 세션 상태에 저장합니다 (유형별 다시 생성에 사용)
 parallel_agent = ParallelAgent(
     name="parallel_agent",
     description="다양한 변형 문제 생성 에이전트",
@@ -100,7 +146,8 @@ master_agent = LlmAgent(
     instruction=sat_problem_variant_generator_master_agent_instruction,
     tools=[
         agent_tool.AgentTool(parallel_agent),
-    ]
+    ],
+    after_model_callback=record_token_usage,
 )
 
 root_agent = LlmAgent(
@@ -117,7 +164,11 @@ root_agent = LlmAgent(
 """,
     tools=[
         agent_tool.AgentTool(master_agent),
-    ]
+    ],
+    before_agent_callback=bind_request_token_usage,
+    after_agent_callback=report_request_token_usage,
+    before_model_callback=compact_history,
+    after_model_callback=record_token_usage,
 )
 
 
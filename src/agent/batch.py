@@ -0,0 +1,340 @@
+"""
+배치 변형 문제 생성 (여러 지문 묶음 처리)
+
+야간 워크북 변환처럼 지연 시간보다 처리량과 비용이 중요한 작업을 위한 모드입니다.
+유형별 에이전트 한 번의 호출로 짧은 지문 K개를 함께 처리하고, 결과는 지문 ID를 키로 한
+JSON 배열로 받습니다. K는 지문 길이와 모델 입력/출력 토큰 예산으로 정하며,
+결과가 빠지거나 잘못된 지문은 묶음에서 빼내 한 개씩 다시 요청합니다.
+
+사용법 (src 디렉토리에서):
+    python -m agent.batch passages.jsonl -o results.jsonl [--types paragraph_order_agent,...]
+
+입력 JSONL 각 줄: {"id": "지문 ID", "text": "지문"}
+출력 JSONL 각 줄: {"id": ..., "variants": {에이전트 이름: 결과}, "errors": {에이전트 이름: 사유}}
+"""
+
+import re
+import sys
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+from typing import Dict, Any, List, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from agent import VARIANT_TYPE_INSTRUCTIONS, model
+from agent.permutations import SEGMENTATION_COMPLETERS
+from agent.shared_prefix import compile_variant_instruction
+from agent.token_usage import record_token_usage
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "agent_batch"
+
+# 토큰 수 추정 (영어 지문 기준 약 4자당 1토큰)
+CHARS_PER_TOKEN = 4
+
+# 한 번의 호출에 허용할 입력/출력 토큰 예산 (모델 한도보다 여유 있게)
+INPUT_TOKEN_BUDGET = 32000
+OUTPUT_TOKEN_BUDGET = 8000
+
+# 지문 하나당 결과에 필요한 출력 토큰 (문제/선택지/해설), 지문을 다시 쓰는 유형은 지문 길이만큼 추가
+OUTPUT_TOKENS_PER_RESULT = 700
+
+# 한 묶음의 최대 지문 수
+MAX_PACK_SIZE = 8
+
+# 동시에 진행할 호출 수
+BATCH_CONCURRENCY = 4
+
+JSON_ARRAY_PATTERN = re.compile(r"\[.*\]", re.DOTALL)
+
+BATCH_PACKING_INSTRUCTION = """
+### **여러 지문 묶음 처리 (배치 모드)**
+
+사용자 메시지에는 `[지문 ID: ...]` 머리말로 구분된 여러 개의 지문이 들어 있습니다.
+
+1.  각 지문마다 **서로 독립적으로** 위 지침에 따라 변형 문제 하나를 생성합니다. 다른 지문의 내용을 섞지 않습니다.
+2.  결과는 **반드시** 아래 형식의 JSON 배열 하나로만 제공합니다. 각 원소의 `result`에는 위 결과 제공 형식의 JSON 객체를 문자열로 감싸지 말고 객체 그대로 넣고, 모든 지문 ID에 대해 원소를 정확히 하나씩 만듭니다.
+
+```json
+[
+    {"passage_id": "[지문 ID]", "result": {"[결과 제공 형식의 키]": "[값]"}}
+]
+```
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    """텍스트의 토큰 수를 대략 추정합니다."""
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+def expected_output_tokens(agent_name: str, passage: str) -> int:
+    """지문 하나에 대한 결과의 출력 토큰 수를 추정합니다."""
+    if agent_name in SEGMENTATION_COMPLETERS:
+        # 분할 정보와 해설만 돌려받음
+        return OUTPUT_TOKENS_PER_RESULT
+    return OUTPUT_TOKENS_PER_RESULT + estimate_tokens(passage)
+
+
+def plan_packs(
+    agent_name: str, items: List[Dict[str, str]], instruction_tokens: int, max_pack_size: int = MAX_PACK_SIZE
+) -> List[List[Dict[str, str]]]:
+    """
+    지문 목록을 입력/출력 토큰 예산에 맞는 묶음으로 나눕니다.
+
+    Args:
+        agent_name (str): 유형별 에이전트 이름
+        items (List[Dict[str, str]]): {"id", "text"} 지문 목록
+        instruction_tokens (int): 시스템 지침의 추정 토큰 수
+        max_pack_size (int): 한 묶음의 최대 지문 수
+
+    Returns:
+        List[List[Dict[str, str]]]: 지문 묶음 목록 (입력 순서 유지)
+    """
+    packs: List[List[Dict[str, str]]] = []
+    current: List[Dict[str, str]] = []
+    input_tokens = instruction_tokens
+    output_tokens = 0
+    for item in items:
+        item_input = estimate_tokens(item["text"])
+        item_output = expected_output_tokens(agent_name, item["text"])
+        if current and (
+            len(current) >= max_pack_size
+            or input_tokens + item_input > INPUT_TOKEN_BUDGET
+            or output_tokens + item_output > OUTPUT_TOKEN_BUDGET
+        ):
+            packs.append(current)
+            current, input_tokens, output_tokens = [], instruction_tokens, 0
+        current.append(item)
+        input_tokens += item_input
+        output_tokens += item_output
+    if current:
+        packs.append(current)
+    return packs
+
+
+def format_pack_message(pack: List[Dict[str, str]]) -> str:
+    """묶음의 지문들을 하나의 사용자 메시지로 만듭니다."""
+    return "\n\n".join(f"[지문 ID: {item['id']}]\n{item['text'].strip()}" for item in pack)
+
+
+def parse_pack_response(
+    agent_name: str, pack: List[Dict[str, str]], text: str
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    묶음 응답(JSON 배열)을 지문별 결과로 나눕니다.
+
+    Args:
+        agent_name (str): 유형별 에이전트 이름
+        pack (List[Dict[str, str]]): 요청한 지문 묶음
+        text (str): 모델 응답 텍스트
+
+    Returns:
+        Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]: (지문 ID → 결과, 지문 ID → 실패 사유)
+            같은 지문 ID가 여러 번 나오면 그 지문은 실패로 처리합니다.
+    """
+    passages = {item["id"]: item["text"] for item in pack}
+    results: Dict[str, Dict[str, Any]] = {}
+    failures: Dict[str, str] = {}
+
+    match = JSON_ARRAY_PATTERN.search(text or "")
+    try:
+        entries = json.loads(match.group(0)) if match else None
+    except json.JSONDecodeError:
+        entries = None
+    if not isinstance(entries, list):
+        return {}, {passage_id: "응답이 JSON 배열이 아닙니다" for passage_id in passages}
+
+    seen = set()
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        passage_id = str(entry.get("passage_id", ""))
+        if passage_id not in passages:
+            continue
+        if passage_id in seen:
+            # 같은 지문 결과가 여러 개면 어느 것이 맞는지 알 수 없으므로 개별 재시도
+            results.pop(passage_id, None)
+            failures[passage_id] = "응답에 같은 지문 ID의 결과가 여러 개 있습니다"
+            continue
+        seen.add(passage_id)
+        result = entry.get("result")
+        completer = SEGMENTATION_COMPLETERS.get(agent_name)
+        try:
+            if isinstance(result, str):
+                # 결과 객체를 JSON 문자열로 감싸 돌려준 경우
+                try:
+                    result = json.loads(result)
+                except json.JSONDecodeError:
+                    pass
+            if not isinstance(result, dict):
+                raise ValueError("결과가 JSON 객체가 아닙니다")
+            if completer:
+                result = completer(passages[passage_id], result)
+            elif "question" not in result:
+                raise ValueError("결과에 question이 없습니다")
+        except ValueError as e:
+            failures[passage_id] = str(e)
+            continue
+        results[passage_id] = result
+
+    for passage_id in passages:
+        if passage_id not in results and passage_id not in failures:
+            failures[passage_id] = "응답에 해당 지문의 결과가 없습니다"
+    return results, failures
+
+
+class BatchGenerator:
+    """유형별 에이전트를 지문 묶음 단위로 호출하는 배치 생성기"""
+
+    def __init__(self, max_pack_size: int = MAX_PACK_SIZE, concurrency: int = BATCH_CONCURRENCY):
+        self.max_pack_size = max_pack_size
+        self.session_service = InMemorySessionService()
+        self._runners: Dict[str, Runner] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.stats = {"calls": 0, "retry_calls": 0, "failed_items": 0}
+
+    def _instruction(self, agent_name: str) -> str:
+        return compile_variant_instruction(VARIANT_TYPE_INSTRUCTIONS[agent_name]) + BATCH_PACKING_INSTRUCTION
+
+    def _get_runner(self, agent_name: str) -> Runner:
+        if agent_name not in self._runners:
+            batch_agent = LlmAgent(
+                name=f"{agent_name}_batch",
+                model=model,
+                description=f"{agent_name}의 배치(여러 지문 묶음) 처리 assistant",
+                instruction=self._instruction(agent_name),
+                after_model_callback=record_token_usage,
+            )
+            self._runners[agent_name] = Runner(
+                app_name=APP_NAME, agent=batch_agent, session_service=self.session_service
+            )
+        return self._runners[agent_name]
+
+    async def _call(self, agent_name: str, pack: List[Dict[str, str]]) -> str:
+        """묶음 하나를 새 세션에서 한 번 호출하고 최종 응답 텍스트를 반환합니다."""
+        session = await self.session_service.create_session(
+            app_name=APP_NAME, user_id="batch", session_id=uuid.uuid4().hex
+        )
+        message = types.Content(role="user", parts=[types.Part(text=format_pack_message(pack))])
+        final_text = ""
+        async with self._semaphore:
+            self.stats["calls"] += 1
+            async for event in self._get_runner(agent_name).run_async(
+                user_id="batch", session_id=session.id, new_message=message
+            ):
+                if event.content and event.content.parts and not event.partial:
+                    text = "".join(part.text for part in event.content.parts if part.text)
+                    if text:
+                        final_text = text
+        return final_text
+
+    async def run_pack(
+        self, agent_name: str, pack: List[Dict[str, str]]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+        """
+        묶음을 처리하고, 실패한 지문은 한 개씩 다시 요청합니다.
+
+        Returns:
+            Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]: (지문 ID → 결과, 지문 ID → 실패 사유)
+        """
+        try:
+            results, failures = parse_pack_response(agent_name, pack, await self._call(agent_name, pack))
+        except Exception as e:
+            results, failures = {}, {item["id"]: f"호출 실패: {e}" for item in pack}
+
+        if failures and len(pack) > 1:
+            logger.warning(f"⚠️ [{agent_name}] 묶음 {len(pack)}개 중 {len(failures)}개 실패, 개별 재시도")
+            retries = [item for item in pack if item["id"] in failures]
+            self.stats["retry_calls"] += len(retries)
+            retried = await asyncio.gather(*(self.run_pack(agent_name, [item]) for item in retries))
+            failures = {}
+            for retry_results, retry_failures in retried:
+                results.update(retry_results)
+                failures.update(retry_failures)
+
+        if len(pack) == 1:
+            self.stats["failed_items"] += len(failures)
+        return results, failures
+
+    async def generate(
+        self, items: List[Dict[str, str]], agent_names: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        모든 지문에 대해 지정한 유형의 변형 문제를 생성합니다.
+
+        Args:
+            items (List[Dict[str, str]]): {"id", "text"} 지문 목록
+            agent_names (List[str]): 생성할 유형별 에이전트 이름 목록
+
+        Returns:
+            List[Dict[str, Any]]: 지문별 {"id", "variants", "errors"} (입력 순서)
+        """
+        outputs = {item["id"]: {"id": item["id"], "variants": {}, "errors": {}} for item in items}
+        jobs = []
+        for agent_name in agent_names:
+            instruction_tokens = estimate_tokens(self._instruction(agent_name))
+            for pack in plan_packs(agent_name, items, instruction_tokens, self.max_pack_size):
+                jobs.append((agent_name, self.run_pack(agent_name, pack)))
+
+        for (agent_name, _), (results, failures) in zip(jobs, await asyncio.gather(*(job for _, job in jobs))):
+            for passage_id, result in results.items():
+                outputs[passage_id]["variants"][agent_name] = result
+            for passage_id, reason in failures.items():
+                outputs[passage_id]["errors"][agent_name] = reason
+        return [outputs[item["id"]] for item in items]
+
+
+def load_passages(path: str) -> List[Dict[str, str]]:
+    """입력 JSONL에서 지문 목록을 읽습니다 (id가 없으면 줄 번호 사용)."""
+    items = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            items.append({"id": str(record.get("id") or line_number), "text": record["text"]})
+    return items
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="여러 지문을 묶어 변형 문제를 배치 생성합니다.")
+    parser.add_argument("input", help='입력 JSONL ({"id", "text"} 한 줄에 지문 하나)')
+    parser.add_argument("-o", "--output", required=True, help="결과 JSONL 경로")
+    parser.add_argument("--types", default=",".join(VARIANT_TYPE_INSTRUCTIONS),
+                        help="생성할 유형별 에이전트 이름 (쉼표 구분, 기본: 8개 유형 모두)")
+    parser.add_argument("--max-pack", type=int, default=MAX_PACK_SIZE, help="한 묶음의 최대 지문 수")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    agent_names = [name.strip() for name in args.types.split(",") if name.strip()]
+    unknown = [name for name in agent_names if name not in VARIANT_TYPE_INSTRUCTIONS]
+    if unknown:
+        parser.error(f"알 수 없는 유형: {', '.join(unknown)}")
+
+    items = load_passages(args.input)
+    generator = BatchGenerator(max_pack_size=args.max_pack)
+    outputs = asyncio.run(generator.generate(items, agent_names))
+    with open(args.output, "w", encoding="utf-8") as f:
+        for output in outputs:
+            f.write(json.dumps(output, ensure_ascii=False) + "\n")
+
+    baseline_calls = len(items) * len(agent_names)
+    stats = generator.stats
+    logger.info(
+        f"✅ 배치 생성 완료: 지문 {len(items)}개 × 유형 {len(agent_names)}개, "
+        f"호출 {stats['calls']}회 (개별 호출 시 {baseline_calls}회, 재시도 {stats['retry_calls']}회), "
+        f"실패 {stats['failed_items']}건"
+    )
+    return 0 if stats["failed_items"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
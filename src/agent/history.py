@@ -0,0 +1,153 @@
+"""
+대화 기록 압축 (세션 컴팩션)
+
+같은 채팅(세션)에 지문을 계속 입력하면 root_agent가 이전 턴의 전체 기록
+(8개 유형 변형 결과 마크다운, master_agent 호출/응답)을 매번 다시 받게 됩니다.
+모델 호출 직전에 이전 턴들을 짧은 요약으로 바꿔 현재 지문과 함께 보냅니다.
+세션 저장소의 전체 기록은 그대로 유지되며, 모델에 보내는 요청만 줄어듭니다.
+"""
+
+import os
+import re
+import logging
+from typing import List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+# 대화 기록 압축 사용 여부 (AGENT_HISTORY_COMPACTION=0 으로 비활성화)
+HISTORY_COMPACTION_ENABLED = os.getenv("AGENT_HISTORY_COMPACTION", "1") != "0"
+
+# 요약으로 남길 이전 턴의 최대 개수 (오래된 턴은 요약도 생략)
+MAX_SUMMARIZED_TURNS = 5
+
+# 이전 입력 지문 요약 길이
+PASSAGE_PREVIEW_CHARS = 120
+
+# 결과에 포함된 문제 개수 추정용 패턴 (JSON "question" 키 또는 마크다운 문제 헤더)
+QUESTION_PATTERN = re.compile(r'"question"\s*:|^\s*#+\s*.*문제', re.MULTILINE)
+
+
+def _content_text(content: types.Content) -> str:
+    """Content의 텍스트 파트를 이어붙여 반환"""
+    return "\n".join(part.text for part in (content.parts or []) if part.text)
+
+
+def _function_result_text(content: types.Content) -> str:
+    """Content의 functionResponse 결과 텍스트를 이어붙여 반환"""
+    texts = []
+    for part in content.parts or []:
+        if part.function_response and part.function_response.response:
+            result = part.function_response.response.get("result")
+            if isinstance(result, str):
+                texts.append(result)
+    return "\n".join(texts)
+
+
+def _is_user_turn_start(content: types.Content) -> bool:
+    """사용자가 직접 입력한 메시지(functionResponse가 아닌)인지 확인"""
+    if content.role != "user" or not content.parts:
+        return False
+    return any(part.text for part in content.parts) and not any(
+        part.function_response for part in content.parts
+    )
+
+
+def split_turns(contents: List[types.Content]) -> List[List[types.Content]]:
+    """
+    요청 contents를 사용자 입력 기준의 턴 목록으로 나눕니다.
+
+    Args:
+        contents (List[types.Content]): LLM 요청의 contents
+
+    Returns:
+        List[List[types.Content]]: 각 턴의 contents (마지막 요소가 현재 턴)
+    """
+    turns: List[List[types.Content]] = []
+    for content in contents:
+        if _is_user_turn_start(content) or not turns:
+            turns.append([])
+        turns[-1].append(content)
+    return turns
+
+
+def summarize_turn(turn: List[types.Content], turn_number: int) -> str:
+    """
+    이전 턴 하나를 한 줄 요약으로 만듭니다.
+
+    Args:
+        turn (List[types.Content]): 턴의 contents
+        turn_number (int): 세션 내 턴 번호 (1부터)
+
+    Returns:
+        str: 입력 지문 미리보기와 생성 결과 규모를 담은 요약
+    """
+    user_text = _content_text(turn[0]) if turn[0].role == "user" else ""
+    preview = " ".join(user_text.split())[:PASSAGE_PREVIEW_CHARS]
+    if len(" ".join(user_text.split())) > PASSAGE_PREVIEW_CHARS:
+        preview += "..."
+
+    output = ""
+    for content in turn[1:]:
+        candidate = _content_text(content) if content.role == "model" else _function_result_text(content)
+        if len(candidate) > len(output):
+            output = candidate
+
+    if not output:
+        return f"[이전 턴 {turn_number}] 입력: {preview} → 생성 결과 없음"
+    question_count = len(QUESTION_PATTERN.findall(output))
+    scale = f"변형 문제 약 {question_count}개, " if question_count else ""
+    return f"[이전 턴 {turn_number}] 입력: {preview} → {scale}결과 {len(output)}자 (세션 기록에 보관, 생략됨)"
+
+
+def _request_chars(contents: List[types.Content]) -> int:
+    return sum(len(_content_text(content)) + len(_function_result_text(content)) for content in contents)
+
+
+def compact_history(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    모델 호출 전에 이전 턴들을 요약으로 바꿔 요청 크기를 일정하게 유지합니다.
+
+    현재 턴(마지막 사용자 입력 이후의 master_agent 호출/응답 포함)은 그대로 두고,
+    그 이전 턴들은 하나의 사용자/모델 요약 쌍으로 대체합니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트
+        llm_request: 모델로 전달될 요청 (contents를 직접 수정)
+
+    Returns:
+        Optional[LlmResponse]: 항상 None (모델 호출은 그대로 진행)
+    """
+    if not HISTORY_COMPACTION_ENABLED:
+        return None
+
+    turns = split_turns(llm_request.contents or [])
+    if len(turns) < 2:
+        return None
+
+    previous_turns = turns[:-1]
+    first_number = max(1, len(previous_turns) - MAX_SUMMARIZED_TURNS + 1)
+    summaries = [
+        summarize_turn(turn, number)
+        for number, turn in enumerate(previous_turns, start=1)
+        if number >= first_number
+    ]
+    if first_number > 1:
+        summaries.insert(0, f"[이전 턴 1~{first_number - 1}] 요약 생략")
+
+    before_chars = _request_chars(llm_request.contents)
+    llm_request.contents = [
+        types.Content(role="user", parts=[types.Part(text="이전 대화 요약:\n" + "\n".join(summaries))]),
+        types.Content(role="model", parts=[types.Part(text="이전 대화 내용을 확인했습니다. 새 입력을 기다립니다.")]),
+    ] + turns[-1]
+
+    logger.info(
+        f"🗜️ 대화 기록 압축 [{callback_context.agent_name}] 이전 턴 {len(previous_turns)}개: "
+        f"{before_chars}자 → {_request_chars(llm_request.contents)}자"
+    )
+    return None
@@ -1,8 +1,11 @@
-agent_emotion_atmosphere_guesser_instruction = """## 에이전트 Instruction: 심경 분위기 파악 문제 생성
+# 8개 변형 문제 생성 에이전트가 공유하는 시스템 지침
+# 유형별 지침(아래 agent_*_instruction)은 모델 호출 직전에 지문 뒤에 덧붙이므로,
+# 병렬로 호출되는 8개 요청은 "공통 지침 + 지문"까지 완전히 같은 앞부분을 가집니다.
+variant_agent_shared_instruction = """## 에이전트 Instruction: 수능 변형 문제 생성
 
-### **목표**
+### **역할**
 
-**제공된 수능 기출 지문**을 기반으로, 지문 내 인물의 감정 변화나 글의 전반적인 분위기를 묻는 변형 문제를 생성합니다.
+**제공된 수능 기출 지문**을 기반으로 한 가지 유형의 변형 문제를 생성합니다. 생성할 문제 유형과 유형별 세부 지침은 사용자 메시지의 지문 **뒤에** `## 유형별 Instruction`으로 주어집니다.
 
 ### **기본 원칙**
 
@@ -14,6 +17,24 @@ agent_emotion_atmosphere_guesser_instruction = """## 에이전트 Instruction: 
 4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
 5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
 
+### **결과 제공 형식 **
+유형별 Instruction에 전용 형식이 없으면 **반드시** 다음의 형식으로 결과를 제공
+```json
+{
+    "question": "[생성된 문제]",
+    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
+    "answer": "[정답번호]",
+    "explanation": "[해설]"
+}
+```
+"""
+
+agent_emotion_atmosphere_guesser_instruction = """## 유형별 Instruction: 심경 분위기 파악 문제 생성
+
+### **목표**
+
+**제공된 수능 기출 지문**을 기반으로, 지문 내 인물의 감정 변화나 글의 전반적인 분위기를 묻는 변형 문제를 생성합니다.
+
 ### **문제 유형별 세부 지침**
 
 #### **1. 심경‧분위기 파악**
@@ -31,35 +52,14 @@ agent_emotion_atmosphere_guesser_instruction = """## 에이전트 Instruction: 
     * 오답 선택지가 왜 적절하지 않은지, 어떤 점에서 오독을 유발할 수 있는지 간략하게 설명합니다.
 2.  **정답 (Answer):**
     * 해당 문제의 정답을 명확하게 명시합니다. (예: `정답: ① 불안 → 안도`)
-
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
-```json
-{
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
-}
-```
 """
 
-agent_implied_meaning_finder_instruction = """## 에이전트 Instruction: 밑줄 친 표현의 맥락적 의미 파악 문제 생성
+agent_implied_meaning_finder_instruction = """## 유형별 Instruction: 밑줄 친 표현의 맥락적 의미 파악 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 밑줄 친 표현이 지문 내에서 의미하는 바를 묻는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **2. 밑줄 친 표현의 맥락적 의미 파악**
@@ -77,35 +77,14 @@ agent_implied_meaning_finder_instruction = """## 에이전트 Instruction: 밑
     * 오답 선택지가 왜 밑줄 친 표현의 맥락적 의미와 맞지 않는지 설명합니다.
 2.  **정답 (Answer):**
     * 해당 문제의 정답을 명확하게 명시합니다. (예: `정답: ③`)
-
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
-```json
-{
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
-}
-```
 """
 
-agent_blank_inference_phrase_instruction = """## 에이전트 Instruction: 빈칸 추론 (구문) 문제 생성
+agent_blank_inference_phrase_instruction = """## 유형별 Instruction: 빈칸 추론 (구문) 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 핵심 구문을 삭제하고 빈칸에 들어갈 가장 적절한 구문을 추론하는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **3. 빈칸 추론 (구문)**
@@ -123,35 +102,14 @@ agent_blank_inference_phrase_instruction = """## 에이전트 Instruction: 빈
     * 오답 선택지가 왜 적절하지 않은지, 어떤 점에서 오류가 있는지 설명합니다.
 2.  **정답 (Answer):**
     * 해당 문제의 정답을 명확하게 명시합니다. (예: `정답: ②`)
-
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
-```json
-{
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
-}
-```
 """
 
-agent_unsuitable_sentence_finder_instruction = """## 에이전트 Instruction: 글 흐름에 부적절한 문장 찾기 문제 생성
+agent_unsuitable_sentence_finder_instruction = """## 유형별 Instruction: 글 흐름에 부적절한 문장 찾기 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 글의 흐름에 부적절한 문장을 찾아내는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **4. 글 흐름에 부적절한 문장 찾기**
@@ -168,35 +126,14 @@ agent_unsuitable_sentence_finder_instruction = """## 에이전트 Instruction: 
     * 나머지 문장들이 왜 적절한지 간략하게 언급합니다.
 2.  **정답 (Answer):**
     * 해당 문제의 정답(부적절한 문장의 번호)을 명확하게 명시합니다. (예: `정답: ④`)
-
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
-```json
-{
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
-}
-```
 """
 
-agent_paragraph_order_sorter_instruction = """## 에이전트 Instruction: 글 순서 맞추기 문제 생성
+agent_paragraph_order_sorter_instruction = """## 유형별 Instruction: 글 순서 맞추기 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 흩어진 단락들을 올바른 순서로 배열하는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **5. 글 순서 맞추기**
@@ -204,45 +141,37 @@ agent_paragraph_order_sorter_instruction = """## 에이전트 Instruction: 글 
 * **Prompt:** `Keep the first sentence in the following passage and shuffle paragraphs (A), (B), (C). (Revise... to be equal. (필요 시))`
 * **생성 지침:**
     1.  **제공된 지문의 첫 문장을 제시문으로 고정하고**, 이어지는 내용을 논리적 완결성을 가진 세 개의 단락으로 나누어 각각 `(A), (B), (C)`로 지정합니다.
-    2.  지시사, 연결사, 내용의 흐름을 단서로 하여 논리적 순서를 유추할 수 있도록 단락을 구성한 후, 순서를 섞어서 제시합니다.
-    3.  (필요시) 각 단락의 길이가 비슷하도록 조절하여 길이로 순서를 유추할 수 없게 합니다.
+    2.  지시사, 연결사, 내용의 흐름을 단서로 하여 논리적 순서를 유추할 수 있도록 단락을 나눕니다.
+    3.  (필요시) 각 단락의 길이가 비슷하도록 나누어 길이로 순서를 유추할 수 없게 합니다.
+    4.  **단락 라벨 지정, 순서 섞기, 선택지 번호와 정답 번호는 시스템이 자동으로 만듭니다.** 지문 전체나 선택지를 다시 쓰지 말고, 아래 형식의 분할 정보와 해설만 제공합니다.
 
 ### **해설 및 정답 구성 지침**
 
 1.  **해설 (Explanation):**
     * 제시문 다음으로 이어질 단락을 먼저 설명하고, 그 단락 다음에 이어질 단락을 논리적 연결사(지시사, 연결어구, 내용의 인과 관계 등)를 근거로 상세하게 설명합니다.
     * 각 단락 간의 유기적인 연결 관계를 명확히 제시합니다.
+    * 단락은 원래 순서대로 `[S1]`, `[S2]`, `[S3]`으로 가리킵니다. (시스템이 (A)/(B)/(C) 라벨로 바꿉니다.)
 2.  **정답 (Answer):**
-    * 해당 문제의 정답(올바른 단락의 순서)을 명확하게 명시합니다. (예: `정답: (B)-(A)-(C)`)
+    * 정답은 시스템이 자동으로 추가하므로 해설에 따로 쓰지 않습니다.
 
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
+### **결과 제공 형식 (이 유형 전용)**
+**반드시** 공통 결과 제공 형식 대신 다음의 형식으로 결과를 제공 (인용 어구는 지문에서 **한 글자도 바꾸지 않고 그대로** 가져옵니다)
 ```json
 {
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
+    "passage_start": "[지문의 첫 5~8단어]",
+    "passage_end": "[지문의 마지막 5~8단어]",
+    "segment_starts": ["[두 번째 단락의 첫 5~8단어]", "[세 번째 단락의 첫 5~8단어]"],
+    "explanation": "[해설 ([S1], [S2], [S3] 사용)]"
 }
 ```
 """
 
-agent_sentence_insertion_locator_instruction = """## 에이전트 Instruction: 글 흐름에 맞게 문장 끼워넣기 문제 생성
+agent_sentence_insertion_locator_instruction = """## 유형별 Instruction: 글 흐름에 맞게 문장 끼워넣기 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 주어진 문장이 들어가기에 가장 적절한 위치를 찾는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **6. 글 흐름에 맞게 문장 끼워넣기**
@@ -250,7 +179,7 @@ agent_sentence_insertion_locator_instruction = """## 에이전트 Instruction: 
 * **Prompt:** `Paragraph (A) is taken from one of ( 1 ) ... ( 5 )... extract one paragraph like (A) at the top... make 5 ( )s as options.`
 * **생성 지침:**
     1.  **제공된 지문 내에서** 앞뒤 문맥과 긴밀하게 연결되는 핵심 문장(또는 짧은 문단)을 하나 **선정하여** 지문 밖으로 빼내어 `[주어진 문장]`으로 제시합니다. (지문 내용을 변경하지 않습니다.)
-    2.  원래 문장이 있던 자리를 포함하여, 논리적으로 문장이 들어갈 수 있는 후보 위치 다섯 곳에 `( 1 ), ( 2 ), ( 3 ), ( 4 ), ( 5 )` 번호를 표시합니다.
+    2.  원래 문장이 있던 자리를 포함한 후보 위치 다섯 곳의 `( 1 ), ( 2 ), ( 3 ), ( 4 ), ( 5 )` 표시와 선택지, 정답 번호는 **시스템이 자동으로 만듭니다.** 지문 전체나 선택지를 다시 쓰지 말고, 아래 형식의 분할 정보와 해설만 제공합니다.
 
 ### **해설 및 정답 구성 지침**
 
@@ -258,37 +187,28 @@ agent_sentence_insertion_locator_instruction = """## 에이전트 Instruction: 
     * 주어진 문장이 어느 위치에 들어가야 가장 자연스럽고 논리적인 흐름을 형성하는지 상세하게 설명합니다.
     * 정답 위치를 지문 내 다른 단서(지시어, 대명사, 내용의 연결성 등)와 연결하여 명확히 설명합니다.
     * 오답 위치가 왜 적절하지 않은지 간략하게 설명합니다.
+    * 정답 위치는 `<정답>`으로 가리킵니다. (시스템이 실제 위치 번호로 바꿉니다.)
 2.  **정답 (Answer):**
-    * 해당 문제의 정답(주어진 문장이 들어가기에 가장 적절한 위치 번호)을 명확하게 명시합니다. (예: `정답: ⑤`)
+    * 정답은 시스템이 자동으로 추가하므로 해설에 따로 쓰지 않습니다.
 
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
+### **결과 제공 형식 (이 유형 전용)**
+**반드시** 공통 결과 제공 형식 대신 다음의 형식으로 결과를 제공 (인용 어구와 문장은 지문에서 **한 글자도 바꾸지 않고 그대로** 가져옵니다)
 ```json
 {
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
+    "passage_start": "[지문의 첫 5~8단어]",
+    "passage_end": "[지문의 마지막 5~8단어]",
+    "given_sentence": "[지문에서 빼낼 문장 전체]",
+    "explanation": "[해설 (<정답> 사용)]"
 }
 ```
 """
 
-agent_grammar_vocabulary_error_spotter_instruction = """## 에이전트 Instruction: 어법 어휘 상 틀린 표현 찾기 문제 생성
+agent_grammar_vocabulary_error_spotter_instruction = """## 유형별 Instruction: 어법 어휘 상 틀린 표현 찾기 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 문법적 오류나 문맥상 부적절한 어휘를 찾아내는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **7. 어법·어휘 상 틀린 표현 찾기**
@@ -305,35 +225,14 @@ agent_grammar_vocabulary_error_spotter_instruction = """## 에이전트 Instruct
     * 나머지 표현들이 왜 적절한지 간략하게 언급합니다.
 2.  **정답 (Answer):**
     * 해당 문제의 정답(어법상/어휘상 틀린 표현의 번호)을 명확하게 명시합니다. (예: `정답: ①`)
-
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
-```json
-{
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
-}
-```
 """
 
-agent_summary_blank_inference_word_instruction = """## 에이전트 Instruction: 지문 요약에서의 빈칸 추론 (단어) 문제 생성
+agent_summary_blank_inference_word_instruction = """## 유형별 Instruction: 지문 요약에서의 빈칸 추론 (단어) 문제 생성
 
 ### **목표**
 
 **제공된 수능 기출 지문**을 기반으로, 지문 요약문의 빈칸에 들어갈 핵심 단어를 추론하는 변형 문제를 생성합니다.
 
-### **기본 원칙**
-
-1.  **지문 유지 및 분석:** 제공된 수능 기출 지문 **그대로 유지하며**, 해당 지문의 주제, 요지, 세부 내용, 문체, 난이도, 길이를 면밀히 분석합니다.
-2.  **유형 지시문 엄수:** 각 문제 유형별로 제시된 영어 지시문(Prompt)의 요구사항을 제공된 지문에 정확하게 적용합니다.
-3.  **매력적인 선택지 구성:**
-    * **정답:** 문제의 의도에 완벽하게 부합하는 명확한 정답을 하나만 만듭니다.
-    * **오답:** 정답처럼 보이지만 미묘한 오류가 있거나, 지문의 일부 내용만으로 판단하면 정답으로 착각할 수 있는 매력적인 오답 4개를 구성합니다. "모두 정답/오답"과 같은 선택지는 피합니다.
-4.  **한국어 생성:** 모든 결과물(지문, 문제, 선택지, 해설, 정답)은 자연스러운 한국어로 생성합니다.
-5.  **형식 준수:** LaTeX 형식을 사용하지 않으며, 일반 텍스트와 마크다운 형식만을 사용합니다.
-
 ### **문제 유형별 세부 지침**
 
 #### **8. 지문 요약에서의 빈칸 추론 (단어)**
@@ -351,17 +250,6 @@ agent_summary_blank_inference_word_instruction = """## 에이전트 Instruction:
     * 오답 선택지의 단어들이 왜 적절하지 않은지, 어떤 점에서 지문의 내용과 벗어나는지 설명합니다.
 2.  **정답 (Answer):**
     * 해당 문제의 정답(올바른 단어 쌍의 번호)을 명확하게 명시합니다. (예: `정답: ③ (단절 – 적응)`)
-
-### **결과 제공 형식 **
-**반드시** 다음의의 형식으로 결과를 제공
-```json
-{
-    "question": "[생성된 문제]",
-    "choices": ["1.[선택지1]", "2.[선택지2]", "3.[선택지3]", "4.[선택지4]", "5.[선택지5]"],
-    "answer": "[정답번호]",
-    "explanation": "[해설]"
-}
-```
 """
 
 sat_problem_variant_generator_master_agent_instruction = """
@@ -0,0 +1,345 @@
+"""
+글 순서 / 문장 끼워넣기 문제의 로컬 조합 생성
+
+paragraph_order_agent와 sentence_insertion_agent는 모델이 지문의 분할 정보
+(단락 시작 위치, 빼낼 문장)만 JSON으로 돌려주고, (A)/(B)/(C) 배열 선택지,
+( 1 )~( 5 ) 삽입 위치 표시, 선택지 번호와 정답 번호는 Python에서 만듭니다.
+after_model_callback으로 모델 응답을 기존 결과 형식(question/choices/answer/explanation)
+JSON으로 바꿔 master_agent에 전달합니다. 분할 정보로 문제를 만들 수 없으면 분할 정보 JSON이
+결과로 남지 않도록 오류 응답(SEGMENTATION_FAILED)으로 바꿉니다.
+"""
+
+import re
+import json
+import random
+import logging
+from itertools import permutations
+from typing import Dict, Any, List, Optional, Tuple
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+PARAGRAPH_LABELS = ["(A)", "(B)", "(C)"]
+INSERTION_MARKS = ["( 1 )", "( 2 )", "( 3 )", "( 4 )", "( 5 )"]
+CIRCLED_NUMBERS = ["①", "②", "③", "④", "⑤"]
+
+# 문장 경계: 마침표/물음표/느낌표(닫는 따옴표 포함) 뒤의 공백
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+|(?<=[.!?][\"'”’)])\s+")
+JSON_BLOCK_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+# 해설에서 단락/정답 위치를 가리키는 자리표시자
+SEGMENT_PLACEHOLDER_PATTERN = re.compile(r"\[S([123])\]")
+ANSWER_PLACEHOLDER = "<정답>"
+
+# 분할 정보로 문제를 만들지 못했을 때의 응답 오류 코드
+SEGMENTATION_ERROR_CODE = "SEGMENTATION_FAILED"
+
+PARAGRAPH_ORDER_QUESTION = "주어진 글 다음에 이어질 글의 순서로 가장 적절한 것은?"
+SENTENCE_INSERTION_QUESTION = "글의 흐름으로 보아, 주어진 문장이 들어가기에 가장 적절한 곳은?"
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def _parse_model_json(text: str) -> Optional[Dict[str, Any]]:
+    """모델 응답 텍스트(```json 코드 블록 포함 가능)에서 JSON 객체를 꺼냅니다."""
+    match = JSON_BLOCK_PATTERN.search(text or "")
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _response_text(llm_response: LlmResponse) -> str:
+    if not llm_response.content or not llm_response.content.parts:
+        return ""
+    return "".join(part.text for part in llm_response.content.parts if part.text)
+
+
+def _user_text(callback_context: CallbackContext) -> str:
+    content = callback_context.user_content
+    if not content or not content.parts:
+        return ""
+    return "\n".join(part.text for part in content.parts if part.text)
+
+
+def locate_passage(source: str, passage_start: str, passage_end: str) -> str:
+    """
+    입력 텍스트에서 모델이 인용한 첫/끝 어구를 기준으로 지문 영역을 잘라냅니다.
+
+    Args:
+        source (str): 에이전트 입력 텍스트
+        passage_start (str): 지문 첫 어구 (그대로 인용)
+        passage_end (str): 지문 마지막 어구 (그대로 인용)
+
+    Returns:
+        str: 공백이 정규화된 지문 텍스트 (어구를 찾지 못하면 빈 문자열)
+    """
+    text = _normalize(source)
+    start_quote = _normalize(passage_start)
+    end_quote = _normalize(passage_end)
+    start = text.find(start_quote) if start_quote else -1
+    end = text.rfind(end_quote) if end_quote else -1
+    if start < 0 or end < start:
+        return ""
+    return text[start:end + len(end_quote)]
+
+
+def split_sentences(text: str) -> List[str]:
+    """지문을 문장 단위로 나눕니다."""
+    return [sentence for sentence in SENTENCE_BOUNDARY_PATTERN.split(text) if sentence.strip()]
+
+
+def build_paragraph_order(
+    passage: str, segment_starts: List[str], rng: random.Random
+) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    지문과 단락 시작 어구로 글 순서 맞추기 문제를 만듭니다.
+
+    첫 문장은 주어진 글로 고정하고, 나머지를 세 단락으로 나눈 뒤
+    올바른 순서가 (A)-(B)-(C)가 되지 않도록 라벨을 섞습니다. 선택지는
+    (A)-(B)-(C)를 제외한 다섯 가지 배열을 사전순으로 제시합니다.
+
+    Args:
+        passage (str): 지문 텍스트
+        segment_starts (List[str]): 두 번째, 세 번째 단락의 첫 어구
+        rng (random.Random): 라벨 섞기에 사용할 난수 생성기
+
+    Returns:
+        Tuple[Dict[str, Any], Dict[str, str]]: (question/choices/answer 결과, 자리표시자 → 라벨)
+
+    Raises:
+        ValueError: 단락을 나눌 수 없는 경우
+    """
+    sentences = split_sentences(passage)
+    if len(sentences) < 4 or len(segment_starts) != 2:
+        raise ValueError("단락을 나누기에 문장 수 또는 단락 시작 어구가 부족합니다")
+    intro = sentences[0]
+    rest = passage[passage.find(intro) + len(intro):].strip()
+
+    cuts = []
+    search_from = 1
+    for quote in segment_starts:
+        index = rest.find(_normalize(quote), search_from)
+        if index < 0:
+            raise ValueError(f"단락 시작 어구를 지문에서 찾을 수 없습니다: {quote}")
+        cuts.append(index)
+        search_from = index + 1
+    segments = [rest[:cuts[0]].strip(), rest[cuts[0]:cuts[1]].strip(), rest[cuts[1]:].strip()]
+    if not all(segments):
+        raise ValueError("비어 있는 단락이 있습니다")
+
+    # segments[i]에 붙일 라벨 (올바른 순서가 (A)-(B)-(C)가 되지 않도록)
+    labels = list(PARAGRAPH_LABELS)
+    while labels == PARAGRAPH_LABELS:
+        rng.shuffle(labels)
+
+    correct = "-".join(labels)
+    options = ["-".join(order) for order in permutations(PARAGRAPH_LABELS)][1:]
+    labeled = sorted(zip(labels, segments))
+    question = "\n\n".join(
+        [PARAGRAPH_ORDER_QUESTION, intro] + [f"{label} {segment}" for label, segment in labeled]
+    )
+    answer_index = options.index(correct) + 1
+    result = {
+        "question": question,
+        "choices": [f"{number}.{option}" for number, option in enumerate(options, start=1)],
+        "answer": str(answer_index),
+        "answer_text": f"{CIRCLED_NUMBERS[answer_index - 1]} {correct}",
+    }
+    placeholders = {str(number): label for number, label in enumerate(labels, start=1)}
+    return result, placeholders
+
+
+def build_sentence_insertion(
+    passage: str, given_sentence: str, rng: random.Random
+) -> Dict[str, Any]:
+    """
+    지문과 빼낼 문장으로 문장 끼워넣기 문제를 만듭니다.
+
+    빼낸 문장이 있던 자리를 포함하는 연속된 다섯 문장 경계에 ( 1 )~( 5 )를
+    표시합니다. 가능하면 첫 문장 앞은 후보에서 제외합니다.
+
+    Args:
+        passage (str): 지문 텍스트
+        given_sentence (str): 지문에서 빼낼 문장 (그대로 인용)
+        rng (random.Random): 후보 위치 선택에 사용할 난수 생성기
+
+    Returns:
+        Dict[str, Any]: question/choices/answer 결과
+
+    Raises:
+        ValueError: 문장을 찾을 수 없거나 후보 위치가 부족한 경우
+    """
+    given = _normalize(given_sentence)
+    index = passage.find(given) if given else -1
+    if index < 0:
+        raise ValueError("주어진 문장을 지문에서 찾을 수 없습니다")
+    before = split_sentences(passage[:index].strip())
+    after = split_sentences(passage[index + len(given):].strip())
+    sentences = before + after
+    true_gap = len(before)  # gap k: sentences[k] 앞 (len(sentences)이면 글의 끝)
+
+    gaps = list(range(1, len(sentences) + 1))
+    if true_gap == 0 or len(gaps) < len(INSERTION_MARKS):
+        gaps = list(range(0, len(sentences) + 1))
+    if len(gaps) < len(INSERTION_MARKS):
+        raise ValueError("삽입 위치 후보가 다섯 곳보다 적습니다")
+
+    first_options = [
+        start for start in range(len(gaps) - len(INSERTION_MARKS) + 1)
+        if gaps[start] <= true_gap <= gaps[start + len(INSERTION_MARKS) - 1]
+    ]
+    start = rng.choice(first_options)
+    candidate_gaps = gaps[start:start + len(INSERTION_MARKS)]
+
+    pieces = []
+    for position in range(len(sentences) + 1):
+        if position in candidate_gaps:
+            pieces.append(INSERTION_MARKS[candidate_gaps.index(position)])
+        if position < len(sentences):
+            pieces.append(sentences[position])
+    answer_index = candidate_gaps.index(true_gap) + 1
+
+    question = "\n\n".join([SENTENCE_INSERTION_QUESTION, f"[주어진 문장]\n{given}", " ".join(pieces)])
+    return {
+        "question": question,
+        "choices": [f"{number}.{mark}" for number, mark in enumerate(INSERTION_MARKS, start=1)],
+        "answer": str(answer_index),
+        "answer_text": CIRCLED_NUMBERS[answer_index - 1],
+    }
+
+
+def _replace_response(llm_response: LlmResponse, result: Dict[str, Any]) -> LlmResponse:
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[types.Part(text=json.dumps(result, ensure_ascii=False, indent=4))],
+        ),
+        usage_metadata=llm_response.usage_metadata,
+    )
+
+
+def _error_response(llm_response: LlmResponse, message: str) -> LlmResponse:
+    """분할 정보 대신 오류를 돌려주는 응답 (내용이 없으므로 유형 결과로 저장되지 않음)"""
+    return LlmResponse(
+        error_code=SEGMENTATION_ERROR_CODE,
+        error_message=message,
+        usage_metadata=llm_response.usage_metadata,
+    )
+
+
+def _finalize(result: Dict[str, Any], explanation: str) -> Dict[str, Any]:
+    answer_text = result.pop("answer_text")
+    result["explanation"] = f"{explanation.strip()}\n\n정답: {answer_text}".strip()
+    return result
+
+
+def complete_paragraph_order(source: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    paragraph_order_agent의 분할 정보로 완성된 문제 결과를 만듭니다.
+
+    Args:
+        source (str): 지문이 포함된 에이전트 입력 텍스트
+        data (Dict[str, Any]): 모델이 돌려준 분할 정보 JSON
+
+    Returns:
+        Dict[str, Any]: question/choices/answer/explanation 결과
+
+    Raises:
+        ValueError: 분할 정보로 문제를 만들 수 없는 경우
+    """
+    passage = locate_passage(source, data.get("passage_start", ""), data.get("passage_end", ""))
+    result, placeholders = build_paragraph_order(passage, data.get("segment_starts") or [], random.Random())
+    explanation = SEGMENT_PLACEHOLDER_PATTERN.sub(
+        lambda match: placeholders[match.group(1)], data.get("explanation", "")
+    )
+    return _finalize(result, explanation)
+
+
+def complete_sentence_insertion(source: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    sentence_insertion_agent의 분할 정보로 완성된 문제 결과를 만듭니다.
+
+    Args:
+        source (str): 지문이 포함된 에이전트 입력 텍스트
+        data (Dict[str, Any]): 모델이 돌려준 분할 정보 JSON
+
+    Returns:
+        Dict[str, Any]: question/choices/answer/explanation 결과
+
+    Raises:
+        ValueError: 분할 정보로 문제를 만들 수 없는 경우
+    """
+    passage = locate_passage(source, data.get("passage_start", ""), data.get("passage_end", ""))
+    result = build_sentence_insertion(passage, data.get("given_sentence", ""), random.Random())
+    explanation = data.get("explanation", "").replace(ANSWER_PLACEHOLDER, INSERTION_MARKS[int(result["answer"]) - 1])
+    return _finalize(result, explanation)
+
+
+# 분할 정보만 돌려주는 에이전트 이름 → 로컬 완성 함수
+SEGMENTATION_COMPLETERS = {
+    "paragraph_order_agent": complete_paragraph_order,
+    "sentence_insertion_agent": complete_sentence_insertion,
+}
+
+
+def build_paragraph_order_response(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """
+    paragraph_order_agent의 분할 정보 응답을 완성된 문제 JSON으로 바꿉니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트 (user_content에 지문 포함)
+        llm_response: 모델 응답
+
+    Returns:
+        Optional[LlmResponse]: 완성된 문제 응답 (만들 수 없으면 오류 응답, 부분 응답이면 None)
+    """
+    if llm_response.partial:
+        return None
+    data = _parse_model_json(_response_text(llm_response))
+    try:
+        if not data or "segment_starts" not in data:
+            raise ValueError("모델 응답에 분할 정보(segment_starts)가 없습니다")
+        result = complete_paragraph_order(_user_text(callback_context), data)
+    except ValueError as e:
+        logger.warning(f"⚠️ 글 순서 선택지 로컬 생성 실패: {e}")
+        return _error_response(llm_response, f"글 순서 선택지를 만들지 못했습니다: {e}")
+    logger.info(f"🔀 글 순서 선택지 로컬 생성 완료 (정답 {result['answer']}번)")
+    return _replace_response(llm_response, result)
+
+
+def build_sentence_insertion_response(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """
+    sentence_insertion_agent의 분할 정보 응답을 완성된 문제 JSON으로 바꿉니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트 (user_content에 지문 포함)
+        llm_response: 모델 응답
+
+    Returns:
+        Optional[LlmResponse]: 완성된 문제 응답 (만들 수 없으면 오류 응답, 부분 응답이면 None)
+    """
+    if llm_response.partial:
+        return None
+    data = _parse_model_json(_response_text(llm_response))
+    try:
+        if not data or "given_sentence" not in data:
+            raise ValueError("모델 응답에 분할 정보(given_sentence)가 없습니다")
+        result = complete_sentence_insertion(_user_text(callback_context), data)
+    except ValueError as e:
+        logger.warning(f"⚠️ 문장 삽입 위치 로컬 생성 실패: {e}")
+        return _error_response(llm_response, f"문장 삽입 위치를 만들지 못했습니다: {e}")
+    logger.info(f"🔀 문장 삽입 위치 로컬 생성 완료 (정답 {result['answer']}번)")
+    return _replace_response(llm_response, result)
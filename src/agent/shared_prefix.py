@@ -0,0 +1,58 @@
+"""
+공통 접두 지침 + 유형별 지침 조립
+
+8개 변형 문제 생성 에이전트는 모두 같은 시스템 지침(variant_agent_shared_instruction)을
+사용하고, 유형별 지침은 모델 호출 직전에 사용자 메시지(지문) 뒤에 덧붙입니다.
+병렬 호출되는 8개 요청의 앞부분("공통 지침 + 지문")이 바이트 단위로 같아지므로
+모델 측 프롬프트(접두) 캐시가 첫 요청 이후의 요청에서 재사용됩니다.
+"""
+
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+from agent.instruction import variant_agent_shared_instruction
+
+
+def compile_variant_instruction(type_instruction: str) -> str:
+    """
+    공통 지침과 유형별 지침을 하나의 지침 문자열로 합칩니다 (단일 호출용).
+
+    Args:
+        type_instruction (str): 유형별 지침
+
+    Returns:
+        str: 공통 지침 + 유형별 지침
+    """
+    return f"{variant_agent_shared_instruction.rstrip()}\n\n{type_instruction.strip()}\n"
+
+
+def append_type_instruction(
+    type_instruction: str,
+) -> Callable[[CallbackContext, LlmRequest], Optional[LlmResponse]]:
+    """
+    유형별 지침을 요청의 마지막(지문 뒤)에 덧붙이는 before_model_callback을 만듭니다.
+
+    Args:
+        type_instruction (str): 유형별 지침
+
+    Returns:
+        Callable: ADK before_model_callback
+    """
+    def callback(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        suffix = type_instruction
+        # ADK가 시스템 지침 뒤에 붙이는 에이전트 정보(이름, 설명)도 지문 뒤로 옮겨 앞부분을 같게 유지
+        system_instruction = llm_request.config.system_instruction
+        if isinstance(system_instruction, str) and system_instruction.startswith(variant_agent_shared_instruction):
+            agent_specific = system_instruction[len(variant_agent_shared_instruction):].strip()
+            llm_request.config.system_instruction = variant_agent_shared_instruction
+            if agent_specific:
+                suffix = f"{agent_specific}\n\n{type_instruction}"
+        llm_request.contents = list(llm_request.contents or []) + [
+            types.Content(role="user", parts=[types.Part(text=suffix)])
+        ]
+        return None
+
+    return callback
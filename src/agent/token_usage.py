@@ -0,0 +1,150 @@
+"""
+요청별 토큰 사용량 집계
+
+모든 LlmAgent의 after_model_callback에서 usage_metadata(입력/캐시/출력 토큰)를 읽어
+요청 단위로 누적합니다. 요청 키는 서버 run이 자기 작업 컨텍스트에 설정한 run_id
+(같은 작업에서 실행되는 AgentTool 하위 에이전트 호출까지 전달됨)이고, 없으면 invocation_id를 사용합니다.
+같은 세션에서 여러 run이 동시에 실행되어도 서로의 집계에 섞이지 않습니다.
+run 없이 /run_sse 등으로 바로 실행한 요청은 루트 에이전트의 콜백이 루트 invocation_id를
+요청 키로 설정하고, 루트 에이전트가 끝날 때 집계를 꺼내 요청 합계를 기록합니다.
+"""
+
+import logging
+import threading
+import contextvars
+from typing import Dict, Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+
+logger = logging.getLogger(__name__)
+
+# 현재 작업(asyncio task)에서 실행 중인 run id (RunManager가 run마다 설정)
+current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("problem_forge_run_id", default=None)
+
+# 캐시된 입력 토큰의 과금 할인율 (캐시 토큰은 일반 입력 토큰의 25% 가격)
+CACHED_TOKEN_DISCOUNT = 0.75
+
+# 오래된 요청 집계가 쌓이지 않도록 보관할 최대 요청 수
+MAX_TRACKED_REQUESTS = 500
+
+_usage_lock = threading.Lock()
+_usage_by_request: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+
+def _request_key(callback_context: CallbackContext) -> str:
+    return current_run_id.get() or callback_context.invocation_id
+
+
+def record_token_usage(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """
+    모델 응답의 토큰 사용량을 요청/에이전트별로 누적합니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트
+        llm_response: 모델 응답
+
+    Returns:
+        Optional[LlmResponse]: 항상 None (응답은 그대로 사용)
+    """
+    usage = llm_response.usage_metadata
+    if usage is None or llm_response.partial:
+        return None
+
+    prompt_tokens = usage.prompt_token_count or 0
+    cached_tokens = usage.cached_content_token_count or 0
+    output_tokens = usage.candidates_token_count or 0
+    key = _request_key(callback_context)
+
+    with _usage_lock:
+        if key not in _usage_by_request and len(_usage_by_request) >= MAX_TRACKED_REQUESTS:
+            _usage_by_request.pop(next(iter(_usage_by_request)))
+        agent_usage = _usage_by_request.setdefault(key, {}).setdefault(
+            callback_context.agent_name,
+            {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0},
+        )
+        agent_usage["calls"] += 1
+        agent_usage["prompt_tokens"] += prompt_tokens
+        agent_usage["cached_tokens"] += cached_tokens
+        agent_usage["output_tokens"] += output_tokens
+
+    logger.info(
+        f"📊 토큰 사용 [{callback_context.agent_name}] 입력 {prompt_tokens} "
+        f"(캐시 {cached_tokens}) / 출력 {output_tokens}"
+    )
+    return None
+
+
+def summarize_token_usage(agents: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    """
+    에이전트별 사용량에 합계와 캐시 절감량을 붙여 반환합니다.
+
+    Args:
+        agents (Dict[str, Dict[str, int]]): 에이전트 이름 → 사용량
+
+    Returns:
+        Dict[str, Any]: agents, total(calls/prompt/cached/output 토큰, 캐시 비율, 절감 토큰 환산)
+    """
+    total = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0}
+    for usage in agents.values():
+        for field in total:
+            total[field] += usage[field]
+    total["cache_ratio"] = round(total["cached_tokens"] / total["prompt_tokens"], 3) if total["prompt_tokens"] else 0.0
+    total["saved_prompt_tokens"] = int(total["cached_tokens"] * CACHED_TOKEN_DISCOUNT)
+    return {"agents": agents, "total": total}
+
+
+def bind_request_token_usage(callback_context: CallbackContext) -> None:
+    """
+    run 없이 실행된 요청이면 루트 invocation_id를 요청 키로 설정합니다 (루트 에이전트 before_agent_callback).
+
+    AgentTool 하위 에이전트는 별도 invocation_id로 실행되므로, 요청 키를 작업 컨텍스트에 두어
+    하위 에이전트 호출까지 같은 요청으로 집계합니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트
+    """
+    if current_run_id.get() is None:
+        current_run_id.set(callback_context.invocation_id)
+    return None
+
+
+def report_request_token_usage(callback_context: CallbackContext) -> None:
+    """
+    bind_request_token_usage로 시작한 요청의 집계를 꺼내 합계를 기록합니다 (루트 에이전트 after_agent_callback).
+
+    서버 run은 RunManager가 끝날 때 직접 꺼내므로 여기서는 건드리지 않습니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트
+    """
+    if current_run_id.get() == callback_context.invocation_id:
+        pop_token_usage(callback_context.invocation_id)
+        current_run_id.set(None)
+    return None
+
+
+def pop_token_usage(request_key: str) -> Optional[Dict[str, Any]]:
+    """
+    요청의 토큰 사용량 집계를 꺼내고 삭제합니다.
+
+    Args:
+        request_key (str): run_id 또는 invocation_id
+
+    Returns:
+        Optional[Dict[str, Any]]: summarize_token_usage 결과 (기록이 없으면 None)
+    """
+    with _usage_lock:
+        agents = _usage_by_request.pop(request_key, None)
+    if not agents:
+        return None
+    summary = summarize_token_usage(agents)
+    total = summary["total"]
+    logger.info(
+        f"📊 요청 토큰 합계 [{request_key}] 호출 {total['calls']}회, 입력 {total['prompt_tokens']} "
+        f"(캐시 {total['cached_tokens']}, {total['cache_ratio']:.0%}) / 출력 {total['output_tokens']}, "
+        f"캐시 절감 약 {total['saved_prompt_tokens']} 토큰"
+    )
+    return summary
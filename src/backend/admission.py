@@ -0,0 +1,180 @@
+"""
+생성 요청 수락 제어 (admission control)
+
+변형 문제 생성(agent 앱)과 PDF 파싱(/pdf 앱)에 각각 동시 실행 수와 대기열 길이
+한도를 두고, 한도를 넘는 요청은 기다리게 하지 않고 바로 503 + Retry-After로 거절합니다.
+두 앱의 한도를 따로 두어 대량 PDF 파싱 요청이 단일 지문 생성 요청의 자리를 차지하지 못하게
+하고, 이미 실행 중인 요청은 동시 실행 수가 한도 안에 머물러 과부하에서도 지연 시간이 유지됩니다.
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 앱별 기본 한도 (동시 실행 수, 대기열 길이)
+AGENT_MAX_CONCURRENT = int(os.getenv("PROBLEM_FORGE_AGENT_MAX_CONCURRENT", "8"))
+AGENT_MAX_QUEUE = int(os.getenv("PROBLEM_FORGE_AGENT_MAX_QUEUE", "16"))
+PDF_MAX_CONCURRENT = int(os.getenv("PROBLEM_FORGE_PDF_MAX_CONCURRENT", "4"))
+PDF_MAX_QUEUE = int(os.getenv("PROBLEM_FORGE_PDF_MAX_QUEUE", "32"))
+
+# HTTP 요청이 대기열에서 기다릴 수 있는 최대 시간 (초, 초과 시 503)
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("PROBLEM_FORGE_ADMISSION_QUEUE_TIMEOUT", "30"))
+
+# Retry-After 추정에 쓰는 처리 시간 이동 평균 가중치와 값 범위 (초)
+SERVICE_TIME_SMOOTHING = 0.2
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 300
+
+
+class Overloaded(Exception):
+    """한도를 넘어 요청을 받을 수 없을 때 발생하는 예외"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.retry_after = controller.retry_after()
+        super().__init__(f"{controller.name} 요청이 많아 처리할 수 없습니다. {self.retry_after}초 후 다시 시도해 주세요.")
+
+
+class AdmissionController:
+    """앱 하나의 동시 실행 수와 대기열 길이 한도"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int,
+                 queue_timeout: Optional[float] = QUEUE_TIMEOUT_SECONDS, initial_service_time: float = 30.0):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.service_time = initial_service_time
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        # 이벤트 루프가 뜬 뒤 처음 사용할 때 생성
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    @property
+    def saturated(self) -> bool:
+        return self.active + self.waiting >= self.max_concurrent + self.max_queue
+
+    def retry_after(self) -> int:
+        """현재 대기열이 빠지는 데 걸릴 예상 시간(초)을 반환합니다."""
+        estimate = self.service_time * (self.waiting + 1) / self.max_concurrent
+        return int(min(MAX_RETRY_AFTER_SECONDS, max(MIN_RETRY_AFTER_SECONDS, math.ceil(estimate))))
+
+    def reserve(self) -> None:
+        """
+        대기열에 자리를 하나 예약합니다 (실행 슬롯은 acquire_reserved로 기다림).
+
+        Raises:
+            Overloaded: 실행 중 + 대기 중 요청이 한도에 도달한 경우
+        """
+        if self.saturated:
+            self.rejected += 1
+            logger.warning(f"🚦 요청 거절 [{self.name}] 실행 {self.active}/{self.max_concurrent}, "
+                           f"대기 {self.waiting}/{self.max_queue}")
+            raise Overloaded(self)
+        self.waiting += 1
+
+    async def acquire_reserved(self, timeout: Optional[float] = None) -> None:
+        """
+        예약한 대기열 자리에서 실행 슬롯이 날 때까지 기다립니다.
+
+        Args:
+            timeout (Optional[float]): 최대 대기 시간 (None이면 무제한)
+
+        Raises:
+            Overloaded: 대기 시간이 초과된 경우
+        """
+        try:
+            if timeout is None:
+                await self.semaphore.acquire()
+            else:
+                await asyncio.wait_for(self.semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning(f"🚦 대기 시간 초과로 요청 거절 [{self.name}] ({timeout:.0f}초)")
+            raise Overloaded(self)
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self, elapsed: float) -> None:
+        """실행 슬롯을 반납하고 처리 시간 평균을 갱신합니다."""
+        self.active -= 1
+        self.semaphore.release()
+        self.service_time += SERVICE_TIME_SMOOTHING * (elapsed - self.service_time)
+
+    @asynccontextmanager
+    async def admitted(self, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """reserve로 예약한 자리에서 실행 슬롯을 얻어 블록이 끝날 때까지 유지합니다."""
+        await self.acquire_reserved(timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+
+def overloaded_response_headers(error: Overloaded) -> List[Tuple[bytes, bytes]]:
+    return [
+        (b"content-type", b"application/json; charset=utf-8"),
+        (b"retry-after", str(error.retry_after).encode("ascii")),
+    ]
+
+
+class AdmissionMiddleware:
+    """
+    경로별 수락 제어 ASGI 미들웨어
+
+    응답 본문(SSE 스트림 포함) 전송이 끝날 때까지 실행 슬롯을 유지하므로
+    /run_sse 같은 스트리밍 요청도 실제 생성 시간 동안 한도에 포함됩니다.
+    """
+
+    def __init__(self, app: Any, routes: List[Tuple[Callable[[str, str], bool], AdmissionController]]):
+        self.app = app
+        self.routes = routes
+
+    def _controller(self, method: str, path: str) -> Optional[AdmissionController]:
+        for matches, controller in self.routes:
+            if matches(method, path):
+                return controller
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        controller = self._controller(scope["method"], scope["path"])
+        if controller is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            controller.reserve()
+            async with controller.admitted(controller.queue_timeout):
+                await self.app(scope, receive, send)
+        except Overloaded as e:
+            body = json.dumps({"success": False, "error": str(e), "retryAfter": e.retry_after},
+                              ensure_ascii=False).encode("utf-8")
+            await send({"type": "http.response.start", "status": 503, "headers": overloaded_response_headers(e)})
+            await send({"type": "http.response.body", "body": body})
+
+
+def post_paths(*paths: str) -> Callable[[str, str], bool]:
+    """지정한 경로의 POST 요청에 맞는 경로 판별 함수를 만듭니다."""
+    return lambda method, path: method == "POST" and path in paths
+
+
+agent_admission = AdmissionController("agent", AGENT_MAX_CONCURRENT, AGENT_MAX_QUEUE)
+pdf_admission = AdmissionController("pdf_agent", PDF_MAX_CONCURRENT, PDF_MAX_QUEUE, initial_service_time=20.0)
@@ -0,0 +1,254 @@
+"""
+메모리 진단 (관리자 전용)
+
+오래 실행한 서버의 메모리 증가 원인을 재시작 없이 찾기 위한 도구입니다.
+
+- tracemalloc 시작/중지, 스냅샷 저장, 할당 위치 상위 목록과 스냅샷 사이 증가량 비교
+- 메모리에 남아 있는 ADK 세션(앱/사용자별 세션 수와 이벤트 수), 로그 큐, 구독자 등 개수 집계
+
+tracemalloc은 켜 두는 동안 할당마다 추적 비용이 들고 스냅샷도 메모리를 차지하므로
+필요할 때만 켜고 스냅샷은 최근 MAX_SNAPSHOTS개만 보관합니다.
+관리자 토큰(PROBLEM_FORGE_ADMIN_TOKEN)을 설정하지 않으면 진단 API를 사용할 수 없습니다.
+"""
+
+import gc
+import os
+import hmac
+import time
+import logging
+import threading
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ADMIN_TOKEN = os.getenv("PROBLEM_FORGE_ADMIN_TOKEN", "")
+ADMIN_TOKEN_HEADER = "x-admin-token"
+
+# 보관할 최대 스냅샷 수 (오래된 것부터 삭제)
+MAX_SNAPSHOTS = 5
+# tracemalloc이 할당마다 기록할 호출 스택 깊이 (기본값)
+DEFAULT_TRACE_FRAMES = 10
+DEFAULT_TOP_LIMIT = 20
+MAX_TOP_LIMIT = 200
+GROUP_BY_OPTIONS = ("lineno", "filename", "traceback")
+
+# 진단 결과에서 제외할 할당 위치 (tracemalloc 자체와 import 과정)
+IGNORED_TRACE_FILES = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>",
+                       "<unknown>")
+
+
+def _clamp_limit(limit: int) -> int:
+    """반환할 항목 수를 1 이상 MAX_TOP_LIMIT 이하로 맞춥니다."""
+    return max(1, min(limit, MAX_TOP_LIMIT))
+
+
+def is_admin_request(headers: Any) -> bool:
+    """요청 헤더의 관리자 토큰이 설정된 토큰과 같은지 확인합니다 (토큰 미설정 시 항상 False)."""
+    token = headers.get(ADMIN_TOKEN_HEADER) or ""
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """현재 프로세스의 메모리 사용량 (바이트, /proc에서 읽을 수 없으면 최대 RSS만)"""
+    usage = {"rss_bytes": None, "peak_rss_bytes": None}
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in ("VmRSS", "VmHWM"):
+                    usage["rss_bytes" if name == "VmRSS" else "peak_rss_bytes"] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+
+        # Linux는 KB, macOS는 바이트 단위
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        usage["peak_rss_bytes"] = peak if os.uname().sysname == "Darwin" else peak * 1024
+    return usage
+
+
+def count_adk_sessions() -> List[Dict[str, Any]]:
+    """
+    메모리에 있는 모든 ADK InMemorySessionService의 앱별 세션 수와 이벤트 수를 셉니다.
+
+    RunManager와 (메모리 세션 서비스를 쓰도록 설정한) ADK 웹 앱이 각자 세션 서비스를 만들므로
+    살아 있는 객체를 모두 찾습니다.
+
+    Returns:
+        List[Dict[str, Any]]: app, users, sessions, events, state_keys (세션 수가 많은 순)
+    """
+    from google.adk.sessions import InMemorySessionService
+
+    totals: Dict[str, Dict[str, int]] = {}
+    for service in gc.get_objects():
+        if not isinstance(service, InMemorySessionService):
+            continue
+        for app_name, users in list(service.sessions.items()):
+            app = totals.setdefault(app_name, {"users": 0, "sessions": 0, "events": 0, "state_keys": 0})
+            app["users"] += len(users)
+            for sessions in list(users.values()):
+                app["sessions"] += len(sessions)
+                for session in list(sessions.values()):
+                    app["events"] += len(session.events)
+                    app["state_keys"] += len(session.state)
+    return sorted(({"app": name, **counts} for name, counts in totals.items()),
+                  key=lambda item: item["sessions"], reverse=True)
+
+
+class MemoryDiagnostics:
+    """tracemalloc 스냅샷과 메모리에 남아 있는 객체 수를 보고하는 도구"""
+
+    def __init__(self, max_snapshots: int = MAX_SNAPSHOTS):
+        self.max_snapshots = max_snapshots
+        # 스냅샷 id → (찍은 시각, 이름, 스냅샷)
+        self._snapshots: Dict[int, tuple] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # 이름 → 개수를 반환하는 함수 (서버에서 로그 큐, run 등을 등록)
+        self._live_counts: Dict[str, Callable[[], Any]] = {}
+
+    def add_live_count(self, name: str, read: Callable[[], Any]) -> None:
+        self._live_counts[name] = read
+
+    # ------------------------------------------------------------------
+    # tracemalloc
+    # ------------------------------------------------------------------
+    def start(self, frames: int = DEFAULT_TRACE_FRAMES) -> Dict[str, Any]:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"🔬 tracemalloc 시작 (호출 스택 {frames}단계)")
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        """tracemalloc을 끄고 스냅샷을 모두 지웁니다."""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+            logger.info("🔬 tracemalloc 중지")
+        with self._lock:
+            self._snapshots.clear()
+        return self.status()
+
+    def status(self) -> Dict[str, Any]:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with self._lock:
+            snapshots = [{"id": snapshot_id, "taken_at": taken_at, "label": label}
+                         for snapshot_id, (taken_at, label, _) in sorted(self._snapshots.items())]
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "snapshots": snapshots,
+        }
+
+    def take_snapshot(self, label: str = "") -> Dict[str, Any]:
+        """
+        현재 할당 상태의 스냅샷을 저장합니다.
+
+        Returns:
+            Dict[str, Any]: id, taken_at, label, traced_bytes
+
+        Raises:
+            RuntimeError: tracemalloc이 켜져 있지 않은 경우
+        """
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc이 꺼져 있습니다. 먼저 시작하세요.")
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, filename) for filename in IGNORED_TRACE_FILES]
+        )
+        taken_at = time.time()
+        with self._lock:
+            snapshot_id = self._next_id
+            self._next_id += 1
+            self._snapshots[snapshot_id] = (taken_at, label, snapshot)
+            while len(self._snapshots) > self.max_snapshots:
+                del self._snapshots[min(self._snapshots)]
+        return {"id": snapshot_id, "taken_at": taken_at, "label": label,
+                "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename"))}
+
+    def _get_snapshot(self, snapshot_id: Optional[int]) -> tracemalloc.Snapshot:
+        with self._lock:
+            if snapshot_id is None and self._snapshots:
+                snapshot_id = max(self._snapshots)
+            if snapshot_id not in self._snapshots:
+                raise KeyError(snapshot_id)
+            return self._snapshots[snapshot_id][2]
+
+    @staticmethod
+    def _format_stat(stat: Any, group_by: str) -> Dict[str, Any]:
+        frames = stat.traceback.format() if group_by == "traceback" else None
+        frame = stat.traceback[0]
+        item = {
+            "location": f"{frame.filename}:{frame.lineno}" if group_by != "filename" else frame.filename,
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+        if hasattr(stat, "size_diff"):
+            item["size_diff_bytes"] = stat.size_diff
+            item["count_diff"] = stat.count_diff
+        if frames:
+            item["traceback"] = frames
+        return item
+
+    def top(self, snapshot_id: Optional[int] = None, limit: int = DEFAULT_TOP_LIMIT,
+            group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """
+        스냅샷에서 할당 크기가 큰 위치를 반환합니다.
+
+        Args:
+            snapshot_id (Optional[int]): 스냅샷 id (없으면 가장 최근 스냅샷)
+            limit (int): 최대 항목 수
+            group_by (str): 묶는 기준 (lineno, filename, traceback)
+
+        Raises:
+            KeyError: 스냅샷이 없는 경우
+            ValueError: 알 수 없는 묶는 기준인 경우
+        """
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"알 수 없는 묶는 기준입니다: {group_by}")
+        stats = self._get_snapshot(snapshot_id).statistics(group_by)
+        return [self._format_stat(stat, group_by) for stat in stats[:_clamp_limit(limit)]]
+
+    def diff(self, from_id: int, to_id: Optional[int] = None, limit: int = DEFAULT_TOP_LIMIT,
+             group_by: str = "lineno") -> List[Dict[str, Any]]:
+        """
+        두 스냅샷 사이에 늘어난 할당을 증가량이 큰 순서로 반환합니다.
+
+        Args:
+            from_id (int): 기준 스냅샷 id
+            to_id (Optional[int]): 비교할 스냅샷 id (없으면 가장 최근 스냅샷)
+            limit (int): 최대 항목 수
+            group_by (str): 묶는 기준 (lineno, filename, traceback)
+
+        Raises:
+            KeyError: 스냅샷이 없는 경우
+            ValueError: 알 수 없는 묶는 기준인 경우
+        """
+        if group_by not in GROUP_BY_OPTIONS:
+            raise ValueError(f"알 수 없는 묶는 기준입니다: {group_by}")
+        stats = self._get_snapshot(to_id).compare_to(self._get_snapshot(from_id), group_by)
+        return [self._format_stat(stat, group_by) for stat in stats[:_clamp_limit(limit)]]
+
+    # ------------------------------------------------------------------
+    # 살아 있는 객체 수
+    # ------------------------------------------------------------------
+    def live_counts(self) -> Dict[str, Any]:
+        """등록된 개수, ADK 세션 수, 프로세스 메모리와 GC 상태"""
+        counts = {}
+        for name, read in self._live_counts.items():
+            try:
+                counts[name] = read()
+            except Exception as e:
+                counts[name] = f"error: {e}"
+        return {
+            "process": process_memory(),
+            "adk_sessions": count_adk_sessions(),
+            "counts": counts,
+            "gc": {"counts": list(gc.get_count()), "objects": len(gc.get_objects()),
+                   "garbage": len(gc.garbage)},
+        }
+
+
+memory_diagnostics = MemoryDiagnostics()
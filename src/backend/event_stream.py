@@ -0,0 +1,173 @@
+"""
+생성 실행 이벤트의 압축 스트리밍 (delta 모드)
+
+streaming 모드의 run은 모델 부분 응답(partial) 조각마다 ADK 이벤트 전체(JSON)를 하나씩 기록하므로,
+이벤트를 그대로 SSE로 보내면 조각 몇 글자마다 수백 바이트의 이벤트 껍데기가 함께 전송되고
+브라우저는 이벤트마다 결과를 다시 그립니다. delta 모드에서는 다음처럼 보냅니다.
+
+- 이벤트를 화면에 필요한 필드만 남긴 프레임으로 줄임 (작성자, 역할, 텍스트, 도구 호출/결과)
+- 같은 작성자의 연속된 부분 응답 조각은 일정 시간(기본 50ms) 또는 크기(기본 1KB)까지 모아 한 프레임으로 보냄
+- 부분 응답 뒤에 오는 완성 응답의 텍스트가 이 연결에서 보낸 조각을 이은 것과 같으면
+  텍스트 대신 fromDeltas 표시만 보냄 (클라이언트가 받은 조각을 이어 사용)
+- 프레임 id는 프레임에 포함된 마지막 이벤트 id라서 Last-Event-ID 재연결은 기존과 같이 동작
+- 클라이언트가 gzip을 받을 수 있으면 프레임마다 flush하는 gzip 스트림으로 압축
+"""
+
+import json
+import zlib
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+# 부분 응답 조각을 모으는 최대 시간 (초)과 크기 (UTF-8 바이트)
+DELTA_FLUSH_SECONDS = 0.05
+DELTA_FLUSH_BYTES = 1024
+
+GZIP_WBITS = 31
+GZIP_LEVEL = 6
+
+
+def compact_event(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    ADK 이벤트(JSON)를 화면에 필요한 필드만 남긴 프레임으로 줄입니다.
+
+    Args:
+        event (Dict[str, Any]): ADK 이벤트 (by_alias JSON)
+
+    Returns:
+        Optional[Dict[str, Any]]: author, role과 text, partial, calls, result, error 중 값이 있는 필드
+            (화면에 보여줄 내용이 없는 이벤트는 None)
+    """
+    content = event.get("content") or {}
+    parts = content.get("parts") or []
+    frame: Dict[str, Any] = {"author": event.get("author"), "role": content.get("role")}
+
+    text = "".join(part.get("text") or "" for part in parts if not part.get("thought"))
+    if text:
+        frame["text"] = text
+    if event.get("partial"):
+        frame["partial"] = True
+    calls = [part["functionCall"].get("name") for part in parts if part.get("functionCall")]
+    if calls:
+        frame["calls"] = calls
+    for part in parts:
+        response = (part.get("functionResponse") or {}).get("response") or {}
+        if isinstance(response.get("result"), str):
+            frame["result"] = response["result"]
+    if event.get("errorMessage") or event.get("errorCode"):
+        frame["error"] = event.get("errorMessage") or event.get("errorCode")
+
+    return frame if any(key in frame for key in ("text", "calls", "result", "error")) else None
+
+
+def _is_delta(frame: Dict[str, Any]) -> bool:
+    """텍스트만 있는 부분 응답 조각인지 확인합니다 (도구 호출/결과/오류가 있으면 바로 보냄)."""
+    return bool(frame.get("partial")) and "text" in frame and not any(
+        key in frame for key in ("calls", "result", "error")
+    )
+
+
+async def coalesce_deltas(
+    records: AsyncIterator[Dict[str, Any]],
+    flush_seconds: float = DELTA_FLUSH_SECONDS,
+    flush_bytes: int = DELTA_FLUSH_BYTES,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    이벤트 기록을 프레임으로 줄이고 연속된 부분 응답 조각을 시간/크기 단위로 묶습니다.
+
+    Args:
+        records: {"id", "event"} 이벤트 기록 (RunManager.stream_events)
+        flush_seconds (float): 조각을 모으는 최대 시간 (초)
+        flush_bytes (int): 조각을 모으는 최대 크기 (바이트)
+
+    Yields:
+        Dict[str, Any]: {"id": 프레임에 포함된 마지막 이벤트 id, "frame": 프레임}
+    """
+    # 작성자별로 이 연결에서 보낸 부분 응답 조각을 이은 텍스트 (완성 응답이 오면 비움)
+    streamed: Dict[str, str] = {}
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    end = object()
+
+    async def pump() -> None:
+        # 시간 단위로 묶으려면 다음 이벤트를 기다리는 도중에도 모은 조각을 보낼 수 있어야 하므로
+        # 이벤트 기록은 별도 작업에서 큐로 옮김
+        try:
+            async for record in records:
+                await queue.put(record)
+        finally:
+            queue.put_nowait(end)
+
+    pump_task = asyncio.create_task(pump())
+    pending: Optional[Dict[str, Any]] = None
+    pending_bytes = 0
+    deadline = 0.0
+    try:
+        while True:
+            try:
+                timeout = None if pending is None else max(0.0, deadline - loop.time())
+                record = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield pending
+                pending = None
+                continue
+            if record is end:
+                break
+
+            frame = compact_event(record["event"])
+            if frame is None:
+                continue
+            if _is_delta(frame):
+                streamed[frame["author"]] = streamed.get(frame["author"], "") + frame["text"]
+                if pending is not None and pending["frame"]["author"] == frame["author"]:
+                    pending["frame"]["text"] += frame["text"]
+                    pending["id"] = record["id"]
+                else:
+                    if pending is not None:
+                        yield pending
+                    pending = {"id": record["id"], "frame": frame}
+                    pending_bytes = 0
+                    deadline = loop.time() + flush_seconds
+                pending_bytes += len(frame["text"].encode("utf-8"))
+                if pending_bytes >= flush_bytes:
+                    yield pending
+                    pending = None
+                continue
+
+            if "text" in frame and not frame.get("partial"):
+                if streamed.pop(frame["author"], None) == frame["text"]:
+                    del frame["text"]
+                    frame["fromDeltas"] = True
+            if pending is not None:
+                yield pending
+                pending = None
+            yield {"id": record["id"], "frame": frame}
+        if pending is not None:
+            yield pending
+        # 원래 이벤트 스트림에서 난 예외를 그대로 전달
+        await pump_task
+    finally:
+        pump_task.cancel()
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """SSE 텍스트 조각을 gzip으로 압축하며 조각마다 flush해 바로 전송되도록 합니다."""
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8")) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush(zlib.Z_FINISH)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Accept-Encoding 헤더가 gzip을 허용하는지 확인합니다 (q=0은 거부)."""
+    for item in (accept_encoding or "").lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def format_frame(record: Dict[str, Any]) -> str:
+    """delta 모드 프레임을 SSE 메시지로 만듭니다."""
+    return f"id: {record['id']}\ndata: {json.dumps(record['frame'], ensure_ascii=False, separators=(',', ':'))}\n\n"
@@ -0,0 +1,276 @@
+"""
+시험지 사진 전처리와 텍스트 추출
+
+휴대폰으로 찍은 시험지 사진은 수천만 화소라서 그대로 모델에 보내면 지문을 읽는 데 필요한 것보다
+훨씬 많은 이미지 타일(입력 토큰)을 쓰고 업로드와 응답도 느려집니다. 서버에서 다음 순서로 처리합니다.
+
+1. EXIF 방향 정보대로 회전
+2. 흑백 변환 후 글자가 있는 영역만 남기고 여백/배경 잘라내기
+3. 목표 DPI(A4 긴 변 기준)에 맞게 축소하고 JPEG로 다시 압축
+4. 모델로 텍스트를 한 번 추출 (이후 변형 생성은 이미지가 아닌 텍스트로 진행)
+
+텍스트 추출 호출도 에이전트 모델 호출처럼 사용자 예산을 확인하고(예산 초과면 거절),
+공평 스케줄러 슬롯을 받아 실행하며, 사용한 토큰을 사용자별 사용량에 기록합니다.
+
+처리한 이미지와 추출한 텍스트는 원본 바이트 해시로 캐시해 같은 사진은 다시 처리하지 않습니다.
+전처리에는 Pillow가 필요합니다. 설치되어 있지 않으면 원본 사진을 그대로 모델에 보내지 않고 처리를 거절합니다.
+"""
+
+import os
+import io
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from metrics import model_calls, model_latency, output_tokens, prompt_tokens, registry
+from scheduler import FairScheduler, scheduler
+from usage import UsageMeter, usage_meter
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # 필수 의존성이지만 이미지 외 기능은 계속 쓸 수 있도록 사진 처리만 거절
+    Image = None
+    logger.error("❌ Pillow가 설치되어 있지 않아 사진 처리를 사용할 수 없습니다 (pip install Pillow)")
+
+IMAGE_CACHE_DIR = os.getenv(
+    "PROBLEM_FORGE_IMAGE_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "image_cache"),
+)
+
+# 텍스트를 읽기에 충분한 해상도 (A4 긴 변 기준 DPI)
+IMAGE_TARGET_DPI = int(os.getenv("PROBLEM_FORGE_IMAGE_DPI", "150"))
+PAGE_LONG_EDGE_INCHES = 11.7
+JPEG_QUALITY = int(os.getenv("PROBLEM_FORGE_IMAGE_JPEG_QUALITY", "80"))
+
+# 글자 영역 찾기: 이 밝기보다 어두운 화소를 글자로 보고, 잘라낸 영역 둘레에 여백을 남김
+INK_THRESHOLD = 128
+CROP_DETECT_EDGE = 1000
+CROP_MARGIN_RATIO = 0.02
+# 글자 영역이 이보다 작으면 잘못 찾은 것으로 보고 자르지 않음 (전체 면적 대비)
+MIN_CROP_AREA_RATIO = 0.05
+
+# 업로드 이미지 최대 크기 (바이트)
+MAX_IMAGE_BYTES = 25 * 1024 * 1024
+SUPPORTED_MIME_TYPES = ("image/jpeg", "image/png", "image/jpg", "image/webp")
+
+IMAGE_TEXT_MODEL = os.getenv("PROBLEM_FORGE_IMAGE_TEXT_MODEL", "gemini-2.0-flash")
+# 사용량 기록에 쓰는 앱/에이전트 이름
+IMAGE_APP_NAME = "image"
+IMAGE_AGENT_NAME = "image_text_extractor"
+IMAGE_TEXT_INSTRUCTION = (
+    "이 이미지는 영어 시험지 사진입니다. 이미지의 텍스트(문항 코드, 지시문, 영어 지문, 선택지)를 "
+    "보이는 순서대로 빠짐없이 그대로 옮겨 적으세요. 설명이나 요약, 마크다운 없이 텍스트만 출력하세요."
+)
+
+# 전처리 설정이 바뀌면 캐시를 새로 만들도록 캐시 키에 포함
+SETTINGS_SIGNATURE = f"v1:{IMAGE_TARGET_DPI}:{JPEG_QUALITY}:{INK_THRESHOLD}:{IMAGE_TEXT_MODEL}"
+
+image_bytes = registry.counter("image_bytes_total", "이미지 전처리 전후 바이트 수", ("stage",))
+image_cache_hits = registry.counter("image_cache_hits_total", "캐시에서 바로 반환한 이미지 텍스트 추출 요청 수")
+
+
+def _text_bbox(gray: Any) -> Optional[Tuple[int, int, int, int]]:
+    """흑백 이미지에서 글자가 있는 영역(left, top, right, bottom)을 찾습니다."""
+    small = gray.copy()
+    small.thumbnail((CROP_DETECT_EDGE, CROP_DETECT_EDGE))
+    scale = gray.width / small.width
+    # 조명 차이를 줄이고 작은 얼룩은 지운 뒤 어두운 화소 영역을 찾음
+    ink = ImageOps.autocontrast(small, cutoff=1).filter(ImageFilter.MedianFilter(3))
+    bbox = ink.point(lambda value: 255 if value < INK_THRESHOLD else 0).getbbox()
+    if bbox is None:
+        return None
+    left, top, right, bottom = (round(edge * scale) for edge in bbox)
+    if (right - left) * (bottom - top) < MIN_CROP_AREA_RATIO * gray.width * gray.height:
+        return None
+    margin = round(CROP_MARGIN_RATIO * max(gray.width, gray.height))
+    return (max(0, left - margin), max(0, top - margin),
+            min(gray.width, right + margin), min(gray.height, bottom + margin))
+
+
+def preprocess_image(data: bytes) -> Tuple[bytes, str, Dict[str, Any]]:
+    """
+    시험지 사진을 회전/자르기/축소/재압축합니다.
+
+    Args:
+        data (bytes): 원본 이미지 바이트
+
+    Returns:
+        Tuple[bytes, str, Dict[str, Any]]: (처리한 이미지 바이트, MIME 형식, 처리 정보)
+            처리 정보: processed, original_size, size, original_bytes, processed_bytes
+
+    Raises:
+        ValueError: 이미지를 읽을 수 없는 경우
+        RuntimeError: Pillow가 설치되어 있지 않은 경우
+    """
+    if Image is None:
+        raise RuntimeError("Pillow가 설치되어 있지 않아 사진을 처리할 수 없습니다 (pip install Pillow).")
+
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except Exception as e:
+        raise ValueError(f"이미지를 읽을 수 없습니다: {e}")
+    original_size = image.size
+
+    image = ImageOps.exif_transpose(image)
+    gray = image.convert("L")
+    bbox = _text_bbox(gray)
+    if bbox is not None:
+        gray = gray.crop(bbox)
+
+    max_edge = round(IMAGE_TARGET_DPI * PAGE_LONG_EDGE_INCHES)
+    if max(gray.size) > max_edge:
+        gray.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+    output = io.BytesIO()
+    gray.save(output, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    processed = output.getvalue()
+    if len(processed) >= len(data) and bbox is None and gray.size == original_size:
+        # 이미 작은 이미지는 원본이 더 가벼우면 원본 사용
+        return data, "", {"processed": False, "original_size": list(original_size), "size": list(original_size),
+                          "original_bytes": len(data), "processed_bytes": len(data)}
+    return processed, "image/jpeg", {
+        "processed": True,
+        "original_size": list(original_size),
+        "size": list(gray.size),
+        "cropped": bbox is not None,
+        "original_bytes": len(data),
+        "processed_bytes": len(processed),
+    }
+
+
+class ImageIngestor:
+    """시험지 사진을 전처리해 텍스트를 추출하고 결과를 해시로 캐시하는 도구"""
+
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, model_name: str = IMAGE_TEXT_MODEL,
+                 meter: Optional[UsageMeter] = None, fair_scheduler: Optional[FairScheduler] = None):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        # 사용자별 예산 확인과 사용량 기록 (없으면 제한 없음)
+        self.meter = meter
+        # 모델 호출 슬롯을 배정하는 공평 스케줄러 (없으면 바로 호출)
+        self.fair_scheduler = fair_scheduler
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # 같은 사진이 동시에 올라와도 한 번만 처리
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def _cache_key(self, data: bytes) -> str:
+        digest = hashlib.sha256(data)
+        digest.update(SETTINGS_SIGNATURE.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _cache_path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def _read_cache(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._cache_path(key, ".json")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_cache(self, key: str, processed: bytes, result: Dict[str, Any]) -> None:
+        with open(self._cache_path(key, ".image"), "wb") as f:
+            f.write(processed)
+        # 텍스트 결과는 임시 파일에 쓴 뒤 교체해 다른 요청이 반쯤 쓴 파일을 읽지 않도록 함
+        temp_path = self._cache_path(key, ".json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(temp_path, self._cache_path(key, ".json"))
+
+    async def _extract_text(self, data: bytes, mime_type: str, user_id: str) -> str:
+        from google.genai import types
+        from warmup import model_warmer
+
+        model = model_warmer.shared_model(self.model_name)
+        if self.fair_scheduler is not None:
+            await self.fair_scheduler.acquire(user_id)
+        try:
+            started = time.perf_counter()
+            model_calls.inc(IMAGE_APP_NAME, IMAGE_AGENT_NAME)
+            response = await model.api_client.aio.models.generate_content(
+                model=self.model_name,
+                contents=[types.Content(role="user", parts=[
+                    types.Part.from_bytes(data=data, mime_type=mime_type),
+                    types.Part(text=IMAGE_TEXT_INSTRUCTION),
+                ])],
+            )
+            model_latency.observe(time.perf_counter() - started, IMAGE_APP_NAME, IMAGE_AGENT_NAME)
+        finally:
+            if self.fair_scheduler is not None:
+                self.fair_scheduler.release(user_id)
+        usage = response.usage_metadata
+        if usage is not None:
+            prompt_tokens.inc(IMAGE_APP_NAME, IMAGE_AGENT_NAME, amount=usage.prompt_token_count or 0)
+            output_tokens.inc(IMAGE_APP_NAME, IMAGE_AGENT_NAME, amount=usage.candidates_token_count or 0)
+            if self.meter is not None:
+                self.meter.record(
+                    user_id, IMAGE_APP_NAME, IMAGE_APP_NAME, IMAGE_AGENT_NAME, self.model_name,
+                    usage.prompt_token_count or 0, usage.cached_content_token_count or 0,
+                    usage.candidates_token_count or 0,
+                )
+        return (response.text or "").strip()
+
+    async def ingest(self, data: bytes, mime_type: str, user_id: str = "anonymous") -> Dict[str, Any]:
+        """
+        시험지 사진에서 텍스트를 추출합니다 (같은 사진은 캐시된 결과 반환).
+
+        Args:
+            data (bytes): 업로드한 이미지 바이트
+            mime_type (str): 업로드한 이미지 MIME 형식
+            user_id (str): 예산 확인, 공평 스케줄링과 사용량 기록에 쓰는 사용자 ID
+
+        Returns:
+            Dict[str, Any]: imageHash, text, cached, 전처리 정보(original_bytes, processed_bytes 등)
+
+        Raises:
+            ValueError: 지원하지 않는 형식이거나 이미지를 읽을 수 없는 경우
+            BudgetExceeded: 캐시에 없는 사진인데 사용자가 이번 달 예산을 넘은 경우
+            RuntimeError: 캐시에 없는 사진인데 Pillow가 설치되어 있지 않은 경우
+        """
+        if mime_type not in SUPPORTED_MIME_TYPES:
+            raise ValueError(f"지원하지 않는 이미지 형식입니다: {mime_type or '알 수 없음'}")
+        if len(data) > MAX_IMAGE_BYTES:
+            raise ValueError(f"이미지가 너무 큽니다 (최대 {MAX_IMAGE_BYTES // (1024 * 1024)}MB).")
+
+        key = self._cache_key(data)
+        cached = self._read_cache(key)
+        if cached is not None:
+            image_cache_hits.inc()
+            return {**cached, "cached": True}
+        if key in self._pending:
+            return {**await asyncio.shield(self._pending[key]), "cached": True}
+        # 예산을 넘은 사용자도 캐시된 사진은 받을 수 있도록 캐시 확인 뒤에 확인
+        if self.meter is not None:
+            self.meter.check_budget(user_id)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            processed, processed_type, info = await asyncio.to_thread(preprocess_image, data)
+            image_bytes.inc("original", amount=len(data))
+            image_bytes.inc("processed", amount=len(processed))
+            text = await self._extract_text(processed, processed_type or mime_type, user_id)
+            result = {"imageHash": key, "text": text, **info}
+            await asyncio.to_thread(self._write_cache, key, processed, result)
+            logger.info(f"🖼️ 이미지 처리 완료 [{key[:12]}] {info['original_bytes']:,} → {info['processed_bytes']:,} 바이트, "
+                        f"텍스트 {len(text)}자")
+            future.set_result(result)
+            return {**result, "cached": False}
+        except Exception as e:
+            future.set_exception(e)
+            # 기다리는 요청이 없으면 예외를 꺼내 두어 경고가 남지 않도록 함
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._pending.pop(key, None)
+
+
+image_ingestor = ImageIngestor(meter=usage_meter, fair_scheduler=scheduler)
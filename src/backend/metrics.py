@@ -0,0 +1,332 @@
+"""
+에이전트별 메트릭 수집 (Prometheus 텍스트 형식)
+
+root_agent, master_agent, parallel_agent의 하위 에이전트, pdf_parser_root 등
+에이전트 트리의 모든 에이전트에 콜백을 붙여 호출 수, 지연 시간 히스토그램,
+입력/캐시/출력 토큰, 오류/재시도 횟수를 수집합니다. 수집은 딕셔너리 갱신 몇 번이
+전부라 운영 환경에서도 켜 둘 수 있으며, /metrics에서 Prometheus 텍스트로 내보냅니다.
+외부 의존성(prometheus_client) 없이 필요한 최소 기능만 구현합니다.
+"""
+
+import time
+import bisect
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.tools.agent_tool import AgentTool
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "problem_forge"
+
+# 지연 시간 히스토그램 버킷 (초) - 짧은 하위 에이전트 호출부터 긴 전체 생성까지
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+
+# 시작 시각을 기록해 둘 최대 진행 중 호출 수 (끝나지 않은 호출이 쌓이지 않도록)
+MAX_PENDING_TIMERS = 10000
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """라벨별로 누적되는 카운터"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {value:g}" for labels, value in items]
+
+
+class Gauge:
+    """수집 시점에 함수를 호출해 값을 읽는 게이지"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, read: Callable[[], float]):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+        self.label_names = ()
+
+    def samples(self) -> List[str]:
+        try:
+            value = self.read()
+        except Exception as e:
+            logger.warning(f"게이지 {self.name} 읽기 실패: {e}")
+            return []
+        return [f"{self.name} {value:g}"]
+
+
+class Histogram:
+    """라벨별 누적 버킷 히스토그램"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 → (버킷별 개수, 합계, 전체 개수)
+        self._values: Dict[LabelValues, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.setdefault(label_values, [[0] * len(self.buckets), 0.0, 0])
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items())
+        lines = []
+        for labels, (bucket_counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(self.label_names, labels, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _format_labels(self.label_names, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{inf_labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """메트릭 모음과 Prometheus 텍스트 출력"""
+
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(f"{METRIC_PREFIX}_{name}", documentation, label_names))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Histogram:
+        return self.register(Histogram(f"{METRIC_PREFIX}_{name}", documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, read: Callable[[], float]) -> Gauge:
+        return self.register(Gauge(f"{METRIC_PREFIX}_{name}", documentation, read))
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식(0.0.4)으로 모든 메트릭을 출력합니다."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+agent_invocations = registry.counter("agent_invocations_total", "에이전트 실행 횟수", ("app", "agent"))
+agent_latency = registry.histogram("agent_latency_seconds", "에이전트 실행 시간 (하위 에이전트 포함)", ("app", "agent"))
+model_calls = registry.counter("model_calls_total", "모델 호출 횟수", ("app", "agent"))
+model_latency = registry.histogram("model_latency_seconds", "모델 호출 지연 시간", ("app", "agent"))
+model_errors = registry.counter("model_errors_total", "모델 호출 오류 횟수", ("app", "agent"))
+model_retries = registry.counter("model_retries_total", "같은 실행에서 오류 후 다시 시도한 모델 호출 횟수", ("app", "agent"))
+prompt_tokens = registry.counter("prompt_tokens_total", "입력 토큰 수", ("app", "agent"))
+cached_tokens = registry.counter("cached_prompt_tokens_total", "입력 토큰 중 캐시에서 읽은 토큰 수 (캐시 적중률 = cached / prompt)", ("app", "agent"))
+output_tokens = registry.counter("output_tokens_total", "출력 토큰 수", ("app", "agent"))
+cache_hit_calls = registry.counter("model_cache_hit_calls_total", "캐시된 입력 토큰이 있었던 모델 호출 횟수", ("app", "agent"))
+
+
+class _Timers:
+    """진행 중인 호출의 시작 시각 (키: invocation_id, 브랜치, 에이전트 이름)"""
+
+    def __init__(self):
+        self._started: Dict[Tuple[str, ...], float] = {}
+        self._errored: Dict[Tuple[str, ...], bool] = {}
+        self._lock = threading.Lock()
+
+    def start(self, key: Tuple[str, ...]) -> bool:
+        """시작 시각을 기록하고, 같은 키에서 이전에 오류가 있었는지 반환합니다."""
+        with self._lock:
+            if len(self._started) >= MAX_PENDING_TIMERS:
+                self._started.pop(next(iter(self._started)))
+            self._started[key] = time.perf_counter()
+            return self._errored.pop(key, False)
+
+    def stop(self, key: Tuple[str, ...]) -> Optional[float]:
+        with self._lock:
+            started = self._started.pop(key, None)
+        return None if started is None else time.perf_counter() - started
+
+    def mark_error(self, key: Tuple[str, ...]) -> None:
+        with self._lock:
+            if len(self._errored) >= MAX_PENDING_TIMERS:
+                self._errored.pop(next(iter(self._errored)))
+            self._errored[key] = True
+
+
+_agent_timers = _Timers()
+_model_timers = _Timers()
+
+# 이미 계측한 (루트 에이전트 id, 앱 이름)
+_instrumented = set()
+
+
+def _key(callback_context: CallbackContext) -> Tuple[str, ...]:
+    branch = getattr(callback_context._invocation_context, "branch", None) or ""
+    return (callback_context.invocation_id, branch, callback_context.agent_name)
+
+
+def _make_callbacks(app_name: str) -> Dict[str, Callable]:
+    """앱 이름을 라벨로 붙이는 계측 콜백 묶음을 만듭니다."""
+
+    def before_agent(callback_context: CallbackContext):
+        agent_invocations.inc(app_name, callback_context.agent_name)
+        _agent_timers.start(_key(callback_context))
+        return None
+
+    def after_agent(callback_context: CallbackContext):
+        elapsed = _agent_timers.stop(_key(callback_context))
+        if elapsed is not None:
+            agent_latency.observe(elapsed, app_name, callback_context.agent_name)
+        return None
+
+    def before_model(callback_context: CallbackContext, llm_request: LlmRequest):
+        agent_name = callback_context.agent_name
+        model_calls.inc(app_name, agent_name)
+        if _model_timers.start(_key(callback_context)):
+            model_retries.inc(app_name, agent_name)
+        return None
+
+    def after_model(callback_context: CallbackContext, llm_response: LlmResponse):
+        if llm_response.partial:
+            return None
+        agent_name = callback_context.agent_name
+        elapsed = _model_timers.stop(_key(callback_context))
+        if elapsed is not None:
+            model_latency.observe(elapsed, app_name, agent_name)
+        if llm_response.error_code:
+            model_errors.inc(app_name, agent_name)
+            _model_timers.mark_error(_key(callback_context))
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            prompt_tokens.inc(app_name, agent_name, amount=usage.prompt_token_count or 0)
+            output_tokens.inc(app_name, agent_name, amount=usage.candidates_token_count or 0)
+            if usage.cached_content_token_count:
+                cached_tokens.inc(app_name, agent_name, amount=usage.cached_content_token_count)
+                cache_hit_calls.inc(app_name, agent_name)
+        return None
+
+    def on_model_error(callback_context: CallbackContext, llm_request: LlmRequest, error: Exception):
+        model_errors.inc(app_name, callback_context.agent_name)
+        _model_timers.stop(_key(callback_context))
+        _model_timers.mark_error(_key(callback_context))
+        return None
+
+    return {
+        "before_agent": before_agent,
+        "after_agent": after_agent,
+        "before_model": before_model,
+        "after_model": after_model,
+        "on_model_error": on_model_error,
+    }
+
+
+def _as_list(callback: Any) -> List[Callable]:
+    if callback is None:
+        return []
+    return list(callback) if isinstance(callback, list) else [callback]
+
+
+def add_agent_callbacks(agent: BaseAgent, field: str, callback: Callable, first: bool) -> None:
+    """
+    에이전트의 기존 콜백을 유지한 채 콜백을 하나 추가합니다.
+
+    ADK는 콜백 목록을 순서대로 실행하다 None이 아닌 값을 반환하면 멈추므로,
+    관측용 콜백은 after_* 콜백에서는 맨 앞(first=True), before_* 콜백에서는
+    맨 뒤(실제로 모델/에이전트가 실행될 때만 호출)에 둡니다.
+
+    Args:
+        agent (BaseAgent): 대상 에이전트
+        field (str): 콜백 필드 이름 (예: "before_model_callback")
+        callback (Callable): 추가할 콜백
+        first (bool): 목록 맨 앞에 둘지 여부
+    """
+    if field not in type(agent).model_fields:
+        return
+    callbacks = _as_list(getattr(agent, field))
+    setattr(agent, field, [callback] + callbacks if first else callbacks + [callback])
+
+
+def iter_agent_tree(agent: BaseAgent):
+    """하위 에이전트와 AgentTool로 감싼 에이전트까지 트리의 모든 에이전트를 순회합니다."""
+    seen = set()
+    stack = [agent]
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        stack.extend(current.sub_agents or [])
+        stack.extend(tool.agent for tool in getattr(current, "tools", None) or [] if isinstance(tool, AgentTool))
+
+
+def instrument_agent_tree(root_agent: BaseAgent, app_name: str) -> int:
+    """
+    에이전트 트리 전체에 메트릭 수집 콜백을 붙입니다 (같은 트리에 두 번 붙이지 않음).
+
+    Args:
+        root_agent (BaseAgent): 루트 에이전트
+        app_name (str): 메트릭 라벨로 사용할 앱 이름 (예: "agent", "pdf_agent")
+
+    Returns:
+        int: 계측한 에이전트 수
+    """
+    if (id(root_agent), app_name) in _instrumented:
+        return 0
+    callbacks = _make_callbacks(app_name)
+    count = 0
+    for agent in iter_agent_tree(root_agent):
+        add_agent_callbacks(agent, "before_agent_callback", callbacks["before_agent"], first=False)
+        add_agent_callbacks(agent, "after_agent_callback", callbacks["after_agent"], first=True)
+        if isinstance(agent, LlmAgent):
+            add_agent_callbacks(agent, "before_model_callback", callbacks["before_model"], first=False)
+            add_agent_callbacks(agent, "after_model_callback", callbacks["after_model"], first=True)
+            add_agent_callbacks(agent, "on_model_error_callback", callbacks["on_model_error"], first=True)
+        count += 1
+    _instrumented.add((id(root_agent), app_name))
+    logger.info(f"📈 메트릭 계측 완료 [{app_name}] 에이전트 {count}개")
+    return count
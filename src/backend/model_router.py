@@ -0,0 +1,391 @@
+"""
+에이전트(변형 유형)별 모델 라우팅과 자동 대체(fallback)
+
+모든 에이전트가 같은 모델("gemini-2.0-flash")을 쓰면 심경/분위기처럼 단순한 유형이나
+PDF 페이지 파싱도 어려운 유형과 같은 모델로 처리됩니다. 에이전트 이름별로 1순위 모델과
+대체 모델 목록(라우팅 표)을 두고, 모델 호출마다 다음 순서로 후보 모델을 시도합니다.
+
+- 호출이 실패(예외, 오류 응답)하거나 결과가 에이전트의 검증을 통과하지 못하면 다음 후보로 넘어감
+  (변형 유형은 문제 JSON, PDF 파싱은 JSON 객체가 있어야 통과)
+- adaptive 모드에서는 후보별 지연 시간/실패율(지수 이동 평균)을 측정해 실패율이 낮은 후보 중
+  가장 빠른 모델을 먼저 시도하고, 일정 호출마다 가장 오래 시도하지 않은 후보를 먼저 시도해 다시 측정
+- static 모드에서는 항상 라우팅 표 순서대로 시도
+
+라우팅 표 (PROBLEM_FORGE_MODEL_ROUTES, "에이전트=모델|대체 모델" 쉼표 구분, "*"는 나머지 에이전트):
+    emotion_atmosphere_agent=gemini-2.0-flash-lite|gemini-2.0-flash,*=gemini-2.0-flash|gemini-2.5-flash
+기본 라우팅 표는 비어 있어, 표에 넣은 에이전트만 라우팅하고 나머지는 원래 모델을 그대로 씁니다.
+
+스트리밍 호출은 이미 보낸 부분 응답을 되돌릴 수 없으므로 첫 조각을 받기 전의 실패(예외, 오류 응답)만
+대체하고, 응답 검증은 하지 않습니다 (검증에 실패해도 이미 화면에 나간 결과를 바꿀 수 없음).
+PROBLEM_FORGE_MODEL_BASE_URL로 모델 API 주소를 로컬 스텁 서버로 바꾸면 모델 이름별로
+느리거나 실패하는 응답을 흉내 내어 라우팅을 확인할 수 있습니다.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from metrics import iter_agent_tree, registry
+from variants import JSON_BLOCK_PATTERN, VARIANT_AGENT_NAMES, parse_variant
+
+logger = logging.getLogger(__name__)
+
+# 라우팅 모드: adaptive (측정값으로 순서 조정), static (표 순서 고정), off (라우팅 사용 안 함)
+ROUTING_MODE = os.getenv("PROBLEM_FORGE_MODEL_ROUTING", "adaptive").lower()
+ROUTING_MODES = ("adaptive", "static", "off")
+
+# 기본 라우팅 표 (비어 있음, PROBLEM_FORGE_MODEL_ROUTES로 지정한 에이전트만 라우팅)
+DEFAULT_MODEL_ROUTES = ""
+MODEL_ROUTES_ENV = os.getenv("PROBLEM_FORGE_MODEL_ROUTES", "")
+WILDCARD_ROUTE = "*"
+
+# 지연 시간/실패율 지수 이동 평균의 가중치와 판단에 필요한 최소 호출 수
+EWMA_ALPHA = 0.2
+MIN_SAMPLES = 3
+# 실패율이 이 값 이상인 후보는 뒤로 미룸
+MAX_ERROR_RATE = 0.3
+# 에이전트별 이 호출 수마다 가장 오래 시도하지 않은 후보를 먼저 시도 (0이면 사용 안 함)
+PROBE_INTERVAL = int(os.getenv("PROBLEM_FORGE_MODEL_PROBE_INTERVAL", "20"))
+
+# 응답 검증 방식: variant (문제 JSON), json (JSON 객체), any (오류가 아닌 응답)
+VALIDATOR_VARIANT = "variant"
+VALIDATOR_JSON = "json"
+VALIDATOR_ANY = "any"
+AGENT_VALIDATORS: Dict[str, str] = {
+    **{name: VALIDATOR_VARIANT for name in VARIANT_AGENT_NAMES},
+    # 분할 정보 JSON을 받아 콜백에서 문제 JSON으로 완성하는 유형
+    "paragraph_order_agent": VALIDATOR_JSON,
+    "sentence_insertion_agent": VALIDATOR_JSON,
+    "pdf_parser_root": VALIDATOR_JSON,
+}
+
+# 실제로 응답한 모델과 대체 전 시도 기록을 남기는 LlmResponse.custom_metadata 키
+ROUTED_MODEL_METADATA_KEY = "routed_model"
+FALLBACKS_METADATA_KEY = "model_fallbacks"
+
+route_calls = registry.counter(
+    "model_route_calls_total", "라우팅된 후보 모델 시도 횟수 (outcome: ok, error, invalid)",
+    ("app", "agent", "model", "outcome"),
+)
+route_fallbacks = registry.counter("model_fallbacks_total", "다음 후보 모델로 대체한 횟수", ("app", "agent", "model"))
+
+
+def parse_model_routes(value: str) -> Dict[str, List[str]]:
+    """
+    "에이전트=모델|대체 모델,에이전트2=모델" 형식의 라우팅 표를 읽습니다 (잘못된 항목은 무시).
+
+    Args:
+        value (str): 라우팅 표 문자열
+
+    Returns:
+        Dict[str, List[str]]: 에이전트 이름 → 시도할 모델 이름 목록 (1순위부터)
+    """
+    routes = {}
+    for item in value.split(","):
+        agent_name, _, models = item.partition("=")
+        names = [name.strip() for name in models.split("|") if name.strip()]
+        if not agent_name.strip() or not names:
+            if item.strip():
+                logger.warning(f"잘못된 모델 라우팅 설정 무시: {item}")
+            continue
+        routes[agent_name.strip()] = list(dict.fromkeys(names))
+    return routes
+
+
+def _response_text(response: LlmResponse) -> str:
+    parts = response.content.parts if response.content and response.content.parts else []
+    return "".join(part.text or "" for part in parts if not part.thought)
+
+
+def is_valid_response(validator: str, response: Optional[LlmResponse]) -> bool:
+    """
+    모델 응답이 에이전트의 검증을 통과하는지 확인합니다.
+
+    도구 호출 응답은 형식 검증 없이 통과합니다 (오류 응답은 항상 실패).
+
+    Args:
+        validator (str): 검증 방식 (variant, json, any)
+        response (Optional[LlmResponse]): 최종 응답
+
+    Returns:
+        bool: 통과 여부
+    """
+    if response is None or response.error_code:
+        return False
+    parts = response.content.parts if response.content and response.content.parts else []
+    if not parts:
+        return False
+    if validator == VALIDATOR_ANY or any(part.function_call for part in parts):
+        return True
+    text = _response_text(response)
+    if validator == VALIDATOR_VARIANT:
+        return parse_variant(text) is not None
+    match = JSON_BLOCK_PATTERN.search(text)
+    if not match:
+        return False
+    try:
+        return isinstance(json.loads(match.group(0)), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+class _ModelStats:
+    """에이전트 하나에서 후보 모델 하나의 측정값"""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        # 성공한 호출의 지연 시간 (실패한 호출은 모델 속도가 아니므로 반영하지 않음, 성공 전에는 None)
+        self.latency: Optional[float] = None
+        self.error_rate = 0.0
+        self.last_tried = 0.0
+
+    def observe(self, elapsed: float, ok: bool) -> None:
+        if ok:
+            self.latency = elapsed if self.latency is None else self.latency + EWMA_ALPHA * (elapsed - self.latency)
+        error = 0.0 if ok else 1.0
+        self.error_rate = error if self.calls == 0 else self.error_rate + EWMA_ALPHA * (error - self.error_rate)
+        self.calls += 1
+        self.failures += 0 if ok else 1
+        self.last_tried = time.monotonic()
+
+    @property
+    def measured(self) -> bool:
+        return self.calls >= MIN_SAMPLES
+
+    @property
+    def healthy(self) -> bool:
+        return not self.measured or self.error_rate < MAX_ERROR_RATE
+
+
+class ModelRouter:
+    """라우팅 표와 후보 모델별 측정값으로 시도 순서를 정하는 도구"""
+
+    def __init__(self, routes: Optional[Dict[str, List[str]]] = None, mode: str = ROUTING_MODE):
+        if routes is None:
+            routes = {**parse_model_routes(DEFAULT_MODEL_ROUTES), **parse_model_routes(MODEL_ROUTES_ENV)}
+        if mode not in ROUTING_MODES:
+            logger.warning(f"알 수 없는 모델 라우팅 모드 '{mode}', adaptive로 동작합니다.")
+            mode = "adaptive"
+        self.routes = routes
+        self.mode = mode
+        # (에이전트 이름, 모델 이름) → 측정값
+        self._stats: Dict[tuple, _ModelStats] = {}
+        self._calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def has_route(self, agent_name: str) -> bool:
+        """에이전트가 라우팅 표에 있는지 확인합니다 ("*" 항목이 있으면 모든 에이전트)."""
+        return agent_name in self.routes or WILDCARD_ROUTE in self.routes
+
+    def models_for(self, agent_name: str, default_model: str) -> List[str]:
+        """에이전트가 시도할 모델 이름 목록 (표에 없으면 에이전트에 설정된 모델만)"""
+        return list(self.routes.get(agent_name) or self.routes.get(WILDCARD_ROUTE) or [default_model])
+
+    def order(self, agent_name: str, names: List[str]) -> List[str]:
+        """
+        이번 호출에서 후보 모델을 시도할 순서를 정합니다.
+
+        adaptive 모드: 실패율이 낮은 후보 중 측정된 지연 시간이 짧은 순서
+        (성공한 적 없는 후보는 그 뒤에 표 순서대로, 실패율이 높은 후보는 맨 뒤).
+        PROBE_INTERVAL 호출마다 가장 오래 시도하지 않은 후보를 맨 앞에 둡니다.
+
+        Args:
+            agent_name (str): 에이전트 이름
+            names (List[str]): 라우팅 표 순서의 후보 모델 이름
+
+        Returns:
+            List[str]: 시도할 순서의 모델 이름
+        """
+        if self.mode != "adaptive" or len(names) < 2:
+            return list(names)
+        with self._lock:
+            calls = self._calls[agent_name] = self._calls.get(agent_name, 0) + 1
+            stats = {name: self._stats.get((agent_name, name)) or _ModelStats() for name in names}
+        ranked = sorted(names, key=lambda name: (
+            not stats[name].healthy,
+            float("inf") if stats[name].latency is None else stats[name].latency,
+            names.index(name),
+        ))
+        if PROBE_INTERVAL > 0 and calls % PROBE_INTERVAL == 0:
+            probe = min(names, key=lambda name: stats[name].last_tried)
+            ranked.remove(probe)
+            ranked.insert(0, probe)
+        return ranked
+
+    def record(self, agent_name: str, model_name: str, elapsed: float, ok: bool) -> None:
+        with self._lock:
+            self._stats.setdefault((agent_name, model_name), _ModelStats()).observe(elapsed, ok)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        라우팅 모드, 라우팅 표와 후보 모델별 측정값을 반환합니다.
+
+        Returns:
+            Dict[str, Any]: mode, routes, stats (에이전트 → 모델 → calls, failures, latency_seconds,
+                error_rate, healthy)
+        """
+        with self._lock:
+            stats: Dict[str, Dict[str, Any]] = {}
+            for (agent_name, model_name), item in sorted(self._stats.items()):
+                stats.setdefault(agent_name, {})[model_name] = {
+                    "calls": item.calls,
+                    "failures": item.failures,
+                    "latency_seconds": None if item.latency is None else round(item.latency, 4),
+                    "error_rate": round(item.error_rate, 4),
+                    "healthy": item.healthy,
+                }
+        return {"mode": self.mode, "routes": self.routes, "stats": stats}
+
+
+def _usage_record(model_name: str, reason: str, response: Optional[LlmResponse]) -> Dict[str, Any]:
+    usage = response.usage_metadata if response is not None else None
+    return {
+        "model": model_name,
+        "reason": reason,
+        "prompt_tokens": (usage.prompt_token_count or 0) if usage else 0,
+        "cached_tokens": (usage.cached_content_token_count or 0) if usage else 0,
+        "output_tokens": (usage.candidates_token_count or 0) if usage else 0,
+    }
+
+
+class RoutedLlm(BaseLlm):
+    """
+    에이전트 하나의 후보 모델을 순서대로 시도하는 BaseLlm
+
+    model 필드는 라우팅 표의 1순위 모델 이름이고, 실제로 응답한 모델은 응답의
+    custom_metadata["routed_model"]에, 대체되기 전 시도(사유와 사용한 토큰)는
+    custom_metadata["model_fallbacks"]에 남깁니다. 스트리밍 호출은 응답 검증 없이
+    오류만 확인합니다.
+    """
+
+    app_name: str
+    agent_name: str
+    validator: str = VALIDATOR_ANY
+    # 모델 이름 → 공용 BaseLlm 객체 (라우팅 표 순서)
+    candidates: Dict[str, BaseLlm]
+    router: Any
+
+    @property
+    def capabilities(self):
+        return self.candidates[self.model].capabilities
+
+    def _stamp(self, response: LlmResponse, model_name: str, fallbacks: List[Dict[str, Any]]) -> LlmResponse:
+        metadata = dict(response.custom_metadata or {})
+        metadata[ROUTED_MODEL_METADATA_KEY] = model_name
+        if fallbacks:
+            metadata[FALLBACKS_METADATA_KEY] = fallbacks
+        response.custom_metadata = metadata
+        return response
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        names = self.router.order(self.agent_name, list(self.candidates))
+        # 스트리밍은 부분 응답을 이미 보냈을 수 있어 검증에 실패해도 대체할 수 없으므로 오류만 확인
+        validator = VALIDATOR_ANY if stream else self.validator
+        fallbacks: List[Dict[str, Any]] = []
+        for index, name in enumerate(names):
+            last = index == len(names) - 1
+            # 후보 모델 객체는 요청의 model 필드로 API 모델 이름을 정함
+            llm_request.model = name
+            started = time.perf_counter()
+            final = None
+            streamed = False
+            try:
+                async for response in self.candidates[name].generate_content_async(llm_request, stream):
+                    if response.partial:
+                        streamed = True
+                        yield self._stamp(response, name, fallbacks)
+                    else:
+                        final = response
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                self.router.record(self.agent_name, name, elapsed, ok=False)
+                route_calls.inc(self.app_name, self.agent_name, name, "error")
+                if streamed or last:
+                    raise
+                logger.warning(f"🔀 [{self.agent_name}] {name} 호출 실패, 다음 후보 모델로 대체: {e!r}")
+                route_fallbacks.inc(self.app_name, self.agent_name, name)
+                fallbacks.append(_usage_record(name, f"error: {type(e).__name__}", None))
+                continue
+
+            elapsed = time.perf_counter() - started
+            ok = is_valid_response(validator, final)
+            outcome = "ok" if ok else ("error" if final is None or final.error_code else "invalid")
+            self.router.record(self.agent_name, name, elapsed, ok=ok)
+            route_calls.inc(self.app_name, self.agent_name, name, outcome)
+            if ok or streamed or last:
+                if final is not None:
+                    yield self._stamp(final, name, fallbacks)
+                return
+            reason = f"error: {final.error_code}" if final is not None and final.error_code else outcome
+            logger.warning(f"🔀 [{self.agent_name}] {name} 응답이 검증을 통과하지 못해 다음 후보 모델로 대체 ({reason})")
+            route_fallbacks.inc(self.app_name, self.agent_name, name)
+            fallbacks.append(_usage_record(name, reason, final))
+
+
+def route_agent_tree(root_agent: Any, app_name: str, router: Optional[ModelRouter] = None,
+                     shared_model: Any = None) -> List[str]:
+    """
+    트리의 LlmAgent 중 model이 문자열인 에이전트를 라우팅 표의 후보 모델을 시도하는 RoutedLlm으로 바꿉니다.
+
+    라우팅 표에 없는 에이전트와 모델 객체를 직접 지정한 에이전트(테스트용 스텁 등)는 그대로 둡니다.
+
+    Args:
+        root_agent: 루트 에이전트
+        app_name (str): 메트릭 라벨로 사용할 앱 이름
+        router (Optional[ModelRouter]): 모델 라우터 (없으면 공용 model_router)
+        shared_model: 모델 이름 → 공용 BaseLlm 객체를 반환하는 함수 (없으면 model_warmer.shared_model)
+
+    Returns:
+        List[str]: 라우팅을 적용한 에이전트 이름 목록
+    """
+    from google.adk.agents import LlmAgent
+
+    router = router or model_router
+    if not router.enabled:
+        return []
+    if shared_model is None:
+        from warmup import model_warmer
+
+        shared_model = model_warmer.shared_model
+
+    routed = []
+    for agent in iter_agent_tree(root_agent):
+        if not isinstance(agent, LlmAgent) or not isinstance(agent.model, str) or not agent.model:
+            continue
+        if not router.has_route(agent.name):
+            continue
+        candidates = {}
+        for name in router.models_for(agent.name, agent.model):
+            try:
+                candidates[name] = shared_model(name)
+            except ValueError as e:
+                # 설정 오타로 서버 시작이 실패하지 않도록 알 수 없는 모델은 건너뜀
+                logger.warning(f"⚠️ 모델 라우팅 [{agent.name}] 알 수 없는 모델 '{name}' 제외: {e}")
+        if not candidates:
+            candidates[agent.model] = shared_model(agent.model)
+        agent.model = RoutedLlm(
+            model=next(iter(candidates)),
+            app_name=app_name,
+            agent_name=agent.name,
+            validator=AGENT_VALIDATORS.get(agent.name, VALIDATOR_ANY),
+            candidates=candidates,
+            router=router,
+        )
+        routed.append(agent.name)
+        logger.info(f"🔀 모델 라우팅 [{app_name}/{agent.name}] {' → '.join(candidates)}")
+    return routed
+
+
+model_router = ModelRouter()
@@ -0,0 +1,331 @@
+"""
+PDF 문제 추출 정확도/속도 회귀 검사
+
+실제 워크북 페이지 텍스트(error_log.txt에 남은 페이지와 같은 형식)와 페이지별로 기대하는
+문제 목록(문항 코드)을 모은 코퍼스(fixtures/pdf_pages.jsonl)로 추출 경로를 측정합니다.
+
+- local: 페이지 윈도우(build_parse_units)와 로컬 사전 분류(classify_page)만으로
+  모델에 보낼 파싱 단위와 그 문항 코드를 정하는 경로 (모델 호출 없음)
+- llm: PDF 파싱 에이전트(pdf_parser_root)까지 호출해 문제를 추출하는 경로
+  (precompute.extract_problems와 같은 흐름, 모델 API 키 또는 PROBLEM_FORGE_MODEL_BASE_URL 필요)
+
+경로마다 문항 코드 기준 정밀도/재현율, 초당 처리 페이지 수, 페이지당 모델 호출 수를 보고하고
+기준값(fixtures/pdf_regression_baseline.json)보다 수율이 낮아지거나 페이지당 모델 호출이 늘면
+실패(종료 코드 1)합니다. 초당 처리 페이지 수는 측정 장비마다 달라 보고만 하고 비교하지 않습니다.
+
+    python src/backend/pdf_regression.py                      # local 경로를 기준값과 비교
+    python src/backend/pdf_regression.py --paths local,llm    # 모델 경로 포함
+    python src/backend/pdf_regression.py --write-baseline     # 현재 측정값을 기준값으로 저장
+
+코퍼스 한 줄: {"id", "source", "pages": [페이지 텍스트 또는 {"items": [{"str", "y"}]}], "expected": [문항 코드]}
+(문항 코드를 붙일 수 없는 문제는 expected에 "(문항 코드 없음)"을 문제 수만큼 넣고, 두 경로 모두 코드 없이
+찾은 문제를 같은 표시로 셈)
+("pages" 대신 코퍼스 파일 기준 상대 경로 "pdf"를 주면 PyPDF2로 페이지 텍스트를 읽음)
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+from collections import Counter
+from typing import Any, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+logger = logging.getLogger(__name__)
+
+CORPUS_PATH = os.path.join(BASE_DIR, "fixtures", "pdf_pages.jsonl")
+BASELINE_PATH = os.path.join(BASE_DIR, "fixtures", "pdf_regression_baseline.json")
+
+PATHS = ("local", "llm")
+
+# 문항 코드 없이 찾은(또는 기대하는) 문제 하나를 나타내는 표시
+NO_ITEM_CODE = "(문항 코드 없음)"
+
+# local 경로는 한 번에 수 ms라 여러 번 반복해 처리 속도를 잼
+LOCAL_REPEAT = 50
+
+# 정밀도/재현율과 페이지당 모델 호출 수의 허용 오차
+YIELD_TOLERANCE = 1e-6
+CALLS_TOLERANCE = 1e-6
+
+# 프론트엔드 extractPageText와 같은 줄바꿈 기준 (Y 좌표가 이 값보다 크게 바뀌면 새 줄)
+LINE_Y_TOLERANCE = 2
+
+
+def join_text_items(items: List[Dict[str, Any]], y_tolerance: float = LINE_Y_TOLERANCE) -> str:
+    """
+    pdf.js 텍스트 아이템을 프론트엔드(App.js extractPageText)와 같은 규칙으로 줄 단위 텍스트로 합칩니다.
+
+    Args:
+        items (List[Dict[str, Any]]): {"str": 텍스트, "y": transform[5]} 아이템 목록 (읽는 순서)
+        y_tolerance (float): 같은 줄로 볼 Y 좌표 차이
+
+    Returns:
+        str: 같은 줄의 아이템은 공백으로, 줄은 줄바꿈으로 이은 페이지 텍스트
+    """
+    lines, current, last_y = [], [], None
+    for item in items:
+        if last_y is not None and abs(last_y - item["y"]) > y_tolerance and current:
+            lines.append(" ".join(current))
+            current = []
+        current.append(item["str"])
+        last_y = item["y"]
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+
+def load_corpus(path: str = CORPUS_PATH) -> List[Dict[str, Any]]:
+    """
+    코퍼스 JSONL을 읽어 문서마다 페이지 텍스트 목록(page_texts)을 만듭니다.
+
+    Args:
+        path (str): 코퍼스 파일 경로
+
+    Returns:
+        List[Dict[str, Any]]: id, source, page_texts, expected 문서 목록
+    """
+    documents = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get("pdf"):
+                from precompute import read_pdf_pages
+
+                page_texts = read_pdf_pages(os.path.join(os.path.dirname(path), record["pdf"]))
+            else:
+                page_texts = [join_text_items(page["items"]) if isinstance(page, dict) else page
+                              for page in record["pages"]]
+            documents.append({
+                "id": record["id"],
+                "source": record.get("source", ""),
+                "page_texts": page_texts,
+                "expected": list(record.get("expected") or []),
+            })
+    return documents
+
+
+def score(expected: List[str], found: List[str]) -> Dict[str, Any]:
+    """
+    문항 코드 기준으로 맞게 찾은 문제, 잘못 찾은 문제(중복 포함), 놓친 문제를 셉니다.
+
+    Returns:
+        Dict[str, Any]: true_positives, false_positives, false_negatives, missing, extra
+    """
+    expected_counts, found_counts = Counter(expected), Counter(found)
+    matched = expected_counts & found_counts
+    missing = expected_counts - found_counts
+    extra = found_counts - expected_counts
+    return {
+        "true_positives": sum(matched.values()),
+        "false_positives": sum(extra.values()),
+        "false_negatives": sum(missing.values()),
+        "missing": sorted(missing.elements()),
+        "extra": sorted(extra.elements()),
+    }
+
+
+def summarize(documents: List[Dict[str, Any]], found: Dict[str, List[str]], elapsed: float,
+              model_calls: int, repeat: int = 1) -> Dict[str, Any]:
+    """
+    문서별 추출 결과를 정밀도/재현율, 처리 속도와 페이지당 모델 호출 수로 요약합니다.
+
+    Args:
+        documents (List[Dict[str, Any]]): 코퍼스 문서
+        found (Dict[str, List[str]]): 문서 id → 찾은 문항 코드
+        elapsed (float): 전체 처리 시간 (초, repeat번 반복한 합계)
+        model_calls (int): 한 번 처리할 때의 모델 호출 수
+        repeat (int): 반복 횟수
+
+    Returns:
+        Dict[str, Any]: 요약 지표와 문서별 놓친/잘못 찾은 문항 코드
+    """
+    totals = Counter()
+    misses = {}
+    for document in documents:
+        result = score(document["expected"], found.get(document["id"], []))
+        totals.update({key: result[key] for key in ("true_positives", "false_positives", "false_negatives")})
+        if result["missing"] or result["extra"]:
+            misses[document["id"]] = {"missing": result["missing"], "extra": result["extra"]}
+    pages = sum(len(document["page_texts"]) for document in documents)
+    predicted = totals["true_positives"] + totals["false_positives"]
+    relevant = totals["true_positives"] + totals["false_negatives"]
+    return {
+        "documents": len(documents),
+        "pages": pages,
+        "expected": relevant,
+        "found": predicted,
+        "precision": round(totals["true_positives"] / predicted, 4) if predicted else 1.0,
+        "recall": round(totals["true_positives"] / relevant, 4) if relevant else 1.0,
+        "pages_per_second": round(pages * repeat / elapsed, 1) if elapsed > 0 else None,
+        "model_calls_per_page": round(model_calls / pages, 4) if pages else 0.0,
+        "misses": misses,
+    }
+
+
+def run_local(documents: List[Dict[str, Any]], repeat: int = LOCAL_REPEAT) -> Dict[str, Any]:
+    """
+    local 경로: 모델에 보낼 파싱 단위의 문항 코드를 찾은 문제로 보고 측정합니다.
+
+    모델 호출 수는 사전 분류를 통과해 모델에 보낼 파싱 단위 수입니다.
+    문항 코드가 없는 파싱 단위는 코드 없는 문제 하나로 셉니다.
+    """
+    from pdf_agent.page_window import build_parse_units
+
+    found, model_calls = {}, 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for document in documents:
+            units = [unit for unit in build_parse_units(document["page_texts"])
+                     if unit["classification"]["has_candidate"]]
+            found[document["id"]] = [code for unit in units
+                                     for code in unit["classification"]["item_codes"] or [NO_ITEM_CODE]]
+            model_calls += len(units)
+    elapsed = time.perf_counter() - started
+    return summarize(documents, found, elapsed, model_calls // repeat, repeat)
+
+
+async def run_llm(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    llm 경로: PDF 파싱 에이전트로 문제를 추출해 측정합니다.
+
+    서버와 같게 모델 라우팅과 공용 모델 객체를 적용하고, 실제로 모델을 호출한 횟수
+    (사전 분류 콜백이 건너뛴 호출 제외)를 셉니다.
+    """
+    from metrics import add_agent_callbacks
+    from model_router import route_agent_tree
+    from precompute import extract_problems
+    from warmup import model_warmer
+    from pdf_agent import root_agent as pdf_root_agent
+
+    route_agent_tree(pdf_root_agent, "pdf_agent")
+    model_warmer.share_models(pdf_root_agent)
+    calls = [0]
+
+    def count_model_call(callback_context, llm_request):
+        calls[0] += 1
+        return None
+
+    add_agent_callbacks(pdf_root_agent, "before_model_callback", count_model_call, first=False)
+
+    found = {}
+    started = time.perf_counter()
+    for document in documents:
+        problems = await extract_problems(document["page_texts"])
+        found[document["id"]] = [problem.get("item_code") or NO_ITEM_CODE for problem in problems]
+    elapsed = time.perf_counter() - started
+    return summarize(documents, found, elapsed, calls[0])
+
+
+# 기준값으로 저장하고 비교하는 지표 (장비에 따라 달라지는 처리 속도는 제외)
+BASELINE_METRICS = ("precision", "recall", "model_calls_per_page")
+
+
+def compare_to_baseline(path_name: str, result: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    측정값을 기준값과 비교해 회귀 항목을 반환합니다 (기준값이 없는 경로는 비교하지 않음).
+
+    정밀도/재현율과 페이지당 모델 호출 수만 비교합니다.
+
+    Returns:
+        List[str]: 회귀 설명 목록 (없으면 통과)
+    """
+    expected = baseline.get(path_name)
+    if not expected:
+        return []
+    failures = []
+    for metric in ("precision", "recall"):
+        if result[metric] < expected[metric] - YIELD_TOLERANCE:
+            failures.append(f"[{path_name}] {metric} {result[metric]:.4f} < 기준 {expected[metric]:.4f}")
+    if result["model_calls_per_page"] > expected["model_calls_per_page"] + CALLS_TOLERANCE:
+        failures.append(f"[{path_name}] 페이지당 모델 호출 {result['model_calls_per_page']} > "
+                        f"기준 {expected['model_calls_per_page']}")
+    return failures
+
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    for path_name, result in results.items():
+        print(f"\n== {path_name} ==")
+        print(f"문서 {result['documents']}개, 페이지 {result['pages']}개, 기대 문제 {result['expected']}개, "
+              f"찾은 문제 {result['found']}개")
+        print(f"정밀도 {result['precision']:.4f}  재현율 {result['recall']:.4f}  "
+              f"초당 페이지 {result['pages_per_second']}  페이지당 모델 호출 {result['model_calls_per_page']}")
+        for document_id, miss in result["misses"].items():
+            print(f"  - {document_id}: 놓침 {miss['missing'] or '-'}, 잘못 찾음 {miss['extra'] or '-'}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="PDF 문제 추출 정확도/속도 회귀 검사")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="페이지 코퍼스 JSONL")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="기준값 JSON")
+    parser.add_argument("--paths", default="local", help="측정할 경로 (쉼표 구분: local, llm)")
+    parser.add_argument("--repeat", type=int, default=LOCAL_REPEAT, help="local 경로 반복 횟수")
+    parser.add_argument("--write-baseline", action="store_true", help="측정값을 기준값으로 저장")
+    parser.add_argument("--json", help="측정 결과를 저장할 JSON 파일")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    paths = [name.strip() for name in args.paths.split(",") if name.strip()]
+    unknown = [name for name in paths if name not in PATHS]
+    if unknown:
+        parser.error(f"알 수 없는 경로: {', '.join(unknown)}")
+    if "llm" in paths:
+        from warmup import MODEL_BASE_URL, has_model_credentials
+
+        if not has_model_credentials() and not MODEL_BASE_URL:
+            parser.error("llm 경로에는 모델 API 키 또는 PROBLEM_FORGE_MODEL_BASE_URL이 필요합니다.")
+
+    documents = load_corpus(args.corpus)
+    results = {}
+    if "local" in paths:
+        results["local"] = run_local(documents, max(1, args.repeat))
+    if "llm" in paths:
+        results["llm"] = asyncio.run(run_llm(documents))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    for path_name in results:
+        if path_name not in baseline and not args.write_baseline:
+            print(f"\n⚠️ [{path_name}] 기준값이 없어 비교하지 않습니다 (--write-baseline으로 저장)")
+
+    if args.write_baseline:
+        for path_name, result in results.items():
+            baseline[path_name] = {key: result[key] for key in BASELINE_METRICS}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\n기준값 저장: {args.baseline}")
+        return 0
+
+    failures = [failure for path_name, result in results.items()
+                for failure in compare_to_baseline(path_name, result, baseline)]
+    if failures:
+        print("\n❌ 회귀 발견")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\n✅ 기준값 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
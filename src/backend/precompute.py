@@ -0,0 +1,196 @@
+"""
+워크북 변형 문제 사전 생성 (오프라인 작업)
+
+워크북 PDF 전체를 PDF 파싱 에이전트로 문제 단위로 나누고, 배치 생성기(agent.batch)로
+8개 유형 변형 문제를 만들어 변형 문제 은행(variant_bank.py)에 저장합니다.
+은행에 이미 모든 유형이 있는 지문은 건너뛰므로 같은 워크북을 다시 돌려도 새 문제만 생성합니다.
+
+    python src/backend/precompute.py workbook.pdf --source "2025 수능특강 영어"
+    python src/backend/precompute.py passages.jsonl   # {"text", "item_code"?, "page"?} 한 줄에 지문 하나
+"""
+
+import os
+import re
+import sys
+import json
+import uuid
+import asyncio
+import logging
+import argparse
+from typing import Any, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from variant_bank import BANK_PATH, VariantBank, find_item_code
+from variants import VARIANT_AGENT_NAMES
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = "pdf_precompute"
+
+# 동시에 파싱할 단위 수
+PARSE_CONCURRENCY = 4
+
+JSON_OBJECT_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def read_pdf_pages(pdf_path: str) -> List[str]:
+    """PDF의 페이지별 텍스트를 읽습니다 (1페이지부터 순서대로)."""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(pdf_path)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def parse_problems_response(text: str) -> List[Dict[str, Any]]:
+    """PDF 파싱 에이전트 응답(JSON)에서 problems 목록을 꺼냅니다."""
+    match = JSON_OBJECT_PATTERN.search(text or "")
+    try:
+        data = json.loads(match.group(0)) if match else {}
+    except json.JSONDecodeError:
+        return []
+    problems = data.get("problems") if isinstance(data, dict) else None
+    return [problem for problem in problems or [] if isinstance(problem, dict) and problem.get("full_text")]
+
+
+async def extract_problems(page_texts: List[str], concurrency: int = PARSE_CONCURRENCY) -> List[Dict[str, Any]]:
+    """
+    페이지 텍스트를 파싱 단위로 나눠 PDF 파싱 에이전트로 영어 문제를 추출합니다.
+
+    Args:
+        page_texts (List[str]): 페이지별 텍스트
+        concurrency (int): 동시에 파싱할 단위 수
+
+    Returns:
+        List[Dict[str, Any]]: {"text", "item_code", "page"} 문제 목록 (페이지 순서)
+    """
+    from google.adk.runners import Runner
+    from google.adk.sessions import InMemorySessionService
+    from google.genai import types
+
+    from pdf_agent import root_agent as pdf_root_agent
+    from pdf_agent.page_window import build_parse_units
+
+    units = [unit for unit in build_parse_units(page_texts) if unit["classification"]["has_candidate"]]
+    session_service = InMemorySessionService()
+    runner = Runner(app_name=APP_NAME, agent=pdf_root_agent, session_service=session_service)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def parse_unit(unit: Dict[str, Any]) -> List[Dict[str, Any]]:
+        async with semaphore:
+            session = await session_service.create_session(
+                app_name=APP_NAME, user_id="precompute", session_id=uuid.uuid4().hex
+            )
+            message = types.Content(role="user", parts=[types.Part(text=unit["text"])])
+            final_text = ""
+            async for event in runner.run_async(user_id="precompute", session_id=session.id, new_message=message):
+                if event.content and event.content.parts and not event.partial:
+                    text = "".join(part.text for part in event.content.parts if part.text)
+                    if text:
+                        final_text = text
+        return [{
+            "text": problem["full_text"],
+            "item_code": find_item_code(str(problem.get("problem_id") or "")) or find_item_code(problem["full_text"]),
+            "page": unit["pages"][0],
+        } for problem in parse_problems_response(final_text)]
+
+    results = await asyncio.gather(*(parse_unit(unit) for unit in units), return_exceptions=True)
+    problems = []
+    for unit, result in zip(units, results):
+        if isinstance(result, BaseException):
+            logger.warning(f"⚠️ 파싱 단위 {unit['unit_id']} 처리 실패: {result!r}")
+            continue
+        problems.extend(result)
+    logger.info(f"📄 페이지 {len(page_texts)}개, 파싱 단위 {len(units)}개에서 문제 {len(problems)}개 추출")
+    return sorted(problems, key=lambda problem: problem["page"])
+
+
+def load_passage_records(path: str) -> List[Dict[str, Any]]:
+    """입력 JSONL에서 지문 목록을 읽습니다 ({"text", "item_code"?, "page"?})."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                records.append({"text": record["text"], "item_code": record.get("item_code"), "page": record.get("page")})
+    return records
+
+
+async def precompute(problems: List[Dict[str, Any]], bank: VariantBank, agent_names: List[str],
+                     source: str = None, force: bool = False) -> Dict[str, int]:
+    """
+    문제 목록의 변형 문제를 생성해 은행에 저장합니다.
+
+    Args:
+        problems (List[Dict[str, Any]]): {"text", "item_code", "page"} 문제 목록
+        bank (VariantBank): 저장할 변형 문제 은행
+        agent_names (List[str]): 생성할 유형별 에이전트 이름
+        source (str): 출처 (워크북 이름 등)
+        force (bool): 은행에 있는 지문도 다시 생성할지 여부
+
+    Returns:
+        Dict[str, int]: passages, skipped, stored, failed 개수
+    """
+    from agent.batch import BatchGenerator
+
+    items, seen, skipped = [], set(), 0
+    for problem in problems:
+        passage_id = bank.add_passage(problem["text"], problem.get("item_code"), source, problem.get("page"))
+        if passage_id in seen:
+            continue
+        seen.add(passage_id)
+        existing = bank.lookup(problem["text"])["variants"]
+        if not force and all(name in existing for name in agent_names):
+            skipped += 1
+            continue
+        items.append({"id": passage_id, "text": problem["text"]})
+
+    stored = failed = 0
+    if items:
+        outputs = await BatchGenerator().generate(items, agent_names)
+        for output in outputs:
+            variants = {name: json.dumps(result, ensure_ascii=False) for name, result in output["variants"].items()}
+            stored += bank.add_variants(output["id"], variants)
+            failed += len(output["errors"])
+    return {"passages": len(seen), "skipped": skipped, "stored": stored, "failed": failed}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="워크북의 변형 문제를 미리 생성해 변형 문제 은행에 저장합니다.")
+    parser.add_argument("input", help="워크북 PDF 또는 지문 JSONL")
+    parser.add_argument("--bank", default=BANK_PATH, help="변형 문제 은행 SQLite 경로")
+    parser.add_argument("--source", help="출처 이름 (기본: 입력 파일 이름)")
+    parser.add_argument("--types", default=",".join(VARIANT_AGENT_NAMES),
+                        help="생성할 유형별 에이전트 이름 (쉼표 구분, 기본: 8개 유형 모두)")
+    parser.add_argument("--force", action="store_true", help="은행에 있는 지문도 다시 생성")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    agent_names = [name.strip() for name in args.types.split(",") if name.strip()]
+    unknown = [name for name in agent_names if name not in VARIANT_AGENT_NAMES]
+    if unknown:
+        parser.error(f"알 수 없는 유형: {', '.join(unknown)}")
+
+    if args.input.lower().endswith(".pdf"):
+        problems = asyncio.run(extract_problems(read_pdf_pages(args.input)))
+    else:
+        problems = load_passage_records(args.input)
+
+    bank = VariantBank(args.bank)
+    stats = asyncio.run(precompute(problems, bank, agent_names, args.source or os.path.basename(args.input), args.force))
+    logger.info(
+        f"✅ 사전 생성 완료: 지문 {stats['passages']}개 (은행에 있어 건너뜀 {stats['skipped']}개), "
+        f"저장 {stats['stored']}건, 실패 {stats['failed']}건 → {args.bank}"
+    )
+    bank.close()
+    return 0 if stats["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
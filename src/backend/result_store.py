@@ -0,0 +1,336 @@
+"""
+완료된 생성 결과의 압축 저장소
+
+8개 유형 결과와 마스터 출력, run 이벤트 로그에는 같은 원본 지문이 여러 번 반복되므로
+완료된 run을 JSON 파일 그대로 두면 정보량의 몇 배를 디스크에 씁니다. 완료된 run은 다음처럼 저장합니다.
+
+- 원본 지문은 본문 해시로 한 번만 저장하고, 결과/이벤트 안의 지문은 참조 표시로 바꿈
+- 유형별 결과는 모델이 출력한 텍스트를 그대로 저장 (읽을 때 같은 문자열을 돌려줌)
+- 전체 결과 마크다운이 유형별 결과로 조립한 것과 같으면 저장하지 않고 읽을 때 다시 조립
+- 모든 레코드는 msgpack + zstd로 압축 (설치되어 있지 않으면 JSON + zlib)
+
+    python src/backend/result_store.py --compact   # 기존 run JSON 파일을 압축 저장소로 옮김
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from metrics import registry
+from variants import render_variants_markdown
+
+try:
+    import zstandard
+except ImportError:  # zstandard는 선택 의존성
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack은 선택 의존성
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+RESULT_STORE_PATH = os.getenv(
+    "PROBLEM_FORGE_RESULT_STORE",
+    os.path.join(BASE_DIR, "data", "results.sqlite3"),
+)
+
+# 완료된 run 압축 저장 여부 (PROBLEM_FORGE_RESULT_STORE_ENABLED=0 이면 JSON 파일로 보관)
+RESULT_STORE_ENABLED = os.getenv("PROBLEM_FORGE_RESULT_STORE_ENABLED", "1") != "0"
+
+ZSTD_LEVEL = 9
+# 이보다 짧은 입력은 참조로 바꿔도 줄어드는 양이 없어 그대로 둠
+MIN_PASSAGE_CHARS = 64
+# 결과/이벤트 안의 원본 지문 자리 (일반 텍스트에는 나오지 않는 NUL 문자로 감쌈)
+PASSAGE_REF = "\x00passage\x00"
+
+# 레코드 앞 2바이트: 압축 방식 (z: zstd, d: zlib) + 직렬화 방식 (m: msgpack, j: JSON)
+CODEC_ZSTD = b"z"
+CODEC_ZLIB = b"d"
+FORMAT_MSGPACK = b"m"
+FORMAT_JSON = b"j"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS passages (
+    passage_hash TEXT PRIMARY KEY,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    passage_hash TEXT REFERENCES passages (passage_hash),
+    created_at REAL,
+    raw_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    meta BLOB NOT NULL,
+    events BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    run_id TEXT NOT NULL REFERENCES runs (run_id),
+    variant TEXT NOT NULL,
+    record BLOB NOT NULL,
+    PRIMARY KEY (run_id, variant)
+) WITHOUT ROWID;
+"""
+
+store_bytes = registry.counter("result_store_bytes_total", "압축 저장소에 옮긴 run의 저장 전후 바이트 수", ("stage",))
+
+
+def encode(value: Any) -> bytes:
+    """값을 직렬화해 압축합니다 (앞 2바이트에 방식 표시)."""
+    if msgpack is not None:
+        fmt, payload = FORMAT_MSGPACK, msgpack.packb(value, use_bin_type=True)
+    else:
+        fmt, payload = FORMAT_JSON, json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if zstandard is not None:
+        return CODEC_ZSTD + fmt + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+    return CODEC_ZLIB + fmt + zlib.compress(payload, 9)
+
+
+def decode(blob: bytes) -> Any:
+    """
+    encode로 만든 레코드를 풉니다.
+
+    Raises:
+        RuntimeError: 레코드를 만든 압축/직렬화 모듈이 설치되어 있지 않은 경우
+    """
+    codec, fmt, payload = blob[:1], blob[1:2], blob[2:]
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstd로 압축된 결과를 읽으려면 zstandard 패키지가 필요합니다.")
+        payload = zstandard.ZstdDecompressor().decompress(payload)
+    else:
+        payload = zlib.decompress(payload)
+    if fmt == FORMAT_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("msgpack으로 저장된 결과를 읽으려면 msgpack 패키지가 필요합니다.")
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def swap_text(value: Any, old: str, new: str) -> Any:
+    """중첩된 dict/list 안의 모든 문자열에서 old를 new로 바꿉니다."""
+    if isinstance(value, str):
+        return value.replace(old, new) if old in value else value
+    if isinstance(value, dict):
+        return {key: swap_text(item, old, new) for key, item in value.items()}
+    if isinstance(value, list):
+        return [swap_text(item, old, new) for item in value]
+    return value
+
+
+def passage_hash_for(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def _variant_text(record: Dict[str, Any]) -> str:
+    # 예전 레코드는 파싱한 구조({"data"})로 저장되어 있어 원래 문자열을 복원할 수 없음
+    if "data" in record:
+        return json.dumps(record["data"], ensure_ascii=False, indent=2)
+    return record["text"]
+
+
+class ResultStore:
+    """완료된 run의 메타데이터, 유형별 결과, 이벤트 로그를 압축해 보관하는 저장소"""
+
+    def __init__(self, path: str = RESULT_STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def has_run(self, run_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def save_run(self, meta: Dict[str, Any], events: List[Dict[str, Any]]) -> Tuple[int, int]:
+        """
+        완료된 run을 저장합니다 (같은 run id는 덮어씀).
+
+        Args:
+            meta (Dict[str, Any]): run 메타데이터 (input_text, variants, result 포함)
+            events (List[Dict[str, Any]]): {"id", "event"} 이벤트 기록 목록
+
+        Returns:
+            Tuple[int, int]: (JSON 파일로 저장했을 때 바이트 수, 압축 저장한 바이트 수)
+        """
+        raw_bytes = len(json.dumps(meta, ensure_ascii=False).encode("utf-8")) + sum(
+            len(json.dumps(record, ensure_ascii=False).encode("utf-8")) + 1 for record in events
+        )
+        passage = (meta.get("input_text") or "").strip()
+        passage_hash = passage_hash_for(passage) if len(passage) >= MIN_PASSAGE_CHARS else None
+
+        def compact(value: Any) -> Any:
+            return swap_text(value, passage, PASSAGE_REF) if passage_hash else value
+
+        variants = meta.get("variants") or {}
+        compact_meta = compact({key: value for key, value in meta.items() if key not in ("variants", "result")})
+        result = meta.get("result")
+        # 유형별 결과로 다시 조립할 수 있는 마크다운은 저장하지 않음
+        if result is not None and result == render_variants_markdown(variants, meta.get("input_text") or ""):
+            compact_meta["result_rendered"] = True
+        else:
+            compact_meta["result"] = compact(result)
+
+        meta_blob = encode(compact_meta)
+        events_blob = encode(compact(events))
+        variant_rows = [(meta["run_id"], name, encode(compact({"text": text}))) for name, text in variants.items()]
+        passage_blob = encode(passage) if passage_hash else None
+        stored_bytes = len(meta_blob) + len(events_blob) + sum(len(row[2]) for row in variant_rows)
+
+        with self._lock, self._conn:
+            if passage_hash:
+                inserted = self._conn.execute(
+                    "INSERT OR IGNORE INTO passages (passage_hash, body) VALUES (?, ?)", (passage_hash, passage_blob)
+                ).rowcount
+                stored_bytes += len(passage_blob) if inserted else 0
+            self._conn.execute("DELETE FROM variants WHERE run_id = ?", (meta["run_id"],))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, passage_hash, created_at, raw_bytes, stored_bytes, meta, events) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (meta["run_id"], passage_hash, meta.get("created_at"), raw_bytes, stored_bytes, meta_blob, events_blob),
+            )
+            self._conn.executemany("INSERT INTO variants (run_id, variant, record) VALUES (?, ?, ?)", variant_rows)
+        store_bytes.inc("raw", amount=raw_bytes)
+        store_bytes.inc("stored", amount=stored_bytes)
+        return raw_bytes, stored_bytes
+
+    def _passage(self, passage_hash: Optional[str]) -> Optional[str]:
+        if not passage_hash:
+            return None
+        row = self._conn.execute("SELECT body FROM passages WHERE passage_hash = ?", (passage_hash,)).fetchone()
+        return decode(row[0]) if row else None
+
+    def load_meta(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """run 메타데이터를 읽습니다 (유형별 결과와 결과 마크다운 복원, 없으면 None)."""
+        with self._lock:
+            row = self._conn.execute("SELECT passage_hash, meta FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            passage = self._passage(row[0])
+            variant_rows = self._conn.execute(
+                "SELECT variant, record FROM variants WHERE run_id = ?", (run_id,)
+            ).fetchall()
+
+        def restore(value: Any) -> Any:
+            return swap_text(value, PASSAGE_REF, passage) if passage is not None else value
+
+        meta = restore(decode(row[1]))
+        meta["variants"] = {name: _variant_text(restore(decode(record))) for name, record in variant_rows}
+        if meta.pop("result_rendered", False):
+            meta["result"] = render_variants_markdown(meta["variants"], meta.get("input_text") or "")
+        else:
+            meta["result"] = restore(meta.get("result"))
+        return meta
+
+    def load_events(self, run_id: str) -> Optional[List[Dict[str, Any]]]:
+        """run 이벤트 기록({"id", "event"}) 목록을 읽습니다 (없으면 None)."""
+        with self._lock:
+            row = self._conn.execute("SELECT passage_hash, events FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is None:
+                return None
+            passage = self._passage(row[0])
+        events = decode(row[1])
+        return swap_text(events, PASSAGE_REF, passage) if passage is not None else events
+
+    def stats(self) -> Dict[str, Any]:
+        """저장한 run 수, 지문 수와 JSON 파일 대비 저장 크기 비율"""
+        with self._lock:
+            runs, raw_bytes, run_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), "
+                "COALESCE(SUM(LENGTH(meta) + LENGTH(events)), 0) FROM runs"
+            ).fetchone()
+            variant_bytes = self._conn.execute("SELECT COALESCE(SUM(LENGTH(record)), 0) FROM variants").fetchone()[0]
+            passages, passage_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM passages"
+            ).fetchone()
+        stored_bytes = run_bytes + variant_bytes + passage_bytes
+        return {
+            "runs": runs,
+            "passages": passages,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else None,
+            "codec": f"{'msgpack' if msgpack else 'json'}+{'zstd' if zstandard else 'zlib'}",
+        }
+
+
+def compact_runs_dir(store: ResultStore, runs_dir: str) -> Dict[str, int]:
+    """
+    runs 디렉토리의 완료된 run JSON 파일을 압축 저장소로 옮기고 원래 파일을 지웁니다.
+
+    Args:
+        store (ResultStore): 옮길 저장소
+        runs_dir (str): run JSON 파일 디렉토리
+
+    Returns:
+        Dict[str, int]: runs, raw_bytes, stored_bytes
+    """
+    from runs import FINISHED_STATUSES
+
+    totals = {"runs": 0, "raw_bytes": 0, "stored_bytes": 0}
+    for name in sorted(os.listdir(runs_dir)):
+        if not name.endswith(".json"):
+            continue
+        meta_path = os.path.join(runs_dir, name)
+        events_path = meta_path[:-len(".json")] + ".events.jsonl"
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("status") not in FINISHED_STATUSES:
+            continue
+        events = []
+        if os.path.exists(events_path):
+            with open(events_path, "r", encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        raw_bytes, stored_bytes = store.save_run(meta, events)
+        for path in (meta_path, events_path):
+            if os.path.exists(path):
+                os.remove(path)
+        totals["runs"] += 1
+        totals["raw_bytes"] += raw_bytes
+        totals["stored_bytes"] += stored_bytes
+    return totals
+
+
+def main(argv: List[str] = None) -> int:
+    from runs import RUNS_DIR
+
+    parser = argparse.ArgumentParser(description="완료된 생성 결과 압축 저장소의 크기를 보고하거나 기존 run 파일을 옮깁니다.")
+    parser.add_argument("--store", default=RESULT_STORE_PATH, help="압축 저장소 SQLite 경로")
+    parser.add_argument("--compact", action="store_true", help="runs 디렉토리의 run JSON 파일을 저장소로 옮김")
+    parser.add_argument("--runs-dir", default=RUNS_DIR, help="run JSON 파일 디렉토리")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    store = ResultStore(args.store)
+    if args.compact:
+        started = time.perf_counter()
+        totals = compact_runs_dir(store, args.runs_dir)
+        logger.info(f"🗜️ run {totals['runs']}개 이동: {totals['raw_bytes']:,} → {totals['stored_bytes']:,} 바이트 "
+                    f"({time.perf_counter() - started:.1f}초)")
+    print(json.dumps(store.stats(), ensure_ascii=False, indent=2))
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
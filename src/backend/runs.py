@@ -0,0 +1,542 @@
+"""
+재개 가능한 생성 실행(run) 관리
+
+변형 문제 생성을 서버 측 run id를 가진 백그라운드 작업으로 실행하고,
+발생한 ADK 이벤트를 순번과 함께 디스크(JSONL)에 기록합니다 (완료되면 압축 저장소로 옮김).
+클라이언트 연결이 끊겨도 실행은 계속되며, 마지막으로 받은 이벤트 id 이후부터
+다시 받거나 완료된 결과만 나중에 조회할 수 있습니다. 에이전트는 다시 실행하지 않습니다.
+완료된 run의 유형별 결과를 보관해 두었다가, 한 유형만 다시 생성하는 run도 만들 수 있습니다.
+변형 문제 은행에 모든 유형이 미리 생성된 지문은 에이전트를 실행하지 않고 바로 완료됩니다.
+run 전용 세션(유형 다시 생성)은 run이 끝나면 지우고, 채팅 세션은 한동안 쓰이지 않으면 지웁니다.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import sqlite3
+import importlib
+from contextlib import nullcontext
+from typing import Dict, Any, List, Optional, AsyncIterator, Set, Tuple
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event, EventActions
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+from admission import AdmissionController
+from result_store import ResultStore
+from tracing import SPAN_KIND_RUN, SPAN_KIND_SESSION, span
+from usage import (
+    BUDGET_MODE_REDUCED, SESSION_ID_STATE_KEY, BudgetExceeded, UsageMeter, allowed_variants, current_budget_mode,
+)
+from variant_bank import VariantBank
+from variants import VARIANT_AGENT_NAMES, extract_variants, render_variants_markdown
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = os.getenv(
+    "PROBLEM_FORGE_RUNS_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "runs"),
+)
+
+# 메모리에 유지할 완료된 run 개수 (초과분은 디스크에서 다시 읽음)
+MAX_CACHED_RUNS = 100
+
+# 마지막 run이 끝난 뒤 이 시간(초) 동안 새 run이 없는 채팅 세션은 메모리에서 지움
+SESSION_IDLE_SECONDS = float(os.getenv("PROBLEM_FORGE_RUN_SESSION_IDLE_SECONDS", "3600"))
+
+RUN_STATUS_RUNNING = "running"
+RUN_STATUS_COMPLETED = "completed"
+RUN_STATUS_FAILED = "failed"
+RUN_STATUS_INTERRUPTED = "interrupted"
+FINISHED_STATUSES = (RUN_STATUS_COMPLETED, RUN_STATUS_FAILED, RUN_STATUS_INTERRUPTED)
+
+
+def extract_final_result(events: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    이벤트 목록에서 최종 변형 결과 텍스트를 추출합니다.
+
+    프론트엔드 runSingleAgentCall과 같은 규칙을 따릅니다: 에이전트 도구의
+    functionResponse 결과를 우선 사용하고, 더 긴 모델 텍스트가 있으면 그것을 사용합니다.
+
+    Args:
+        events (List[Dict[str, Any]]): ADK 이벤트(JSON) 목록
+
+    Returns:
+        Optional[str]: 최종 결과 텍스트 (없으면 None)
+    """
+    final_result = None
+    for event in events:
+        content = event.get("content") or {}
+        parts = content.get("parts") or [{}]
+        if content.get("role") == "user":
+            function_response = parts[0].get("functionResponse") or {}
+            result = (function_response.get("response") or {}).get("result")
+            if isinstance(result, str) and result:
+                final_result = result
+        if content.get("role") == "model" and not event.get("partial"):
+            text = parts[0].get("text")
+            if text and (not final_result or len(text) > len(final_result)):
+                final_result = text
+    return final_result
+
+
+def find_agent(agent: Any, name: str) -> Optional[Any]:
+    """
+    에이전트 트리에서 이름으로 에이전트를 찾습니다 (AgentTool로 감싼 에이전트 포함).
+
+    Args:
+        agent: 탐색을 시작할 에이전트
+        name (str): 찾을 에이전트 이름
+
+    Returns:
+        Optional[Any]: 찾은 에이전트 (없으면 None)
+    """
+    if agent.name == name:
+        return agent
+    children = list(agent.sub_agents or [])
+    children += [tool.agent for tool in getattr(agent, "tools", None) or [] if isinstance(tool, AgentTool)]
+    for child in children:
+        found = find_agent(child, name)
+        if found is not None:
+            return found
+    return None
+
+
+def _append_line(path: str, line: str) -> None:
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+class RunManager:
+    """생성 실행을 백그라운드에서 수행하고 이벤트 로그를 보관하는 관리자"""
+
+    def __init__(self, app_name: str = "agent", agent_module: str = "agent", runs_dir: str = RUNS_DIR,
+                 admission: Optional[AdmissionController] = None, variant_bank: Optional[VariantBank] = None,
+                 usage_meter: Optional[UsageMeter] = None, result_store: Optional[ResultStore] = None):
+        self.app_name = app_name
+        self.agent_module = agent_module
+        self.runs_dir = runs_dir
+        self.session_service = InMemorySessionService()
+        # 동시 실행 수/대기열 한도 (없으면 제한 없음)
+        self.admission = admission
+        # 미리 생성한 변형 문제 은행 (없으면 항상 에이전트 실행)
+        self.variant_bank = variant_bank
+        # 사용자별 예산 확인 (없으면 제한 없음)
+        self.usage_meter = usage_meter
+        # 완료된 run을 압축해 보관할 저장소 (없으면 JSON 파일로 보관)
+        self.result_store = result_store
+        self._runners: Dict[str, Runner] = {}
+        self._runs: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # 압축 저장소로 옮기는 중인 작업 (끝나기 전에 가비지 컬렉션되지 않도록 참조 유지)
+        self._archive_tasks: Set[asyncio.Task] = set()
+        # (user_id, session_id) → 실행 중인 run 수 / 마지막 run이 끝난 시각
+        self._session_runs: Dict[Tuple[str, str], int] = {}
+        self._session_last_used: Dict[Tuple[str, str], float] = {}
+        # 현재 이벤트 스트림을 받고 있는 클라이언트 수
+        self.active_streams = 0
+        os.makedirs(self.runs_dir, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # 저장소
+    # ------------------------------------------------------------------
+    def _meta_path(self, run_id: str) -> str:
+        return os.path.join(self.runs_dir, f"{run_id}.json")
+
+    def _events_path(self, run_id: str) -> str:
+        return os.path.join(self.runs_dir, f"{run_id}.events.jsonl")
+
+    def _save_meta(self, run: Dict[str, Any]) -> None:
+        meta = run["meta"]
+        with open(self._meta_path(meta["run_id"]), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    async def _archive_run(self, run: Dict[str, Any]) -> None:
+        """
+        완료된 run을 압축 저장소로 옮기고 실행 중에 쓰던 JSON 파일을 지웁니다.
+
+        압축과 SQLite 쓰기는 이벤트 루프를 막지 않도록 별도 스레드에서 실행합니다.
+        옮기는 동안에는 JSON 파일에서 읽고, 옮기지 못하면 JSON 파일로 계속 보관합니다.
+        """
+        meta = run["meta"]
+        if self.result_store is None or meta["status"] not in FINISHED_STATUSES:
+            return
+        try:
+            raw_bytes, stored_bytes = await asyncio.to_thread(self.result_store.save_run, meta, list(run["events"]))
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 결과 압축 저장 실패 [{meta['run_id']}]: {e}")
+            return
+        for path in (self._meta_path(meta["run_id"]), self._events_path(meta["run_id"])):
+            if os.path.exists(path):
+                os.remove(path)
+        logger.debug(f"🗜️ 결과 압축 저장 [{meta['run_id']}] {raw_bytes:,} → {stored_bytes:,} 바이트")
+
+    def _read_meta(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """실행 중 JSON 파일 또는 압축 저장소에서 run 메타데이터를 읽습니다."""
+        if not run_id.isalnum():
+            return None
+        if os.path.exists(self._meta_path(run_id)):
+            with open(self._meta_path(run_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        return self.result_store.load_meta(run_id) if self.result_store is not None else None
+
+    def _load_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """디스크에서 run 메타데이터와 이벤트 로그를 읽어옵니다."""
+        meta = self._read_meta(run_id)
+        if meta is None:
+            return None
+        events = []
+        if os.path.exists(self._events_path(run_id)):
+            with open(self._events_path(run_id), "r", encoding="utf-8") as f:
+                events = [json.loads(line) for line in f if line.strip()]
+        elif self.result_store is not None:
+            events = self.result_store.load_events(run_id) or []
+        # 서버 재시작 등으로 중단된 실행
+        if meta["status"] == RUN_STATUS_RUNNING and run_id not in self._tasks:
+            meta["status"] = RUN_STATUS_INTERRUPTED
+        run = {"meta": meta, "events": events, "condition": asyncio.Condition()}
+        self._runs[run_id] = run
+        self._evict_finished_runs()
+        return run
+
+    def _evict_finished_runs(self) -> None:
+        finished = [run_id for run_id, run in self._runs.items()
+                    if run["meta"]["status"] in FINISHED_STATUSES]
+        for run_id in finished[:max(0, len(self._runs) - MAX_CACHED_RUNS)]:
+            del self._runs[run_id]
+
+    def load_meta(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """run 메타데이터만 읽습니다 (이벤트 로그를 읽지 않고 메모리에도 올리지 않음)."""
+        run = self._runs.get(run_id)
+        if run is not None:
+            return run["meta"]
+        return self._read_meta(run_id)
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """run 정보를 반환합니다 (메모리에 없으면 디스크에서 로드)."""
+        return self._runs.get(run_id) or self._load_run(run_id)
+
+    # ------------------------------------------------------------------
+    # 실행
+    # ------------------------------------------------------------------
+    def _get_runner(self, agent_name: Optional[str] = None) -> Runner:
+        """root_agent(또는 이름으로 찾은 하위 에이전트)를 실행하는 Runner를 반환합니다."""
+        key = agent_name or ""
+        if key not in self._runners:
+            root_agent = importlib.import_module(self.agent_module).root_agent
+            agent = find_agent(root_agent, agent_name) if agent_name else root_agent
+            if agent is None:
+                raise ValueError(f"에이전트를 찾을 수 없습니다: {agent_name}")
+            self._runners[key] = Runner(
+                app_name=self.app_name,
+                agent=agent,
+                session_service=self.session_service,
+            )
+        return self._runners[key]
+
+    async def _prepare_session(self, user_id: str, session_id: str, run_id: str) -> None:
+        """세션을 준비하고 세션 id를 세션 상태에 기록합니다 (사용량 기록용)."""
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            session = await self.session_service.create_session(
+                app_name=self.app_name, user_id=user_id, session_id=session_id
+            )
+        await self.session_service.append_event(session, Event(
+            invocation_id=f"run-{run_id}",
+            author="user",
+            actions=EventActions(state_delta={SESSION_ID_STATE_KEY: session_id}),
+        ))
+
+    async def _release_session(self, meta: Dict[str, Any]) -> None:
+        """run이 끝난 세션을 정리합니다 (run 전용 세션은 바로, 채팅 세션은 오래 쓰이지 않으면 삭제)."""
+        key = (meta["user_id"], meta["session_id"])
+        remaining = self._session_runs.get(key, 1) - 1
+        if remaining > 0:
+            self._session_runs[key] = remaining
+        else:
+            self._session_runs.pop(key, None)
+        if meta.get("parent_run_id"):
+            await self._delete_session(*key)
+        else:
+            self._session_last_used[key] = time.time()
+        cutoff = time.time() - SESSION_IDLE_SECONDS
+        idle = [key for key, last_used in self._session_last_used.items()
+                if last_used < cutoff and key not in self._session_runs]
+        for user_id, session_id in idle:
+            await self._delete_session(user_id, session_id)
+
+    async def _delete_session(self, user_id: str, session_id: str) -> None:
+        self._session_last_used.pop((user_id, session_id), None)
+        try:
+            await self.session_service.delete_session(
+                app_name=self.app_name, user_id=user_id, session_id=session_id
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ 세션 삭제 실패 [{session_id}]: {e}")
+
+    def _bind_run_id(self, run_id: str) -> None:
+        """
+        토큰 사용량 집계의 run id 컨텍스트 변수에 현재 run을 설정합니다.
+
+        run마다 별도 작업(task)에서 실행되므로 같은 세션의 다른 run과 값이 섞이지 않습니다.
+        """
+        from agent.token_usage import current_run_id
+        current_run_id.set(run_id)
+
+    def _pop_token_usage(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """run의 토큰 사용량 집계를 꺼냅니다 (기록이 없으면 None)."""
+        from agent.token_usage import pop_token_usage
+        return pop_token_usage(run_id)
+
+    async def _append_event(self, run: Dict[str, Any], event_json: str) -> None:
+        run_id = run["meta"]["run_id"]
+        record = {"id": len(run["events"]) + 1, "event": json.loads(event_json)}
+        # 스트리밍 조각마다 호출되므로 파일 쓰기는 이벤트 루프 밖에서 처리 (run의 이벤트는 순서대로 기다리며 기록)
+        await asyncio.to_thread(_append_line, self._events_path(run_id), json.dumps(record, ensure_ascii=False))
+        async with run["condition"]:
+            run["events"].append(record)
+            run["condition"].notify_all()
+
+    async def _finish(self, run: Dict[str, Any], status: str, error: Optional[str] = None) -> None:
+        meta = run["meta"]
+        meta["status"] = status
+        meta["finished_at"] = time.time()
+        meta["event_count"] = len(run["events"])
+        meta["token_usage"] = self._pop_token_usage(meta["run_id"])
+        events = [record["event"] for record in run["events"]]
+        if meta.get("parent_run_id"):
+            # 다시 생성한 유형만 바꾸고 나머지 유형은 원래 run의 결과를 재사용
+            parent = self.get_run(meta["parent_run_id"])
+            variants = dict(parent["meta"].get("variants") or {}) if parent else {}
+            regenerated = extract_variants(events).get(meta["variant"]) or extract_final_result(events)
+            if regenerated:
+                variants[meta["variant"]] = regenerated
+            meta["variants"] = variants
+            meta["result"] = render_variants_markdown(variants, meta["input_text"]) if regenerated else None
+        else:
+            meta["variants"] = extract_variants(events)
+            if meta.get("budget_mode") == BUDGET_MODE_REDUCED:
+                # 예산 때문에 건너뛴 유형의 안내 문구는 결과로 보관하지 않음
+                allowed = allowed_variants(BUDGET_MODE_REDUCED)
+                meta["variants"] = {name: text for name, text in meta["variants"].items() if name in allowed}
+            meta["result"] = extract_final_result(events)
+        if error:
+            meta["error"] = error
+        self._save_meta(run)
+        async with run["condition"]:
+            run["condition"].notify_all()
+        await self._archive_run(run)
+
+    async def _execute(self, run: Dict[str, Any], text: str, streaming: bool) -> None:
+        meta = run["meta"]
+        with span("run", SPAN_KIND_RUN, run_id=meta["run_id"], variant=meta.get("variant") or "") as run_span:
+            meta["trace_id"] = run_span.trace_id
+            self._bind_run_id(meta["run_id"])
+            # 이 run의 모델 호출에만 시작할 때 정한 예산 단계를 적용
+            current_budget_mode.set(meta.get("budget_mode"))
+            try:
+                # start_run에서 예약한 대기열 자리에서 실행 슬롯이 날 때까지 대기
+                async with self.admission.admitted() if self.admission else nullcontext():
+                    with span("session", SPAN_KIND_SESSION, session_id=meta["session_id"]):
+                        await self._prepare_session(meta["user_id"], meta["session_id"], meta["run_id"])
+                    run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
+                    new_message = types.Content(role="user", parts=[types.Part(text=text)])
+                    async for event in self._get_runner(meta.get("variant")).run_async(
+                        user_id=meta["user_id"],
+                        session_id=meta["session_id"],
+                        new_message=new_message,
+                        run_config=run_config,
+                    ):
+                        await self._append_event(run, event.model_dump_json(exclude_none=True, by_alias=True))
+                run_span.attributes["event_count"] = len(run["events"])
+                await self._finish(run, RUN_STATUS_COMPLETED)
+                logger.info(f"✅ 생성 실행 완료 [{meta['run_id']}] 이벤트 {len(run['events'])}개")
+            except Exception as e:
+                logger.error(f"❌ 생성 실행 실패 [{meta['run_id']}]: {e}")
+                run_span.status = "error"
+                run_span.attributes["error"] = str(e)[:500]
+                await self._finish(run, RUN_STATUS_FAILED, str(e))
+            finally:
+                self._tasks.pop(meta["run_id"], None)
+                self._evict_finished_runs()
+                await self._release_session(meta)
+
+    def start_run(self, user_id: str, session_id: str, text: str, streaming: bool = False) -> Dict[str, Any]:
+        """
+        새 생성 실행을 백그라운드에서 시작합니다.
+
+        Args:
+            user_id (str): 사용자 ID
+            session_id (str): ADK 세션 ID
+            text (str): 사용자 입력 (지문/문제)
+            streaming (bool): 모델 부분 응답(partial) 이벤트까지 기록할지 여부
+
+        Returns:
+            Dict[str, Any]: run 메타데이터
+
+        Raises:
+            Overloaded: 실행 중 + 대기 중 run이 한도에 도달한 경우
+            BudgetExceeded: 은행에 없는 지문인데 사용자가 이번 달 예산을 넘은 경우
+        """
+        run_id = uuid.uuid4().hex
+        meta = {
+            "run_id": run_id,
+            "app_name": self.app_name,
+            "user_id": user_id,
+            "session_id": session_id,
+            "status": RUN_STATUS_RUNNING,
+            "created_at": time.time(),
+            "input_text": text,
+        }
+        if self._complete_from_bank(meta):
+            logger.info(f"🏦 변형 문제 은행 결과 사용 [{run_id}] 문항: {meta.get('item_code') or meta['passage_id']}")
+            return meta
+        # 예산을 넘은 사용자도 은행에 있는 지문은 받을 수 있도록 은행 조회 뒤에 확인
+        self._check_budget(meta)
+        self._start(meta, streaming)
+        logger.info(f"🚀 생성 실행 시작 [{run_id}] 사용자: {user_id}, 세션: {session_id}")
+        return meta
+
+    def _check_budget(self, meta: Dict[str, Any]) -> None:
+        if self.usage_meter is None:
+            return
+        # 예산을 넘으면 run을 만들지 않고 BudgetExceeded 예외 (서버에서 429 응답)
+        status = self.usage_meter.check_budget(meta["user_id"])
+        if meta.get("variant") and meta["variant"] not in status["allowed_variants"]:
+            raise BudgetExceeded(meta["user_id"], status)
+        meta["budget_mode"] = status["mode"]
+
+    def _complete_from_bank(self, meta: Dict[str, Any]) -> bool:
+        """은행에 모든 유형이 있는 지문이면 저장된 결과로 run을 바로 완료합니다."""
+        if self.variant_bank is None:
+            return False
+        try:
+            found = self.variant_bank.lookup(meta["input_text"])
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ 변형 문제 은행 조회 실패: {e}")
+            return False
+        if not found or any(name not in found["variants"] for name in VARIANT_AGENT_NAMES):
+            return False
+
+        meta.update({
+            "status": RUN_STATUS_COMPLETED,
+            "finished_at": time.time(),
+            "event_count": 0,
+            "source": "variant_bank",
+            "passage_id": found["passage_id"],
+            "item_code": found["item_code"],
+            "variants": found["variants"],
+            "result": render_variants_markdown(found["variants"], meta["input_text"]),
+        })
+        run = {"meta": meta, "events": [], "condition": asyncio.Condition()}
+        self._runs[meta["run_id"]] = run
+        self._save_meta(run)
+        if self.result_store is not None:
+            task = asyncio.create_task(self._archive_run(run))
+            self._archive_tasks.add(task)
+            task.add_done_callback(self._archive_tasks.discard)
+        self._evict_finished_runs()
+        return True
+
+    def regenerate_variant(self, run_id: str, variant: str, streaming: bool = False) -> Dict[str, Any]:
+        """
+        완료된 run의 지문으로 한 유형만 다시 생성하는 run을 시작합니다.
+
+        해당 유형의 하위 에이전트만 별도 세션에서 한 번 호출하고, 나머지 유형은
+        원래 run에 보관된 결과를 그대로 사용해 전체 결과를 조립합니다.
+
+        Args:
+            run_id (str): 원래 run ID
+            variant (str): 다시 생성할 유형의 에이전트 이름
+            streaming (bool): 모델 부분 응답(partial) 이벤트까지 기록할지 여부
+
+        Returns:
+            Dict[str, Any]: 새 run 메타데이터
+
+        Raises:
+            KeyError: 원래 run이 없는 경우
+            ValueError: 알 수 없는 유형이거나 원래 run이 완료되지 않은 경우
+            Overloaded: 실행 중 + 대기 중 run이 한도에 도달한 경우
+            BudgetExceeded: 사용자가 이번 달 예산을 넘었거나, 예산이 얼마 남지 않아 이 유형을 생성할 수 없는 경우
+        """
+        parent = self.get_run(run_id)
+        if parent is None:
+            raise KeyError(run_id)
+        if variant not in VARIANT_AGENT_NAMES:
+            raise ValueError(f"알 수 없는 변형 유형입니다: {variant}")
+        if parent["meta"]["status"] != RUN_STATUS_COMPLETED:
+            raise ValueError("완료된 실행만 다시 생성할 수 있습니다.")
+
+        new_run_id = uuid.uuid4().hex
+        meta = {
+            "run_id": new_run_id,
+            "app_name": self.app_name,
+            "user_id": parent["meta"]["user_id"],
+            # 채팅 세션 기록에 섞이지 않도록 별도 세션에서 하위 에이전트만 실행
+            "session_id": f"regenerate-{new_run_id}",
+            "status": RUN_STATUS_RUNNING,
+            "created_at": time.time(),
+            "input_text": parent["meta"]["input_text"],
+            "parent_run_id": run_id,
+            "variant": variant,
+        }
+        self._check_budget(meta)
+        self._start(meta, streaming)
+        logger.info(f"🔁 유형 다시 생성 시작 [{new_run_id}] 원래 실행: {run_id}, 유형: {variant}")
+        return meta
+
+    def _start(self, meta: Dict[str, Any], streaming: bool) -> None:
+        if self.admission:
+            # 한도를 넘으면 run을 만들지 않고 Overloaded 예외 (서버에서 503 응답)
+            self.admission.reserve()
+        run = {"meta": meta, "events": [], "condition": asyncio.Condition()}
+        self._runs[meta["run_id"]] = run
+        self._save_meta(run)
+        key = (meta["user_id"], meta["session_id"])
+        self._session_runs[key] = self._session_runs.get(key, 0) + 1
+        self._tasks[meta["run_id"]] = asyncio.create_task(self._execute(run, meta["input_text"], streaming))
+
+    async def stream_events(self, run_id: str, after_id: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        after_id 이후의 이벤트를 순서대로 내보내고, 실행 중이면 새 이벤트를 기다립니다.
+
+        Args:
+            run_id (str): run ID
+            after_id (int): 클라이언트가 마지막으로 받은 이벤트 id
+
+        Yields:
+            Dict[str, Any]: {"id": 순번, "event": ADK 이벤트}
+        """
+        run = self.get_run(run_id)
+        if run is None:
+            return
+        next_index = max(0, after_id)
+        self.active_streams += 1
+        try:
+            while True:
+                async with run["condition"]:
+                    while (next_index >= len(run["events"])
+                           and run["meta"]["status"] == RUN_STATUS_RUNNING):
+                        await run["condition"].wait()
+                    pending = run["events"][next_index:]
+                    finished = run["meta"]["status"] != RUN_STATUS_RUNNING
+                for record in pending:
+                    yield record
+                next_index += len(pending)
+                if finished and next_index >= len(run["events"]):
+                    return
+        finally:
+            self.active_streams -= 1
+
+    @property
+    def running_count(self) -> int:
+        """백그라운드에서 실행 중인 run 수"""
+        return len(self._tasks)
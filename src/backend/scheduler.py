@@ -0,0 +1,317 @@
+"""
+사용자별 가중 공평 모델 호출 스케줄러
+
+한 사용자가 수백 페이지 워크북을 변환하면 페이지 파싱과 변형 생성 호출이 모델을 모두 차지해
+다른 사용자의 단일 지문 요청이 뒤로 밀립니다. 모든 LlmAgent의 모델 호출 직전에 사용자 ID
+(세션 URL의 userId, AgentTool 하위 세션에도 그대로 전달됨)별 대기열에 줄을 세우고,
+시작 시각 공평 큐잉(start-time fair queuing)으로 사용자 사이에 호출을 번갈아 배정합니다.
+
+- 전체 동시 모델 호출 수와 사용자별 동시 호출 수 상한을 둡니다.
+- 사용자별 가중치(PROBLEM_FORGE_USER_WEIGHTS="teacher1=2,batch=0.5")만큼 더 자주 배정됩니다.
+- 호출 비용은 입력 길이로 추정해, 큰 배치 요청이 짧은 대화형 요청보다 느리게 차례를 소모합니다.
+
+슬롯은 before_model 콜백에서 받고, 에이전트 모델을 감싼 ScheduledLlm이 모델 호출이 어떻게
+끝나든(연결 끊김으로 인한 취소 포함, 이때는 after_model/on_model_error 콜백이 불리지 않음) 반납합니다.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Optional, Tuple
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from metrics import add_agent_callbacks, iter_agent_tree, registry
+
+logger = logging.getLogger(__name__)
+
+# 서버 전체 동시 모델 호출 수와 사용자 한 명의 동시 모델 호출 수 상한
+MODEL_MAX_CONCURRENT = int(os.getenv("PROBLEM_FORGE_MODEL_MAX_CONCURRENT", "16"))
+USER_MAX_CONCURRENT = int(os.getenv("PROBLEM_FORGE_USER_MAX_CONCURRENT", "4"))
+
+# 사용자별 가중치 ("user=weight" 쉼표 구분, 지정하지 않은 사용자는 DEFAULT_USER_WEIGHT)
+USER_WEIGHTS_ENV = os.getenv("PROBLEM_FORGE_USER_WEIGHTS", "")
+DEFAULT_USER_WEIGHT = 1.0
+
+# 호출 비용 = 1 + 추정 입력 토큰 / COST_TOKENS_PER_UNIT
+COST_TOKENS_PER_UNIT = 4000
+CHARS_PER_TOKEN = 4
+
+model_queue_wait = registry.histogram("model_queue_wait_seconds", "모델 호출이 공평 스케줄러 대기열에서 기다린 시간", ("app",))
+
+
+def parse_user_weights(value: str) -> Dict[str, float]:
+    """
+    "user=weight,user2=weight" 형식의 가중치 설정을 읽습니다 (잘못된 항목은 무시).
+
+    Args:
+        value (str): 가중치 설정 문자열
+
+    Returns:
+        Dict[str, float]: 사용자 ID → 가중치
+    """
+    weights = {}
+    for item in value.split(","):
+        user_id, _, weight = item.partition("=")
+        try:
+            if user_id.strip() and float(weight) > 0:
+                weights[user_id.strip()] = float(weight)
+        except ValueError:
+            logger.warning(f"잘못된 사용자 가중치 설정 무시: {item}")
+    return weights
+
+
+class _UserQueue:
+    """사용자 한 명의 대기 중 호출과 공평 큐잉 상태"""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.active = 0
+        self.last_finish = 0.0
+        # (시작 태그, 대기 Future)
+        self.waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+
+class FairScheduler:
+    """사용자별 대기열을 시작 시각 공평 큐잉으로 번갈아 배정하는 모델 호출 스케줄러"""
+
+    def __init__(self, max_concurrent: int = MODEL_MAX_CONCURRENT, per_user_concurrent: int = USER_MAX_CONCURRENT,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.per_user_concurrent = max(1, per_user_concurrent)
+        self.weights = weights if weights is not None else parse_user_weights(USER_WEIGHTS_ENV)
+        self.active = 0
+        self.virtual_time = 0.0
+        self._users: Dict[str, _UserQueue] = {}
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(user.waiters) for user in self._users.values())
+
+    @property
+    def active_users(self) -> int:
+        return sum(1 for user in self._users.values() if user.active or user.waiters)
+
+    def _user(self, user_id: str) -> _UserQueue:
+        if user_id not in self._users:
+            self._users[user_id] = _UserQueue(self.weights.get(user_id, DEFAULT_USER_WEIGHT))
+        return self._users[user_id]
+
+    def _dispatch(self) -> None:
+        """빈 슬롯이 있는 동안 시작 태그가 가장 작은 대기 호출부터 배정합니다."""
+        while self.active < self.max_concurrent:
+            candidates = [user for user in self._users.values()
+                          if user.waiters and user.active < self.per_user_concurrent]
+            if not candidates:
+                return
+            user = min(candidates, key=lambda candidate: candidate.waiters[0][0])
+            start_tag, future = user.waiters.popleft()
+            if future.done():
+                continue
+            self.virtual_time = max(self.virtual_time, start_tag)
+            user.active += 1
+            self.active += 1
+            future.set_result(None)
+
+    async def acquire(self, user_id: str, cost: float = 1.0) -> None:
+        """
+        사용자 차례가 올 때까지 기다린 뒤 모델 호출 슬롯을 하나 받습니다.
+
+        Args:
+            user_id (str): 사용자 ID
+            cost (float): 호출 비용 (클수록 사용자 차례를 많이 소모)
+        """
+        user = self._user(user_id)
+        start_tag = max(self.virtual_time, user.last_finish)
+        user.last_finish = start_tag + cost / user.weight
+        future = asyncio.get_running_loop().create_future()
+        user.waiters.append((start_tag, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(user_id)
+            else:
+                future.cancel()
+                self._forget_idle(user_id)
+            raise
+
+    def release(self, user_id: str) -> None:
+        """모델 호출 슬롯을 반납하고 다음 호출을 배정합니다."""
+        user = self._users.get(user_id)
+        if user is None or user.active == 0:
+            return
+        user.active -= 1
+        self.active -= 1
+        self._forget_idle(user_id)
+        self._dispatch()
+
+    def _forget_idle(self, user_id: str) -> None:
+        user = self._users.get(user_id)
+        if user is not None and user.active == 0 and not any(not future.done() for _, future in user.waiters):
+            # 쉬고 있던 사용자가 돌아와도 밀린 몫을 한꺼번에 쓰지 않도록 상태를 지움
+            del self._users[user_id]
+
+
+scheduler = FairScheduler()
+
+
+class _Slot:
+    """모델 호출 하나가 받은 슬롯 (여러 곳에서 반납해도 한 번만 반납)"""
+
+    def __init__(self, user_id: str, owner: FairScheduler):
+        self.user_id = user_id
+        self.owner = owner
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.owner.release(self.user_id)
+
+
+# 현재 작업(asyncio task)에서 진행 중인 모델 호출의 슬롯 (before_model 콜백에서 설정)
+_current_slot: contextvars.ContextVar[Optional[_Slot]] = contextvars.ContextVar("problem_forge_model_slot", default=None)
+
+# 이미 계측한 (루트 에이전트 id, 앱 이름)
+_scheduled = set()
+
+
+def _user_id(callback_context: Any) -> str:
+    return getattr(callback_context._invocation_context, "user_id", None) or "anonymous"
+
+
+def estimate_cost(llm_request: Any) -> float:
+    """요청 내용 길이로 모델 호출 비용을 추정합니다."""
+    chars = 0
+    for content in llm_request.contents or []:
+        for part in content.parts or []:
+            chars += len(part.text or "")
+    return 1.0 + chars / CHARS_PER_TOKEN / COST_TOKENS_PER_UNIT
+
+
+def _release_current() -> None:
+    slot = _current_slot.get()
+    if slot is not None:
+        slot.release()
+
+
+class ScheduledLlm(BaseLlm):
+    """
+    모델 호출이 끝나면(정상 종료, 오류, 취소 모두) before_model에서 받은 슬롯을 반납하는 BaseLlm
+
+    model 필드는 감싼 모델의 이름이며, 실제 호출은 inner에 그대로 맡깁니다.
+    """
+
+    inner: BaseLlm
+
+    @property
+    def capabilities(self):
+        return self.inner.capabilities
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        # 호출을 시작할 때의 슬롯을 잡아 두고 호출이 어떻게 끝나든 반납
+        slot = _current_slot.get()
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream):
+                yield response
+        finally:
+            if slot is not None:
+                slot.release()
+
+
+def _make_callbacks(app_name: str, fair_scheduler: FairScheduler) -> Dict[str, Callable]:
+    """앱 이름을 메트릭 라벨로 붙이는 스케줄링 콜백 묶음을 만듭니다."""
+
+    async def before_model(callback_context, llm_request):
+        user_id = _user_id(callback_context)
+        started = time.perf_counter()
+        await fair_scheduler.acquire(user_id, estimate_cost(llm_request))
+        model_queue_wait.observe(time.perf_counter() - started, app_name)
+        _current_slot.set(_Slot(user_id, fair_scheduler))
+        return None
+
+    # ScheduledLlm으로 감싸지 않은 모델도 호출이 끝나면 바로 반납
+    def after_model(callback_context, llm_response):
+        if not llm_response.partial:
+            _release_current()
+        return None
+
+    def on_model_error(callback_context, llm_request, error):
+        _release_current()
+        return None
+
+    def after_agent(callback_context):
+        _release_current()
+        return None
+
+    return {
+        "before_model": before_model,
+        "after_model": after_model,
+        "on_model_error": on_model_error,
+        "after_agent": after_agent,
+    }
+
+
+def schedule_agent_tree(root_agent: Any, app_name: str, fair_scheduler: FairScheduler = scheduler) -> int:
+    """
+    에이전트 트리의 모든 LlmAgent 모델 호출이 공평 스케줄러를 거치도록 콜백을 붙입니다.
+
+    메트릭/트레이스 계측보다 먼저 붙이면 대기 시간이 모델 지연 시간에 섞이지 않습니다.
+
+    Args:
+        root_agent: 루트 에이전트
+        app_name (str): 메트릭 라벨로 사용할 앱 이름
+        fair_scheduler (FairScheduler): 사용할 스케줄러 (기본: 서버 공용 스케줄러)
+
+    Returns:
+        int: 스케줄러를 붙인 LlmAgent 수
+    """
+    from google.adk.agents import LlmAgent
+
+    if (id(root_agent), app_name) in _scheduled:
+        return 0
+    callbacks = _make_callbacks(app_name, fair_scheduler)
+    count = 0
+    for agent in iter_agent_tree(root_agent):
+        if not isinstance(agent, LlmAgent):
+            continue
+        add_agent_callbacks(agent, "before_model_callback", callbacks["before_model"], first=False)
+        add_agent_callbacks(agent, "after_model_callback", callbacks["after_model"], first=True)
+        add_agent_callbacks(agent, "on_model_error_callback", callbacks["on_model_error"], first=True)
+        add_agent_callbacks(agent, "after_agent_callback", callbacks["after_agent"], first=True)
+        count += 1
+    _scheduled.add((id(root_agent), app_name))
+    logger.info(f"⚖️ 공평 스케줄러 연결 [{app_name}] 에이전트 {count}개 "
+                f"(전체 {fair_scheduler.max_concurrent}, 사용자별 {fair_scheduler.per_user_concurrent})")
+    return count
+
+
+def wrap_scheduled_models(root_agent: Any) -> int:
+    """
+    트리의 LlmAgent 모델을 ScheduledLlm으로 감싸 취소된 호출의 슬롯도 반납되게 합니다.
+
+    모델 라우팅과 공용 모델 객체 적용이 끝난 뒤(모델이 객체로 정해진 뒤)에 호출합니다.
+
+    Args:
+        root_agent: 루트 에이전트
+
+    Returns:
+        int: 새로 감싼 LlmAgent 수
+    """
+    from google.adk.agents import LlmAgent
+
+    count = 0
+    for agent in iter_agent_tree(root_agent):
+        if not isinstance(agent, LlmAgent) or isinstance(agent.model, ScheduledLlm):
+            continue
+        inner = agent.canonical_model
+        agent.model = ScheduledLlm(model=inner.model, inner=inner)
+        count += 1
+    return count
@@ -7,8 +7,10 @@ FastAPI 기반 백엔드 서버로 AI 에이전트를 통한 문제 변형 생
 import os
 import sys
 import logging
+import importlib
 import asyncio
 import json
+import sqlite3
 from typing import Dict, Any, List, Optional
 from queue import Queue
 import threading
@@ -20,10 +22,35 @@ SRC_DIR = os.path.abspath(os.path.join(BASE_DIR, ".."))
 
 if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
 
-from google.adk.cli.fast_api import get_fast_api_app
-from fastapi import Request, HTTPException
-from fastapi.responses import JSONResponse, StreamingResponse
+from startup import StartupPhases, AppReadiness, ReadinessGate, LazyASGIApp, path_prefix
+
+# 서버 시작 단계별 소요 시간 (/ready 응답과 startup_profile.py 보고서에 사용)
+startup_phases = StartupPhases()
+
+with startup_phases.phase("import google.adk fast_api"):
+    from contextlib import asynccontextmanager
+    from google.adk.cli.fast_api import get_fast_api_app
+    from fastapi import Request, HTTPException
+    from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+
+from runs import RunManager
+from variants import VARIANT_AGENT_NAMES
+from worksheet import iter_worksheet_html
+from images import MAX_IMAGE_BYTES, image_ingestor
+from variant_bank import BANK_LOOKUP_ENABLED, DEFAULT_SEARCH_LIMIT, get_variant_bank
+from admission import AdmissionMiddleware, Overloaded, agent_admission, pdf_admission, post_paths
+from metrics import registry as metrics_registry, instrument_agent_tree
+from scheduler import scheduler as model_scheduler, schedule_agent_tree, wrap_scheduled_models
+from warmup import model_warmer
+from model_router import model_router, route_agent_tree
+from usage import BudgetExceeded, meter_agent_tree, usage_meter
+from result_store import RESULT_STORE_ENABLED, ResultStore
+from event_stream import accepts_gzip, coalesce_deltas, format_frame, gzip_stream
+from diagnostics import DEFAULT_TOP_LIMIT, DEFAULT_TRACE_FRAMES, is_admin_request, memory_diagnostics
+from tracing import SPAN_KIND_HTTP, start_span, end_span, trace_agent_tree, set_current_span, reset_current_span
 
 
 
@@ -38,6 +65,9 @@ CORS_ORIGINS = ["*"]
 # 로그 캡처를 위한 전역 큐
 log_queues = {}  # session_id -> Queue 매핑
 
+# /pdf 요청 로깅 미들웨어가 요청이 끝날 때까지 들고 있는 요청 본문 (메모리 진단용)
+pdf_buffered_bodies = {"requests": 0, "bytes": 0}
+
 class SSELogHandler(logging.Handler):
     """SSE 로그 전달을 위한 커스텀 핸들러"""
     
@@ -120,15 +150,41 @@ for logger_name in pdf_related_loggers:
     logger_obj.addHandler(sse_handler)
     logger_obj.setLevel(logging.INFO)
 
+# 에이전트 트리와 /pdf 하위 앱은 서버 시작 후 백그라운드에서 준비 (준비 전 요청은 ReadinessGate에서 대기)
+app_readiness = AppReadiness(startup_phases)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    app_readiness.start_all()
+    # 모델 호출이 한동안 없으면 모델 연결을 다시 데움
+    keep_warm_task = asyncio.create_task(model_warmer.keep_warm())
+    # 모아 둔 사용량을 주기적으로 저장 (종료할 때 마지막으로 저장)
+    usage_flush_task = asyncio.create_task(usage_meter.run_flusher())
+    try:
+        yield
+    finally:
+        keep_warm_task.cancel()
+        usage_flush_task.cancel()
+
+
 # FastAPI app initialization - 기본 agent 앱 등록 
-app = get_fast_api_app(
-    agents_dir=os.path.join(SRC_DIR, "agent"),  # 기존 문제 변형 에이전트들 (agent 앱)
-    web=True,            # True로 변경하여 /run 엔드포인트 활성화
-    allow_origins=["*"], # CORS 허용
-)
+with startup_phases.phase("build agent app"):
+    app = get_fast_api_app(
+        agents_dir=os.path.join(SRC_DIR, "agent"),  # 기존 문제 변형 에이전트들 (agent 앱)
+        web=True,            # True로 변경하여 /run 엔드포인트 활성화
+        allow_origins=["*"], # CORS 허용
+        lifespan=lifespan,
+    )
+
 
-# 🚀 별도 PDF 파싱 에이전트 앱 생성 및 마운트
-try:
+def build_pdf_app():
+    """
+    /pdf 경로에 마운트할 PDF 파싱 에이전트 앱을 만듭니다 (처음 사용하거나 준비 작업에서 호출).
+
+    Returns:
+        FastAPI: PDF 파싱 에이전트 앱
+    """
     pdf_app = get_fast_api_app(
         agents_dir=os.path.join(SRC_DIR, "pdf_agent"),  # PDF 파싱 에이전트들
         web=True,  # PDF 앱도 독립적인 웹 서비스로 구성
@@ -139,10 +195,14 @@ try:
     @pdf_app.middleware("http")
     async def log_pdf_requests(request: Request, call_next):
         # PDF 파싱 요청인 경우 로깅
+        buffered = 0
         if request.url.path.endswith("/run_sse"):
             try:
                 # 요청 본문 읽기
                 body = await request.body()
+                buffered = len(body)
+                pdf_buffered_bodies["requests"] += 1
+                pdf_buffered_bodies["bytes"] += buffered
                 if body:
                     import json
                     try:
@@ -170,28 +230,180 @@ try:
                 
             except Exception as e:
                 pdf_parser_logger.error(f"요청 로깅 중 오류: {e}")
-        
-        response = await call_next(request)
+
+        if not buffered:
+            return await call_next(request)
+        try:
+            response = await call_next(request)
+        except Exception:
+            pdf_buffered_bodies["requests"] -= 1
+            pdf_buffered_bodies["bytes"] -= buffered
+            raise
+        body_iterator = response.body_iterator
+
+        async def release_body():
+            # 스트리밍 응답이 끝나야 요청 본문을 붙잡고 있는 클로저가 풀림
+            try:
+                async for chunk in body_iterator:
+                    yield chunk
+            finally:
+                pdf_buffered_bodies["requests"] -= 1
+                pdf_buffered_bodies["bytes"] -= buffered
+
+        response.body_iterator = release_body()
         return response
-    
-    # PDF 앱을 메인 앱에 서브앱으로 마운트
-    app.mount("/pdf", pdf_app)
+
+    return pdf_app
+
+
+# 🚀 별도 PDF 파싱 에이전트 앱 마운트 (앱 생성은 지연)
+pdf_app = LazyASGIApp(build_pdf_app, name="pdf_agent")
+app.mount("/pdf", pdf_app)
+
+
+def attach_agent_callbacks(app_name: str) -> None:
+    """
+    에이전트 트리에 사용량/예산, 사용자별 공평 스케줄링과 메트릭/트레이스 계측 콜백을 붙입니다.
+
+    ADK 앱 로더와 RunManager는 같은 모듈 객체(sys.modules)를 사용하므로
+    여기서 붙인 콜백이 모든 실행 경로에 적용됩니다.
+
+    Args:
+        app_name (str): 에이전트 패키지 이름 ("agent" 또는 "pdf_agent")
+    """
+    root_agent = importlib.import_module(app_name).root_agent
+    # 예산을 넘은 사용자의 호출은 스케줄러 대기열에 들어가기 전에 차단
+    meter_agent_tree(root_agent, app_name)
+    # 스케줄러 대기 시간이 모델 지연 시간에 섞이지 않도록 계측 콜백보다 먼저 연결
+    schedule_agent_tree(root_agent, app_name)
+    instrument_agent_tree(root_agent, app_name)
+    trace_agent_tree(root_agent, app_name)
+
+
+async def warm_up_agent_models(app_name: str) -> None:
+    """에이전트 트리에 모델 라우팅을 적용하고 모델 클라이언트와 연결을 미리 준비합니다."""
+    root_agent = importlib.import_module(app_name).root_agent
+    # 에이전트별 후보 모델도 공용 객체를 쓰도록 라우팅을 먼저 적용
+    route_agent_tree(root_agent, app_name)
+    model_names = model_warmer.share_models(root_agent)
+    # 모델이 객체로 정해진 뒤 감싸야 라우팅/공용 모델 적용에 영향을 주지 않음
+    wrap_scheduled_models(root_agent)
+    await model_warmer.warm_up(model_names)
+
+
+async def load_agent_app() -> None:
+    # 에이전트 모듈 import(에이전트 객체 생성)는 이벤트 루프를 막지 않도록 스레드에서 실행
+    await asyncio.to_thread(importlib.import_module, "agent")
+    attach_agent_callbacks("agent")
+    await warm_up_agent_models("agent")
+
+
+async def load_pdf_agent_app() -> None:
+    await asyncio.to_thread(importlib.import_module, "pdf_agent")
+    attach_agent_callbacks("pdf_agent")
+    await asyncio.to_thread(pdf_app.build)
+    await warm_up_agent_models("pdf_agent")
     pdf_parser_logger.info("📦 PDF 파싱 에이전트 앱을 /pdf 경로에 마운트 완료")
-    
-except Exception as e:
-    pdf_parser_logger.error(f"❌ PDF 파싱 에이전트 앱 마운트 실패: {e}")
-    pdf_parser_logger.info("🔄 수동 PDF 에이전트 임포트 시도...")
-    
-    # 실패 시 수동으로 PDF 에이전트만 로드
-    try:
-        from pdf_agent import root_agent as pdf_root_agent
-        pdf_parser_logger.info("📦 PDF 루트 에이전트 로드 완료")
-    except Exception as fallback_error:
-        pdf_parser_logger.error(f"❌ PDF 에이전트 수동 로드 실패: {fallback_error}")
+
+
+app_readiness.register("agent", load_agent_app)
+app_readiness.register("pdf_agent", load_pdf_agent_app)
 
 # In-memory session storage - ADK가 자체 세션 관리를 하므로 불필요
 # sessions = {}
 
+# 재개 가능한 생성 실행 관리자 (run id + 이벤트 로그) - agent 앱 수락 한도를 /run_sse와 함께 사용
+run_manager = RunManager(app_name="agent", agent_module="agent", admission=agent_admission,
+                         variant_bank=get_variant_bank() if BANK_LOOKUP_ENABLED else None,
+                         usage_meter=usage_meter,
+                         result_store=ResultStore() if RESULT_STORE_ENABLED else None)
+
+# 생성 요청 수락 제어 - agent 앱과 /pdf 앱의 한도를 따로 두어 PDF 파싱이 단일 지문 생성을 밀어내지 않도록 함
+app.add_middleware(
+    AdmissionMiddleware,
+    routes=[
+        (post_paths("/run", "/run_sse", "/api/images/ingest"), agent_admission),
+        (post_paths("/pdf/run", "/pdf/run_sse"), pdf_admission),
+    ],
+)
+
+# 에이전트를 사용하는 요청은 해당 앱의 준비(콜백 연결 포함)가 끝날 때까지 대기
+app.add_middleware(
+    ReadinessGate,
+    readiness=app_readiness,
+    routes=[
+        (path_prefix("/run", "/api/runs", "/api/images/", methods=("POST",)), "agent"),
+        (path_prefix("/apps/agent/"), "agent"),
+        (path_prefix("/pdf/", "/api/pdf/"), "pdf_agent"),
+    ],
+)
+
+metrics_registry.gauge("sse_log_subscribers", "서버 로그 SSE 구독자 수", lambda: len(log_queues))
+metrics_registry.gauge("sse_log_queue_depth", "서버 로그 SSE 큐에 쌓인 로그 수 (전체 구독자 합계)",
+                       lambda: sum(queue.qsize() for queue in list(log_queues.values())))
+metrics_registry.gauge("runs_running", "백그라운드에서 실행 중인 생성 run 수", lambda: run_manager.running_count)
+metrics_registry.gauge("run_event_subscribers", "생성 run 이벤트 SSE 구독자 수", lambda: run_manager.active_streams)
+metrics_registry.gauge("model_scheduler_active", "공평 스케줄러가 배정한 진행 중 모델 호출 수", lambda: model_scheduler.active)
+metrics_registry.gauge("model_scheduler_queued", "공평 스케줄러 대기열의 모델 호출 수", lambda: model_scheduler.waiting)
+metrics_registry.gauge("model_scheduler_active_users", "모델 호출이 진행 중이거나 대기 중인 사용자 수", lambda: model_scheduler.active_users)
+memory_diagnostics.add_live_count("log_queues", lambda: len(log_queues))
+memory_diagnostics.add_live_count("log_queue_items", lambda: sum(queue.qsize() for queue in list(log_queues.values())))
+memory_diagnostics.add_live_count("pdf_buffered_requests", lambda: pdf_buffered_bodies["requests"])
+memory_diagnostics.add_live_count("pdf_buffered_bytes", lambda: pdf_buffered_bodies["bytes"])
+memory_diagnostics.add_live_count("runs_cached", lambda: len(run_manager._runs))
+memory_diagnostics.add_live_count("runs_cached_events", lambda: sum(len(run["events"]) for run in list(run_manager._runs.values())))
+memory_diagnostics.add_live_count("runs_running", lambda: run_manager.running_count)
+memory_diagnostics.add_live_count("run_event_subscribers", lambda: run_manager.active_streams)
+memory_diagnostics.add_live_count("image_ingests_pending", lambda: len(image_ingestor._pending))
+memory_diagnostics.add_live_count("model_scheduler_queued", lambda: model_scheduler.waiting)
+for admission in (agent_admission, pdf_admission):
+    metrics_registry.gauge(f"admission_{admission.name}_active", f"{admission.name} 앱 실행 중인 요청 수",
+                           lambda admission=admission: admission.active)
+    metrics_registry.gauge(f"admission_{admission.name}_queued", f"{admission.name} 앱 대기열의 요청 수",
+                           lambda admission=admission: admission.waiting)
+    metrics_registry.gauge(f"admission_{admission.name}_rejected", f"{admission.name} 앱 한도 초과로 거절한 요청 수 (누적)",
+                           lambda admission=admission: admission.rejected)
+
+# 요청 트레이스를 기록할 경로 (로그 스트림, 메트릭, 정적 파일 제외)
+TRACED_PATH_PREFIXES = ("/api/", "/run", "/apps/", "/pdf/")
+UNTRACED_PATH_PREFIXES = ("/api/logs/",)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    API 요청마다 HTTP span을 시작해 그 아래에 run/에이전트/모델 span이 기록되도록 합니다.
+
+    스트리밍 응답(/run_sse 등)은 본문 전송이 끝날 때 span을 종료합니다.
+    """
+    path = request.url.path
+    if not path.startswith(TRACED_PATH_PREFIXES) or path.startswith(UNTRACED_PATH_PREFIXES):
+        return await call_next(request)
+
+    http_span = start_span(f"{request.method} {path}", SPAN_KIND_HTTP,
+                           http_method=request.method, http_path=path)
+    token = set_current_span(http_span)
+    try:
+        response = await call_next(request)
+    except Exception as e:
+        end_span(http_span, e)
+        raise
+    finally:
+        reset_current_span(token)
+    http_span.attributes["http_status_code"] = response.status_code
+    response.headers["X-Trace-Id"] = http_span.trace_id
+    body_iterator = response.body_iterator
+
+    async def traced_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            end_span(http_span)
+
+    response.body_iterator = traced_body()
+    return response
+
 
 def check_login(user_id: str, password: str) -> bool:
     """
@@ -280,6 +492,704 @@ async def login_endpoint(request: Request) -> JSONResponse:
 # 기존 API 엔드포인트 제거 - 이제 모든 PDF 파싱은 ADK 방식으로 처리
 
 
+@app.post('/api/pdf/parse-units')
+async def parse_units_endpoint(request: Request) -> JSONResponse:
+    """
+    페이지 텍스트 목록을 PDF 파싱 에이전트에 보낼 파싱 단위로 변환하는 API
+
+    페이지 끝에서 잘린 문제는 다음 페이지 앞부분과 이어붙여 별도 단위로 만들고,
+    각 단위에 로컬 사전 분류 결과를 함께 반환합니다.
+
+    Args:
+        request: 파싱 단위 요청 (pages: 페이지 순서대로 정렬된 텍스트 목록)
+
+    Returns:
+        JSONResponse: 파싱 단위 목록
+    """
+    try:
+        data = await request.json()
+        pages = data.get('pages')
+
+        if not isinstance(pages, list) or not all(isinstance(page, str) for page in pages):
+            return JSONResponse(
+                {'success': False, 'error': '페이지 텍스트 목록이 필요합니다.'},
+                status_code=400
+            )
+
+        # pdf_agent 패키지는 앱 준비 단계에서 불러오므로 여기서 지연 import
+        from pdf_agent.page_window import build_parse_units
+        units = build_parse_units(pages)
+        stitched_count = sum(1 for unit in units if unit['stitched'])
+        skipped_count = sum(1 for unit in units if not unit['classification']['has_candidate'])
+        pdf_parser_logger.info(
+            f"🧩 파싱 단위 생성: 페이지 {len(pages)}개 → 단위 {len(units)}개 "
+            f"(이어붙임 {stitched_count}개, 사전 제외 {skipped_count}개)"
+        )
+        return JSONResponse({'success': True, 'units': units})
+
+    except Exception as e:
+        logger.error(f"Parse units endpoint error: {e}")
+        return JSONResponse(
+            {'success': False, 'error': '서버 오류가 발생했습니다.'},
+            status_code=500
+        )
+
+
+async def read_capped_body(request: Request, limit: int) -> Optional[bytes]:
+    """
+    요청 본문을 최대 크기까지만 읽습니다.
+
+    Content-Length가 한도를 넘으면 본문을 읽지 않고, 헤더가 없거나 맞지 않아도 읽는 도중 한도를 넘으면 중단합니다.
+
+    Args:
+        request: 업로드 요청
+        limit (int): 최대 바이트 수
+
+    Returns:
+        Optional[bytes]: 본문 바이트 (한도를 넘으면 None)
+    """
+    content_length = request.headers.get('content-length', '')
+    if content_length.isdigit() and int(content_length) > limit:
+        return None
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@app.post('/api/images/ingest')
+async def ingest_image_endpoint(request: Request) -> JSONResponse:
+    """
+    시험지 사진을 전처리(회전/자르기/축소/재압축)하고 텍스트를 추출하는 API
+
+    요청 본문은 이미지 바이트 그대로이며 Content-Type에 이미지 형식을, 쿼리 userId에 사용자 ID를 지정합니다.
+    같은 사진은 캐시된 결과를 바로 반환하고, 새 사진은 사용자의 예산을 확인한 뒤 텍스트를 추출합니다.
+
+    Args:
+        request: 이미지 업로드 요청
+
+    Returns:
+        JSONResponse: 추출한 텍스트와 전처리 전후 크기 (예산 초과면 429)
+    """
+    mime_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    user_id = request.query_params.get('userId') or 'anonymous'
+    data = await read_capped_body(request, MAX_IMAGE_BYTES)
+    if data is None:
+        return JSONResponse(
+            {'success': False, 'error': f'이미지가 너무 큽니다 (최대 {MAX_IMAGE_BYTES // (1024 * 1024)}MB).'},
+            status_code=413
+        )
+    try:
+        result = await image_ingestor.ingest(data, mime_type, user_id)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except BudgetExceeded as e:
+        return budget_exceeded_response(e)
+    except Exception as e:
+        logger.error(f"Image ingest endpoint error: {e}")
+        return JSONResponse(
+            {'success': False, 'error': '이미지에서 텍스트를 추출하지 못했습니다.'},
+            status_code=500
+        )
+    return JSONResponse({
+        'success': True,
+        'imageHash': result['imageHash'],
+        'text': result['text'],
+        'cached': result['cached'],
+        'originalBytes': result['original_bytes'],
+        'processedBytes': result['processed_bytes'],
+        'size': result.get('size'),
+    })
+
+
+def budget_exceeded_response(error: BudgetExceeded) -> JSONResponse:
+    """
+    예산 초과 응답 (429)
+
+    Args:
+        error (BudgetExceeded): 예산 초과 예외
+
+    Returns:
+        JSONResponse: 429 응답 (이번 달 사용 금액과 예산 포함)
+    """
+    return JSONResponse(
+        {
+            'success': False,
+            'error': str(error),
+            'budgetMode': error.status['mode'],
+            'spentUsd': error.status['spent_usd'],
+            'budgetUsd': error.status['budget_usd'],
+        },
+        status_code=429,
+    )
+
+
+def overloaded_response(error: Overloaded) -> JSONResponse:
+    """
+    수락 한도 초과 응답 (503 + Retry-After)
+
+    Args:
+        error (Overloaded): 한도 초과 예외
+
+    Returns:
+        JSONResponse: 503 응답
+    """
+    return JSONResponse(
+        {'success': False, 'error': str(error), 'retryAfter': error.retry_after},
+        status_code=503,
+        headers={'Retry-After': str(error.retry_after)}
+    )
+
+
+@app.post('/api/runs')
+async def create_run_endpoint(request: Request) -> JSONResponse:
+    """
+    변형 문제 생성 실행 시작 API
+
+    실행은 서버에서 백그라운드로 진행되며, 클라이언트 연결과 무관하게 끝까지 수행됩니다.
+
+    Args:
+        request: 실행 요청 (userId, sessionId, newMessage 또는 text, streaming)
+
+    Returns:
+        JSONResponse: 생성된 run 정보 (runId, status)
+    """
+    try:
+        data = await request.json()
+        user_id = data.get('userId')
+        session_id = data.get('sessionId')
+        text = data.get('text')
+        if text is None:
+            parts = (data.get('newMessage') or {}).get('parts') or []
+            text = "\n".join(part.get('text', '') for part in parts if part.get('text'))
+
+        if not user_id or not session_id or not text:
+            return JSONResponse(
+                {'success': False, 'error': 'userId, sessionId와 입력 텍스트가 필요합니다.'},
+                status_code=400
+            )
+
+        meta = run_manager.start_run(user_id, session_id, text, streaming=bool(data.get('streaming', False)))
+        return JSONResponse({'success': True, 'runId': meta['run_id'], 'status': meta['status']})
+
+    except Overloaded as e:
+        return overloaded_response(e)
+    except BudgetExceeded as e:
+        return budget_exceeded_response(e)
+    except Exception as e:
+        logger.error(f"Create run endpoint error: {e}")
+        return JSONResponse(
+            {'success': False, 'error': '서버 오류가 발생했습니다.'},
+            status_code=500
+        )
+
+
+@app.get('/api/runs/{run_id}')
+async def get_run_endpoint(run_id: str) -> JSONResponse:
+    """
+    생성 실행 상태 및 결과 조회 API
+
+    Args:
+        run_id (str): run ID
+
+    Returns:
+        JSONResponse: run 상태, 이벤트 수, (완료 시) 최종 결과
+    """
+    run = run_manager.get_run(run_id)
+    if run is None:
+        return JSONResponse({'success': False, 'error': '실행을 찾을 수 없습니다.'}, status_code=404)
+
+    meta = run['meta']
+    return JSONResponse({
+        'success': True,
+        'runId': run_id,
+        'status': meta['status'],
+        'eventCount': len(run['events']),
+        'result': meta.get('result'),
+        'error': meta.get('error'),
+        'variants': sorted((meta.get('variants') or {}).keys()),
+        'parentRunId': meta.get('parent_run_id'),
+        'tokenUsage': meta.get('token_usage'),
+        'traceId': meta.get('trace_id'),
+        'source': meta.get('source', 'agent'),
+        'budgetMode': meta.get('budget_mode'),
+    })
+
+
+@app.get('/api/store/stats')
+async def get_result_store_stats_endpoint() -> JSONResponse:
+    """
+    완료된 생성 결과 압축 저장소 크기 조회 API
+
+    Returns:
+        JSONResponse: 저장한 run/지문 수, JSON 파일 기준 크기, 저장 크기와 비율
+    """
+    if run_manager.result_store is None:
+        return JSONResponse({'success': False, 'error': '결과 압축 저장소를 사용하지 않습니다.'}, status_code=404)
+    stats = await asyncio.to_thread(run_manager.result_store.stats)
+    return JSONResponse({
+        'success': True,
+        'runs': stats['runs'],
+        'passages': stats['passages'],
+        'rawBytes': stats['raw_bytes'],
+        'storedBytes': stats['stored_bytes'],
+        'ratio': stats['ratio'],
+        'codec': stats['codec'],
+    })
+
+
+@app.get('/api/models/routes')
+async def get_model_routes_endpoint() -> JSONResponse:
+    """
+    에이전트별 모델 라우팅 표와 후보 모델 측정값 조회 API
+
+    Returns:
+        JSONResponse: 라우팅 모드, 에이전트별 후보 모델 목록, 에이전트/모델별 호출 수, 실패 수,
+            지연 시간과 실패율(지수 이동 평균)
+    """
+    snapshot = model_router.snapshot()
+    return JSONResponse({
+        'success': True,
+        'mode': snapshot['mode'],
+        'routes': snapshot['routes'],
+        'stats': {
+            agent_name: {
+                model_name: {
+                    'calls': item['calls'],
+                    'failures': item['failures'],
+                    'latencySeconds': item['latency_seconds'],
+                    'errorRate': item['error_rate'],
+                    'healthy': item['healthy'],
+                }
+                for model_name, item in models.items()
+            }
+            for agent_name, models in snapshot['stats'].items()
+        },
+    })
+
+
+@app.get('/api/bank/search')
+async def search_variant_bank_endpoint(
+    itemCode: Optional[str] = None,
+    type: Optional[str] = None,
+    q: Optional[str] = None,
+    limit: int = DEFAULT_SEARCH_LIMIT,
+) -> JSONResponse:
+    """
+    미리 생성한 변형 문제 은행 조회 API
+
+    Args:
+        itemCode (Optional[str]): 문항 코드 (예: 23005-0001, 앞부분만 줘도 됨)
+        type (Optional[str]): 유형별 에이전트 이름 (예: paragraph_order_agent)
+        q (Optional[str]): 지문/문제/선택지/해설 검색어
+        limit (int): 최대 결과 수
+
+    Returns:
+        JSONResponse: 조건에 맞는 변형 문제 목록 (지문 ID, 문항 코드, 유형, 정답, 결과)
+    """
+    if type and type not in VARIANT_AGENT_NAMES:
+        return JSONResponse({'success': False, 'error': f'알 수 없는 변형 유형입니다: {type}'}, status_code=400)
+    try:
+        rows = get_variant_bank().search(item_code=itemCode, variant_type=type, keyword=q, limit=limit)
+    except sqlite3.Error as e:
+        logger.error(f"Variant bank search error: {e}")
+        return JSONResponse({'success': False, 'error': '검색어를 처리할 수 없습니다.'}, status_code=400)
+    return JSONResponse({
+        'success': True,
+        'count': len(rows),
+        'results': [{
+            'passageId': row['passage_id'],
+            'itemCode': row['item_code'],
+            'source': row['source'],
+            'page': row['page'],
+            'variantType': row['variant_type'],
+            'answer': row['answer'],
+            'result': row['result'],
+        } for row in rows],
+    })
+
+
+@app.get('/api/usage')
+async def get_usage_endpoint(
+    userId: Optional[str] = None,
+    period: str = "day",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    groupBy: str = "user",
+) -> JSONResponse:
+    """
+    사용자별 토큰 사용량/비용 조회 API
+
+    Args:
+        userId (Optional[str]): 특정 사용자만 조회
+        period (str): 집계 단위 ("day" 또는 "month")
+        start (Optional[str]): 시작일 (YYYY-MM-DD, 포함)
+        end (Optional[str]): 종료일 (YYYY-MM-DD, 포함)
+        groupBy (str): 함께 묶을 항목 (쉼표 구분: user, session, app, agent, model)
+
+    Returns:
+        JSONResponse: 기간별 호출 수, 입력/캐시/출력 토큰 수, 비용(달러)
+    """
+    group_by = tuple(name.strip() for name in groupBy.split(",") if name.strip())
+    try:
+        rows = await asyncio.to_thread(usage_meter.query, period, userId, start, end, group_by)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    return JSONResponse({
+        'success': True,
+        'period': period,
+        'usage': [{
+            'period': row['period'],
+            **{name: row[column] for name, column in
+               (('userId', 'user_id'), ('sessionId', 'session_id'), ('app', 'app'), ('agent', 'agent'), ('model', 'model'))
+               if column in row},
+            'calls': row['calls'],
+            'promptTokens': row['prompt_tokens'],
+            'cachedTokens': row['cached_tokens'],
+            'outputTokens': row['output_tokens'],
+            'costUsd': row['cost_usd'],
+        } for row in rows],
+    })
+
+
+@app.get('/api/usage/budget/{user_id}')
+async def get_usage_budget_endpoint(user_id: str) -> JSONResponse:
+    """
+    사용자의 이번 달 예산 상태 조회 API
+
+    Args:
+        user_id (str): 사용자 ID
+
+    Returns:
+        JSONResponse: mode(full/reduced/cache_only), 사용 금액, 예산, 생성할 수 있는 유형
+    """
+    status = usage_meter.budget_status(user_id)
+    return JSONResponse({
+        'success': True,
+        'userId': user_id,
+        'mode': status['mode'],
+        'spentUsd': status['spent_usd'],
+        'budgetUsd': status['budget_usd'],
+        'allowedVariants': status['allowed_variants'],
+    })
+
+
+@app.post('/api/runs/{run_id}/regenerate')
+async def regenerate_variant_endpoint(run_id: str, request: Request) -> JSONResponse:
+    """
+    완료된 실행에서 한 유형의 변형 문제만 다시 생성하는 API
+
+    해당 유형의 하위 에이전트만 한 번 호출하고 나머지 7개 유형은 기존 결과를 재사용합니다.
+    새 run이 만들어지며, 진행 상황과 결과는 다른 run과 같은 방식으로 조회합니다.
+
+    Args:
+        run_id (str): 원래 run ID
+        request: 요청 (variant: 다시 생성할 에이전트 이름, streaming)
+
+    Returns:
+        JSONResponse: 새 run 정보 (runId, status)
+    """
+    try:
+        data = await request.json()
+        meta = run_manager.regenerate_variant(
+            run_id, data.get('variant', ''), streaming=bool(data.get('streaming', False))
+        )
+        return JSONResponse({'success': True, 'runId': meta['run_id'], 'status': meta['status']})
+
+    except KeyError:
+        return JSONResponse({'success': False, 'error': '실행을 찾을 수 없습니다.'}, status_code=404)
+    except Overloaded as e:
+        return overloaded_response(e)
+    except BudgetExceeded as e:
+        return budget_exceeded_response(e)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    except Exception as e:
+        logger.error(f"Regenerate variant endpoint error: {e}")
+        return JSONResponse(
+            {'success': False, 'error': '서버 오류가 발생했습니다.'},
+            status_code=500
+        )
+
+
+@app.get('/api/runs/{run_id}/events')
+async def get_run_events_stream(run_id: str, request: Request, after: Optional[int] = None, mode: str = "events"):
+    """
+    생성 실행 이벤트 SSE 스트림 (재연결 지원)
+
+    각 이벤트에 순번 id를 붙여 전송합니다. 재연결 시 Last-Event-ID 헤더
+    (또는 after 쿼리)를 보내면 그 이후의 이벤트만 다시 전송합니다.
+    mode=delta이면 화면에 필요한 필드만 남긴 프레임으로 보내고 부분 응답 조각을 묶어 보내며,
+    Accept-Encoding이 gzip을 허용하면 압축합니다 (event_stream.py).
+
+    Args:
+        run_id (str): run ID
+        after (Optional[int]): 이 id 이후의 이벤트부터 전송
+        mode (str): "events" (ADK 이벤트 그대로) 또는 "delta" (압축 프레임)
+
+    Returns:
+        StreamingResponse: SSE 형태의 이벤트 스트림
+    """
+    run = run_manager.get_run(run_id)
+    if run is None:
+        return JSONResponse({'success': False, 'error': '실행을 찾을 수 없습니다.'}, status_code=404)
+
+    last_event_id = request.headers.get('last-event-id')
+    if after is None:
+        after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+
+    if mode not in ("events", "delta"):
+        return JSONResponse({'success': False, 'error': f'알 수 없는 스트림 형식입니다: {mode}'}, status_code=400)
+
+    async def event_stream():
+        if mode == "delta":
+            async for record in coalesce_deltas(run_manager.stream_events(run_id, after)):
+                yield format_frame(record)
+        else:
+            async for record in run_manager.stream_events(run_id, after):
+                yield f"id: {record['id']}\ndata: {json.dumps(record['event'], ensure_ascii=False)}\n\n"
+        meta = run['meta']
+        yield f"event: end\ndata: {json.dumps({'status': meta['status'], 'error': meta.get('error')}, ensure_ascii=False)}\n\n"
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+    }
+    body = event_stream()
+    if mode == "delta" and accepts_gzip(request.headers.get('accept-encoding')):
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
+
+
+# 학습지 하나에 담을 수 있는 최대 run 수
+MAX_WORKSHEET_RUNS = 1000
+
+
+@app.post('/api/export/worksheet')
+async def export_worksheet_endpoint(request: Request):
+    """
+    저장된 run 결과를 인쇄용 HTML 학습지로 내보내는 API
+
+    문제편(원본 지문 + 유형별 문제/선택지)과 정답/해설편으로 나눠, run 메타데이터를
+    하나씩 읽으며 스트리밍하므로 문제 수가 많아도 서버 메모리 사용량이 늘지 않습니다.
+
+    Args:
+        request: 내보내기 요청 (runIds: run ID 목록, labels: 문제 제목 목록(선택),
+            title: 학습지 제목, answerKey: 정답/해설편 포함 여부 (기본 true))
+
+    Returns:
+        StreamingResponse: text/html 학습지
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JSONResponse({'success': False, 'error': '요청 본문이 올바른 JSON 객체가 아닙니다.'}, status_code=400)
+    run_ids = data.get('runIds')
+    if (not isinstance(run_ids, list) or not run_ids or len(run_ids) > MAX_WORKSHEET_RUNS
+            or not all(isinstance(run_id, str) for run_id in run_ids)):
+        return JSONResponse(
+            {'success': False, 'error': f'runIds(최대 {MAX_WORKSHEET_RUNS}개)가 필요합니다.'},
+            status_code=400
+        )
+    # 응답 헤더를 보낸 뒤에는 오류를 알릴 수 없으므로 스트리밍 전에 모두 확인
+    labels = data.get('labels') or []
+    if not isinstance(labels, list) or not all(isinstance(label, str) for label in labels):
+        return JSONResponse({'success': False, 'error': 'labels는 문자열 목록이어야 합니다.'}, status_code=400)
+
+    def load_items():
+        for index, run_id in enumerate(run_ids):
+            meta = run_manager.load_meta(run_id)
+            if meta is None:
+                yield None
+                continue
+            yield {
+                'label': labels[index] if index < len(labels) else meta.get('item_code') or '',
+                'original_text': meta.get('input_text'),
+                'variants': meta.get('variants'),
+                'result': meta.get('result'),
+            }
+
+    title = str(data.get('title') or '변형 문제 학습지')
+    return StreamingResponse(
+        iter_worksheet_html(load_items, title, answer_key=data.get('answerKey', True) is not False),
+        media_type="text/html; charset=utf-8",
+        headers={"Content-Disposition": "attachment; filename=worksheet.html"},
+    )
+
+
+@app.get('/metrics')
+async def metrics_endpoint() -> PlainTextResponse:
+    """
+    Prometheus 텍스트 형식 메트릭 엔드포인트
+
+    에이전트별 호출 수, 지연 시간 히스토그램, 토큰 수, 오류/재시도 횟수,
+    캐시 토큰, SSE 구독자 및 큐 깊이를 제공합니다.
+
+    Returns:
+        PlainTextResponse: Prometheus 텍스트 노출 형식
+    """
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get('/ready')
+async def readiness_endpoint() -> JSONResponse:
+    """
+    준비 상태 확인 API (로드밸런서/오토스케일러 readiness probe용)
+
+    에이전트 트리와 /pdf 앱이 모두 준비되면 200, 준비 중이거나 실패했으면 503을 반환합니다.
+    서버 시작 단계별 소요 시간도 함께 반환합니다.
+
+    Returns:
+        JSONResponse: ready, 앱별 상태, 시작 단계 목록
+    """
+    ready = app_readiness.all_ready
+    return JSONResponse(
+        {'ready': ready, 'apps': app_readiness.status(), 'startup': startup_phases.report()},
+        status_code=200 if ready else 503
+    )
+
+
+def admin_forbidden_response() -> JSONResponse:
+    """관리자 토큰이 없거나 틀린 요청 응답 (403)"""
+    return JSONResponse({'success': False, 'error': '관리자 권한이 필요합니다.'}, status_code=403)
+
+
+@app.get('/api/admin/memory')
+async def memory_status_endpoint(request: Request) -> JSONResponse:
+    """
+    메모리 진단 상태 조회 API (관리자 전용, X-Admin-Token 헤더)
+
+    Returns:
+        JSONResponse: tracemalloc 상태와 스냅샷 목록, 프로세스 메모리, ADK 세션/로그 큐/run 등 살아 있는 객체 수
+    """
+    if not is_admin_request(request.headers):
+        return admin_forbidden_response()
+    live = await asyncio.to_thread(memory_diagnostics.live_counts)
+    return JSONResponse({'success': True, 'tracemalloc': memory_diagnostics.status(), **live})
+
+
+@app.post('/api/admin/memory/tracemalloc')
+async def tracemalloc_control_endpoint(request: Request) -> JSONResponse:
+    """
+    tracemalloc 시작/중지 API (관리자 전용)
+
+    Args:
+        request: 요청 (action: "start" 또는 "stop", frames: 기록할 호출 스택 깊이)
+
+    Returns:
+        JSONResponse: tracemalloc 상태
+    """
+    if not is_admin_request(request.headers):
+        return admin_forbidden_response()
+    try:
+        data = await request.json()
+        action = data.get('action')
+        frames = int(data.get('frames') or DEFAULT_TRACE_FRAMES)
+        if frames < 1:
+            raise ValueError(frames)
+    except (ValueError, TypeError, AttributeError):
+        return JSONResponse(
+            {'success': False, 'error': '요청 본문은 JSON 객체이고 frames는 1 이상의 정수여야 합니다.'},
+            status_code=400
+        )
+    if action == 'start':
+        status = memory_diagnostics.start(frames)
+    elif action == 'stop':
+        status = memory_diagnostics.stop()
+    else:
+        return JSONResponse({'success': False, 'error': 'action은 start 또는 stop이어야 합니다.'}, status_code=400)
+    return JSONResponse({'success': True, 'tracemalloc': status})
+
+
+@app.post('/api/admin/memory/snapshots')
+async def take_memory_snapshot_endpoint(request: Request) -> JSONResponse:
+    """
+    tracemalloc 스냅샷 저장 API (관리자 전용)
+
+    Args:
+        request: 요청 (label: 스냅샷 이름, limit: 함께 반환할 할당 위치 수)
+
+    Returns:
+        JSONResponse: 스냅샷 id와 할당 크기가 큰 위치 목록
+    """
+    if not is_admin_request(request.headers):
+        return admin_forbidden_response()
+    try:
+        data = await request.json()
+        label = str(data.get('label') or '')
+        limit = int(data.get('limit') or DEFAULT_TOP_LIMIT)
+    except (ValueError, TypeError, AttributeError):
+        return JSONResponse(
+            {'success': False, 'error': '요청 본문은 JSON 객체이고 limit은 정수여야 합니다.'},
+            status_code=400
+        )
+    try:
+        snapshot = await asyncio.to_thread(memory_diagnostics.take_snapshot, label)
+    except RuntimeError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=409)
+    top = await asyncio.to_thread(memory_diagnostics.top, snapshot['id'], limit)
+    return JSONResponse({'success': True, 'snapshot': snapshot, 'top': top})
+
+
+@app.get('/api/admin/memory/top')
+async def memory_top_endpoint(request: Request, snapshot: Optional[int] = None,
+                              limit: int = DEFAULT_TOP_LIMIT, groupBy: str = "lineno") -> JSONResponse:
+    """
+    스냅샷의 할당 크기 상위 위치 조회 API (관리자 전용)
+
+    Args:
+        snapshot (Optional[int]): 스냅샷 id (없으면 가장 최근 스냅샷)
+        limit (int): 최대 항목 수
+        groupBy (str): 묶는 기준 (lineno, filename, traceback)
+
+    Returns:
+        JSONResponse: 위치별 할당 크기와 개수
+    """
+    if not is_admin_request(request.headers):
+        return admin_forbidden_response()
+    try:
+        top = await asyncio.to_thread(memory_diagnostics.top, snapshot, limit, groupBy)
+    except KeyError:
+        return JSONResponse({'success': False, 'error': '스냅샷을 찾을 수 없습니다.'}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    return JSONResponse({'success': True, 'top': top})
+
+
+@app.get('/api/admin/memory/diff')
+async def memory_diff_endpoint(request: Request, base: int, snapshot: Optional[int] = None,
+                               limit: int = DEFAULT_TOP_LIMIT, groupBy: str = "lineno") -> JSONResponse:
+    """
+    두 스냅샷 사이 할당 증가량 조회 API (관리자 전용)
+
+    Args:
+        base (int): 기준 스냅샷 id
+        snapshot (Optional[int]): 비교할 스냅샷 id (없으면 가장 최근 스냅샷)
+        limit (int): 최대 항목 수
+        groupBy (str): 묶는 기준 (lineno, filename, traceback)
+
+    Returns:
+        JSONResponse: 위치별 크기/개수와 증가량 (증가량이 큰 순서)
+    """
+    if not is_admin_request(request.headers):
+        return admin_forbidden_response()
+    try:
+        diff = await asyncio.to_thread(memory_diagnostics.diff, base, snapshot, limit, groupBy)
+    except KeyError:
+        return JSONResponse({'success': False, 'error': '스냅샷을 찾을 수 없습니다.'}, status_code=404)
+    except ValueError as e:
+        return JSONResponse({'success': False, 'error': str(e)}, status_code=400)
+    return JSONResponse({'success': True, 'diff': diff})
+
+
 @app.get("/api/logs/{session_id}")
 async def get_logs_stream(session_id: str):
     """
@@ -0,0 +1,204 @@
+"""
+서버 시작 단계 관리 (지연 로딩, 준비 상태, 시작 시간 기록)
+
+서버 모듈을 불러올 때는 메인 FastAPI 앱만 만들고, 에이전트 트리(agent, pdf_agent)와
+/pdf 하위 앱은 서버가 뜬 뒤 백그라운드 작업으로 준비합니다. 준비되기 전에 들어온
+에이전트 요청은 해당 앱이 준비될 때까지 기다리며, /ready로 준비 상태를 확인할 수 있습니다.
+단계별 소요 시간을 기록해 콜드 스타트 시간을 추적합니다.
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 준비되지 않은 앱으로 들어온 요청이 기다릴 최대 시간 (초, 초과 시 503)
+READY_TIMEOUT_SECONDS = float(os.getenv("PROBLEM_FORGE_READY_TIMEOUT", "60"))
+
+# 준비 대기 시간 초과 시 Retry-After (초)
+NOT_READY_RETRY_AFTER_SECONDS = 5
+
+APP_STATUS_PENDING = "pending"
+APP_STATUS_LOADING = "loading"
+APP_STATUS_READY = "ready"
+APP_STATUS_FAILED = "failed"
+
+
+class StartupPhases:
+    """서버 시작 단계별 소요 시간 기록"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases.append({
+                "name": name,
+                "seconds": round(seconds, 4),
+                "at": round(time.perf_counter() - self.started, 4),
+            })
+
+    def report(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.phases)
+
+
+class AppReadiness:
+    """앱별 백그라운드 준비 작업과 준비 상태"""
+
+    def __init__(self, phases: Optional[StartupPhases] = None):
+        self.phases = phases
+        self._loaders: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, name: str, loader: Callable[[], Awaitable[None]]) -> None:
+        """
+        앱 준비 함수를 등록합니다.
+
+        Args:
+            name (str): 앱 이름 (예: "agent", "pdf_agent")
+            loader: 앱을 준비하는 비동기 함수
+        """
+        self._loaders[name] = loader
+        self._status[name] = {"status": APP_STATUS_PENDING}
+
+    def start(self, name: str) -> asyncio.Task:
+        """앱 준비를 시작합니다 (이미 시작했으면 기존 작업 반환)."""
+        task = self._tasks.get(name)
+        # 실패한 앱은 다음 요청에서 다시 준비
+        if task is None or (task.done() and not self.is_ready(name)):
+            self._tasks[name] = asyncio.create_task(self._load(name))
+        return self._tasks[name]
+
+    def start_all(self) -> None:
+        for name in self._loaders:
+            self.start(name)
+
+    async def _load(self, name: str) -> None:
+        self._status[name] = {"status": APP_STATUS_LOADING}
+        started = time.perf_counter()
+        try:
+            await self._loaders[name]()
+        except Exception as e:
+            self._status[name] = {"status": APP_STATUS_FAILED, "error": str(e)}
+            logger.error(f"❌ 앱 준비 실패 [{name}]: {e}")
+            return
+        seconds = time.perf_counter() - started
+        self._status[name] = {"status": APP_STATUS_READY, "seconds": round(seconds, 4)}
+        if self.phases:
+            self.phases.record(f"load {name}", seconds)
+        logger.info(f"✅ 앱 준비 완료 [{name}] {seconds:.2f}초")
+
+    def is_ready(self, name: str) -> bool:
+        return self._status.get(name, {}).get("status") == APP_STATUS_READY
+
+    @property
+    def all_ready(self) -> bool:
+        return all(self.is_ready(name) for name in self._loaders)
+
+    async def wait(self, name: str, timeout: float = READY_TIMEOUT_SECONDS) -> bool:
+        """
+        앱이 준비될 때까지 기다립니다 (준비를 아직 시작하지 않았으면 시작).
+
+        Args:
+            name (str): 앱 이름
+            timeout (float): 최대 대기 시간 (초)
+
+        Returns:
+            bool: 준비 완료 여부 (실패/시간 초과면 False)
+        """
+        if self.is_ready(name):
+            return True
+        task = self.start(name)
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except Exception:
+            return False
+        return self.is_ready(name)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(status) for name, status in self._status.items()}
+
+
+class ReadinessGate:
+    """
+    에이전트를 사용하는 요청을 해당 앱이 준비될 때까지 붙잡아 두는 ASGI 미들웨어
+
+    에이전트 트리에 스케줄링/계측 콜백이 붙기 전에 에이전트가 실행되지 않도록 보장합니다.
+    """
+
+    def __init__(self, app: Any, readiness: AppReadiness, routes: List[Tuple[Callable[[str, str], bool], str]]):
+        self.app = app
+        self.readiness = readiness
+        self.routes = routes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            for matches, name in self.routes:
+                if matches(scope["method"], scope["path"]):
+                    if not await self.readiness.wait(name):
+                        await self._not_ready(send, name)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+    async def _not_ready(self, send, name: str) -> None:
+        body = json.dumps({
+            "success": False,
+            "error": f"{name} 앱을 준비하는 중입니다. 잠시 후 다시 시도해 주세요.",
+            "retryAfter": NOT_READY_RETRY_AFTER_SECONDS,
+        }, ensure_ascii=False).encode("utf-8")
+        await send({"type": "http.response.start", "status": 503, "headers": [
+            (b"content-type", b"application/json; charset=utf-8"),
+            (b"retry-after", str(NOT_READY_RETRY_AFTER_SECONDS).encode("ascii")),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+class LazyASGIApp:
+    """처음 사용할 때(또는 build 호출 시) 만들어지는 ASGI 하위 앱"""
+
+    def __init__(self, factory: Callable[[], Any], name: str):
+        self.factory = factory
+        self.name = name
+        self._app = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._app is not None
+
+    def build(self) -> Any:
+        """하위 앱을 만들어 반환합니다 (이미 만들었으면 그대로 반환)."""
+        if self._app is None:
+            with self._lock:
+                if self._app is None:
+                    started = time.perf_counter()
+                    self._app = self.factory()
+                    logger.info(f"📦 하위 앱 생성 완료 [{self.name}] {time.perf_counter() - started:.2f}초")
+        return self._app
+
+    async def __call__(self, scope, receive, send):
+        await self.build()(scope, receive, send)
+
+
+def path_prefix(*prefixes: str, methods: Optional[Tuple[str, ...]] = None) -> Callable[[str, str], bool]:
+    """경로 접두사(와 메서드)로 요청을 판별하는 함수를 만듭니다."""
+    return lambda method, path: path.startswith(prefixes) and (methods is None or method in methods)
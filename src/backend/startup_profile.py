@@ -0,0 +1,147 @@
+"""
+서버 콜드 스타트 프로파일링 보고서
+
+새 파이썬 프로세스에서 `python -X importtime`으로 서버 모듈을 불러오고, 앱이 준비될 때까지
+(/ready가 200을 반환할 때까지) 걸린 시간을 측정합니다. 모듈별 import 시간(자체/누적)과
+최상위 패키지별 합계, 서버 시작 단계별 시간을 출력해 배포마다 콜드 스타트 시간을 비교할 수 있습니다.
+
+    python src/backend/startup_profile.py --top 20 --json startup_profile.json
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Any, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# -X importtime 출력 형식: "import time:  self [us] | cumulative | imported package"
+IMPORT_TIME_PATTERN = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+# 준비 완료를 기다릴 최대 시간 (초)
+READY_WAIT_SECONDS = 120
+
+# 하위 프로세스에서 실행할 측정 스크립트 (결과는 마지막 줄에 JSON으로 출력)
+PROBE_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import server
+imported = time.perf_counter() - started
+from fastapi.testclient import TestClient
+with TestClient(server.app) as client:
+    deadline = time.perf_counter() + %(wait)d
+    while True:
+        response = client.get("/ready")
+        if response.status_code == 200 or time.perf_counter() > deadline:
+            break
+        time.sleep(0.05)
+    ready = time.perf_counter() - started
+    print(json.dumps({"import_seconds": imported, "ready_seconds": ready, "readiness": response.json()}))
+"""
+
+
+def parse_import_times(stderr: str) -> List[Dict[str, Any]]:
+    """
+    -X importtime 출력에서 모듈별 import 시간을 읽습니다.
+
+    Args:
+        stderr (str): 하위 프로세스의 표준 오류 출력
+
+    Returns:
+        List[Dict[str, Any]]: module, self_ms, cumulative_ms, depth 목록
+    """
+    records = []
+    for line in stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        records.append({
+            "module": module.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(indent) - 1) // 2,
+        })
+    return records
+
+
+def _package(module: str) -> str:
+    # google.* 네임스페이스 패키지는 google.adk, google.genai처럼 두 단계까지 구분
+    parts = module.split(".")
+    return ".".join(parts[:2]) if parts[0] == "google" and len(parts) > 1 else parts[0]
+
+
+def summarize_by_package(records: List[Dict[str, Any]]) -> Dict[str, float]:
+    """모듈 자체 import 시간을 최상위 패키지별로 합칩니다 (ms, 큰 순서)."""
+    totals: Dict[str, float] = {}
+    for record in records:
+        package = _package(record["module"])
+        totals[package] = totals.get(package, 0.0) + record["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def profile_startup(python: str = sys.executable) -> Dict[str, Any]:
+    """
+    새 프로세스에서 서버를 불러와 준비될 때까지의 시간과 모듈별 import 시간을 측정합니다.
+
+    Args:
+        python (str): 사용할 파이썬 실행 파일
+
+    Returns:
+        Dict[str, Any]: import_seconds, ready_seconds, readiness, imports, packages
+    """
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", PROBE_SCRIPT % {"wait": READY_WAIT_SECONDS}],
+        cwd=BASE_DIR,
+        capture_output=True,
+        text=True,
+        timeout=READY_WAIT_SECONDS + 60,
+    )
+    output_lines = [line for line in completed.stdout.splitlines() if line.startswith("{")]
+    if completed.returncode != 0 or not output_lines:
+        raise RuntimeError(f"서버 시작 측정 실패 (종료 코드 {completed.returncode}):\n{completed.stderr[-2000:]}")
+    result = json.loads(output_lines[-1])
+    result["imports"] = parse_import_times(completed.stderr)
+    result["packages"] = summarize_by_package(result["imports"])
+    return result
+
+
+def format_report(result: Dict[str, Any], top: int) -> str:
+    """측정 결과를 출력용 보고서 문자열로 만듭니다."""
+    lines = [
+        f"서버 모듈 import: {result['import_seconds']:.2f}s, 준비 완료까지: {result['ready_seconds']:.2f}s",
+        "",
+        "시작 단계:",
+    ]
+    for phase in result["readiness"].get("startup", []):
+        lines.append(f"  {phase['name']:<32} {phase['seconds']:>8.3f}s  (시작 후 {phase['at']:.2f}s)")
+
+    lines += ["", f"패키지별 import 시간 (상위 {top}):"]
+    for package, ms in list(result["packages"].items())[:top]:
+        lines.append(f"  {package:<32} {ms:>9.1f}ms")
+
+    lines += ["", f"누적 import 시간이 긴 모듈 (상위 {top}):"]
+    for record in sorted(result["imports"], key=lambda r: -r["cumulative_ms"])[:top]:
+        lines.append(f"  {record['module']:<48} {record['cumulative_ms']:>9.1f}ms (자체 {record['self_ms']:.1f}ms)")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="서버 콜드 스타트 시간과 모듈별 import 시간을 측정합니다.")
+    parser.add_argument("--top", type=int, default=20, help="출력할 모듈/패키지 수")
+    parser.add_argument("--json", help="전체 측정 결과를 저장할 JSON 경로")
+    args = parser.parse_args(argv)
+
+    result = profile_startup()
+    print(format_report(result, args.top))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
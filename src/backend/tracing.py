@@ -0,0 +1,610 @@
+"""
+생성 요청 단위 계층형 트레이스 (span) 기록
+
+HTTP 요청 → 생성 실행(run) → 세션 준비 → 에이전트 실행 → 모델/도구 호출로 이어지는
+span 트리를 요청마다 기록합니다. root_agent → master_agent AgentTool 호출, parallel_agent의
+병렬 실행, master_agent의 최종 정리 중 어디에서 시간이 쓰였는지 확인하기 위한 용도입니다.
+
+span은 백그라운드 스레드가 로컬 JSONL 파일(일자별)에 기록하며, PROBLEM_FORGE_OTLP_ENDPOINT를
+지정하면 OTLP/HTTP(JSON) 수집기(예: http://localhost:4318/v1/traces)로도 보냅니다.
+외부 의존성(opentelemetry) 없이 메트릭 계측과 같은 에이전트 콜백으로 수집합니다.
+
+트레이스 하나의 임계 경로(critical path) 분석:
+    python src/backend/tracing.py <trace_id>
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import argparse
+import threading
+import contextvars
+import urllib.request
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("PROBLEM_FORGE_TRACING", "1") != "0"
+
+TRACES_DIR = os.getenv(
+    "PROBLEM_FORGE_TRACES_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "traces"),
+)
+
+# OTLP/HTTP JSON 수집기 주소 (비어 있으면 JSONL 파일에만 기록)
+OTLP_ENDPOINT = os.getenv("PROBLEM_FORGE_OTLP_ENDPOINT", "")
+
+SERVICE_NAME = "problem-forge"
+
+# 내보내기 스레드가 한 번에 기록하는 최대 span 수
+EXPORT_BATCH_SIZE = 256
+
+# 내보내기 대기열 최대 크기 (초과 시 span을 버리고 경고)
+MAX_QUEUED_SPANS = 10000
+
+# 시작만 되고 끝나지 않은 span을 보관할 최대 개수
+MAX_OPEN_SPANS = 10000
+
+SPAN_KIND_HTTP = "http"
+SPAN_KIND_RUN = "run"
+SPAN_KIND_SESSION = "session"
+SPAN_KIND_AGENT = "agent"
+SPAN_KIND_MODEL = "model"
+SPAN_KIND_TOOL = "tool"
+
+# OTLP span kind (SERVER=2, INTERNAL=1, CLIENT=3)
+OTLP_SPAN_KINDS = {SPAN_KIND_HTTP: 2, SPAN_KIND_MODEL: 3}
+
+
+class Span:
+    """시작/종료 시각과 속성을 가진 작업 구간 하나"""
+
+    __slots__ = ("trace_id", "span_id", "parent", "name", "kind", "start_time", "end_time",
+                 "status", "attributes")
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.name = name
+        self.kind = kind
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.status = "ok"
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+
+    def to_dict(self) -> Dict[str, Any]:
+        end_time = self.end_time or time.time()
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start_time": self.start_time,
+            "end_time": end_time,
+            "duration": round(end_time - self.start_time, 6),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+# 현재 실행 흐름(asyncio 태스크)의 span
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("problem_forge_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """현재 실행 흐름의 span을 반환합니다 (없으면 None)."""
+    return _current_span.get()
+
+
+def set_current_span(value: Optional[Span]) -> contextvars.Token:
+    """span을 현재 실행 흐름의 span으로 설정하고 되돌릴 때 쓸 토큰을 반환합니다."""
+    return _current_span.set(value)
+
+
+def reset_current_span(token: contextvars.Token) -> None:
+    """set_current_span 이전의 현재 span으로 되돌립니다."""
+    _current_span.reset(token)
+
+
+# ----------------------------------------------------------------------
+# 내보내기
+# ----------------------------------------------------------------------
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    span 기록 목록을 OTLP/HTTP JSON(ExportTraceServiceRequest) 형식으로 변환합니다.
+
+    Args:
+        records (List[Dict[str, Any]]): Span.to_dict() 결과 목록
+
+    Returns:
+        Dict[str, Any]: resourceSpans 요청 본문
+    """
+    spans = []
+    for record in records:
+        otlp_span = {
+            "traceId": record["trace_id"],
+            "spanId": record["span_id"],
+            "name": record["name"],
+            "kind": OTLP_SPAN_KINDS.get(record["kind"], 1),
+            "startTimeUnixNano": str(int(record["start_time"] * 1e9)),
+            "endTimeUnixNano": str(int(record["end_time"] * 1e9)),
+            "attributes": [{"key": "problem_forge.kind", "value": {"stringValue": record["kind"]}}] + [
+                {"key": key, "value": _otlp_value(value)} for key, value in record["attributes"].items()
+            ],
+            "status": {"code": 2 if record["status"] == "error" else 1},
+        }
+        if record["parent_span_id"]:
+            otlp_span["parentSpanId"] = record["parent_span_id"]
+        spans.append(otlp_span)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{"scope": {"name": "problem_forge.tracing"}, "spans": spans}],
+    }]}
+
+
+class SpanExporter:
+    """끝난 span을 백그라운드 스레드에서 JSONL 파일과 OTLP 수집기로 내보내는 도구"""
+
+    def __init__(self, traces_dir: str = TRACES_DIR, otlp_endpoint: str = OTLP_ENDPOINT):
+        self.traces_dir = traces_dir
+        self.otlp_endpoint = otlp_endpoint
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=MAX_QUEUED_SPANS)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._otlp_failed = False
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            logger.warning(f"⚠️ span 대기열이 가득 차 버립니다: {span.name}")
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._worker, name="span-exporter", daemon=True)
+                    self._thread.start()
+
+    def _take_batch(self, timeout: Optional[float]) -> List[Dict[str, Any]]:
+        try:
+            batch = [self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(batch) < EXPORT_BATCH_SIZE:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._take_batch(timeout=1.0)
+            if batch:
+                self._write(batch)
+
+    def flush(self) -> None:
+        """대기 중인 span을 모두 내보냅니다 (프로세스 종료 시 호출)."""
+        while True:
+            batch = self._take_batch(timeout=None)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            os.makedirs(self.traces_dir, exist_ok=True)
+            path = os.path.join(self.traces_dir, time.strftime("spans-%Y%m%d.jsonl"))
+            with self._lock, open(path, "a", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"⚠️ span 파일 기록 실패: {e}")
+        if self.otlp_endpoint:
+            self._post_otlp(batch)
+
+    def _post_otlp(self, batch: List[Dict[str, Any]]) -> None:
+        request = urllib.request.Request(
+            self.otlp_endpoint,
+            data=json.dumps(to_otlp(batch)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+            self._otlp_failed = False
+        except Exception as e:
+            # 수집기가 꺼져 있을 때 같은 경고가 계속 쌓이지 않도록 처음 한 번만 기록
+            if not self._otlp_failed:
+                logger.warning(f"⚠️ OTLP 수집기 전송 실패 ({self.otlp_endpoint}): {e}")
+            self._otlp_failed = True
+
+
+exporter = SpanExporter()
+atexit.register(exporter.flush)
+
+
+# ----------------------------------------------------------------------
+# span 시작/종료
+# ----------------------------------------------------------------------
+def start_span(name: str, kind: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+    """
+    span을 시작합니다 (현재 span으로 설정하지는 않음).
+
+    Args:
+        name (str): span 이름
+        kind (str): span 종류 (SPAN_KIND_*)
+        parent (Optional[Span]): 부모 span (없으면 현재 span, 그것도 없으면 새 트레이스)
+        **attributes: span 속성
+
+    Returns:
+        Span: 시작된 span
+    """
+    return Span(name, kind, parent or _current_span.get(), attributes)
+
+
+def end_span(span: Span, error: Optional[BaseException] = None) -> None:
+    """span을 끝내고 내보냅니다 (이미 끝난 span은 무시)."""
+    if span.end_time is not None:
+        return
+    span.end_time = time.time()
+    if error is not None:
+        span.status = "error"
+        span.attributes["error"] = str(error)[:500]
+    if TRACING_ENABLED:
+        exporter.export(span)
+
+
+@contextmanager
+def span(name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+    """
+    블록 실행 구간을 현재 span의 하위 span으로 기록합니다.
+
+    Args:
+        name (str): span 이름
+        kind (str): span 종류 (SPAN_KIND_*)
+        **attributes: span 속성
+
+    Yields:
+        Span: 블록 안에서 현재 span으로 설정된 span
+    """
+    current = start_span(name, kind, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        end_span(current, e)
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(current)
+
+
+# ----------------------------------------------------------------------
+# 에이전트 트리 계측
+# ----------------------------------------------------------------------
+class _OpenSpans:
+    """시작했지만 아직 끝나지 않은 span (키: invocation_id, 브랜치, 에이전트/도구 이름)"""
+
+    def __init__(self):
+        self._spans: Dict[Tuple[str, ...], Span] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: Tuple[str, ...], value: Span) -> None:
+        with self._lock:
+            if len(self._spans) >= MAX_OPEN_SPANS:
+                self._spans.pop(next(iter(self._spans)))
+            self._spans[key] = value
+
+    def get(self, key: Tuple[str, ...]) -> Optional[Span]:
+        with self._lock:
+            return self._spans.get(key)
+
+    def pop(self, key: Tuple[str, ...]) -> Optional[Span]:
+        with self._lock:
+            return self._spans.pop(key, None)
+
+
+_agent_spans = _OpenSpans()
+_model_spans = _OpenSpans()
+_tool_spans = _OpenSpans()
+
+# 이미 계측한 (루트 에이전트 id, 앱 이름)
+_traced = set()
+
+
+def _key(context: Any, *extra: str) -> Tuple[str, ...]:
+    invocation_context = getattr(context, "_invocation_context", None)
+    branch = getattr(invocation_context, "branch", None) or ""
+    return (context.invocation_id, branch, context.agent_name) + extra
+
+
+def _make_callbacks(app_name: str) -> Dict[str, Callable]:
+    """앱 이름을 속성으로 붙이는 트레이스 콜백 묶음을 만듭니다."""
+
+    def before_agent(callback_context):
+        agent_span = start_span(callback_context.agent_name, SPAN_KIND_AGENT,
+                                app=app_name, agent=callback_context.agent_name)
+        _agent_spans.put(_key(callback_context), agent_span)
+        _current_span.set(agent_span)
+        return None
+
+    def after_agent(callback_context):
+        agent_span = _agent_spans.pop(_key(callback_context))
+        if agent_span is not None:
+            end_span(agent_span)
+            _current_span.set(agent_span.parent)
+        return None
+
+    def before_model(callback_context, llm_request):
+        parent = _agent_spans.get(_key(callback_context))
+        model_span = start_span(f"{callback_context.agent_name} model", SPAN_KIND_MODEL, parent,
+                                app=app_name, agent=callback_context.agent_name,
+                                model=str(llm_request.model or ""))
+        _model_spans.put(_key(callback_context), model_span)
+        return None
+
+    def after_model(callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        model_span = _model_spans.pop(_key(callback_context))
+        if model_span is None:
+            return None
+        usage = llm_response.usage_metadata
+        if usage is not None:
+            model_span.attributes["prompt_tokens"] = usage.prompt_token_count or 0
+            model_span.attributes["cached_tokens"] = usage.cached_content_token_count or 0
+            model_span.attributes["output_tokens"] = usage.candidates_token_count or 0
+        if llm_response.error_code:
+            model_span.status = "error"
+            model_span.attributes["error"] = str(llm_response.error_message or llm_response.error_code)[:500]
+        end_span(model_span)
+        return None
+
+    def on_model_error(callback_context, llm_request, error):
+        model_span = _model_spans.pop(_key(callback_context))
+        if model_span is not None:
+            end_span(model_span, error)
+        return None
+
+    def before_tool(tool, args, tool_context):
+        call_key = _key(tool_context, tool.name, tool_context.function_call_id or "")
+        parent = _agent_spans.get(_key(tool_context))
+        tool_span = start_span(tool.name, SPAN_KIND_TOOL, parent,
+                               app=app_name, agent=tool_context.agent_name, tool=tool.name)
+        _tool_spans.put(call_key, tool_span)
+        # AgentTool로 실행되는 하위 에이전트 span이 도구 span 아래에 놓이도록 현재 span으로 설정
+        _current_span.set(tool_span)
+        return None
+
+    def after_tool(tool, args, tool_context, tool_response):
+        tool_span = _tool_spans.pop(_key(tool_context, tool.name, tool_context.function_call_id or ""))
+        if tool_span is not None:
+            end_span(tool_span)
+            _current_span.set(tool_span.parent)
+        return None
+
+    def on_tool_error(tool, args, tool_context, error):
+        tool_span = _tool_spans.pop(_key(tool_context, tool.name, tool_context.function_call_id or ""))
+        if tool_span is not None:
+            end_span(tool_span, error)
+            _current_span.set(tool_span.parent)
+        return None
+
+    return {
+        "before_agent": before_agent,
+        "after_agent": after_agent,
+        "before_model": before_model,
+        "after_model": after_model,
+        "on_model_error": on_model_error,
+        "before_tool": before_tool,
+        "after_tool": after_tool,
+        "on_tool_error": on_tool_error,
+    }
+
+
+def trace_agent_tree(root_agent: Any, app_name: str) -> int:
+    """
+    에이전트 트리 전체에 트레이스 콜백을 붙입니다 (같은 트리에 두 번 붙이지 않음).
+
+    Args:
+        root_agent: 루트 에이전트
+        app_name (str): span 속성으로 사용할 앱 이름 (예: "agent", "pdf_agent")
+
+    Returns:
+        int: 계측한 에이전트 수
+    """
+    from google.adk.agents import LlmAgent
+    from metrics import add_agent_callbacks, iter_agent_tree
+
+    if not TRACING_ENABLED or (id(root_agent), app_name) in _traced:
+        return 0
+    callbacks = _make_callbacks(app_name)
+    count = 0
+    for agent in iter_agent_tree(root_agent):
+        add_agent_callbacks(agent, "before_agent_callback", callbacks["before_agent"], first=False)
+        add_agent_callbacks(agent, "after_agent_callback", callbacks["after_agent"], first=True)
+        if isinstance(agent, LlmAgent):
+            add_agent_callbacks(agent, "before_model_callback", callbacks["before_model"], first=False)
+            add_agent_callbacks(agent, "after_model_callback", callbacks["after_model"], first=True)
+            add_agent_callbacks(agent, "on_model_error_callback", callbacks["on_model_error"], first=True)
+            add_agent_callbacks(agent, "before_tool_callback", callbacks["before_tool"], first=False)
+            add_agent_callbacks(agent, "after_tool_callback", callbacks["after_tool"], first=True)
+            add_agent_callbacks(agent, "on_tool_error_callback", callbacks["on_tool_error"], first=True)
+        count += 1
+    _traced.add((id(root_agent), app_name))
+    logger.info(f"🧵 트레이스 계측 완료 [{app_name}] 에이전트 {count}개")
+    return count
+
+
+# ----------------------------------------------------------------------
+# 임계 경로 분석
+# ----------------------------------------------------------------------
+def load_trace(trace_id: str, traces_dir: str = TRACES_DIR) -> List[Dict[str, Any]]:
+    """
+    span 파일들에서 트레이스 하나의 span을 모두 읽습니다.
+
+    Args:
+        trace_id (str): 트레이스 ID
+        traces_dir (str): span JSONL 파일 디렉터리
+
+    Returns:
+        List[Dict[str, Any]]: span 기록 목록
+    """
+    records = []
+    if not os.path.isdir(traces_dir):
+        return records
+    for file_name in sorted(os.listdir(traces_dir)):
+        if not file_name.endswith(".jsonl"):
+            continue
+        with open(os.path.join(traces_dir, file_name), "r", encoding="utf-8") as f:
+            for line in f:
+                if trace_id in line:
+                    record = json.loads(line)
+                    if record["trace_id"] == trace_id:
+                        records.append(record)
+    return records
+
+
+def critical_path(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    트레이스의 임계 경로를 계산합니다.
+
+    루트 span의 끝에서부터 거꾸로, 가장 늦게 끝난 하위 span을 따라 내려가며
+    전체 소요 시간을 결정한 구간만 남깁니다. 부모보다 늦게 끝난 하위 span
+    (예: HTTP 응답 후에도 계속되는 백그라운드 run)은 부모 구간을 늘려 포함합니다.
+
+    Args:
+        records (List[Dict[str, Any]]): 한 트레이스의 span 기록 목록
+
+    Returns:
+        List[Dict[str, Any]]: 시작 시각 순 구간 목록 (span, depth, self_time: 임계 경로상 자체 시간)
+    """
+    by_id = {record["span_id"]: record for record in records}
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for record in records:
+        parent_id = record["parent_span_id"] if record["parent_span_id"] in by_id else None
+        children.setdefault(parent_id, []).append(record)
+
+    effective_end: Dict[str, float] = {}
+
+    def compute_end(record: Dict[str, Any]) -> float:
+        end = record["end_time"]
+        for child in children.get(record["span_id"], []):
+            end = max(end, compute_end(child))
+        effective_end[record["span_id"]] = end
+        return end
+
+    roots = children.get(None, [])
+    for root in roots:
+        compute_end(root)
+
+    segments: List[Dict[str, Any]] = []
+
+    def walk(record: Dict[str, Any], low: float, high: float, depth: int) -> None:
+        cursor = high
+        self_time = 0.0
+        ordered = sorted(children.get(record["span_id"], []), key=lambda r: effective_end[r["span_id"]], reverse=True)
+        for child in ordered:
+            child_end = min(effective_end[child["span_id"]], cursor)
+            if child_end <= low:
+                break
+            if child["start_time"] >= cursor:
+                continue
+            self_time += cursor - child_end
+            child_start = max(child["start_time"], low)
+            walk(child, child_start, child_end, depth + 1)
+            cursor = child_start
+        self_time += max(0.0, cursor - low)
+        segments.append({"span": record, "depth": depth, "start": low, "self_time": self_time})
+
+    if roots:
+        root = max(roots, key=lambda r: effective_end[r["span_id"]] - r["start_time"])
+        walk(root, root["start_time"], effective_end[root["span_id"]], 0)
+    segments.sort(key=lambda segment: (segment["start"], segment["depth"]))
+    return segments
+
+
+def format_critical_path(records: List[Dict[str, Any]]) -> str:
+    """
+    임계 경로 구간, 종류/에이전트별 자체 시간, 토큰 합계를 표 형태 문자열로 만듭니다.
+
+    Args:
+        records (List[Dict[str, Any]]): 한 트레이스의 span 기록 목록
+
+    Returns:
+        str: 출력용 보고서
+    """
+    segments = critical_path(records)
+    if not segments:
+        return "span이 없습니다."
+    total = sum(segment["self_time"] for segment in segments) or 1e-9
+    lines = [f"트레이스 {records[0]['trace_id']}: span {len(records)}개, 임계 경로 {total:.3f}s", ""]
+    lines.append(f"{'자체 시간':>10} {'비율':>6}  {'전체':>9}  구간")
+    for segment in segments:
+        record = segment["span"]
+        lines.append(
+            f"{segment['self_time']:>9.3f}s {segment['self_time'] / total:>6.1%}  {record['duration']:>8.3f}s  "
+            f"{'  ' * segment['depth']}{record['name']} [{record['kind']}]"
+            + (" (오류)" if record["status"] == "error" else "")
+        )
+
+    by_kind: Dict[str, float] = {}
+    by_agent: Dict[str, float] = {}
+    for segment in segments:
+        record = segment["span"]
+        by_kind[record["kind"]] = by_kind.get(record["kind"], 0.0) + segment["self_time"]
+        agent = record["attributes"].get("agent")
+        if agent:
+            by_agent[agent] = by_agent.get(agent, 0.0) + segment["self_time"]
+    lines += ["", "종류별 임계 경로 시간:"]
+    lines += [f"  {kind:<10} {seconds:>8.3f}s {seconds / total:>6.1%}"
+              for kind, seconds in sorted(by_kind.items(), key=lambda item: -item[1])]
+    if by_agent:
+        lines += ["", "에이전트별 임계 경로 시간 (모델/도구 호출 포함):"]
+        lines += [f"  {agent:<36} {seconds:>8.3f}s {seconds / total:>6.1%}"
+                  for agent, seconds in sorted(by_agent.items(), key=lambda item: -item[1])]
+
+    model_records = [record for record in records if record["kind"] == SPAN_KIND_MODEL]
+    tokens = {field: sum(record["attributes"].get(field, 0) for record in model_records)
+              for field in ("prompt_tokens", "cached_tokens", "output_tokens")}
+    lines += ["", f"모델 호출 {len(model_records)}회, 입력 {tokens['prompt_tokens']} "
+                  f"(캐시 {tokens['cached_tokens']}) / 출력 {tokens['output_tokens']} 토큰"]
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="트레이스 하나의 임계 경로를 출력합니다.")
+    parser.add_argument("trace_id", help="트레이스 ID (GET /api/runs/{run_id}의 traceId)")
+    parser.add_argument("--dir", default=TRACES_DIR, help="span JSONL 파일 디렉터리")
+    args = parser.parse_args(argv)
+
+    records = load_trace(args.trace_id, args.dir)
+    if not records:
+        print(f"트레이스를 찾을 수 없습니다: {args.trace_id}", file=sys.stderr)
+        return 1
+    print(format_critical_path(records))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
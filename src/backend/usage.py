@@ -0,0 +1,404 @@
+"""
+사용자별 토큰/비용 집계와 예산
+
+모든 에이전트 트리의 모델 응답(usage_metadata)을 사용자, 세션, 앱, 에이전트별로 집계해
+SQLite에 일 단위 누적 행으로 저장합니다 (호출마다 행을 쌓지 않고 같은 날의 행에 더함).
+/api/usage로 일별/월별 사용량과 비용을 조회할 수 있습니다.
+
+사용자별 월 예산(PROBLEM_FORGE_USER_BUDGETS="teacher1=20,*=5", 달러)을 넘으면 바로 실패시키지 않고
+단계적으로 줄입니다.
+
+- 예산의 PROBLEM_FORGE_BUDGET_SOFT_RATIO(기본 80%) 이상: 일부 변형 유형만 생성 (reduced)
+- 예산 초과: 모델을 호출하지 않고 변형 문제 은행에 미리 생성된 결과만 제공 (cache_only)
+"""
+
+import os
+import asyncio
+import sqlite3
+import logging
+import threading
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from google.genai import types
+
+from metrics import add_agent_callbacks, iter_agent_tree
+from model_router import FALLBACKS_METADATA_KEY, ROUTED_MODEL_METADATA_KEY
+from scheduler import parse_user_weights
+from variants import VARIANT_AGENT_NAMES
+
+logger = logging.getLogger(__name__)
+
+USAGE_DB_PATH = os.getenv(
+    "PROBLEM_FORGE_USAGE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "usage.sqlite3"),
+)
+
+# 메모리에 모은 사용량을 저장하는 주기 (초)
+FLUSH_INTERVAL_SECONDS = 5.0
+
+# 모델별 100만 토큰당 가격 (달러): (입력, 캐시된 입력, 출력)
+MODEL_PRICES: Dict[str, Tuple[float, float, float]] = {
+    "gemini-2.0-flash": (0.10, 0.025, 0.40),
+    "gemini-2.0-flash-lite": (0.075, 0.01875, 0.30),
+    "gemini-2.5-flash": (0.30, 0.075, 2.50),
+    "gemini-2.5-pro": (1.25, 0.31, 10.00),
+}
+DEFAULT_MODEL = "gemini-2.0-flash"
+
+# 사용자별 월 예산 (달러, "*"는 나머지 사용자 기본값, 지정하지 않으면 제한 없음)
+USER_BUDGETS_ENV = os.getenv("PROBLEM_FORGE_USER_BUDGETS", "")
+BUDGET_SOFT_RATIO = float(os.getenv("PROBLEM_FORGE_BUDGET_SOFT_RATIO", "0.8"))
+
+# reduced 단계에서도 생성하는 변형 유형 (출력이 짧은 유형 위주)
+REDUCED_VARIANT_TYPES = [name.strip() for name in os.getenv(
+    "PROBLEM_FORGE_BUDGET_REDUCED_VARIANTS",
+    "paragraph_order_agent,sentence_insertion_agent,blank_inference_phrase_agent,summary_blank_inference_word_agent",
+).split(",") if name.strip()]
+
+BUDGET_MODE_FULL = "full"
+BUDGET_MODE_REDUCED = "reduced"
+BUDGET_MODE_CACHE_ONLY = "cache_only"
+
+# 세션 상태에서 사용자 채팅 세션 ID를 읽는 키 (AgentTool 하위 세션에도 복사됨)
+SESSION_ID_STATE_KEY = "session_id"
+# run을 시작할 때 정한 예산 단계 (실행 도중 예산을 넘어도 같은 run은 같은 단계로 끝까지 실행)
+# 세션 상태에 두면 같은 채팅 세션의 다음 요청(/run_sse 등)까지 이전 run의 단계가 남으므로,
+# run마다 별도 작업(task)에서 설정하는 컨텍스트 변수로 전달합니다.
+current_budget_mode: ContextVar[Optional[str]] = ContextVar("current_budget_mode", default=None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_daily (
+    day TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    app TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    model TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    PRIMARY KEY (day, user_id, session_id, app, agent, model)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS usage_daily_user ON usage_daily (user_id, day);
+"""
+
+USAGE_FIELDS = ("calls", "prompt_tokens", "cached_tokens", "output_tokens", "cost_usd")
+GROUP_COLUMNS = {"user": "user_id", "session": "session_id", "app": "app", "agent": "agent", "model": "model"}
+
+
+class BudgetExceeded(Exception):
+    """예산을 넘어 모델 호출이 필요한 요청을 받을 수 없을 때 발생하는 예외"""
+
+    def __init__(self, user_id: str, status: Dict[str, Any]):
+        self.user_id = user_id
+        self.status = status
+        super().__init__(
+            f"이번 달 사용 한도(${status['budget_usd']:.2f})에 도달해 새 변형 문제를 생성할 수 없습니다. "
+            f"미리 생성된 문제는 계속 사용할 수 있습니다."
+        )
+
+
+def token_cost(model: str, prompt_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+    """토큰 수로 비용(달러)을 계산합니다 (모르는 모델은 기본 모델 가격)."""
+    input_price, cached_price, output_price = MODEL_PRICES.get(model, MODEL_PRICES[DEFAULT_MODEL])
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * input_price + cached_tokens * cached_price + output_tokens * output_price) / 1_000_000
+
+
+def allowed_variants(mode: str) -> List[str]:
+    """예산 단계에서 생성할 수 있는 유형별 에이전트 이름 목록"""
+    if mode == BUDGET_MODE_CACHE_ONLY:
+        return []
+    if mode == BUDGET_MODE_REDUCED:
+        return [name for name in VARIANT_AGENT_NAMES if name in REDUCED_VARIANT_TYPES]
+    return list(VARIANT_AGENT_NAMES)
+
+
+def _model_name(callback_context: Any, llm_response: Any = None) -> str:
+    # 모델 라우터를 거친 응답은 실제로 응답한 모델로 기록
+    routed = ((getattr(llm_response, "custom_metadata", None) or {}).get(ROUTED_MODEL_METADATA_KEY))
+    if routed:
+        return routed
+    model = getattr(callback_context._invocation_context.agent, "model", None)
+    return getattr(model, "model", model) if model else DEFAULT_MODEL
+
+
+def _user_id(callback_context: Any) -> str:
+    return getattr(callback_context._invocation_context, "user_id", None) or "anonymous"
+
+
+def _session_id(callback_context: Any) -> str:
+    session_id = callback_context.state.get(SESSION_ID_STATE_KEY)
+    if session_id:
+        return session_id
+    session = getattr(callback_context._invocation_context, "session", None)
+    return getattr(session, "id", None) or ""
+
+
+class UsageMeter:
+    """모델 사용량을 메모리에 모아 SQLite 일 단위 행에 더하는 집계기"""
+
+    def __init__(self, path: str = USAGE_DB_PATH, budgets: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.budgets = budgets if budgets is not None else parse_user_weights(USER_BUDGETS_ENV)
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # 아직 저장하지 않은 사용량: (day, user, session, app, agent, model) → 필드 목록
+        self._pending: Dict[Tuple[str, ...], List[float]] = {}
+        # (월, 사용자) → 월 누적 비용 (예산 판단용, 처음 조회할 때 DB에서 읽음)
+        self._monthly_cost: Dict[Tuple[str, str], float] = {}
+
+    # ------------------------------------------------------------------
+    # 기록
+    # ------------------------------------------------------------------
+    def record(self, user_id: str, session_id: str, app: str, agent: str, model: str,
+               prompt_tokens: int, cached_tokens: int, output_tokens: int) -> float:
+        """
+        모델 호출 한 번의 사용량을 더합니다.
+
+        Returns:
+            float: 호출 비용 (달러)
+        """
+        cost = token_cost(model, prompt_tokens, cached_tokens, output_tokens)
+        now = datetime.now()
+        key = (now.strftime("%Y-%m-%d"), user_id, session_id, app, agent, model)
+        month_key = (now.strftime("%Y-%m"), user_id)
+        with self._lock:
+            totals = self._pending.setdefault(key, [0, 0, 0, 0, 0.0])
+            for index, value in enumerate((1, prompt_tokens, cached_tokens, output_tokens, cost)):
+                totals[index] += value
+            if month_key in self._monthly_cost:
+                self._monthly_cost[month_key] += cost
+        return cost
+
+    def flush(self) -> int:
+        """메모리에 모은 사용량을 저장합니다. 저장한 행 수를 반환합니다."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO usage_daily (day, user_id, session_id, app, agent, model, "
+                    "calls, prompt_tokens, cached_tokens, output_tokens, cost_usd) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (day, user_id, session_id, app, agent, model) DO UPDATE SET "
+                    "calls = calls + excluded.calls, prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                    "cached_tokens = cached_tokens + excluded.cached_tokens, "
+                    "output_tokens = output_tokens + excluded.output_tokens, cost_usd = cost_usd + excluded.cost_usd",
+                    [key + tuple(values) for key, values in pending.items()],
+                )
+        return len(pending)
+
+    async def run_flusher(self, interval: float = FLUSH_INTERVAL_SECONDS) -> None:
+        """주기적으로 사용량을 저장하는 백그라운드 루프 (취소될 때 마지막으로 한 번 저장)"""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                await asyncio.to_thread(self.flush)
+        finally:
+            self.flush()
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def query(self, period: str = "day", user_id: Optional[str] = None, start: Optional[str] = None,
+              end: Optional[str] = None, group_by: Tuple[str, ...] = ("user",)) -> List[Dict[str, Any]]:
+        """
+        기간 단위 사용량 합계를 조회합니다.
+
+        Args:
+            period (str): "day" 또는 "month"
+            user_id (Optional[str]): 특정 사용자만 조회
+            start (Optional[str]): 시작일 (YYYY-MM-DD, 포함)
+            end (Optional[str]): 종료일 (YYYY-MM-DD, 포함)
+            group_by (Tuple[str, ...]): 함께 묶을 항목 (user, session, app, agent, model)
+
+        Returns:
+            List[Dict[str, Any]]: period, 묶은 항목, calls, 토큰 수, cost_usd 목록 (기간 순서)
+
+        Raises:
+            ValueError: 알 수 없는 기간 단위나 묶음 항목인 경우
+        """
+        if period not in ("day", "month"):
+            raise ValueError(f"알 수 없는 기간 단위입니다: {period}")
+        unknown = [name for name in group_by if name not in GROUP_COLUMNS]
+        if unknown:
+            raise ValueError(f"알 수 없는 묶음 항목입니다: {', '.join(unknown)}")
+        self.flush()
+
+        period_column = "day" if period == "day" else "substr(day, 1, 7)"
+        columns = [GROUP_COLUMNS[name] for name in group_by]
+        conditions, params = [], []
+        if user_id:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if start:
+            conditions.append("day >= ?")
+            params.append(start)
+        if end:
+            conditions.append("day <= ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        select = ", ".join([f"{period_column} AS period"] + columns)
+        sums = ", ".join(f"SUM({field}) AS {field}" for field in USAGE_FIELDS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {select}, {sums} FROM usage_daily {where} "
+                f"GROUP BY {', '.join(['period'] + columns)} ORDER BY period, cost_usd DESC",
+                params,
+            ).fetchall()
+        return [{**dict(row), "cost_usd": round(row["cost_usd"], 6)} for row in rows]
+
+    def monthly_cost(self, user_id: str) -> float:
+        """사용자의 이번 달 누적 비용 (달러)"""
+        month = datetime.now().strftime("%Y-%m")
+        with self._lock:
+            if (month, user_id) not in self._monthly_cost:
+                stored = self._conn.execute(
+                    "SELECT COALESCE(SUM(cost_usd), 0) FROM usage_daily WHERE user_id = ? AND day >= ?",
+                    (user_id, f"{month}-01"),
+                ).fetchone()[0]
+                pending = sum(values[4] for key, values in self._pending.items()
+                              if key[1] == user_id and key[0].startswith(month))
+                self._monthly_cost[(month, user_id)] = stored + pending
+            return self._monthly_cost[(month, user_id)]
+
+    # ------------------------------------------------------------------
+    # 예산
+    # ------------------------------------------------------------------
+    def budget_status(self, user_id: str) -> Dict[str, Any]:
+        """
+        사용자의 예산 단계를 반환합니다.
+
+        Returns:
+            Dict[str, Any]: mode(full/reduced/cache_only), spent_usd, budget_usd(없으면 None), allowed_variants
+        """
+        budget = self.budgets.get(user_id, self.budgets.get("*"))
+        spent = self.monthly_cost(user_id)
+        if budget is None:
+            mode = BUDGET_MODE_FULL
+        elif spent >= budget:
+            mode = BUDGET_MODE_CACHE_ONLY
+        elif spent >= budget * BUDGET_SOFT_RATIO:
+            mode = BUDGET_MODE_REDUCED
+        else:
+            mode = BUDGET_MODE_FULL
+        return {"mode": mode, "spent_usd": round(spent, 6), "budget_usd": budget,
+                "allowed_variants": allowed_variants(mode)}
+
+    def check_budget(self, user_id: str) -> Dict[str, Any]:
+        """
+        모델 호출이 필요한 새 요청을 받을 수 있는지 확인합니다.
+
+        Returns:
+            Dict[str, Any]: 예산 상태 (budget_status와 같음)
+
+        Raises:
+            BudgetExceeded: 예산을 넘어 미리 생성된 결과만 제공하는 단계인 경우
+        """
+        status = self.budget_status(user_id)
+        if status["mode"] == BUDGET_MODE_CACHE_ONLY:
+            raise BudgetExceeded(user_id, status)
+        return status
+
+
+usage_meter = UsageMeter()
+
+# 이미 계측한 (루트 에이전트 id, 앱 이름)
+_metered = set()
+
+
+def _make_callbacks(app_name: str, meter: UsageMeter) -> Dict[str, Callable]:
+    """앱 이름을 붙여 사용량을 기록하고 예산 단계를 적용하는 콜백 묶음을 만듭니다."""
+
+    def budget_mode(callback_context) -> str:
+        # RunManager run은 시작할 때 정한 단계, ADK /run_sse 요청은 현재 사용 금액으로 판단
+        return (current_budget_mode.get()
+                or meter.budget_status(_user_id(callback_context))["mode"])
+
+    def before_model(callback_context, llm_request):
+        if budget_mode(callback_context) != BUDGET_MODE_CACHE_ONLY:
+            return None
+        from google.adk.models import LlmResponse
+
+        user_id = _user_id(callback_context)
+        logger.warning(f"💸 예산 초과로 모델 호출 차단 [{user_id}] {callback_context.agent_name}")
+        return LlmResponse(
+            error_code="BUDGET_EXCEEDED",
+            error_message=str(BudgetExceeded(user_id, meter.budget_status(user_id))),
+        )
+
+    def after_model(callback_context, llm_response):
+        if llm_response.partial:
+            return None
+        user_id, session_id = _user_id(callback_context), _session_id(callback_context)
+        # 대체되기 전 후보 모델 시도도 토큰을 사용했으므로 함께 기록
+        for attempt in (llm_response.custom_metadata or {}).get(FALLBACKS_METADATA_KEY) or []:
+            if attempt["prompt_tokens"] or attempt["output_tokens"]:
+                meter.record(
+                    user_id, session_id, app_name, callback_context.agent_name, attempt["model"],
+                    attempt["prompt_tokens"], attempt["cached_tokens"], attempt["output_tokens"],
+                )
+        usage = llm_response.usage_metadata
+        if usage is None:
+            return None
+        meter.record(
+            user_id, session_id, app_name, callback_context.agent_name,
+            _model_name(callback_context, llm_response), usage.prompt_token_count or 0,
+            usage.cached_content_token_count or 0, usage.candidates_token_count or 0,
+        )
+        return None
+
+    def before_variant_agent(callback_context):
+        # 예산이 얼마 남지 않은 사용자는 일부 변형 유형만 생성
+        if callback_context.agent_name in allowed_variants(budget_mode(callback_context)):
+            return None
+        return types.Content(role="model", parts=[types.Part(
+            text="이번 달 사용 한도에 가까워 이 유형은 생성하지 않았습니다."
+        )])
+
+    return {"before_model": before_model, "after_model": after_model, "before_variant_agent": before_variant_agent}
+
+
+def meter_agent_tree(root_agent: Any, app_name: str, meter: UsageMeter = usage_meter) -> int:
+    """
+    에이전트 트리의 모든 LlmAgent에 사용량 기록과 예산 단계 콜백을 붙입니다.
+
+    예산 초과 사용자의 모델 호출이 스케줄러 대기열에 들어가지 않도록 스케줄러보다 먼저 붙입니다.
+
+    Args:
+        root_agent: 루트 에이전트
+        app_name (str): 사용량에 기록할 앱 이름
+        meter (UsageMeter): 사용할 집계기 (기본: 서버 공용 집계기)
+
+    Returns:
+        int: 계측한 LlmAgent 수
+    """
+    from google.adk.agents import LlmAgent
+
+    if (id(root_agent), app_name) in _metered:
+        return 0
+    callbacks = _make_callbacks(app_name, meter)
+    count = 0
+    for agent in iter_agent_tree(root_agent):
+        if not isinstance(agent, LlmAgent):
+            continue
+        add_agent_callbacks(agent, "before_model_callback", callbacks["before_model"], first=False)
+        add_agent_callbacks(agent, "after_model_callback", callbacks["after_model"], first=True)
+        if agent.name in VARIANT_AGENT_NAMES:
+            add_agent_callbacks(agent, "before_agent_callback", callbacks["before_variant_agent"], first=True)
+        count += 1
+    _metered.add((id(root_agent), app_name))
+    logger.info(f"💰 사용량 집계 연결 [{app_name}] 에이전트 {count}개")
+    return count
@@ -0,0 +1,297 @@
+"""
+미리 생성한 변형 문제 은행 (SQLite + FTS5 전문 검색)
+
+학기마다 같은 EBS/수능특강 워크북이 반복해서 들어오므로, precompute.py로 워크북 전체를
+미리 파싱/생성해 지문별 8개 유형 결과를 로컬 SQLite 파일에 저장합니다.
+지문은 공백을 정규화한 본문 해시로 찾고, 문항 코드(예: 23005-0001)와 유형, 본문/문제
+키워드(FTS5)로 바로 조회할 수 있습니다. 은행에 모든 유형이 있는 지문은 생성 실행 시
+에이전트를 호출하지 않고 저장된 결과를 사용합니다.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+from variants import VARIANT_AGENT_NAMES, parse_variant
+
+logger = logging.getLogger(__name__)
+
+BANK_PATH = os.getenv(
+    "PROBLEM_FORGE_VARIANT_BANK",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "variant_bank.sqlite3"),
+)
+
+# 생성 실행 시 은행 결과 사용 여부 (PROBLEM_FORGE_VARIANT_BANK_LOOKUP=0 으로 비활성화)
+BANK_LOOKUP_ENABLED = os.getenv("PROBLEM_FORGE_VARIANT_BANK_LOOKUP", "1") != "0"
+
+ITEM_CODE_PATTERN = re.compile(r"\d{5}-\d{4}")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+# 조회 결과 최대 개수
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS passages (
+    passage_id TEXT PRIMARY KEY,
+    item_code TEXT,
+    source TEXT,
+    page INTEGER,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_item_code ON passages (item_code);
+CREATE TABLE IF NOT EXISTS variants (
+    id INTEGER PRIMARY KEY,
+    passage_id TEXT NOT NULL REFERENCES passages (passage_id),
+    variant_type TEXT NOT NULL,
+    answer TEXT,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    UNIQUE (passage_id, variant_type)
+);
+CREATE INDEX IF NOT EXISTS variants_type ON variants (variant_type);
+"""
+
+# rowid = variants.id, 본문은 지문 + 문제/선택지/해설
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS variants_fts USING fts5 (
+    item_code, variant_type, body, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def normalize_passage(text: str) -> str:
+    """비교용으로 지문의 공백을 하나로 정규화합니다."""
+    return WHITESPACE_PATTERN.sub(" ", text or "").strip()
+
+
+def passage_id_for(text: str) -> str:
+    """정규화한 지문 본문으로 지문 ID(해시 앞 16자리)를 만듭니다."""
+    return hashlib.sha256(normalize_passage(text).encode("utf-8")).hexdigest()[:16]
+
+
+def find_item_code(text: str) -> Optional[str]:
+    """텍스트에서 첫 번째 문항 코드(예: 23005-0001)를 찾습니다."""
+    match = ITEM_CODE_PATTERN.search(text or "")
+    return match.group(0) if match else None
+
+
+def fts_query(keyword: str) -> str:
+    """검색어를 FTS5 질의로 바꿉니다 (단어별 접두 일치, 특수 문자는 따옴표로 감쌈)."""
+    terms = [term.replace('"', '""') for term in keyword.split() if term.strip()]
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _search_body(passage_text: str, result: str) -> str:
+    data = parse_variant(result) or {}
+    parts = [passage_text, str(data.get("question", ""))]
+    parts += [str(choice) for choice in data.get("choices") or []]
+    parts.append(str(data.get("explanation", "")))
+    return "\n".join(part for part in parts if part)
+
+
+class VariantBank:
+    """지문별 변형 문제 결과를 저장하고 조회하는 SQLite 은행"""
+
+    def __init__(self, path: str = BANK_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            try:
+                self._conn.executescript(FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError:
+                # FTS5 없이 빌드된 SQLite에서는 LIKE 검색으로 대체
+                logger.warning("⚠️ SQLite FTS5를 사용할 수 없어 키워드 검색을 LIKE로 대체합니다.")
+                self.fts_enabled = False
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # 저장
+    # ------------------------------------------------------------------
+    def add_passage(self, text: str, item_code: Optional[str] = None,
+                    source: Optional[str] = None, page: Optional[int] = None) -> str:
+        """
+        지문을 저장하고 지문 ID를 반환합니다 (이미 있으면 문항 코드/출처만 보충).
+
+        Args:
+            text (str): 지문(문제 전체) 텍스트
+            item_code (Optional[str]): 문항 코드 (없으면 본문에서 찾음)
+            source (Optional[str]): 출처 (워크북 이름 등)
+            page (Optional[int]): 원본 페이지 번호
+
+        Returns:
+            str: 지문 ID
+        """
+        passage_id = passage_id_for(text)
+        item_code = item_code or find_item_code(text)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO passages (passage_id, item_code, source, page, text, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (passage_id) DO UPDATE SET "
+                "item_code = COALESCE(passages.item_code, excluded.item_code), "
+                "source = COALESCE(passages.source, excluded.source), "
+                "page = COALESCE(passages.page, excluded.page)",
+                (passage_id, item_code, source, page, text.strip(), time.time()),
+            )
+        return passage_id
+
+    def add_variants(self, passage_id: str, variants: Dict[str, str]) -> int:
+        """
+        지문의 유형별 결과를 저장합니다 (같은 유형은 새 결과로 교체).
+
+        Args:
+            passage_id (str): add_passage가 반환한 지문 ID
+            variants (Dict[str, str]): 에이전트 이름 → 결과 텍스트(JSON)
+
+        Returns:
+            int: 저장한 유형 수
+
+        Raises:
+            KeyError: 지문이 은행에 없는 경우
+        """
+        with self._lock, self._conn:
+            passage = self._conn.execute(
+                "SELECT item_code, text FROM passages WHERE passage_id = ?", (passage_id,)
+            ).fetchone()
+            if passage is None:
+                raise KeyError(passage_id)
+            count = 0
+            for variant_type, result in variants.items():
+                if variant_type not in VARIANT_AGENT_NAMES or not result:
+                    continue
+                data = parse_variant(result) or {}
+                row = self._conn.execute(
+                    "INSERT INTO variants (passage_id, variant_type, answer, result, created_at) "
+                    "VALUES (?, ?, ?, ?, ?) ON CONFLICT (passage_id, variant_type) DO UPDATE SET "
+                    "answer = excluded.answer, result = excluded.result, created_at = excluded.created_at "
+                    "RETURNING id",
+                    (passage_id, variant_type, str(data.get("answer", "")).strip() or None, result, time.time()),
+                ).fetchone()
+                if self.fts_enabled:
+                    self._conn.execute("DELETE FROM variants_fts WHERE rowid = ?", (row["id"],))
+                    self._conn.execute(
+                        "INSERT INTO variants_fts (rowid, item_code, variant_type, body) VALUES (?, ?, ?, ?)",
+                        (row["id"], passage["item_code"] or "", variant_type, _search_body(passage["text"], result)),
+                    )
+                count += 1
+        return count
+
+    # ------------------------------------------------------------------
+    # 조회
+    # ------------------------------------------------------------------
+    def has_passage(self, text: str, complete: bool = True) -> bool:
+        """지문이 은행에 있는지 확인합니다 (complete면 모든 유형이 있어야 함)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(variants.id) AS count FROM passages "
+                "LEFT JOIN variants ON variants.passage_id = passages.passage_id "
+                "WHERE passages.passage_id = ?", (passage_id_for(text),),
+            ).fetchone()
+        if row is None:
+            return False
+        return row["count"] >= len(VARIANT_AGENT_NAMES) if complete else row["count"] > 0
+
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        지문 본문으로 은행에 저장된 지문과 유형별 결과를 찾습니다.
+
+        Args:
+            text (str): 지문(문제 전체) 텍스트 (공백 차이는 무시)
+
+        Returns:
+            Optional[Dict[str, Any]]: passage_id, item_code, source, page, text, variants (없으면 None)
+        """
+        passage_id = passage_id_for(text)
+        with self._lock:
+            passage = self._conn.execute(
+                "SELECT passage_id, item_code, source, page, text FROM passages WHERE passage_id = ?",
+                (passage_id,),
+            ).fetchone()
+            if passage is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT variant_type, result FROM variants WHERE passage_id = ?", (passage_id,)
+            ).fetchall()
+        found = dict(passage)
+        found["variants"] = {row["variant_type"]: row["result"] for row in rows}
+        return found
+
+    def search(self, item_code: Optional[str] = None, variant_type: Optional[str] = None,
+               keyword: Optional[str] = None, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """
+        문항 코드, 유형, 키워드로 변형 문제를 찾습니다 (조건은 모두 만족해야 함).
+
+        Args:
+            item_code (Optional[str]): 문항 코드 (예: "23005-0001", "23005-"처럼 앞부분만 줘도 됨)
+            variant_type (Optional[str]): 유형별 에이전트 이름
+            keyword (Optional[str]): 지문/문제/선택지/해설 검색어
+            limit (int): 최대 결과 수
+
+        Returns:
+            List[Dict[str, Any]]: passage_id, item_code, source, page, variant_type, answer, result 목록
+        """
+        conditions, params = [], []
+        tables = "variants JOIN passages ON passages.passage_id = variants.passage_id"
+        if item_code:
+            conditions.append("passages.item_code LIKE ?")
+            params.append(f"{item_code.strip()}%")
+        if variant_type:
+            conditions.append("variants.variant_type = ?")
+            params.append(variant_type)
+        order = "passages.item_code, variants.id"
+        if keyword and keyword.strip():
+            if self.fts_enabled:
+                tables += " JOIN variants_fts ON variants_fts.rowid = variants.id"
+                conditions.append("variants_fts MATCH ?")
+                params.append(fts_query(keyword))
+                order = "variants_fts.rank"
+            else:
+                conditions.append("(passages.text LIKE ? OR variants.result LIKE ?)")
+                params += [f"%{keyword.strip()}%"] * 2
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        params.append(max(1, min(limit, MAX_SEARCH_LIMIT)))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT passages.passage_id, passages.item_code, passages.source, passages.page, "
+                f"variants.variant_type, variants.answer, variants.result FROM {tables} {where} "
+                f"ORDER BY {order} LIMIT ?",
+                params,
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            passages = self._conn.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+            variants = self._conn.execute("SELECT COUNT(*) FROM variants").fetchone()[0]
+        return {"passages": passages, "variants": variants}
+
+
+_bank: Optional[VariantBank] = None
+_bank_lock = threading.Lock()
+
+
+def get_variant_bank() -> VariantBank:
+    """서버 공용 변형 문제 은행 (처음 사용할 때 파일을 엶)"""
+    global _bank
+    if _bank is None:
+        with _bank_lock:
+            if _bank is None:
+                _bank = VariantBank()
+    return _bank
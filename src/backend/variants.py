@@ -0,0 +1,104 @@
+"""
+유형별 변형 결과 관리
+
+parallel_agent의 8개 하위 에이전트는 각자의 이름을 output_key로 결과를 세션 상태에
+저장하고, 이 상태 변경(stateDelta)은 AgentTool을 거쳐 root_agent 이벤트까지 전달됩니다.
+run 이벤트 로그에서 유형별 결과를 꺼내 보관하고, 일부 유형만 다시 생성했을 때
+master_agent를 다시 호출하지 않고 로컬에서 전체 결과 마크다운을 조립합니다.
+"""
+
+import re
+import json
+from typing import Dict, Any, List, Optional, Tuple
+
+# (에이전트 이름, 마스터 출력 형식의 유형 제목) - 출력 순서와 동일
+VARIANT_TYPES: List[Tuple[str, str]] = [
+    ("emotion_atmosphere_agent", "심경/분위기 파악"),
+    ("implied_meaning_agent", "밑줄 친 표현의 맥락적 의미 파악"),
+    ("blank_inference_phrase_agent", "빈칸 추론 (구문)"),
+    ("unsuitable_sentence_agent", "글 흐름에 부적절한 문장 찾기"),
+    ("paragraph_order_agent", "글 순서 맞추기"),
+    ("sentence_insertion_agent", "글 흐름에 맞게 문장 끼워넣기"),
+    ("grammar_vocabulary_error_agent", "어법/어휘 상 틀린 표현 찾기"),
+    ("summary_blank_inference_word_agent", "지문 요약에서의 빈칸 추론 (단어)"),
+]
+VARIANT_AGENT_NAMES = [name for name, _ in VARIANT_TYPES]
+
+JSON_BLOCK_PATTERN = re.compile(r"\{.*\}", re.DOTALL)
+CHOICE_NUMBER_PATTERN = re.compile(r"^\s*\d+\s*[.)]\s*")
+
+
+def extract_variants(events: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    run 이벤트 목록의 stateDelta에서 유형별 결과 텍스트를 꺼냅니다.
+
+    Args:
+        events (List[Dict[str, Any]]): ADK 이벤트(JSON) 목록
+
+    Returns:
+        Dict[str, str]: 에이전트 이름 → 결과 텍스트
+    """
+    variants = {}
+    for event in events:
+        state_delta = (event.get("actions") or {}).get("stateDelta") or {}
+        for name in VARIANT_AGENT_NAMES:
+            value = state_delta.get(name)
+            if isinstance(value, str) and value.strip():
+                variants[name] = value
+    return variants
+
+
+def parse_variant(text: str) -> Optional[Dict[str, Any]]:
+    """유형 결과 텍스트에서 question이 있는 JSON 객체를 꺼냅니다 (없으면 None)."""
+    match = JSON_BLOCK_PATTERN.search(text or "")
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) and "question" in data else None
+
+
+def render_variant_markdown(number: int, title: str, text: str) -> str:
+    """
+    유형 하나의 결과(JSON 텍스트)를 마스터 출력 형식의 마크다운으로 만듭니다.
+
+    Args:
+        number (int): 유형 번호 (1부터)
+        title (str): 유형 제목
+        text (str): 하위 에이전트 결과 텍스트
+
+    Returns:
+        str: 마크다운 섹션 (JSON이 아니면 결과 텍스트를 그대로 사용)
+    """
+    header = f"### **변형 문제 유형 {number}: {title}**"
+    data = parse_variant(text)
+    if data is None:
+        return f"{header}\n\n{text.strip()}"
+
+    lines = [header, "", f"**{str(data.get('question', '')).strip()}**"]
+    for index, choice in enumerate(data.get("choices") or [], start=1):
+        lines.append(f"{index}. {CHOICE_NUMBER_PATTERN.sub('', str(choice))}")
+    lines += ["", "**해설:**", str(data.get("explanation", "")).strip(), "", "**정답:**", str(data.get("answer", "")).strip()]
+    return "\n".join(lines)
+
+
+def render_variants_markdown(variants: Dict[str, str], original_text: str = "") -> str:
+    """
+    유형별 결과를 master_agent 출력 형식과 같은 순서의 마크다운으로 조립합니다.
+
+    Args:
+        variants (Dict[str, str]): 에이전트 이름 → 결과 텍스트
+        original_text (str): 사용자가 입력한 원본 지문/문제
+
+    Returns:
+        str: 전체 결과 마크다운
+    """
+    sections = []
+    if original_text:
+        sections.append(f"### **원본 문제**\n\n{original_text.strip()}")
+    for number, (name, title) in enumerate(VARIANT_TYPES, start=1):
+        if name in variants:
+            sections.append(render_variant_markdown(number, title, variants[name]))
+    return "\n\n---\n\n".join(sections)
@@ -0,0 +1,151 @@
+"""
+모델 클라이언트 워밍업과 연결 유지
+
+에이전트의 model 필드가 문자열("gemini-2.0-flash")이면 ADK가 에이전트마다 따로 Gemini 객체와
+google-genai 클라이언트를 만들고, 첫 요청 안에서 클라이언트 생성과 TLS 연결이 이루어져 배포 직후나
+오래 쉬고 난 뒤의 첫 생성이 느립니다. 서버 시작 시 에이전트 트리의 모델을 모델 이름별 공용 객체로
+바꾸고, 서버 이벤트 루프에서 클라이언트를 만든 뒤 가벼운 모델 메타데이터 요청(토큰 소모 없음)으로
+연결 풀에 연결을 미리 열어 둡니다. 일정 시간 모델 호출이 없으면 같은 요청으로 연결을 다시 데웁니다.
+
+PROBLEM_FORGE_MODEL_BASE_URL로 모델 API 주소를 바꾸면 로컬 스텁 서버로 워밍업을 확인할 수 있습니다.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from metrics import add_agent_callbacks, iter_agent_tree
+
+logger = logging.getLogger(__name__)
+
+WARMUP_ENABLED = os.getenv("PROBLEM_FORGE_WARMUP", "1") != "0"
+
+# 이 시간(초) 동안 모델 호출이 없으면 연결을 다시 데움 (0이면 사용 안 함)
+WARMUP_IDLE_SECONDS = float(os.getenv("PROBLEM_FORGE_WARMUP_IDLE_SECONDS", "240"))
+
+# 워밍업 요청 하나의 최대 대기 시간 (초) - 준비 상태가 네트워크 문제로 오래 막히지 않도록
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("PROBLEM_FORGE_WARMUP_TIMEOUT", "10"))
+
+# 모델 API 주소 (비어 있으면 google-genai 기본값)
+MODEL_BASE_URL = os.getenv("PROBLEM_FORGE_MODEL_BASE_URL", "")
+
+
+def has_model_credentials() -> bool:
+    """google-genai 클라이언트를 만들 수 있는 인증 설정이 있는지 확인합니다."""
+    if os.getenv("GOOGLE_GENAI_USE_VERTEXAI", "").lower() in ("1", "true"):
+        return True
+    return bool(os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY"))
+
+
+class ModelWarmer:
+    """에이전트 트리의 모델을 공용 객체로 묶고 클라이언트/연결을 미리 준비하는 도구"""
+
+    def __init__(self, idle_seconds: float = WARMUP_IDLE_SECONDS, base_url: str = MODEL_BASE_URL):
+        self.idle_seconds = idle_seconds
+        self.base_url = base_url
+        # 모델 이름 → 공용 BaseLlm 객체
+        self.models: Dict[str, Any] = {}
+        self.last_activity = time.monotonic()
+        self.warmups = 0
+        # 호출 시각 기록 콜백을 붙인 에이전트 (id)
+        self._noted_agents = set()
+
+    def shared_model(self, name: str) -> Any:
+        """모델 이름별 공용 BaseLlm 객체를 반환합니다 (없으면 만듦)."""
+        from google.adk.models.registry import LLMRegistry
+
+        if name not in self.models:
+            model_class = LLMRegistry.resolve(name)
+            kwargs = {"model": name}
+            if self.base_url and "base_url" in model_class.model_fields:
+                kwargs["base_url"] = self.base_url
+            self.models[name] = model_class(**kwargs)
+        return self.models[name]
+
+    def share_models(self, root_agent: Any) -> List[str]:
+        """
+        트리의 LlmAgent 중 model이 문자열인 에이전트를 모델 이름별 공용 객체로 바꿉니다.
+
+        모델 라우터가 이미 감싼 에이전트는 후보 모델을 워밍업 대상에 포함합니다.
+        같은 모델을 쓰는 에이전트가 한 클라이언트(연결 풀)를 함께 사용하게 되고,
+        모델 호출 시각도 기록해 유휴 시간 판단에 사용합니다.
+
+        Args:
+            root_agent: 루트 에이전트
+
+        Returns:
+            List[str]: 트리에서 공용 모델로 묶인 모델 이름 목록
+        """
+        from google.adk.agents import LlmAgent
+
+        names = []
+        for agent in iter_agent_tree(root_agent):
+            if not isinstance(agent, LlmAgent):
+                continue
+            if isinstance(agent.model, str) and agent.model:
+                agent.model = self.shared_model(agent.model)
+            # 모델 라우터(RoutedLlm)로 감싼 모델은 후보 모델마다 공용 객체를 사용
+            models = list(getattr(agent.model, "candidates", {}).values()) or [agent.model]
+            shared = [model for model in models if self.models.get(getattr(model, "model", None)) is model]
+            if shared and id(agent) not in self._noted_agents:
+                add_agent_callbacks(agent, "before_model_callback", self._note_activity, first=False)
+                self._noted_agents.add(id(agent))
+            for model in shared:
+                if model.model not in names:
+                    names.append(model.model)
+        return names
+
+    def _note_activity(self, callback_context: Any, llm_request: Any) -> None:
+        self.last_activity = time.monotonic()
+        return None
+
+    async def _warm_model(self, name: str, model: Any) -> None:
+        api_client = getattr(model, "api_client", None)
+        if api_client is None:
+            return
+        started = time.perf_counter()
+        # 메타데이터 조회는 토큰을 쓰지 않고 TLS 연결만 열어 연결 풀에 남김
+        await asyncio.wait_for(api_client.aio.models.get(model=name), WARMUP_TIMEOUT_SECONDS)
+        logger.info(f"🔥 모델 연결 워밍업 완료 [{name}] {time.perf_counter() - started:.2f}초")
+
+    async def warm_up(self, names: List[str] = None) -> None:
+        """
+        공용 모델의 클라이언트를 현재 이벤트 루프에서 만들고 연결을 미리 엽니다.
+
+        실패(네트워크, 인증 등)는 경고만 남기며 서버 준비를 막지 않습니다.
+
+        Args:
+            names (List[str]): 워밍업할 모델 이름 (없으면 모든 공용 모델)
+        """
+        if not WARMUP_ENABLED:
+            return
+        if not has_model_credentials():
+            logger.info("모델 API 키가 설정되지 않아 연결 워밍업을 건너뜁니다.")
+            return
+        targets = {name: self.models[name] for name in (names or self.models) if name in self.models}
+        results = await asyncio.gather(
+            *(self._warm_model(name, model) for name, model in targets.items()),
+            return_exceptions=True,
+        )
+        for name, result in zip(targets, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"⚠️ 모델 연결 워밍업 실패 [{name}]: {result!r}")
+        self.warmups += 1
+        self.last_activity = time.monotonic()
+
+    async def keep_warm(self) -> None:
+        """모델 호출 없이 idle_seconds가 지날 때마다 연결을 다시 데우는 백그라운드 루프"""
+        if not WARMUP_ENABLED or self.idle_seconds <= 0:
+            return
+        while True:
+            idle = time.monotonic() - self.last_activity
+            if idle >= self.idle_seconds:
+                logger.info(f"🔥 {idle:.0f}초 동안 모델 호출이 없어 연결을 다시 데웁니다.")
+                await self.warm_up()
+                idle = 0.0
+            await asyncio.sleep(self.idle_seconds - idle)
+
+
+model_warmer = ModelWarmer()
@@ -0,0 +1,120 @@
+"""
+인쇄용 학습지(HTML) 내보내기
+
+저장된 run의 유형별 결과를 문제편과 정답/해설편으로 나눈 인쇄용 HTML 학습지로 만듭니다.
+문제 하나씩 읽어 바로 HTML 조각으로 내보내는 제너레이터라서 문제가 수백 개여도
+메모리에는 문제 하나 분량만 올라갑니다 (정답편은 문제 목록을 한 번 더 읽어 만듦).
+브라우저에서 열어 인쇄하거나 PDF로 저장하면 문제마다 쪽이 나뉩니다.
+"""
+
+import html
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from variants import CHOICE_NUMBER_PATTERN, VARIANT_TYPES, parse_variant
+
+WORKSHEET_STYLE = """
+body { font-family: "Noto Serif KR", "Times New Roman", serif; font-size: 11pt; line-height: 1.6; margin: 2em; }
+h1 { font-size: 18pt; text-align: center; }
+h2 { font-size: 14pt; border-bottom: 2px solid #333; padding-bottom: 0.2em; }
+h3 { font-size: 12pt; margin-top: 1.4em; }
+.problem { page-break-inside: auto; }
+.problem + .problem { page-break-before: always; }
+.original, .question { white-space: pre-wrap; }
+.original { border: 1px solid #999; padding: 0.6em 0.8em; }
+.question { font-weight: bold; }
+ol.choices { margin: 0.4em 0 0 0; padding-left: 2em; }
+.answer-key { page-break-before: always; }
+.answer-key .answer { font-weight: bold; }
+.answer-key .explanation { white-space: pre-wrap; margin: 0.2em 0 0.8em 0; }
+.raw { white-space: pre-wrap; font-family: monospace; }
+@media print { body { margin: 0; } }
+"""
+
+
+def _escape(text: Any) -> str:
+    return html.escape(str(text or "").strip())
+
+
+def _variant_sections(item: Dict[str, Any]) -> Iterator[tuple]:
+    """문제의 유형별 (번호, 제목, 파싱한 결과 또는 None, 원문 텍스트)을 출력 순서대로 내보냅니다."""
+    variants = item.get("variants") or {}
+    for number, (name, title) in enumerate(VARIANT_TYPES, start=1):
+        if name in variants:
+            yield number, title, parse_variant(variants[name]), variants[name]
+
+
+def render_problem_html(index: int, item: Dict[str, Any]) -> str:
+    """
+    문제 하나의 문제편 HTML 조각을 만듭니다 (정답/해설 제외).
+
+    Args:
+        index (int): 문제 번호 (1부터)
+        item (Dict[str, Any]): label, original_text, variants, result
+
+    Returns:
+        str: HTML 조각
+    """
+    parts = [f'<section class="problem"><h2>문제 {index}. {_escape(item.get("label"))}</h2>']
+    if item.get("original_text"):
+        parts.append(f'<div class="original">{_escape(item["original_text"])}</div>')
+
+    sections = list(_variant_sections(item))
+    if not sections:
+        # 유형별 결과가 없는 run은 최종 결과 텍스트를 그대로 출력
+        parts.append(f'<div class="raw">{_escape(item.get("result") or "결과를 생성하지 못했습니다.")}</div>')
+    for number, title, data, text in sections:
+        parts.append(f"<h3>유형 {number}. {_escape(title)}</h3>")
+        if data is None:
+            parts.append(f'<div class="raw">{_escape(text)}</div>')
+            continue
+        parts.append(f'<div class="question">{_escape(data.get("question"))}</div>')
+        choices = "".join(f"<li>{_escape(CHOICE_NUMBER_PATTERN.sub('', str(choice)))}</li>"
+                          for choice in data.get("choices") or [])
+        if choices:
+            parts.append(f'<ol class="choices">{choices}</ol>')
+    parts.append("</section>\n")
+    return "".join(parts)
+
+
+def render_answer_key_html(index: int, item: Dict[str, Any]) -> str:
+    """문제 하나의 정답/해설편 HTML 조각을 만듭니다."""
+    parts = [f"<h3>문제 {index}. {_escape(item.get('label'))}</h3>"]
+    for number, title, data, _ in _variant_sections(item):
+        if data is None:
+            continue
+        parts.append(
+            f'<div>유형 {number}. {_escape(title)} - 정답: <span class="answer">{_escape(data.get("answer"))}</span></div>'
+            f'<div class="explanation">{_escape(data.get("explanation"))}</div>'
+        )
+    return "".join(parts) + "\n"
+
+
+def iter_worksheet_html(
+    load_items: Callable[[], Iterable[Optional[Dict[str, Any]]]],
+    title: str = "변형 문제 학습지",
+    answer_key: bool = True,
+) -> Iterator[str]:
+    """
+    학습지 HTML을 조각 단위로 내보냅니다.
+
+    Args:
+        load_items: 문제(label, original_text, variants, result)를 순서대로 읽어 오는 함수.
+            정답편을 만들 때 한 번 더 호출하며, 찾을 수 없는 문제는 None (번호를 매기지 않고 건너뜀)
+        title (str): 학습지 제목
+        answer_key (bool): 정답/해설편 포함 여부
+
+    Yields:
+        str: HTML 조각
+    """
+    yield (f'<!DOCTYPE html>\n<html lang="ko"><head><meta charset="utf-8"><title>{_escape(title)}</title>'
+           f"<style>{WORKSHEET_STYLE}</style></head><body>\n<h1>{_escape(title)}</h1>\n")
+    # 찾을 수 없는 문제는 건너뛰고 번호는 실제로 넣은 문제에만 붙임
+    for index, item in enumerate((item for item in load_items() if item is not None), start=1):
+        yield render_problem_html(index, item)
+
+    if answer_key:
+        yield '<section class="answer-key"><h2>정답 및 해설</h2>\n'
+        for index, item in enumerate((item for item in load_items() if item is not None), start=1):
+            yield render_answer_key_html(index, item)
+        yield "</section>\n"
+    yield "</body></html>\n"
@@ -13,6 +13,39 @@ pdfjsLib.GlobalWorkerOptions.workerSrc = '/pdf.worker.min.js';
 const API_BASE_URL = process.env.REACT_APP_API_URL;
 const api = axios.create({ baseURL: API_BASE_URL });
 
+// 파이프라인 모드에서 동시에 실행할 변형 생성 개수
+const PIPELINE_GENERATION_CONCURRENCY = 2;
+
+// 생성 실행 스트림 재연결 설정
+const RUN_RECONNECT_LIMIT = 5;
+const RUN_RECONNECT_DELAY_MS = 1000;
+
+// 로그인 사용자를 알 수 없을 때 PDF 파싱 세션에 사용할 사용자 ID
+// (서버는 사용자 ID별로 모델 호출을 공평하게 나눠 배정하므로 가능하면 로그인 ID를 사용)
+const PDF_PARSER_USER_ID = "pdf_parser";
+
+// 이보다 많은 문제를 한 번에 변환하면 채팅창에는 요약만 표시하고 전체 결과는 학습지(HTML)로 내려받음
+const WORKSHEET_SUMMARY_THRESHOLD = 5;
+
+// 시험지 사진 업로드 전 브라우저에서 줄이는 최대 크기 (긴 변 픽셀, 세밀한 자르기/축소는 서버에서 처리)
+const UPLOAD_IMAGE_MAX_EDGE = 2400;
+const UPLOAD_IMAGE_JPEG_QUALITY = 0.85;
+
+// 서버 혼잡(503) 시 Retry-After만큼 기다렸다가 다시 요청하는 최대 횟수
+const OVERLOAD_RETRY_LIMIT = 5;
+
+// 503 응답이면 Retry-After(초)만큼 기다린 뒤 같은 요청을 다시 보냄
+const fetchWithRetryAfter = async (url, options, onRetry, attempt = 0) => {
+  const response = await fetch(url, options);
+  if (response.status !== 503 || attempt >= OVERLOAD_RETRY_LIMIT) {
+    return response;
+  }
+  const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 5;
+  onRetry?.(retryAfter, attempt + 1);
+  await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+  return fetchWithRetryAfter(url, options, onRetry, attempt + 1);
+};
+
 const extractTextFromPdf = async (file) => {
   const reader = new FileReader();
   return new Promise((resolve, reject) => {
@@ -82,60 +115,110 @@ const extractTextFromPdf = async (file) => {
   });
 };
 
-// 📄 NEW: PDF에서 페이지별로 영어 문제 추출 (병렬 처리)
-const extractEnglishProblemsFromPdf = async (file, appendLog, updateProgress) => {
+// 🖼️ 업로드 전 사진 축소 (EXIF 방향 반영, 이미 작거나 실패하면 원본 사용)
+const shrinkImageForUpload = async (file) => {
+  try {
+    const bitmap = await createImageBitmap(file, { imageOrientation: 'from-image' });
+    const scale = Math.min(1, UPLOAD_IMAGE_MAX_EDGE / Math.max(bitmap.width, bitmap.height));
+    if (scale === 1 && file.size < 1024 * 1024) {
+      return file;
+    }
+    const canvas = document.createElement('canvas');
+    canvas.width = Math.round(bitmap.width * scale);
+    canvas.height = Math.round(bitmap.height * scale);
+    canvas.getContext('2d').drawImage(bitmap, 0, 0, canvas.width, canvas.height);
+    const blob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', UPLOAD_IMAGE_JPEG_QUALITY));
+    return blob && blob.size < file.size ? blob : file;
+  } catch (error) {
+    return file;
+  }
+};
+
+// 🖼️ 시험지 사진에서 텍스트 추출 (서버에서 회전/자르기/축소 후 추출, 같은 사진은 캐시 사용)
+const extractTextFromImage = async (file, appendLog, userId) => {
+  const upload = await shrinkImageForUpload(file);
+  const response = await api.post('/api/images/ingest', upload, {
+    headers: { 'Content-Type': upload.type || file.type },
+    params: { userId }, // 예산 확인과 사용량 기록
+  });
+  const { text, cached, originalBytes, processedBytes } = response.data;
+  appendLog(`🖼️ 사진 텍스트 추출 완료 (업로드 ${file.size} → ${upload.size}바이트, ` +
+    `모델 입력 ${originalBytes} → ${processedBytes}바이트${cached ? ', 캐시' : ''})`);
+  return text;
+};
+
+// 📄 NEW: PDF에서 파싱 단위별로 영어 문제 추출 (병렬 처리)
+// onProblem이 주어지면 파싱 단위가 끝날 때마다 발견된 문제를 즉시 전달 (파이프라인 모드)
+const extractEnglishProblemsFromPdf = async (file, appendLog, updateProgress, onProblem = null, userId = PDF_PARSER_USER_ID) => {
   const reader = new FileReader();
   return new Promise((resolve, reject) => {
     reader.onload = async (event) => {
       try {
         const pdf = await pdfjsLib.getDocument({ data: event.target.result }).promise;
         const totalPages = pdf.numPages;
-        let completedPages = 0;
         
         appendLog(`PDF 파싱 시작 - 파일명: ${file.name}, 총 페이지 수: ${totalPages}`);
         console.log(`[영어문제 추출] 총 페이지 수: ${totalPages}`);
         
+        // 1단계: 모든 페이지 텍스트 추출 (로컬 처리)
+        const pageNumbers = Array.from({ length: totalPages }, (_, i) => i + 1);
+        const pageTexts = await Promise.all(pageNumbers.map(i => extractPageText(pdf, i)));
+        
+        // 2단계: 페이지 경계에서 잘린 문제를 이어붙인 파싱 단위 생성 + 사전 분류
+        const unitsResponse = await api.post('/api/pdf/parse-units', { pages: pageTexts });
+        const units = unitsResponse.data.units;
+        const candidateUnits = units.filter(unit => unit.classification.has_candidate);
+        
+        units
+          .filter(unit => !unit.classification.has_candidate)
+          .forEach(unit => appendLog(`⏭️ ${unitLabel(unit)}: 에이전트 호출 생략 (${unit.classification.reason})`));
+        units
+          .filter(unit => unit.stitched)
+          .forEach(unit => appendLog(`🧩 ${unitLabel(unit)}: 페이지 경계 문제 이어붙임`));
+        
         // 📊 진행률 업데이트 함수
-        const updatePageProgress = () => {
-          completedPages += 1;
-          updateProgress(completedPages, totalPages);
-          appendLog(`진행률: ${completedPages}/${totalPages} 페이지 완료`);
+        let completedUnits = 0;
+        const updateUnitProgress = () => {
+          completedUnits += 1;
+          updateProgress(completedUnits, candidateUnits.length);
+          appendLog(`진행률: ${completedUnits}/${candidateUnits.length} 파싱 단위 완료`);
         };
         
-        // 🚀 병렬 처리: 모든 페이지를 동시에 처리
-        const pagePromises = [];
-        for (let i = 1; i <= totalPages; i++) {
-          const pagePromise = processPageParallel(pdf, i, appendLog, updatePageProgress);
-          pagePromises.push(pagePromise);
-        }
-        
-        // Promise.allSettled를 사용하여 모든 페이지 처리 완료 대기
-        appendLog(`🚀 ${totalPages}개 페이지 병렬 처리 시작...`);
-        const pageResults = await Promise.allSettled(pagePromises);
+        // 🚀 병렬 처리: 문제가 있을 수 있는 파싱 단위만 동시에 처리
+        appendLog(`🚀 ${candidateUnits.length}개 파싱 단위 병렬 처리 시작 (전체 ${units.length}개 중)...`);
+        const unitResults = await Promise.allSettled(
+          candidateUnits.map(unit => processParseUnit(unit, appendLog, updateUnitProgress, userId).then(unitResult => {
+            if (onProblem && unitResult.problems) {
+              unitResult.problems.forEach(problem => onProblem({ ...problem, source_page: unit.pages[0], source_pages: unit.pages }));
+            }
+            return unitResult;
+          }))
+        );
         
         // 결과 수집
         const allProblems = [];
         let successCount = 0;
         let failureCount = 0;
         
-        pageResults.forEach((result, index) => {
-          const pageNumber = index + 1;
+        unitResults.forEach((result, index) => {
+          const unit = candidateUnits[index];
           if (result.status === 'fulfilled') {
             successCount++;
-            const pageResult = result.value;
-            if (pageResult.problems && pageResult.problems.length > 0) {
-              pageResult.problems.forEach(problem => {
-                problem.source_page = pageNumber;
+            const unitResult = result.value;
+            if (unitResult.problems && unitResult.problems.length > 0) {
+              unitResult.problems.forEach(problem => {
+                problem.source_page = unit.pages[0];
+                problem.source_pages = unit.pages;
                 allProblems.push(problem);
               });
-              appendLog(`✅ 페이지 ${pageNumber}: ${pageResult.problems.length}개 영어문제 발견`);
+              appendLog(`✅ ${unitLabel(unit)}: ${unitResult.problems.length}개 영어문제 발견`);
             } else {
-              appendLog(`⚪ 페이지 ${pageNumber}: 영어문제 없음`);
+              appendLog(`⚪ ${unitLabel(unit)}: 영어문제 없음`);
             }
           } else {
             failureCount++;
-            appendLog(`❌ 페이지 ${pageNumber} 처리 실패: ${result.reason}`);
-            console.error(`[영어문제 추출] 페이지 ${pageNumber} 실패:`, result.reason);
+            appendLog(`❌ ${unitLabel(unit)} 처리 실패: ${result.reason}`);
+            console.error(`[영어문제 추출] ${unitLabel(unit)} 실패:`, result.reason);
           }
         });
         
@@ -160,48 +243,232 @@ const extractEnglishProblemsFromPdf = async (file, appendLog, updateProgress) =>
   });
 };
 
-// 🔄 개별 페이지 처리 함수 (병렬 처리용)
-const processPageParallel = async (pdf, pageNumber, appendLog, updatePageProgress) => {
-  try {
-    appendLog(`📄 페이지 ${pageNumber} 텍스트 추출 시작...`);
-    
-    const page = await pdf.getPage(pageNumber);
-    const text = await page.getTextContent();
-    
-    // 텍스트 아이템들을 위치 정보를 고려하여 줄바꿈 처리
-    let lastY = null;
-    let pageLines = [];
-    let currentLine = [];
-    
-    text.items.forEach(item => {
-      if (lastY !== null && Math.abs(lastY - item.transform[5]) > 2) {
-        if (currentLine.length > 0) {
-          pageLines.push(currentLine.join(' '));
-          currentLine = [];
+// 🔁 생성 실행 이벤트 구독 (SSE 연결이 끊기면 Last-Event-ID로 재연결, 에이전트는 재실행하지 않음)
+// 결과는 { ok, text } - 실행이 완료되어 결과를 받았을 때만 ok
+const followRunEvents = (runId, appendLog) => new Promise((resolve, reject) => {
+  let lastEventId = 0;
+  let reconnectCount = 0;
+  let finalResult = null;
+  
+  const finish = async () => {
+    try {
+      // 서버에 저장된 최종 결과 우선 사용
+      const runResponse = await api.get(`/api/runs/${runId}`);
+      if (runResponse.data.status === 'failed') {
+        appendLog(`❌ 생성 실행 실패: ${runResponse.data.error}`);
+      }
+      const result = runResponse.data.result || finalResult;
+      resolve({ ok: runResponse.data.status === 'completed' && !!result, text: result || "결과를 받지 못했습니다." });
+    } catch (error) {
+      resolve({ ok: !!finalResult, text: finalResult || "결과를 받지 못했습니다." });
+    }
+  };
+  
+  const reconnect = (error) => {
+    reconnectCount += 1;
+    if (reconnectCount > RUN_RECONNECT_LIMIT) {
+      appendLog(`❌ 실행 ${runId} 스트림 재연결 한도 초과`);
+      reject(error || new Error('스트림 재연결 한도 초과'));
+      return;
+    }
+    appendLog(`🔌 실행 ${runId} 스트림 끊김 - ${lastEventId}번 이벤트 이후부터 재연결 (${reconnectCount}/${RUN_RECONNECT_LIMIT})`);
+    setTimeout(connect, RUN_RECONNECT_DELAY_MS * reconnectCount);
+  };
+  
+  // 작성자별로 받은 부분 응답 조각 (완성 응답이 fromDeltas로 오면 이어 붙인 텍스트를 사용)
+  const streamedText = {};
+
+  // delta 모드 프레임 처리: { author, role, text?, partial?, fromDeltas?, calls?, result?, error? }
+  const handleEvent = (data) => {
+    try {
+      const frame = JSON.parse(data);
+      
+      if (frame.partial) {
+        streamedText[frame.author] = (streamedText[frame.author] || '') + frame.text;
+        return;
+      }
+      
+      appendLog(`[RAW] ${data}`);
+      if (frame.error) {
+        appendLog(`⚠️ ${frame.author}: ${frame.error}`);
+      }
+      if (frame.calls) {
+        appendLog(`${frame.author} → ${frame.calls.join(', ')} 호출`);
+      }
+      
+      // 최종 결과 처리
+      // functionResponse 처리를 먼저 확인 (에이전트가 생성한 실제 내용)
+      if (frame.role === "user" && frame.result) {
+        finalResult = frame.result;
+        appendLog(`에이전트 변형 문제 수신: ${frame.result.substring(0, 100)}...`);
+      }
+      
+      // text 응답 처리 (functionResponse가 없거나 더 긴 경우에만 사용)
+      if (frame.role === "model") {
+        const resultText = frame.fromDeltas ? streamedText[frame.author] : frame.text;
+        delete streamedText[frame.author];
+        if (resultText) {
+          // functionResponse가 이미 있고 text가 더 짧으면 덮어쓰지 않음
+          if (!finalResult || resultText.length > finalResult.length) {
+            finalResult = resultText;
+            appendLog(`에이전트 응답 수신: ${resultText.substring(0, 100)}...`);
+          } else {
+            appendLog(`추가 메시지 수신: ${resultText.substring(0, 100)}...`);
+          }
         }
       }
-      currentLine.push(item.str);
-      lastY = item.transform[5];
+    } catch (parseError) {
+      // JSON 파싱 실패 시 원본 데이터를 로그로 표시
+      if (data.trim()) {
+        appendLog(`[서버] ${data}`);
+      }
+    }
+  };
+  
+  const connect = () => {
+    // delta 모드: 부분 응답 조각을 서버에서 묶고 필요한 필드만 받음 (브라우저가 gzip 자동 해제)
+    fetch(`${API_BASE_URL}/api/runs/${runId}/events?mode=delta`, {
+      headers: {
+        'Accept': 'text/event-stream',
+        'Last-Event-ID': String(lastEventId)
+      }
+    }).then(response => {
+      if (!response.ok) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+      }
+      reconnectCount = 0;
+      
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let eventId = null;
+      let eventName = null;
+      let ended = false;
+      
+      const readStream = () => {
+        reader.read().then(({ done, value }) => {
+          if (done) {
+            if (ended) {
+              appendLog(`스트리밍 완료`);
+              finish();
+            } else {
+              reconnect();
+            }
+            return;
+          }
+          
+          buffer += decoder.decode(value, { stream: true });
+          const lines = buffer.split('\n');
+          buffer = lines.pop(); // 마지막 불완전한 줄 보관
+          
+          lines.forEach(line => {
+            if (line.startsWith('id: ')) {
+              eventId = parseInt(line.slice(4), 10);
+            } else if (line.startsWith('event: ')) {
+              eventName = line.slice(7);
+            } else if (line.startsWith('data: ')) {
+              if (eventName === 'end') {
+                ended = true;
+              } else {
+                handleEvent(line.slice(6)); // 'data: ' 제거
+                if (eventId !== null) lastEventId = eventId;
+              }
+            } else if (line === '') {
+              eventId = null;
+              eventName = null;
+            }
+          });
+          
+          readStream();
+        }).catch(error => {
+          appendLog(`스트리밍 읽기 오류: ${error.message}`);
+          reconnect(error);
+        });
+      };
+      
+      readStream();
+    }).catch(error => {
+      appendLog(`실행 스트림 연결 실패: ${error.message}`);
+      reconnect(error);
     });
-    
-    if (currentLine.length > 0) {
-      pageLines.push(currentLine.join(' '));
+  };
+  
+  connect();
+});
+
+// 🧵 동시 실행 개수를 제한하는 작업 큐 (파이프라인 모드용)
+const createTaskQueue = (concurrency) => {
+  let running = 0;
+  const pending = [];
+  
+  const runNext = () => {
+    if (running >= concurrency || pending.length === 0) return;
+    const { task, resolve, reject } = pending.shift();
+    running += 1;
+    task()
+      .then(resolve, reject)
+      .finally(() => {
+        running -= 1;
+        runNext();
+      });
+  };
+  
+  return {
+    push: (task) => new Promise((resolve, reject) => {
+      pending.push({ task, resolve, reject });
+      runNext();
+    }),
+  };
+};
+
+// 🏷️ 파싱 단위 표시용 라벨 (예: "페이지 3", "페이지 3-4")
+const unitLabel = (unit) => `페이지 ${unit.pages.length > 1 ? `${unit.pages[0]}-${unit.pages[unit.pages.length - 1]}` : unit.pages[0]}`;
+
+// 📄 개별 페이지 텍스트 추출 (Y 좌표 기준 줄바꿈)
+const extractPageText = async (pdf, pageNumber) => {
+  const page = await pdf.getPage(pageNumber);
+  const text = await page.getTextContent();
+  
+  // 텍스트 아이템들을 위치 정보를 고려하여 줄바꿈 처리
+  let lastY = null;
+  let pageLines = [];
+  let currentLine = [];
+  
+  text.items.forEach(item => {
+    if (lastY !== null && Math.abs(lastY - item.transform[5]) > 2) {
+      if (currentLine.length > 0) {
+        pageLines.push(currentLine.join(' '));
+        currentLine = [];
+      }
     }
-    
-    const pageText = pageLines.join('\n');
-    appendLog(`📄 페이지 ${pageNumber} 텍스트 추출 완료 (${pageText.length}자) - 에이전트 호출...`);
+    currentLine.push(item.str);
+    lastY = item.transform[5];
+  });
+  
+  if (currentLine.length > 0) {
+    pageLines.push(currentLine.join(' '));
+  }
+  
+  return pageLines.join('\n');
+};
+
+// 🔄 개별 파싱 단위 처리 함수 (병렬 처리용)
+const processParseUnit = async (unit, appendLog, updateUnitProgress, userId) => {
+  const label = unitLabel(unit);
+  try {
+    appendLog(`📄 ${label} (${unit.text.length}자) - 에이전트 호출...`);
     
     // PDF 파싱 에이전트 호출
-    const result = await callPdfParsingAgent(pageText, pageNumber, appendLog);
+    const result = await callPdfParsingAgent(unit.text, unit.unit_id, appendLog, userId);
     
     // 진행률 업데이트
-    updatePageProgress();
+    updateUnitProgress();
     
     return result;
   } catch (error) {
     // 진행률 업데이트 (실패해도 완료된 것으로 간주)
-    updatePageProgress();
-    throw new Error(`페이지 ${pageNumber} 처리 실패: ${error.message}`);
+    updateUnitProgress();
+    throw new Error(`${label} 처리 실패: ${error.message}`);
   }
 };
 
@@ -261,31 +528,31 @@ const splitProblemsOnClient = (text) => {
 };
 
 // 📡 PDF 파싱 에이전트 호출 (별도 앱으로 마운트된 pdf_agent 호출)
-const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
+const callPdfParsingAgent = async (pageText, unitId, appendLog, userId = PDF_PARSER_USER_ID) => {
   const appName = "pdf_agent";
-  const sessionId = `pdf-parsing-${pageNumber}-${Date.now()}`; // 페이지별 고유 세션
+  const sessionId = `pdf-parsing-${unitId}-${Date.now()}`; // 파싱 단위별 고유 세션
   
   try {
-    appendLog(`페이지 ${pageNumber}: PDF 파싱 에이전트 세션 생성 시작`);
+    appendLog(`파싱 단위 ${unitId}: PDF 파싱 에이전트 세션 생성 시작`);
     
     // 1단계: PDF 앱에서 세션 생성 (/pdf 경로 사용)
     try {
-      await api.post(`/pdf/apps/${appName}/users/pdf_parser/sessions/${sessionId}`, {
-        state: { pageNumber: pageNumber }
+      await api.post(`/pdf/apps/${appName}/users/${userId}/sessions/${sessionId}`, {
+        state: { unitId: unitId }
       });
-      appendLog(`페이지 ${pageNumber}: PDF 파싱 세션 생성 완료 [${sessionId}]`);
+      appendLog(`파싱 단위 ${unitId}: PDF 파싱 세션 생성 완료 [${sessionId}]`);
     } catch (sessionError) {
       if (sessionError.response?.status !== 409) {
-        appendLog(`페이지 ${pageNumber}: PDF 파싱 세션 생성 실패 - ${sessionError.message}`);
+        appendLog(`파싱 단위 ${unitId}: PDF 파싱 세션 생성 실패 - ${sessionError.message}`);
       } else {
-        appendLog(`페이지 ${pageNumber}: 기존 PDF 파싱 세션 재사용 [${sessionId}]`);
+        appendLog(`파싱 단위 ${unitId}: 기존 PDF 파싱 세션 재사용 [${sessionId}]`);
       }
     }
     
     // 2단계: PDF 파싱 에이전트 실행 (/pdf/run_sse 사용)
     const requestBody = {
       appName: appName,
-      userId: "pdf_parser", 
+      userId: userId,
       sessionId: sessionId,
       streaming: true,
       newMessage: {
@@ -295,13 +562,13 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
     };
     
     // 전송되는 텍스트 내용을 콘솔과 로그에 출력
-    console.log(`[PDF 텍스트 전송] 페이지 ${pageNumber}:`, {
+    console.log(`[PDF 텍스트 전송] 파싱 단위 ${unitId}:`, {
       길이: `${pageText.length}자`,
       내용: pageText.substring(0, 200) + (pageText.length > 200 ? '...' : ''),
       전체내용: pageText  // 디버깅용으로 전체 내용도 콘솔에 출력
     });
     
-    appendLog(`페이지 ${pageNumber}: PDF 파싱 에이전트에 텍스트 전송 (${pageText.length}자)`);
+    appendLog(`파싱 단위 ${unitId}: PDF 파싱 에이전트에 텍스트 전송 (${pageText.length}자)`);
     appendLog(`📝 전송 텍스트 전체 내용:`);
     appendLog("-".repeat(50));
     appendLog(pageText);
@@ -309,13 +576,15 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
     
     return new Promise((resolve, reject) => {
       // 🚀 PDF 앱의 run_sse 엔드포인트 사용
-      fetch(`${API_BASE_URL}/pdf/run_sse`, {
+      fetchWithRetryAfter(`${API_BASE_URL}/pdf/run_sse`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'Accept': 'text/event-stream'
         },
         body: JSON.stringify(requestBody)
+      }, (retryAfter, attempt) => {
+        appendLog(`파싱 단위 ${unitId}: 서버 혼잡으로 ${retryAfter}초 후 다시 요청 (${attempt}/${OVERLOAD_RETRY_LIMIT})`);
       }).then(response => {
         if (!response.ok) {
           throw new Error(`HTTP ${response.status}: ${response.statusText}`);
@@ -329,7 +598,7 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
         const readStream = () => {
           reader.read().then(({ done, value }) => {
             if (done) {
-              appendLog(`페이지 ${pageNumber} PDF 파싱 에이전트 스트리밍 완료`);
+              appendLog(`파싱 단위 ${unitId} PDF 파싱 에이전트 스트리밍 완료`);
               
               // 최종 결과가 없으면 기본 응답 반환
               if (!finalResult) {
@@ -337,7 +606,7 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
                   has_english_problem: false,
                   reason: "에이전트 응답 없음",
                   problems: [],
-                  page_number: pageNumber
+                  unit_id: unitId
                 });
               } else {
                 try {
@@ -363,17 +632,17 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
                     throw new Error('has_english_problem 필드가 없습니다');
                   }
                   
-                  parsedResult.page_number = pageNumber;
-                  appendLog(`페이지 ${pageNumber} JSON 파싱 성공: ${parsedResult.has_english_problem ? '영어문제 발견' : '영어문제 없음'}`);
+                  parsedResult.unit_id = unitId;
+                  appendLog(`파싱 단위 ${unitId} JSON 파싱 성공: ${parsedResult.has_english_problem ? '영어문제 발견' : '영어문제 없음'}`);
                   resolve(parsedResult);
                 } catch (parseError) {
-                  appendLog(`페이지 ${pageNumber} JSON 파싱 실패: ${parseError.message}`);
-                  appendLog(`페이지 ${pageNumber} 원본 응답: ${JSON.stringify(finalResult).substring(0, 200)}...`);
+                  appendLog(`파싱 단위 ${unitId} JSON 파싱 실패: ${parseError.message}`);
+                  appendLog(`파싱 단위 ${unitId} 원본 응답: ${JSON.stringify(finalResult).substring(0, 200)}...`);
                   resolve({
                     has_english_problem: false,
                     reason: "응답 파싱 실패",
                     problems: [],
-                    page_number: pageNumber,
+                    unit_id: unitId,
                     raw_response: finalResult
                   });
                 }
@@ -403,7 +672,7 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
                     const functionResponse = parsed.content?.parts?.[0]?.functionResponse;
                     if (functionResponse?.response?.result) {
                       finalResult = functionResponse.response.result;
-                      appendLog(`페이지 ${pageNumber} PDF 파싱 에이전트 결과 수신: ${JSON.stringify(functionResponse.response.result).substring(0, 200)}...`);
+                      appendLog(`파싱 단위 ${unitId} PDF 파싱 에이전트 결과 수신: ${JSON.stringify(functionResponse.response.result).substring(0, 200)}...`);
                     }
                   }
                   
@@ -412,7 +681,7 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
                     if (resultText) {
                       if (!finalResult || resultText.length > (finalResult?.length || 0)) {
                         finalResult = resultText;
-                        appendLog(`페이지 ${pageNumber} PDF 파싱 에이전트 응답: ${resultText.substring(0, 200)}...`);
+                        appendLog(`파싱 단위 ${unitId} PDF 파싱 에이전트 응답: ${resultText.substring(0, 200)}...`);
                       }
                     }
                   }
@@ -427,21 +696,21 @@ const callPdfParsingAgent = async (pageText, pageNumber, appendLog) => {
             
             readStream();
           }).catch(error => {
-            appendLog(`페이지 ${pageNumber} PDF 파싱 스트리밍 읽기 오류: ${error.message}`);
+            appendLog(`파싱 단위 ${unitId} PDF 파싱 스트리밍 읽기 오류: ${error.message}`);
             reject(error);
           });
         };
         
         readStream();
       }).catch(error => {
-        appendLog(`페이지 ${pageNumber} PDF 파싱 에이전트 호출 실패: ${error.message}`);
+        appendLog(`파싱 단위 ${unitId} PDF 파싱 에이전트 호출 실패: ${error.message}`);
         reject(error);
       });
     });
     
   } catch (err) {
     console.error("PDF parsing agent call failed:", err);
-    appendLog(`페이지 ${pageNumber} PDF 파싱 에이전트 호출 실패: ${err.response?.status || 'Unknown'} - ${err.message}`);
+    appendLog(`파싱 단위 ${unitId} PDF 파싱 에이전트 호출 실패: ${err.response?.status || 'Unknown'} - ${err.message}`);
     throw err;
   }
 };
@@ -459,6 +728,7 @@ function App() {
   const [selectableProblems, setSelectableProblems] = useState([]);
   const [selectedProblems, setSelectedProblems] = useState(new Set());
   const [pdfProgressMessage, setPdfProgressMessage] = useState(null);
+  const [pipelineMode, setPipelineMode] = useState(false);
 
   // 로그 추가 함수 (useEffect에서 사용되므로 먼저 정의)
   const appendLog = (msg) => setLogs(logs => [...logs, `[${new Date().toLocaleString()}] ${msg}`]);
@@ -664,10 +934,32 @@ function App() {
     setErrorMessage(""); // 기존 에러 메시지 클리어
     
     let fullTextToProcess = textToProcess;
-    if (filesToProcess.length > 0) {
+    const isImageUpload = filesToProcess.length > 0 && filesToProcess[0].type.startsWith('image/');
+    if (isImageUpload) {
+      try {
+        const imageText = await extractTextFromImage(filesToProcess[0], appendLog, userId);
+        fullTextToProcess += `\n\n${imageText}`;
+      } catch (error) {
+        setErrorMessage(error.response?.data?.error || "사진에서 텍스트를 추출하지 못했습니다.");
+        setInputValue(textToProcess);
+        setAttachedFiles(filesToProcess);
+        return;
+      }
+    }
+    if (filesToProcess.length > 0 && !isImageUpload && pipelineMode) {
+      try {
+        await runPdfPipeline(filesToProcess[0]);
+      } catch (error) {
+        setErrorMessage(error);
+        setInputValue(textToProcess);
+        setAttachedFiles(filesToProcess);
+      }
+      return;
+    }
+    if (filesToProcess.length > 0 && !isImageUpload) {
       try {
         // 📄 NEW: PDF 파일을 페이지별로 처리
-        const extractedProblems = await extractEnglishProblemsFromPdf(filesToProcess[0], appendLog, updateProgress);
+        const extractedProblems = await extractEnglishProblemsFromPdf(filesToProcess[0], appendLog, updateProgress, null, userId);
         if (extractedProblems.length > 0) {
           // 영어 문제가 발견된 경우 - 채팅창에 결과 메시지 추가
           const problemTexts = extractedProblems.map(problem => problem.full_text || problem.question || "문제 텍스트가 없습니다");
@@ -743,54 +1035,104 @@ function App() {
     addMessage(userMessageText, 'user');
     addMessage('답변 생성 중...', 'assistant', true);
 
+    const runIds = new Array(problemsToRun.length).fill(null);
     const results = await Promise.all(
-      problemsToRun.map(problem => runSingleAgentCall(problem))
+      problemsToRun.map((problem, i) => runSingleAgentCall(problem, (runId) => { runIds[i] = runId; }))
     );
 
-    const formattedResults = results.map((res, i) => 
-      `--- 문제 ${i + 1} 변형 결과 ---\n\n${res || "결과를 생성하지 못했습니다."}`
-    ).join('\n\n');
+    const startedRuns = runIds
+      .map((runId, i) => ({ runId, label: `문제 ${i + 1}` }))
+      .filter(run => run.runId);
+    if (startedRuns.length > 1) {
+      await downloadWorksheet(startedRuns.map(run => run.runId), startedRuns.map(run => run.label));
+    }
+
+    if (problemsToRun.length > WORKSHEET_SUMMARY_THRESHOLD) {
+      // 큰 결과를 채팅창에 한꺼번에 그리지 않고 요약만 표시
+      const failedCount = results.filter(res => !res.ok).length;
+      updateLastMessage(
+        `${problemsToRun.length}개 문제 변형을 마쳤습니다 (실패 ${failedCount}개). ` +
+        `전체 결과는 내려받은 학습지(worksheet.html)에서 확인하고 인쇄할 수 있습니다.`
+      );
+    } else {
+      const formattedResults = results.map((res, i) => 
+        `--- 문제 ${i + 1} 변형 결과 ---\n\n${res.text || "결과를 생성하지 못했습니다."}`
+      ).join('\n\n');
+      updateLastMessage(formattedResults);
+    }
+    resetInputs();
+  };
+
+  // 완료된 생성 실행 결과를 문제편/정답편으로 나눈 인쇄용 학습지로 내려받음
+  const downloadWorksheet = async (runIds, labels) => {
+    try {
+      const response = await api.post('/api/export/worksheet', {
+        runIds,
+        labels,
+        title: `변형 문제 학습지 (${runIds.length}문제)`,
+      }, { responseType: 'blob' });
+      saveAs(response.data, `worksheet_${new Date().toISOString().replace(/[:.]/g, '-')}.html`);
+      appendLog(`📄 학습지 내려받기 완료 (${runIds.length}문제)`);
+    } catch (error) {
+      appendLog(`❌ 학습지 내보내기 실패: ${error.message}`);
+    }
+  };
+
+  // ⚡ 파이프라인 모드: PDF 파싱 중 발견되는 문제마다 바로 변형 생성 시작
+  const runPdfPipeline = async (file) => {
+    addMessage(`📄 ${file.name} - 파싱과 동시에 변형 생성을 시작합니다.`, 'user');
+    
+    const generationQueue = createTaskQueue(PIPELINE_GENERATION_CONCURRENCY);
+    const generations = [];
+    let problemCount = 0;
+    
+    const handleProblem = (problem) => {
+      problemCount += 1;
+      const problemNumber = problemCount;
+      const messageId = uuidv4();
+      const problemLabel = `문제 ${problemNumber} (${problem.problem_id || 'ID 없음'}, 페이지 ${problem.source_page})`;
+      
+      appendLog(`⚡ ${problemLabel} 변형 대기열 추가`);
+      addMessage(`${problemLabel} 변형 대기 중...`, 'assistant', true, messageId);
+      
+      generations.push(generationQueue.push(async () => {
+        updateMessage(messageId, `${problemLabel} 변형 생성 중...`, true);
+        const { text: resultText } = await runSingleAgentCall(problem.full_text || problem.question || "");
+        updateMessage(messageId, `--- 문제 ${problemNumber} 변형 결과 ---\n\n${resultText || "결과를 생성하지 못했습니다."}`);
+      }).catch(error => {
+        appendLog(`❌ ${problemLabel} 변형 실패: ${error.message}`);
+        updateMessage(messageId, `--- 문제 ${problemNumber} 변형 결과 ---\n\n결과를 생성하지 못했습니다.`);
+      }));
+    };
     
-    updateLastMessage(formattedResults);
+    await extractEnglishProblemsFromPdf(file, appendLog, updateProgress, handleProblem, userId);
+    await Promise.allSettled(generations);
+    
+    if (problemCount === 0) {
+      addMessage('PDF에서 영어 문제를 찾지 못했습니다.', 'assistant');
+    }
+    appendLog(`⚡ 파이프라인 완료 - 총 ${problemCount}개 문제 변형`);
     resetInputs();
   };
 
   const processSingleProblem = async (text) => {
     addMessage(text, 'user');
     addMessage('답변 생성 중...', 'assistant', true);
-    const resultText = await runSingleAgentCall(text);
+    const { text: resultText } = await runSingleAgentCall(text);
     updateLastMessage(resultText || "결과를 생성하지 못했습니다.");
     resetInputs();
   };
 
-  const runSingleAgentCall = async (text) => {
-    const appName = "agent";
+  // 결과는 { ok, text } - 실패해도 text에 사용자에게 보여 줄 안내 문구를 담음
+  const runSingleAgentCall = async (text, onRunStarted = null) => {
     const sessionId = selectedChat?.sessionId || uuidv4();
     
     try {
       appendLog(`에이전트 호출 시작 - 사용자: ${userId}, 세션: ${sessionId}`);
       appendLog(`요청 내용: ${text.substring(0, 100)}...`);
       
-      // 서버 로그 스트림 제거 (이전 커밋 방식으로 복원)
-      
-      // 1단계: 세션 생성 (ADK 문서에 따른 필수 단계)
-      try {
-        await api.post(`/apps/${appName}/users/${userId}/sessions/${sessionId}`, {
-          state: {}
-        });
-        appendLog(`세션 생성 완료: ${sessionId}`);
-      } catch (sessionError) {
-        // 세션이 이미 존재하는 경우는 무시
-        if (sessionError.response?.status !== 409) {
-          appendLog(`세션 생성 실패: ${sessionError.message}`);
-        } else {
-          appendLog(`기존 세션 사용: ${sessionId}`);
-        }
-      }
-      
-      // 2단계: 에이전트 실행 (ADK SSE 스트리밍 방식)
-      const requestBody = {
-        appName: appName,
+      // 1단계: 서버 측 생성 실행 시작 (세션은 서버에서 자동 생성/재사용)
+      const runResponse = await api.post('/api/runs', {
         userId: userId,
         sessionId: sessionId,
         streaming: true, // 스트리밍 활성화
@@ -798,107 +1140,31 @@ function App() {
           role: "user",
           parts: [{ text }]
         }
-      };
-      
-      return new Promise((resolve, reject) => {
-        // POST 요청을 위해 fetch 사용 (EventSource는 GET만 지원)
-        fetch(`${API_BASE_URL}/run_sse`, {
-          method: 'POST',
-          headers: {
-            'Content-Type': 'application/json',
-            'Accept': 'text/event-stream'
-          },
-          body: JSON.stringify(requestBody)
-        }).then(response => {
-          if (!response.ok) {
-            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
-          }
-          
-          const reader = response.body.getReader();
-          const decoder = new TextDecoder();
-          let buffer = '';
-          let finalResult = null;
-          
-          const readStream = () => {
-            reader.read().then(({ done, value }) => {
-              if (done) {
-                appendLog(`스트리밍 완료`);
-                resolve(finalResult || "결과를 받지 못했습니다.");
-                return;
-              }
-              
-              buffer += decoder.decode(value, { stream: true });
-              const lines = buffer.split('\n');
-              buffer = lines.pop(); // 마지막 불완전한 줄 보관
-              
-              lines.forEach(line => {
-                if (line.startsWith('data: ')) {
-                  const data = line.slice(6); // 'data: ' 제거
-                  if (data.trim() === '[DONE]') {
-                    return;
-                  }
-                  
-                  try {
-                    const parsed = JSON.parse(data);
-                    
-                    // ★ 모든 원본 데이터를 로깅 (이전 커밋 방식 복원)
-                    appendLog(`[RAW] ${data}`);
-                    
-                    // 최종 결과 처리
-                    // functionResponse 처리를 먼저 확인 (에이전트가 생성한 실제 내용)
-                    if (parsed.content?.role === "user") {
-                      const functionResponse = parsed.content?.parts?.[0]?.functionResponse;
-                      if (functionResponse?.response?.result) {
-                        finalResult = functionResponse.response.result;
-                        appendLog(`에이전트 변형 문제 수신: ${functionResponse.response.result.substring(0, 100)}...`);
-                      }
-                    }
-                    
-                    // text 응답 처리 (functionResponse가 없거나 더 긴 경우에만 사용)
-                    if (parsed.content?.role === "model") {
-                      const resultText = parsed.content?.parts?.[0]?.text;
-                      if (resultText) {
-                        // functionResponse가 이미 있고 text가 더 짧으면 덮어쓰지 않음
-                        if (!finalResult || resultText.length > finalResult.length) {
-                          finalResult = resultText;
-                          appendLog(`에이전트 응답 수신: ${resultText.substring(0, 100)}...`);
-                        } else {
-                          appendLog(`추가 메시지 수신: ${resultText.substring(0, 100)}...`);
-                        }
-                      }
-                    }
-                  } catch (parseError) {
-                    // JSON 파싱 실패 시 원본 데이터를 로그로 표시
-                    if (data.trim() && data !== '[DONE]') {
-                      appendLog(`[서버] ${data}`);
-                    }
-                  }
-                }
-              });
-              
-              readStream();
-            }).catch(error => {
-              appendLog(`스트리밍 읽기 오류: ${error.message}`);
-              reject(error);
-            });
-          };
-          
-          readStream();
-        }).catch(error => {
-          appendLog(`에이전트 호출 실패: ${error.message}`);
-          reject(error);
-        });
       });
+      const runId = runResponse.data.runId;
+      appendLog(`생성 실행 시작: ${runId}`);
+      if (onRunStarted) onRunStarted(runId);
+      
+      // 2단계: 실행 이벤트 스트림 구독 (연결이 끊기면 마지막 이벤트 이후부터 재연결)
+      return await followRunEvents(runId, appendLog);
       
     } catch (err) {
       console.error("Agent call failed:", err);
       appendLog(`에이전트 호출 실패: ${err.response?.status || 'Unknown'} - ${err.message}`);
-      return "에이전트 호출 중 오류가 발생했습니다.";
+      if (err.response?.status === 503) {
+        return { ok: false, text: `요청이 많아 지금은 생성할 수 없습니다. ${err.response.data?.retryAfter || 30}초 후 다시 시도해 주세요.` };
+      }
+      if (err.response?.status === 429) {
+        // 이번 달 예산 초과 - 변형 문제 은행에 미리 생성된 지문만 사용할 수 있음
+        return { ok: false, text: err.response.data?.error || "이번 달 사용 한도에 도달했습니다." };
+      }
+      return { ok: false, text: "에이전트 호출 중 오류가 발생했습니다." };
     }
   };
 
-  const addMessage = (text, role, isLoading = false) => {
+  const addMessage = (text, role, isLoading = false, messageId = null) => {
     const newMessage = {
+      id: messageId,
       type: isLoading ? 'loading' : 'text',
       text,
       role,
@@ -919,6 +1185,19 @@ function App() {
     }));
   };
   
+  // id로 지정한 메시지 내용 갱신 (파이프라인 모드에서 문제별 결과 스트리밍)
+  const updateMessage = (messageId, text, isLoading = false) => {
+    setChats(chats => chats.map(chat => {
+      if (chat.id !== selectedChatId) return chat;
+      const updatedMessages = chat.messages.map(m => (
+        m.id === messageId
+          ? { ...m, type: isLoading ? 'loading' : 'text', text, isLoading, timestamp: new Date() }
+          : m
+      ));
+      return { ...chat, messages: updatedMessages };
+    }));
+  };
+  
   const handleEditChatTitle = (id, newTitle) => {
     setChats(chats => chats.map(chat =>
       chat.id === id ? { ...chat, title: newTitle } : chat
@@ -1037,6 +1316,8 @@ function App() {
           onDeselectAll={handleDeselectAll}
           onConvertSelected={processProblems}
           onCancelSelection={resetInputs}
+          pipelineMode={pipelineMode}
+          onTogglePipelineMode={() => setPipelineMode(mode => !mode)}
         />
       </div>
 
@@ -14,6 +14,8 @@ function ChatInput({
   onDeselectAll,
   onConvertSelected,
   onCancelSelection,
+  pipelineMode = false,
+  onTogglePipelineMode,
 }) {
   const fileInputRef = useRef();
   const [expandedProblems, setExpandedProblems] = useState(new Set());
@@ -172,6 +174,15 @@ function ChatInput({
           rows={1}
           style={{ flex: 1, resize: 'none', borderRadius: 8, border: '1px solid #ddd', padding: 10, fontSize: 16, minHeight: 36, maxHeight: 120 }}
         />
+        {onTogglePipelineMode && (
+          <label
+            title="PDF 파싱이 끝나기 전에 발견된 문제부터 바로 변형을 생성합니다."
+            style={{ marginLeft: 8, display: 'flex', alignItems: 'center', gap: 4, fontSize: 13, color: '#555', whiteSpace: 'nowrap', cursor: 'pointer' }}
+          >
+            <input type="checkbox" checked={pipelineMode} onChange={onTogglePipelineMode} />
+            ⚡ 바로 변형
+          </label>
+        )}
         <button
           onClick={onSend}
           style={{ marginLeft: 8, background: '#2d8cff', color: '#fff', border: 'none', borderRadius: 8, padding: '8px 18px', fontWeight: 'bold', fontSize: 16, cursor: 'pointer' }}
@@ -1,11 +1,21 @@
+import os
+import json
 import logging
+from typing import Optional
 from google.adk.agents import LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
 from pdf_agent.instruction import (
     english_problem_extractor_instruction,
 )
+from pdf_agent.page_classifier import classify_page
 
 model = "gemini-2.0-flash"
 
+# 로컬 페이지 사전 분류 사용 여부 (PDF_PAGE_PRECHECK=0 으로 비활성화)
+PAGE_PRECHECK_ENABLED = os.getenv("PDF_PAGE_PRECHECK", "1") != "0"
+
 # 로거 설정 - 단순하게 로깅만 추가
 pdf_logger = logging.getLogger('pdf_parser')
 pdf_logger.setLevel(logging.INFO)
@@ -24,10 +34,56 @@ def log_pdf_text_input(text):
         pdf_logger.info("-" * 40)
         pdf_logger.info("🔍 에이전트에서 영어 문제 추출 시작...")
 
+def _latest_user_text(llm_request: LlmRequest) -> str:
+    """LLM 요청에서 가장 최근 사용자 메시지의 텍스트를 반환"""
+    for content in reversed(llm_request.contents or []):
+        if content.role != "user" or not content.parts:
+            continue
+        texts = [part.text for part in content.parts if part.text]
+        if texts:
+            return "\n".join(texts)
+    return ""
+
+# 모델 호출 전 페이지 사전 분류 콜백
+def skip_pages_without_problem(
+    callback_context: CallbackContext, llm_request: LlmRequest
+) -> Optional[LlmResponse]:
+    """
+    영어 문제가 있을 수 없는 페이지는 모델을 호출하지 않고 바로 응답합니다.
+
+    Args:
+        callback_context: ADK 콜백 컨텍스트
+        llm_request: 모델로 전달될 요청
+
+    Returns:
+        Optional[LlmResponse]: 페이지를 건너뛰는 경우 미리 만든 응답, 아니면 None
+    """
+    if not PAGE_PRECHECK_ENABLED:
+        return None
+
+    classification = classify_page(_latest_user_text(llm_request))
+    if classification["has_candidate"]:
+        return None
+
+    pdf_logger.info(f"⏭️ 모델 호출 생략 - {classification['reason']}")
+    result = {
+        "has_english_problem": False,
+        "reason": classification["reason"],
+        "problems": [],
+        "skipped_by_precheck": True,
+    }
+    return LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[types.Part(text=json.dumps(result, ensure_ascii=False))],
+        )
+    )
+
 # 기존 방식대로 단순한 LlmAgent 사용
 root_agent = LlmAgent(
     name="pdf_parser_root",
     model=model,
     description="PDF에서 영어 문제를 추출하고 분석하는 루트 에이전트",
-    instruction=english_problem_extractor_instruction
+    instruction=english_problem_extractor_instruction,
+    before_model_callback=skip_pages_without_problem,
 )
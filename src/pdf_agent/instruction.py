@@ -6,7 +6,7 @@ PDF에서 페이지 단위로 추출된 텍스트에서 **영어 문제만** 식
 
 ### **기본 원칙**
 
-1. **페이지 단위 분석**: 입력받은 단일 페이지 텍스트를 분석하여 영어 문제 존재 여부를 확인합니다.
+1. **파싱 단위 분석**: 입력받은 단일 페이지(또는 페이지 경계를 넘어 이어붙인) 텍스트를 분석하여 영어 문제 존재 여부를 확인합니다.
 2. **영어 문제 식별 기준**:
    * 영어 지문이 포함된 문제 (영어 문장, 단어가 일정 비율 이상)
    * 객관식 선택지 (①, ②, ③, ④, ⑤ 또는 1., 2., 3., 4., 5.)
@@ -57,7 +57,7 @@ PDF에서 페이지 단위로 추출된 텍스트에서 **영어 문제만** 식
 
 ### **예외 처리**
 
-- 문제가 여러 페이지에 걸쳐 있는 경우: 현재 페이지의 텍스트만으로 판단
+- 문제가 여러 페이지에 걸쳐 있는 경우: 입력 텍스트는 앞 페이지 끝과 다음 페이지 앞부분을 이어붙인 단위일 수 있으므로, 입력 텍스트 전체를 하나의 문제 영역으로 판단
 - 영어와 한국어가 혼재된 경우: 영어 비율이 30% 이상인 경우만 영어 문제로 분류
 - 불완전한 문제: completeness_score가 0.7 미만인 경우 제외
 """
@@ -0,0 +1,125 @@
+"""
+PDF 페이지 사전 분류기
+
+pdf_parser_root 에이전트를 호출하기 전에 로컬에서 페이지 텍스트를 검사하여
+영어 문제가 들어 있을 수 없는 페이지(표지, 한국어 해설, 정답과 해설 등)를 걸러냅니다.
+임계값은 english_problem_extractor_instruction에 명시된 기준과 동일합니다.
+"""
+
+import re
+from typing import Dict, Any
+
+# english_problem_extractor_instruction과 동일한 기준
+MIN_ENGLISH_RATIO = 0.3    # 영어 비율 30% 이상
+MIN_CHOICE_COUNT = 3       # 객관식 선택지 최소 3개 이상
+MIN_ENGLISH_CHARS = 50     # 영어 지문 최소 50자 이상
+
+ITEM_CODE_PATTERN = re.compile(r"\d{5}-\d{4}")
+EXERCISES_PATTERN = re.compile(r"^\s*E\s?xercises", re.MULTILINE)
+CIRCLED_CHOICE_PATTERN = re.compile(r"[①②③④⑤]")
+NUMBERED_CHOICE_PATTERN = re.compile(r"^\s*([1-5])[.)]\s", re.MULTILINE)
+ENGLISH_CHAR_PATTERN = re.compile(r"[A-Za-z]")
+HANGUL_CHAR_PATTERN = re.compile(r"[가-힣]")
+
+# 정답/해설 페이지 시그니처
+ANSWER_KEY_HEADER_PATTERN = re.compile(r"정답\s*과\s*해설")
+ANSWER_MARK_PATTERN = re.compile(r"정답\s*[:：]?\s*[①②③④⑤]")
+MIN_ANSWER_MARKS = 2
+
+
+def count_choices(text: str) -> int:
+    """
+    페이지에 등장하는 서로 다른 객관식 선택지 번호의 개수를 셉니다.
+
+    Args:
+        text (str): 페이지 텍스트
+
+    Returns:
+        int: ①~⑤ 또는 1.~5. 형식 중 더 많이 발견된 쪽의 고유 번호 개수
+    """
+    circled = set(CIRCLED_CHOICE_PATTERN.findall(text))
+    numbered = set(NUMBERED_CHOICE_PATTERN.findall(text))
+    return max(len(circled), len(numbered))
+
+
+def english_ratio(text: str) -> float:
+    """
+    영어 문자 비율을 계산합니다 (영문자 / (영문자 + 한글 음절)).
+
+    Args:
+        text (str): 페이지 텍스트
+
+    Returns:
+        float: 0.0 ~ 1.0 사이의 영어 비율
+    """
+    english = len(ENGLISH_CHAR_PATTERN.findall(text))
+    hangul = len(HANGUL_CHAR_PATTERN.findall(text))
+    if english + hangul == 0:
+        return 0.0
+    return english / (english + hangul)
+
+
+def is_answer_key_page(text: str) -> bool:
+    """
+    '정답과 해설' 섹션 페이지인지 판단합니다.
+
+    Args:
+        text (str): 페이지 텍스트
+
+    Returns:
+        bool: 정답/해설 페이지 여부
+    """
+    if ANSWER_KEY_HEADER_PATTERN.search(text):
+        return True
+    return len(ANSWER_MARK_PATTERN.findall(text)) >= MIN_ANSWER_MARKS
+
+
+def classify_page(text: str) -> Dict[str, Any]:
+    """
+    페이지 텍스트에 영어 문제가 포함될 수 있는지 로컬에서 판단합니다.
+
+    Args:
+        text (str): 페이지 텍스트
+
+    Returns:
+        Dict[str, Any]: 분류 결과
+            - has_candidate (bool): 모델에 보낼 가치가 있는 페이지인지 여부
+            - reason (str): 제외 사유 (has_candidate가 True이면 빈 문자열)
+            - english_ratio (float): 영어 비율
+            - english_chars (int): 영문자 수
+            - choice_count (int): 고유 선택지 번호 수
+            - item_codes (List[str]): 발견된 문항 코드
+            - has_exercises (bool): Exercises 헤더 존재 여부
+            - is_answer_key (bool): 정답/해설 페이지 여부
+    """
+    text = text or ""
+    ratio = english_ratio(text)
+    english_chars = len(ENGLISH_CHAR_PATTERN.findall(text))
+    choice_count = count_choices(text)
+    answer_key = is_answer_key_page(text)
+
+    result = {
+        "has_candidate": True,
+        "reason": "",
+        "english_ratio": round(ratio, 3),
+        "english_chars": english_chars,
+        "choice_count": choice_count,
+        "item_codes": ITEM_CODE_PATTERN.findall(text),
+        "has_exercises": bool(EXERCISES_PATTERN.search(text)),
+        "is_answer_key": answer_key,
+    }
+
+    if answer_key:
+        result["has_candidate"] = False
+        result["reason"] = "정답과 해설 페이지"
+    elif english_chars < MIN_ENGLISH_CHARS:
+        result["has_candidate"] = False
+        result["reason"] = f"영어 텍스트 부족 ({english_chars}자 < {MIN_ENGLISH_CHARS}자)"
+    elif ratio < MIN_ENGLISH_RATIO:
+        result["has_candidate"] = False
+        result["reason"] = f"영어 비율 미달 ({ratio:.0%} < {MIN_ENGLISH_RATIO:.0%})"
+    elif choice_count < MIN_CHOICE_COUNT:
+        result["has_candidate"] = False
+        result["reason"] = f"객관식 선택지 부족 ({choice_count}개 < {MIN_CHOICE_COUNT}개)"
+
+    return result
@@ -0,0 +1,179 @@
+"""
+페이지 경계 문제 이어붙이기 (슬라이딩 페이지 윈도우)
+
+문항 코드(또는 Exercises) 경계를 기준으로 각 페이지를 블록으로 나누고,
+페이지 끝의 문제 블록이 불완전하면 다음 페이지의 머리 부분(첫 경계 이전 텍스트)을
+이어붙여 하나의 파싱 단위로 만듭니다. 이어붙인 영역만 따로 파싱 단위가 되고,
+나머지 완전한 블록들은 원래 페이지 단위에 그대로 남습니다.
+문항 코드가 문제 뒤에 오는 워크북(지문, 선택지 다음 줄에 코드)은 블록 맨 앞 코드가 앞 문제의
+것이므로, 코드는 앞 문제에 남기고 이어붙인 문제에는 다음 페이지에서 나오는 코드를 붙입니다.
+"""
+
+import re
+from typing import Dict, Any, List, Tuple
+
+from pdf_agent.page_classifier import (
+    ENGLISH_CHAR_PATTERN,
+    ITEM_CODE_PATTERN,
+    MIN_CHOICE_COUNT,
+    MIN_ENGLISH_CHARS,
+    classify_page,
+    count_choices,
+)
+
+# 문제 블록 시작 경계: 문항 코드 또는 Exercises 헤더
+BLOCK_BOUNDARY_PATTERN = re.compile(r"(?=\d{5}-\d{4})|(?=^\s*E\s?xercises)", re.MULTILINE)
+
+# 하나의 문제를 이어붙일 수 있는 최대 페이지 수
+MAX_WINDOW_PAGES = 3
+
+# 문제 지시문 키워드 (프론트엔드 splitProblemsOnClient와 동일)
+PROBLEM_KEYWORDS = ['다음', '아래', 'Dear', '밑줄', '빈칸', '글의', '주어진']
+
+
+def split_page_blocks(text: str) -> Tuple[str, List[str]]:
+    """
+    페이지 텍스트를 머리 부분과 문제 블록 목록으로 나눕니다.
+
+    Args:
+        text (str): 페이지 텍스트
+
+    Returns:
+        Tuple[str, List[str]]: (첫 경계 이전 텍스트, 경계에서 시작하는 블록 목록)
+    """
+    pieces = BLOCK_BOUNDARY_PATTERN.split(text or "")
+    head = pieces[0] if pieces else ""
+    blocks = [piece for piece in pieces[1:] if piece.strip()]
+    return head, blocks
+
+
+def is_block_complete(block: str) -> bool:
+    """
+    문제 블록이 선택지까지 모두 포함하고 있는지 확인합니다.
+
+    Args:
+        block (str): 문제 블록 텍스트
+
+    Returns:
+        bool: 선택지가 최소 개수 이상이면 True
+    """
+    return count_choices(block) >= MIN_CHOICE_COUNT
+
+
+def _is_problem_start(block: str) -> bool:
+    """블록이 문항 코드/푸터만이 아니라 실제 문제의 시작 부분을 담고 있는지 확인"""
+    if len(ENGLISH_CHAR_PATTERN.findall(block)) >= MIN_ENGLISH_CHARS:
+        return True
+    return any(keyword in block for keyword in PROBLEM_KEYWORDS)
+
+
+def _is_continuation(head: str) -> bool:
+    """다음 페이지 머리 부분이 이전 문제의 이어지는 내용으로 볼 만한지 확인"""
+    if count_choices(head) > 0:
+        return True
+    return len(ENGLISH_CHAR_PATTERN.findall(head)) >= MIN_ENGLISH_CHARS
+
+
+def _split_code_line(block: str) -> Tuple[str, str]:
+    """블록 맨 앞의 문항 코드와 나머지 텍스트로 나눕니다 (문항 코드로 시작하지 않으면 코드는 빈 문자열)."""
+    match = ITEM_CODE_PATTERN.match(block)
+    if not match:
+        return "", block
+    return block[:match.end()], block[match.end():]
+
+
+def _has_trailing_code(preceding: str) -> bool:
+    """
+    블록 앞의 텍스트가 자기 문항 코드 없이 끝난 완전한 문제이면, 이 워크북은 문항 코드가
+    문제 뒤에 오는 형식이므로 블록 맨 앞의 코드는 앞 문제의 것으로 봅니다.
+    """
+    return is_block_complete(preceding) and not ITEM_CODE_PATTERN.search(preceding)
+
+
+def build_parse_units(page_texts: List[str]) -> List[Dict[str, Any]]:
+    """
+    페이지 텍스트 목록으로부터 에이전트에 보낼 파싱 단위를 만듭니다.
+
+    Args:
+        page_texts (List[str]): 페이지 순서대로 정렬된 페이지 텍스트 (1페이지부터)
+
+    Returns:
+        List[Dict[str, Any]]: 파싱 단위 목록
+            - unit_id (str): 단위 식별자 (예: "p3", "p3-4")
+            - pages (List[int]): 단위에 포함된 페이지 번호
+            - text (str): 에이전트에 전달할 텍스트
+            - stitched (bool): 페이지 경계를 넘어 이어붙인 단위인지 여부
+            - classification (Dict[str, Any]): classify_page 결과
+    """
+    splits = [split_page_blocks(text) for text in page_texts]
+    heads = [head for head, _ in splits]
+    blocks = [list(page_blocks) for _, page_blocks in splits]
+    stitched_units = []
+
+    for index in range(len(page_texts)):
+        if not blocks[index]:
+            continue
+        tail = blocks[index][-1]
+        if is_block_complete(tail) or not _is_problem_start(tail):
+            continue
+        # 문항 코드가 문제 뒤에 오는 형식이면 블록 맨 앞 코드는 앞 문제에 남기고,
+        # 이어붙인 문제의 코드는 다음 페이지 첫 블록 맨 앞에서 가져옴
+        preceding = blocks[index][-2] if len(blocks[index]) > 1 else heads[index]
+        trailing_code = _has_trailing_code(preceding)
+        kept_code = ""
+        if trailing_code:
+            kept_code, tail = _split_code_line(tail)
+
+        # 불완전한 마지막 블록에 다음 페이지 머리 부분을 이어붙임
+        window_text = tail
+        window_pages = [index + 1]
+        consumed = []
+        next_index = index + 1
+        while (next_index < len(page_texts)
+               and len(window_pages) < MAX_WINDOW_PAGES
+               and _is_continuation(heads[next_index])):
+            window_text = f"{window_text.rstrip()}\n{heads[next_index].strip()}"
+            window_pages.append(next_index + 1)
+            consumed.append(next_index)
+            # 다음 페이지에 새 블록이 있으면 문제는 그 페이지 머리에서 끝남
+            if blocks[next_index] or is_block_complete(window_text):
+                break
+            next_index += 1
+
+        if not consumed:
+            continue
+
+        if kept_code:
+            blocks[index][-1] = kept_code
+        else:
+            blocks[index].pop()
+        for consumed_index in consumed:
+            heads[consumed_index] = ""
+        last_blocks = blocks[consumed[-1]]
+        if trailing_code and last_blocks:
+            window_code, last_blocks[0] = _split_code_line(last_blocks[0])
+            if window_code:
+                window_text = f"{window_text.rstrip()}\n{window_code}"
+        stitched_units.append({
+            "unit_id": f"p{window_pages[0]}-{window_pages[-1]}",
+            "pages": window_pages,
+            "text": window_text.strip(),
+            "stitched": True,
+        })
+
+    page_units = []
+    for index in range(len(page_texts)):
+        text = "".join([heads[index]] + blocks[index]).strip()
+        if not text:
+            continue
+        page_units.append({
+            "unit_id": f"p{index + 1}",
+            "pages": [index + 1],
+            "text": text,
+            "stitched": False,
+        })
+
+    units = sorted(page_units + stitched_units, key=lambda unit: (unit["pages"][0], unit["stitched"]))
+    for unit in units:
+        unit["classification"] = classify_page(unit["text"])
+    return units
@@ -0,0 +1,27 @@
+"""
+테스트 공통 설정
+
+에이전트 패키지(agent, pdf_agent)는 src에서, 백엔드 모듈은 src/backend에서 바로 import하며
+(서버 실행과 같은 구조), 모듈이 import 시점에 읽는 저장 경로 환경 변수는 임시 디렉토리로 돌립니다.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (os.path.join(ROOT_DIR, "src"), os.path.join(ROOT_DIR, "src", "backend")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+_DATA_DIR = tempfile.mkdtemp(prefix="problem_forge_test_")
+for name, value in {
+    "PROBLEM_FORGE_RUNS_DIR": os.path.join(_DATA_DIR, "runs"),
+    "PROBLEM_FORGE_TRACES_DIR": os.path.join(_DATA_DIR, "traces"),
+    "PROBLEM_FORGE_USAGE_DB": os.path.join(_DATA_DIR, "usage.sqlite3"),
+    "PROBLEM_FORGE_RESULT_STORE": os.path.join(_DATA_DIR, "results.sqlite3"),
+    "PROBLEM_FORGE_VARIANT_BANK": os.path.join(_DATA_DIR, "variant_bank.sqlite3"),
+    "PROBLEM_FORGE_IMAGE_CACHE_DIR": os.path.join(_DATA_DIR, "image_cache"),
+    "PROBLEM_FORGE_WARMUP": "0",
+}.items():
+    os.environ.setdefault(name, value)
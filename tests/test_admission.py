@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import pytest
+
+from admission import AdmissionController, AdmissionMiddleware, Overloaded, post_paths
+
+
+def test_reserve_rejects_when_running_plus_queued_reach_the_limit():
+    controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+    controller.reserve()
+    controller.reserve()
+    with pytest.raises(Overloaded) as error:
+        controller.reserve()
+    assert controller.rejected == 1 and controller.waiting == 2
+    assert error.value.retry_after >= 1
+
+
+def test_retry_after_follows_the_service_time_estimate():
+    controller = AdmissionController("test", max_concurrent=2, max_queue=10, initial_service_time=10.0)
+    assert controller.retry_after() == 5
+    controller.waiting = 3
+    assert controller.retry_after() == 20
+    controller.service_time = 10_000
+    assert controller.retry_after() == 300
+
+
+def test_admitted_releases_the_slot_even_when_the_block_fails():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=0, initial_service_time=10.0)
+        controller.reserve()
+        with pytest.raises(RuntimeError):
+            async with controller.admitted():
+                assert (controller.active, controller.waiting) == (1, 0)
+                raise RuntimeError("boom")
+        assert (controller.active, controller.waiting) == (0, 0)
+        assert controller.service_time < 10.0
+
+    asyncio.run(scenario())
+
+
+def test_queued_request_times_out():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1)
+        controller.reserve()
+        async with controller.admitted():
+            controller.reserve()
+            with pytest.raises(Overloaded):
+                await controller.acquire_reserved(timeout=0.01)
+        assert (controller.active, controller.waiting, controller.rejected) == (0, 0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_middleware_answers_503_with_retry_after():
+    async def scenario():
+        controller = AdmissionController("agent", max_concurrent=1, max_queue=0)
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        middleware = AdmissionMiddleware(app, routes=[(post_paths("/run_sse"), controller)])
+        scope = {"type": "http", "method": "POST", "path": "/run_sse"}
+        first_messages, second_messages = [], []
+
+        def collect(messages):
+            async def send(message):
+                messages.append(message)
+            return send
+
+        first = asyncio.create_task(middleware(scope, None, collect(first_messages)))
+        await asyncio.sleep(0)
+        await middleware(scope, None, collect(second_messages))
+        release.set()
+        await first
+
+        assert first_messages[0]["status"] == 200
+        assert second_messages[0]["status"] == 503
+        assert dict(second_messages[0]["headers"])[b"retry-after"].isdigit()
+        assert json.loads(second_messages[1]["body"])["success"] is False
+        # 경로가 다르면 한도와 관계없이 통과
+        assert not post_paths("/run_sse")("GET", "/run_sse")
+
+    asyncio.run(scenario())
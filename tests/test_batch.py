@@ -0,0 +1,94 @@
+import json
+
+from agent.batch import (
+    BATCH_PACKING_INSTRUCTION,
+    INPUT_TOKEN_BUDGET,
+    OUTPUT_TOKEN_BUDGET,
+    OUTPUT_TOKENS_PER_RESULT,
+    expected_output_tokens,
+    format_pack_message,
+    parse_pack_response,
+    plan_packs,
+)
+
+PASSAGE = (
+    "People often think that memory works like a recorder. In fact, it rebuilds the past each time. "
+    "Every recall changes the memory a little. Details that fit our beliefs are kept. "
+    "Others slowly fade away. As a result, confident memories can still be wrong. "
+    "This is why witnesses disagree."
+)
+QUESTION = {"question": "Q", "choices": ["1.a", "2.b"], "answer": "1", "explanation": "e"}
+PACK = [{"id": "p1", "text": PASSAGE}, {"id": "p2", "text": PASSAGE}]
+
+
+def _items(count, length=400):
+    return [{"id": f"p{index}", "text": "x" * length} for index in range(count)]
+
+
+def test_plan_packs_respects_pack_size_and_keeps_order():
+    packs = plan_packs("emotion_atmosphere_agent", _items(10), 1000, max_pack_size=4)
+    assert [len(pack) for pack in packs] == [4, 4, 2]
+    assert [item["id"] for pack in packs for item in pack] == [f"p{index}" for index in range(10)]
+
+
+def test_plan_packs_respects_token_budgets():
+    long_item = INPUT_TOKEN_BUDGET * 4 // 3
+    assert [len(pack) for pack in plan_packs("emotion_atmosphere_agent", _items(3, long_item), 0)] == [1, 1, 1]
+    per_pack = OUTPUT_TOKEN_BUDGET // OUTPUT_TOKENS_PER_RESULT
+    packs = plan_packs("paragraph_order_agent", _items(per_pack + 1, 40), 0, max_pack_size=100)
+    assert [len(pack) for pack in packs] == [per_pack, 1]
+    # 지문을 다시 쓰는 유형은 지문 길이만큼 출력 토큰이 더 필요
+    assert expected_output_tokens("emotion_atmosphere_agent", PASSAGE) > expected_output_tokens(
+        "paragraph_order_agent", PASSAGE)
+
+
+def test_format_pack_message():
+    assert format_pack_message(PACK).startswith("[지문 ID: p1]\nPeople often")
+    assert "\n\n[지문 ID: p2]\n" in format_pack_message(PACK)
+
+
+def test_instruction_example_shows_result_as_an_object():
+    example = BATCH_PACKING_INSTRUCTION.split("```json")[1].split("```")[0]
+    assert isinstance(json.loads(example)[0]["result"], dict)
+
+
+def test_parse_pack_response_accepts_objects_and_json_strings():
+    text = json.dumps([
+        {"passage_id": "p1", "result": QUESTION},
+        {"passage_id": "p2", "result": json.dumps(QUESTION)},
+    ])
+    results, failures = parse_pack_response("emotion_atmosphere_agent", PACK, f"```json\n{text}\n```")
+    assert results == {"p1": QUESTION, "p2": QUESTION} and failures == {}
+
+
+def test_parse_pack_response_reports_bad_missing_and_duplicate_entries():
+    text = json.dumps([
+        {"passage_id": "p1", "result": "not json"},
+        {"passage_id": "unknown", "result": QUESTION},
+    ])
+    results, failures = parse_pack_response("emotion_atmosphere_agent", PACK, text)
+    assert results == {}
+    assert failures == {"p1": "결과가 JSON 객체가 아닙니다", "p2": "응답에 해당 지문의 결과가 없습니다"}
+
+    text = json.dumps([
+        {"passage_id": "p1", "result": QUESTION},
+        {"passage_id": "p1", "result": dict(QUESTION, question="other")},
+        {"passage_id": "p2", "result": QUESTION},
+    ])
+    results, failures = parse_pack_response("emotion_atmosphere_agent", PACK, text)
+    assert list(results) == ["p2"] and "여러 개" in failures["p1"]
+
+    _, failures = parse_pack_response("emotion_atmosphere_agent", PACK, "형식을 지킬 수 없습니다.")
+    assert set(failures) == {"p1", "p2"}
+
+
+def test_parse_pack_response_completes_segmentation_results():
+    segmentation = {
+        "passage_start": "People often", "passage_end": "witnesses disagree.",
+        "segment_starts": ["Details that fit", "As a result"], "explanation": "[S1] 다음에 [S2]",
+    }
+    broken = dict(segmentation, segment_starts=["missing quote", "As a result"])
+    text = json.dumps([{"passage_id": "p1", "result": segmentation}, {"passage_id": "p2", "result": broken}])
+    results, failures = parse_pack_response("paragraph_order_agent", PACK, text)
+    assert set(results["p1"]) == {"question", "choices", "answer", "explanation"}
+    assert "찾을 수 없습니다" in failures["p2"]
@@ -0,0 +1,78 @@
+import json
+import tracemalloc
+
+import pytest
+from starlette.testclient import TestClient
+
+import diagnostics
+from diagnostics import MAX_TOP_LIMIT, MemoryDiagnostics
+
+TOKEN = "test-admin-token"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    from server import app, memory_diagnostics
+
+    monkeypatch.setattr(diagnostics, "ADMIN_TOKEN", TOKEN)
+    client = TestClient(app, headers={"X-Admin-Token": TOKEN})
+    yield client
+    memory_diagnostics.stop()
+
+
+def test_admin_endpoints_are_forbidden_without_the_token(client, monkeypatch):
+    for headers in ({"X-Admin-Token": ""}, {"X-Admin-Token": "wrong"}):
+        assert client.get("/api/admin/memory", headers=headers).status_code == 403
+        assert client.post("/api/admin/memory/snapshots", json={}, headers=headers).status_code == 403
+        assert client.get("/api/admin/memory/top", headers=headers).status_code == 403
+        assert client.get("/api/admin/memory/diff?base=1", headers=headers).status_code == 403
+    # 토큰을 설정하지 않으면 진단 API를 쓸 수 없음
+    monkeypatch.setattr(diagnostics, "ADMIN_TOKEN", "")
+    assert client.get("/api/admin/memory").status_code == 403
+
+
+def test_bad_admin_bodies_are_rejected(client):
+    bodies = ["not json", json.dumps(["start"]), json.dumps({"action": "start", "frames": "abc"}),
+              json.dumps({"action": "start", "frames": -1})]
+    for body in bodies:
+        response = client.post("/api/admin/memory/tracemalloc", content=body,
+                               headers={"content-type": "application/json"})
+        assert response.status_code == 400, body
+    assert client.post("/api/admin/memory/tracemalloc", json={"action": "pause"}).status_code == 400
+    for body in ["not json", json.dumps({"limit": "many"})]:
+        response = client.post("/api/admin/memory/snapshots", content=body,
+                               headers={"content-type": "application/json"})
+        assert response.status_code == 400, body
+    assert not tracemalloc.is_tracing()
+
+
+def test_snapshot_top_and_diff(client):
+    assert client.post("/api/admin/memory/snapshots", json={}).status_code == 409
+    assert client.post("/api/admin/memory/tracemalloc", json={"action": "start", "frames": 2}).json()["tracemalloc"]
+    base = client.post("/api/admin/memory/snapshots", json={"label": "before", "limit": 3}).json()
+    assert base["snapshot"]["label"] == "before" and len(base["top"]) <= 3
+    kept = [bytearray(1024) for _ in range(200)]
+    client.post("/api/admin/memory/snapshots", json={"label": "after"})
+
+    assert len(client.get("/api/admin/memory/top?limit=-1").json()["top"]) == 1
+    assert len(client.get("/api/admin/memory/top?limit=5&groupBy=filename").json()["top"]) <= 5
+    assert client.get("/api/admin/memory/top?groupBy=module").status_code == 400
+    assert client.get("/api/admin/memory/top?snapshot=999").status_code == 404
+    diff = client.get(f"/api/admin/memory/diff?base={base['snapshot']['id']}&limit=0").json()["diff"]
+    assert len(diff) == 1
+    assert client.get("/api/admin/memory/diff?base=999").status_code == 404
+    assert len(kept) == 200
+
+
+def test_limits_are_clamped():
+    assert diagnostics._clamp_limit(-1) == 1
+    assert diagnostics._clamp_limit(0) == 1
+    assert diagnostics._clamp_limit(10_000) == MAX_TOP_LIMIT
+    tool = MemoryDiagnostics()
+    try:
+        tool.start(1)
+        kept = [bytearray(1024) for _ in range(10)]
+        tool.take_snapshot()
+        assert len(tool.top(limit=-5)) == 1 and kept
+    finally:
+        tool.stop()
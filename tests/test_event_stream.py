@@ -0,0 +1,109 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+
+from event_stream import accepts_gzip, coalesce_deltas, compact_event, format_frame, gzip_stream
+
+
+def _event(author, text=None, partial=False, **extra):
+    event = {"author": author, "invocationId": "inv-1", "actions": {"stateDelta": {}}, **extra}
+    if text is not None:
+        event["content"] = {"role": "model", "parts": [{"text": text}]}
+    if partial:
+        event["partial"] = True
+    return event
+
+
+async def _records(events, delay=0.0):
+    for index, event in enumerate(events, start=1):
+        if delay:
+            await asyncio.sleep(delay)
+        yield {"id": index, "event": event}
+
+
+def _collect(records, **kwargs):
+    async def scenario():
+        return [record async for record in coalesce_deltas(records, **kwargs)]
+
+    return asyncio.run(scenario())
+
+
+def test_compact_event_keeps_only_displayed_fields():
+    assert compact_event(_event("root_agent", "안녕", partial=True)) == {
+        "author": "root_agent", "role": "model", "text": "안녕", "partial": True}
+    call = {"author": "root_agent", "content": {"role": "model", "parts": [
+        {"text": "생각 중", "thought": True}, {"functionCall": {"name": "emotion_atmosphere_agent", "args": {}}}]}}
+    assert compact_event(call) == {"author": "root_agent", "role": "model", "calls": ["emotion_atmosphere_agent"]}
+    result = {"author": "root_agent", "content": {"role": "user", "parts": [
+        {"functionResponse": {"name": "x", "response": {"result": "{\"answer\": \"2\"}"}}}]}}
+    assert compact_event(result)["result"] == "{\"answer\": \"2\"}"
+    assert compact_event({"author": "root_agent", "errorCode": "BUDGET_EXCEEDED"})["error"] == "BUDGET_EXCEEDED"
+    assert compact_event(_event("root_agent")) is None
+
+
+def test_deltas_are_coalesced_and_the_final_text_is_not_resent():
+    events = [_event("root_agent", piece, partial=True) for piece in ("Dear ", "Mr. ", "Carter")]
+    events.append(_event("root_agent", "Dear Mr. Carter"))
+    frames = _collect(_records(events), flush_seconds=10)
+    assert frames == [
+        {"id": 3, "frame": {"author": "root_agent", "role": "model", "text": "Dear Mr. Carter", "partial": True}},
+        {"id": 4, "frame": {"author": "root_agent", "role": "model", "fromDeltas": True}},
+    ]
+
+
+def test_final_text_is_sent_when_it_differs_from_the_deltas():
+    events = [_event("root_agent", "Dear", partial=True), _event("root_agent", "Dear Mr. Carter")]
+    assert _collect(_records(events), flush_seconds=10)[-1]["frame"]["text"] == "Dear Mr. Carter"
+
+
+def test_deltas_flush_on_size_author_change_and_time():
+    by_size = _collect(_records([_event("a", "12345", partial=True) for _ in range(3)]), flush_seconds=10, flush_bytes=8)
+    assert [(record["id"], record["frame"]["text"]) for record in by_size] == [(2, "1234512345"), (3, "12345")]
+
+    by_author = _collect(_records([_event("a", "x", partial=True), _event("b", "y", partial=True)]), flush_seconds=10)
+    assert [record["frame"]["author"] for record in by_author] == ["a", "b"]
+
+    by_time = _collect(_records([_event("a", "x", partial=True), _event("a", "y", partial=True)], delay=0.05),
+                       flush_seconds=0.01)
+    assert [record["frame"]["text"] for record in by_time] == ["x", "y"]
+
+
+def test_source_errors_are_raised_after_pending_frames():
+    async def failing():
+        yield {"id": 1, "event": _event("a", "x", partial=True)}
+        raise RuntimeError("run failed")
+
+    async def scenario():
+        frames = []
+        with pytest.raises(RuntimeError):
+            async for record in coalesce_deltas(failing(), flush_seconds=10):
+                frames.append(record)
+        return frames
+
+    assert [record["id"] for record in asyncio.run(scenario())] == [1]
+
+
+def test_gzip_stream_flushes_every_chunk():
+    async def chunks():
+        for record in ({"id": 1, "frame": {"text": "지문"}}, {"id": 2, "frame": {"fromDeltas": True}}):
+            yield format_frame(record)
+
+    async def scenario():
+        return [data async for data in gzip_stream(chunks())]
+
+    parts = asyncio.run(scenario())
+    decompressor = zlib.decompressobj(31)
+    # 첫 조각만으로도 첫 프레임 전체를 풀 수 있어야 바로 전송됨
+    first = decompressor.decompress(parts[0]).decode("utf-8")
+    assert first == 'id: 1\ndata: {"text":"지문"}\n\n'
+    rest = b"".join(decompressor.decompress(part) for part in parts[1:]).decode("utf-8")
+    assert json.loads(rest.split("data: ")[1]) == {"fromDeltas": True}
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, *;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("")
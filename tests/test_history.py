@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from agent.history import MAX_SUMMARIZED_TURNS, compact_history, split_turns, summarize_turn
+
+
+def _user(text):
+    return types.Content(role="user", parts=[types.Part(text=text)])
+
+
+def _model(text):
+    return types.Content(role="model", parts=[types.Part(text=text)])
+
+
+def _tool_result(result):
+    return types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+        name="master_agent", response={"result": result},
+    ))])
+
+
+def _turn(passage):
+    return [_user(passage), _tool_result('{"question": "Q1"} {"question": "Q2"}' + "x" * 500), _model("결과")]
+
+
+def test_split_turns_keeps_tool_results_in_the_turn():
+    turns = split_turns(_turn("first") + _turn("second"))
+    assert [len(turn) for turn in turns] == [3, 3]
+    assert turns[1][0].parts[0].text == "second"
+
+
+def test_summarize_turn():
+    summary = summarize_turn(_turn("Dear Mr. Carter " * 20), 2)
+    assert summary.startswith("[이전 턴 2] 입력: Dear Mr. Carter")
+    assert "..." in summary and "변형 문제 약 2개" in summary
+    assert summarize_turn([_user("only")], 1).endswith("생성 결과 없음")
+
+
+def test_compact_history_replaces_previous_turns_with_a_summary():
+    contents = [content for index in range(MAX_SUMMARIZED_TURNS + 2) for content in _turn(f"passage {index}")]
+    current = _turn("current passage")
+    request = LlmRequest(contents=contents + current)
+
+    assert compact_history(SimpleNamespace(agent_name="root_agent"), request) is None
+    assert request.contents[2:] == current
+    summary = request.contents[0].parts[0].text
+    assert "[이전 턴 1~2] 요약 생략" in summary
+    assert f"[이전 턴 {MAX_SUMMARIZED_TURNS + 2}] 입력: passage {MAX_SUMMARIZED_TURNS + 1}" in summary
+
+
+def test_single_turn_is_left_alone():
+    request = LlmRequest(contents=_turn("only turn"))
+    compact_history(SimpleNamespace(agent_name="root_agent"), request)
+    assert len(request.contents) == 3
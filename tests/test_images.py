@@ -0,0 +1,136 @@
+import asyncio
+import base64
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image, ImageDraw
+from starlette.requests import Request
+
+import images
+import warmup
+from images import IMAGE_AGENT_NAME, ImageIngestor
+from scheduler import FairScheduler
+from usage import BudgetExceeded, UsageMeter
+
+# 1x1 흰색 PNG
+PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8/5+hHgAHggJ/PchI7wAAAABJRU5ErkJggg=="
+)
+
+
+class FakeModels:
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content(self, model, contents):
+        self.calls += 1
+        usage = SimpleNamespace(prompt_token_count=300, cached_content_token_count=0, candidates_token_count=50)
+        return SimpleNamespace(text=" 23005-0011 Dear Mr. Carter ", usage_metadata=usage)
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    models = FakeModels()
+    model = SimpleNamespace(api_client=SimpleNamespace(aio=SimpleNamespace(models=models)))
+    monkeypatch.setattr(warmup.model_warmer, "shared_model", lambda name: model)
+    return models
+
+
+def _ingestor(tmp_path, budgets=None):
+    meter = UsageMeter(str(tmp_path / "usage.sqlite3"), budgets=budgets or {})
+    return ImageIngestor(cache_dir=str(tmp_path / "cache"), meter=meter, fair_scheduler=FairScheduler(weights={}))
+
+
+def test_extraction_is_scheduled_and_metered(tmp_path, fake_model):
+    ingestor = _ingestor(tmp_path)
+    result = asyncio.run(ingestor.ingest(PNG, "image/png", "teacher1"))
+    assert result["text"] == "23005-0011 Dear Mr. Carter" and not result["cached"]
+    assert ingestor.fair_scheduler.active == 0
+    ingestor.meter.flush()
+    rows = ingestor.meter.query(period="day", user_id="teacher1")
+    assert sum(row["prompt_tokens"] for row in rows) == 300
+    assert asyncio.run(ingestor.ingest(PNG, "image/png", "teacher1"))["cached"]
+    assert fake_model.calls == 1
+
+
+def test_users_over_budget_only_get_cached_images(tmp_path, fake_model):
+    ingestor = _ingestor(tmp_path, budgets={"teacher1": 0.000001})
+    ingestor.meter.record("teacher1", "s", "agent", IMAGE_AGENT_NAME, "gemini-2.0-flash", 100_000, 0, 0)
+    with pytest.raises(BudgetExceeded):
+        asyncio.run(ingestor.ingest(PNG, "image/png", "teacher1"))
+    assert fake_model.calls == 0
+    # 다른 사용자가 처리한 같은 사진은 캐시에서 받을 수 있음
+    asyncio.run(ingestor.ingest(PNG, "image/png", "teacher2"))
+    assert asyncio.run(ingestor.ingest(PNG, "image/png", "teacher1"))["cached"]
+
+
+def test_photos_are_rotated_cropped_and_downscaled():
+    # 가로로 찍혀 EXIF 방향(6: 시계 방향 90도 회전)이 붙은 사진, 가운데에만 글자 영역이 있음
+    photo = Image.new("RGB", (4000, 3000), "white")
+    draw = ImageDraw.Draw(photo)
+    for top in range(500, 2500, 40):
+        draw.rectangle((500, top, 3500, top + 20), fill="black")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", exif=exif)
+
+    data, mime_type, info = images.preprocess_image(buffer.getvalue())
+    assert mime_type == "image/jpeg" and info["processed"] and info["cropped"]
+    assert info["original_size"] == [4000, 3000]
+    width, height = Image.open(io.BytesIO(data)).size
+    assert [width, height] == info["size"]
+    # 회전해서 세로가 길고, 글자 영역만 남아 목표 DPI 크기 이하로 줄어듦
+    assert height > width
+    assert height <= round(images.IMAGE_TARGET_DPI * images.PAGE_LONG_EDGE_INCHES)
+    assert width < 3000 * height / 4000
+    assert info["processed_bytes"] < info["original_bytes"]
+
+
+def test_small_images_are_sent_as_is():
+    data, mime_type, info = images.preprocess_image(PNG)
+    assert (data, mime_type, info["processed"]) == (PNG, "", False)
+
+
+def test_unsupported_or_oversized_uploads_are_rejected(tmp_path, fake_model):
+    ingestor = _ingestor(tmp_path)
+    with pytest.raises(ValueError):
+        asyncio.run(ingestor.ingest(b"%PDF", "application/pdf"))
+    assert fake_model.calls == 0
+
+
+def test_missing_pillow_refuses_instead_of_sending_the_original(tmp_path, fake_model, monkeypatch):
+    monkeypatch.setattr(images, "Image", None)
+    with pytest.raises(RuntimeError):
+        asyncio.run(_ingestor(tmp_path).ingest(PNG, "image/png"))
+    assert fake_model.calls == 0
+
+
+def _upload(chunks, headers):
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunks]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+    received = []
+
+    async def receive():
+        received.append(True)
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/api/images/ingest",
+             "headers": [(name.encode(), value.encode()) for name, value in headers.items()]}
+    return Request(scope, receive), received
+
+
+def test_upload_size_is_capped_before_and_while_reading():
+    from server import read_capped_body
+
+    request, received = _upload([b"x" * 10], {"content-length": "1000"})
+    assert asyncio.run(read_capped_body(request, 100)) is None
+    assert not received
+
+    request, received = _upload([b"x" * 60] * 5, {})
+    assert asyncio.run(read_capped_body(request, 100)) is None
+    assert len(received) == 2
+
+    request, _ = _upload([b"ab", b"cd"], {"content-length": "4"})
+    assert asyncio.run(read_capped_body(request, 100)) == b"abcd"
@@ -0,0 +1,62 @@
+from google.adk.agents import LlmAgent
+
+from metrics import Counter, Gauge, Histogram, MetricsRegistry, add_agent_callbacks, iter_agent_tree
+
+
+def test_counter_renders_labels_and_escapes_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("calls_total", "호출 횟수", ("agent",))
+    counter.inc('say "hi"\n')
+    counter.inc("master", amount=2)
+    counter.inc("master")
+    assert registry.render().splitlines() == [
+        "# HELP problem_forge_calls_total 호출 횟수",
+        "# TYPE problem_forge_calls_total counter",
+        'problem_forge_calls_total{agent="master"} 3',
+        'problem_forge_calls_total{agent="say \\"hi\\"\\n"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    histogram = Histogram("latency", "지연 시간", ("agent",), buckets=(1, 0.5))
+    for value in (0.2, 0.7, 3):
+        histogram.observe(value, "a")
+    assert histogram.samples() == [
+        'latency_bucket{agent="a",le="0.5"} 1',
+        'latency_bucket{agent="a",le="1"} 2',
+        'latency_bucket{agent="a",le="+Inf"} 3',
+        'latency_sum{agent="a"} 3.9',
+        'latency_count{agent="a"} 3',
+    ]
+
+
+def test_gauge_without_labels_and_failing_read_is_skipped():
+    assert Gauge("up", "가동", lambda: 1).samples() == ["up 1"]
+    assert Gauge("broken", "실패", lambda: 1 / 0).samples() == []
+    assert Counter("empty", "빈 카운터").samples() == []
+
+
+def test_add_agent_callbacks_keeps_existing_callbacks_in_order():
+    def existing(*args):
+        return None
+
+    def before(*args):
+        return None
+
+    def after(*args):
+        return None
+
+    agent = LlmAgent(name="child", model="gemini-2.0-flash",
+                     before_model_callback=existing, after_model_callback=[existing])
+    add_agent_callbacks(agent, "before_model_callback", before, first=False)
+    add_agent_callbacks(agent, "after_model_callback", after, first=True)
+    add_agent_callbacks(agent, "no_such_callback", after, first=True)
+    assert agent.before_model_callback == [existing, before]
+    assert agent.after_model_callback == [after, existing]
+
+
+def test_iter_agent_tree_visits_each_sub_agent_once():
+    child = LlmAgent(name="child", model="gemini-2.0-flash")
+    middle = LlmAgent(name="middle", model="gemini-2.0-flash", sub_agents=[child])
+    root = LlmAgent(name="root", model="gemini-2.0-flash", sub_agents=[middle])
+    assert sorted(agent.name for agent in iter_agent_tree(root)) == ["child", "middle", "root"]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from typing import AsyncGenerator, List
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+
+from model_router import (
+    FALLBACKS_METADATA_KEY, ROUTED_MODEL_METADATA_KEY, VALIDATOR_VARIANT, ModelRouter, RoutedLlm, parse_model_routes,
+    route_agent_tree,
+)
+
+VALID = json.dumps({"question": "Q", "choices": ["1.a", "2.b", "3.c", "4.d", "5.e"], "answer": "2", "explanation": "e"})
+
+
+class FakeLlm(BaseLlm):
+    """HTTP 없이 정해진 결과(valid, invalid, error, raise)를 돌려주는 테스트용 모델"""
+
+    outcome: str = "valid"
+    calls: List[bool] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls.append(stream)
+        if self.outcome == "raise":
+            raise ConnectionError(f"{self.model} unavailable")
+        usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=100, candidates_token_count=7)
+        if self.outcome == "error":
+            yield LlmResponse(error_code="RESOURCE_EXHAUSTED", error_message="quota", usage_metadata=usage)
+            return
+        text = VALID if self.outcome == "valid" else "문제를 만들 수 없습니다."
+        if stream:
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text[:5])]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]), usage_metadata=usage)
+
+
+def _routed(outcomes, mode="static", validator=VALIDATOR_VARIANT):
+    candidates = {name: FakeLlm(model=name, outcome=outcome, calls=[]) for name, outcome in outcomes.items()}
+    return RoutedLlm(model=next(iter(candidates)), app_name="agent", agent_name="emotion_atmosphere_agent",
+                     validator=validator, candidates=candidates, router=ModelRouter(routes={}, mode=mode))
+
+
+def _generate(llm, stream=False):
+    async def scenario():
+        return [response async for response in llm.generate_content_async(LlmRequest(), stream)]
+
+    return asyncio.run(scenario())
+
+
+def test_parse_model_routes_skips_bad_items():
+    assert parse_model_routes("a=m1|m2|m1, bad, =m3,*=m4") == {"a": ["m1", "m2"], "*": ["m4"]}
+
+
+def test_falls_back_through_errors_and_invalid_results():
+    llm = _routed({"lite": "raise", "flash": "invalid", "pro": "valid"})
+    responses = _generate(llm)
+    assert len(responses) == 1
+    metadata = responses[0].custom_metadata
+    assert metadata[ROUTED_MODEL_METADATA_KEY] == "pro"
+    assert [(item["model"], item["reason"], item["output_tokens"]) for item in metadata[FALLBACKS_METADATA_KEY]] == [
+        ("lite", "error: ConnectionError", 0), ("flash", "invalid", 7)]
+    stats = llm.router.snapshot()["stats"]["emotion_atmosphere_agent"]
+    assert {name: item["failures"] for name, item in stats.items()} == {"lite": 1, "flash": 1, "pro": 0}
+
+
+def test_last_candidate_result_is_returned_even_if_invalid():
+    responses = _generate(_routed({"lite": "error", "flash": "invalid"}))
+    assert responses[-1].custom_metadata[ROUTED_MODEL_METADATA_KEY] == "flash"
+    with pytest.raises(ConnectionError):
+        _generate(_routed({"lite": "error", "flash": "raise"}))
+
+
+def test_streaming_skips_validation_but_falls_back_on_errors():
+    llm = _routed({"lite": "error", "flash": "invalid", "pro": "valid"})
+    responses = _generate(llm, stream=True)
+    assert [response.custom_metadata[ROUTED_MODEL_METADATA_KEY] for response in responses] == ["flash", "flash"]
+    assert responses[0].partial and not responses[-1].partial
+    assert llm.candidates["pro"].calls == []
+    stats = llm.router.snapshot()["stats"]["emotion_atmosphere_agent"]
+    assert stats["lite"]["failures"] == 1 and stats["flash"]["failures"] == 0
+
+
+def test_adaptive_mode_prefers_healthy_fast_models():
+    router = ModelRouter(routes={}, mode="adaptive")
+    for _ in range(3):
+        router.record("a", "slow", 2.0, ok=True)
+        router.record("a", "fast", 0.5, ok=True)
+        router.record("a", "broken", 0.1, ok=False)
+    assert router.order("a", ["broken", "slow", "fast"]) == ["fast", "slow", "broken"]
+    assert ModelRouter(routes={}, mode="static").order("a", ["broken", "slow"]) == ["broken", "slow"]
+
+
+def test_route_agent_tree_only_wraps_agents_in_the_table():
+    def shared_model(name):
+        if name == "typo-model":
+            raise ValueError(name)
+        return FakeLlm(model=name, calls=[])
+
+    routed_agent = LlmAgent(name="emotion_atmosphere_agent", model="gemini-2.0-flash")
+    plain_agent = LlmAgent(name="implied_meaning_agent", model="gemini-2.0-flash")
+    root = LlmAgent(name="root_agent", model="gemini-2.0-flash", sub_agents=[routed_agent, plain_agent])
+    router = ModelRouter(routes={"emotion_atmosphere_agent": ["gemini-2.0-flash-lite", "typo-model", "gemini-2.0-flash"]})
+
+    assert route_agent_tree(root, "agent", router=router, shared_model=shared_model) == ["emotion_atmosphere_agent"]
+    assert list(routed_agent.model.candidates) == ["gemini-2.0-flash-lite", "gemini-2.0-flash"]
+    assert plain_agent.model == "gemini-2.0-flash" and root.model == "gemini-2.0-flash"
+    # 기본 표는 비어 있어 아무 에이전트도 라우팅하지 않음
+    assert route_agent_tree(LlmAgent(name="x", model="gemini-2.0-flash"), "agent", router=ModelRouter(routes={}),
+                            shared_model=shared_model) == []
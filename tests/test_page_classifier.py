@@ -0,0 +1,41 @@
+from pdf_agent.page_classifier import classify_page, count_choices, english_ratio, is_answer_key_page
+
+PASSAGE = (
+    "Dear Mr. Carter, Thank you for the interest you have shown in the FC Rainbow City "
+    "50 Year Anniversary products. We regret to inform you that we are unable to fulfil your order."
+)
+PROBLEM_PAGE = f"01 다음 글의 목적으로 가장 적절한 것은?\n{PASSAGE}\n① 안내\n② 환불\n③ 초대\n④ 교환\n⑤ 통보\n23005-0011"
+
+
+def test_count_choices_uses_the_richer_numbering_style():
+    assert count_choices("① a ② b ③ c") == 3
+    assert count_choices("1. a\n2. b\n3) c\n4. d") == 4
+    assert count_choices("① a ① again") == 1
+
+
+def test_english_ratio():
+    assert english_ratio("") == 0.0
+    assert english_ratio("abc") == 1.0
+    assert english_ratio("ab가나") == 0.5
+
+
+def test_answer_key_page_detection():
+    assert is_answer_key_page("정답과 해설\n01 ...")
+    assert is_answer_key_page("01 정답 ② 해설\n02 정답: ③ 해설")
+    assert not is_answer_key_page(PROBLEM_PAGE)
+
+
+def test_problem_page_is_a_candidate():
+    result = classify_page(PROBLEM_PAGE)
+    assert result["has_candidate"] and result["reason"] == ""
+    assert result["item_codes"] == ["23005-0011"]
+    assert result["choice_count"] == 5
+
+
+def test_pages_without_problems_are_skipped():
+    assert not classify_page("")["has_candidate"]
+    assert "영어 텍스트 부족" in classify_page("수능특강 영어독해연습 EBS")["reason"]
+    assert "선택지 부족" in classify_page(f"E xercises\n{PASSAGE}\n23005-0003")["reason"]
+    assert classify_page("정답과 해설\n" + PROBLEM_PAGE)["reason"] == "정답과 해설 페이지"
+    korean = "다음 중 밑줄 친 낱말의 쓰임이 적절하지 않은 것은? " * 10 + "word ① 가 ② 나 ③ 다" + " abcd" * 15
+    assert "영어 비율 미달" in classify_page(korean)["reason"]
@@ -0,0 +1,51 @@
+from pdf_agent.page_window import build_parse_units, split_page_blocks
+
+PASSAGE = (
+    "Dear Mr. Carter, Thank you for the interest you have shown in the FC Rainbow City "
+    "50 Year Anniversary products. We regret to inform you that we are unable to fulfil your order."
+)
+CHOICES = "① 안내\n② 환불\n③ 초대\n④ 교환\n⑤ 통보"
+
+
+def _candidate_codes(units):
+    return [
+        (unit["unit_id"], unit["classification"]["item_codes"])
+        for unit in units if unit["classification"]["has_candidate"]
+    ]
+
+
+def test_split_page_blocks():
+    head, blocks = split_page_blocks(f"머리말\n23005-0011 01 {PASSAGE}\n23005-0012 02 {PASSAGE}")
+    assert head == "머리말\n"
+    assert [block[:10] for block in blocks] == ["23005-0011", "23005-0012"]
+
+
+def test_complete_pages_are_not_stitched():
+    units = build_parse_units([f"23005-0011 01 다음 글의 목적은?\n{PASSAGE}\n{CHOICES}"])
+    assert [unit["unit_id"] for unit in units] == ["p1"]
+    assert units[0]["classification"]["has_candidate"]
+
+
+def test_leading_codes_stitch_the_tail_block():
+    pages = [
+        f"23005-0011 01 다음 글의 목적은?\n{PASSAGE}\n{CHOICES}\n23005-0012 02 다음 글의 분위기는?\n{PASSAGE}",
+        f"{PASSAGE}\n{CHOICES}\n23005-0013 03 다음 글의 요지는?\n{PASSAGE}\n{CHOICES}",
+    ]
+    units = build_parse_units(pages)
+    assert _candidate_codes(units) == [
+        ("p1", ["23005-0011"]),
+        ("p1-2", ["23005-0012"]),
+        ("p2", ["23005-0013"]),
+    ]
+
+
+def test_trailing_codes_stay_with_their_own_problem():
+    pages = [
+        f"E xercises\n 01 다음 글의 목적은?\n{PASSAGE}\n{CHOICES}\n23005-0021\n 02 다음 글의 분위기는?\n{PASSAGE}",
+        f"{PASSAGE}\n{CHOICES}\n23005-0022\n 수능특강 영어독해연습",
+    ]
+    units = build_parse_units(pages)
+    assert _candidate_codes(units) == [("p1", ["23005-0021"]), ("p1-2", ["23005-0022"])]
+    stitched = next(unit for unit in units if unit["stitched"])
+    assert "02 다음 글의 분위기는?" in stitched["text"]
+    assert "23005-0021" not in stitched["text"]
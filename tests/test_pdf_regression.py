@@ -0,0 +1,50 @@
+import json
+
+import pdf_regression
+from pdf_regression import BASELINE_PATH, NO_ITEM_CODE, compare_to_baseline, load_corpus, run_local, score
+
+
+def test_local_path_matches_the_baseline():
+    with open(BASELINE_PATH, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    result = run_local(load_corpus(), repeat=1)
+    assert compare_to_baseline("local", result, baseline) == []
+    # 사전 분류가 건너뛰는 선택지 없는 지문은 코드 없는 문제를 놓친 것으로 셈
+    assert result["misses"] == {"test_small_exercises": {"missing": [NO_ITEM_CODE] * 4, "extra": []}}
+
+
+def test_code_less_units_are_scored_as_code_less_problems(monkeypatch):
+    import pdf_agent.page_window as page_window
+
+    units = [{"classification": {"has_candidate": True, "item_codes": []}},
+             {"classification": {"has_candidate": True, "item_codes": ["23005-0011"]}}]
+    monkeypatch.setattr(page_window, "build_parse_units", lambda page_texts: units)
+    documents = [{"id": "d", "page_texts": ["p1", "p2"], "expected": [NO_ITEM_CODE, "23005-0011"]}]
+    result = run_local(documents, repeat=1)
+    assert (result["precision"], result["recall"], result["misses"]) == (1.0, 1.0, {})
+
+
+def test_cli_checks_the_local_path(capsys):
+    assert pdf_regression.main(["--repeat", "1"]) == 0
+    assert "회귀 없음" in capsys.readouterr().out
+
+
+def test_cli_warns_when_a_path_has_no_baseline(tmp_path, capsys):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text("{}")
+    assert pdf_regression.main(["--repeat", "1", "--baseline", str(baseline)]) == 0
+    assert "[local] 기준값이 없어" in capsys.readouterr().out
+
+
+def test_regressions_are_reported_but_speed_is_not_gated():
+    baseline = {"local": {"precision": 1.0, "recall": 1.0, "model_calls_per_page": 0.5}}
+    result = {"precision": 1.0, "recall": 0.75, "pages_per_second": 0.1, "model_calls_per_page": 0.6}
+    failures = compare_to_baseline("local", result, baseline)
+    assert len(failures) == 2
+    assert any("recall" in failure for failure in failures) and any("모델 호출" in failure for failure in failures)
+    assert compare_to_baseline("llm", result, baseline) == []
+
+
+def test_score_counts_duplicates_as_false_positives():
+    result = score(["23005-0011", "23005-0012"], ["23005-0011", "23005-0011"])
+    assert (result["true_positives"], result["false_positives"], result["false_negatives"]) == (1, 1, 1)
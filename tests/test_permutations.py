@@ -0,0 +1,89 @@
+import json
+import random
+from types import SimpleNamespace
+
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from agent.permutations import (
+    SEGMENTATION_ERROR_CODE,
+    build_paragraph_order,
+    build_paragraph_order_response,
+    build_sentence_insertion,
+    build_sentence_insertion_response,
+    locate_passage,
+    split_sentences,
+)
+
+PASSAGE = (
+    "People often think that memory works like a recorder. In fact, it rebuilds the past each time. "
+    "Every recall changes the memory a little. Details that fit our beliefs are kept. "
+    "Others slowly fade away. As a result, confident memories can still be wrong. "
+    "This is why witnesses disagree."
+)
+SOURCE = f"다음 지문으로 문제를 만들어 주세요.\n\n{PASSAGE}"
+
+
+def _context(text=SOURCE):
+    return SimpleNamespace(user_content=types.Content(role="user", parts=[types.Part(text=text)]))
+
+
+def _response(data):
+    text = f"```json\n{json.dumps(data)}\n```" if isinstance(data, dict) else data
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def test_locate_passage_and_split_sentences():
+    assert locate_passage(SOURCE, "People often", "witnesses disagree.") == PASSAGE
+    assert locate_passage(SOURCE, "missing", "witnesses disagree.") == ""
+    assert len(split_sentences(PASSAGE)) == 7
+
+
+def test_paragraph_order_answer_matches_the_shuffled_labels():
+    for seed in range(10):
+        result, placeholders = build_paragraph_order(
+            PASSAGE, ["Details that fit", "As a result"], random.Random(seed)
+        )
+        correct = "-".join(placeholders[str(number)] for number in (1, 2, 3))
+        assert correct != "(A)-(B)-(C)"
+        assert len(result["choices"]) == 5
+        assert result["choices"][int(result["answer"]) - 1].endswith(correct)
+
+
+def test_sentence_insertion_marks_the_removed_sentence_position():
+    for seed in range(10):
+        result = build_sentence_insertion(PASSAGE, "Others slowly fade away.", random.Random(seed))
+        body = result["question"].split("\n\n")[-1]
+        mark = result["choices"][int(result["answer"]) - 1].split(".", 1)[1]
+        assert "Others slowly fade away." not in body
+        assert body.split(mark)[0].rstrip().endswith("Details that fit our beliefs are kept.")
+
+
+def test_callbacks_complete_the_problem():
+    response = build_sentence_insertion_response(_context(), _response({
+        "passage_start": "People often", "passage_end": "witnesses disagree.",
+        "given_sentence": "Others slowly fade away.", "explanation": "정답 위치는 <정답>입니다.",
+    }))
+    result = json.loads(response.content.parts[0].text)
+    assert set(result) == {"question", "choices", "answer", "explanation"}
+    assert response.error_code is None
+
+
+def test_failed_segmentation_becomes_an_error_instead_of_the_raw_json():
+    bad_quote = _response({
+        "passage_start": "People often", "passage_end": "witnesses disagree.",
+        "segment_starts": ["not in the passage", "As a result"],
+    })
+    for response in (
+        build_paragraph_order_response(_context(), bad_quote),
+        build_paragraph_order_response(_context(), _response("세 단락으로 나눌 수 없습니다.")),
+        build_sentence_insertion_response(_context(), _response({"given_sentence": "Never written."})),
+    ):
+        assert response.error_code == SEGMENTATION_ERROR_CODE
+        assert response.content is None and "만들지 못했습니다" in response.error_message
+
+
+def test_partial_responses_are_left_alone():
+    partial = _response("{")
+    partial.partial = True
+    assert build_paragraph_order_response(_context(), partial) is None
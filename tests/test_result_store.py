@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import types as pytypes
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.genai import types
+
+from result_store import PASSAGE_REF, ResultStore, compact_runs_dir, decode, encode
+from runs import RUN_STATUS_COMPLETED, RunManager
+from variant_bank import VariantBank
+from variants import VARIANT_AGENT_NAMES, render_variants_markdown
+
+PASSAGE = ("Dear Mr. Carter, thank you for your order of anniversary mugs. "
+           "Unfortunately the design you chose is no longer available.")
+
+# 모델 출력 그대로의 결과 (코드 블록, 키 순서, 들여쓰기가 JSON 재직렬화와 다름)
+VERBATIM = '```json\n{"question": "다음 글의 목적은?", "answer": "2",\n  "choices": ["1.a", "2.b"], "explanation": "e"}\n```'
+COMPACT_JSON = '{"question":"Q","choices":["1.a","2.b"],"answer":"1","explanation":"e"}'
+
+
+def _meta(run_id, variants, **extra):
+    return {"run_id": run_id, "status": RUN_STATUS_COMPLETED, "created_at": 1.0, "input_text": PASSAGE,
+            "variants": variants, "result": render_variants_markdown(variants, PASSAGE), **extra}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_records_round_trip():
+    value = {"text": "지문", "items": [1, 2.5, None, True]}
+    assert decode(encode(value)) == value
+
+
+def test_variants_are_returned_verbatim(store):
+    variants = {"emotion_atmosphere_agent": VERBATIM, "paragraph_order_agent": COMPACT_JSON,
+                "sentence_insertion_agent": f"plain text quoting {PASSAGE}"}
+    store.save_run(_meta("run1", variants), [])
+    meta = store.load_meta("run1")
+    assert meta["variants"] == variants
+    assert meta["result"] == render_variants_markdown(variants, PASSAGE)
+
+
+def test_passages_are_stored_once_and_restored(store):
+    events = [{"id": 1, "event": {"content": {"parts": [{"text": f"echo: {PASSAGE}"}]}}}]
+    for run_id in ("run1", "run2"):
+        store.save_run(_meta(run_id, {"paragraph_order_agent": COMPACT_JSON}, result=f"custom {PASSAGE}"), events)
+    stats = store.stats()
+    assert stats["runs"] == 2 and stats["passages"] == 1
+    assert store.load_events("run2") == events
+    assert store.load_meta("run2")["result"] == f"custom {PASSAGE}"
+    assert PASSAGE_REF not in json.dumps(store.load_meta("run1"))
+    assert store.load_meta("missing") is None and store.load_events("missing") is None
+
+
+def test_compact_moves_only_finished_run_files(store, tmp_path):
+    runs_dir = tmp_path / "runs"
+    runs_dir.mkdir()
+    (runs_dir / "done.json").write_text(json.dumps(_meta("done", {"paragraph_order_agent": VERBATIM})))
+    (runs_dir / "done.events.jsonl").write_text(json.dumps({"id": 1, "event": {"author": "root_agent"}}) + "\n")
+    (runs_dir / "busy.json").write_text(json.dumps({"run_id": "busy", "status": "running", "input_text": PASSAGE}))
+
+    assert compact_runs_dir(store, str(runs_dir))["runs"] == 1
+    assert sorted(os.listdir(runs_dir)) == ["busy.json"]
+    assert store.load_meta("done")["variants"] == {"paragraph_order_agent": VERBATIM}
+    assert store.load_events("done") == [{"id": 1, "event": {"author": "root_agent"}}]
+
+
+class VerbatimAgent(BaseAgent):
+    """모델 출력 형식 그대로의 결과를 내는 테스트용 에이전트"""
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            content=types.Content(role="model", parts=[types.Part(text=VERBATIM)]),
+        )
+
+
+fake_agent = pytypes.ModuleType("fake_store_agent")
+fake_agent.root_agent = VerbatimAgent(name="root_agent")
+sys.modules["fake_store_agent"] = fake_agent
+
+
+def test_run_manager_archives_finished_runs_off_the_event_loop(store, tmp_path, monkeypatch):
+    runs_dir = tmp_path / "runs"
+    threads = []
+    save_run = store.save_run
+
+    def recording_save_run(meta, events):
+        threads.append(threading.current_thread())
+        return save_run(meta, events)
+
+    monkeypatch.setattr(store, "save_run", recording_save_run)
+
+    async def scenario():
+        bank = VariantBank(":memory:")
+        bank.add_variants(bank.add_passage(PASSAGE), {name: VERBATIM for name in VARIANT_AGENT_NAMES})
+        manager = RunManager(agent_module="fake_store_agent", runs_dir=str(runs_dir), result_store=store,
+                             variant_bank=bank)
+        banked = manager.start_run("u1", "chat-1", PASSAGE)
+        run = manager.start_run("u1", "chat-1", "a passage that is not in the bank")
+        async for _ in manager.stream_events(run["run_id"]):
+            pass
+        while manager.running_count or manager._archive_tasks:
+            await asyncio.sleep(0.01)
+        assert threading.main_thread() not in threads and len(threads) == 2
+        assert os.listdir(runs_dir) == []
+        # 메모리에서 내려간 뒤에도 저장소에서 같은 결과를 읽음
+        manager._runs.clear()
+        assert manager.get_run(run["run_id"])["meta"]["status"] == RUN_STATUS_COMPLETED
+        assert manager.load_meta(banked["run_id"])["variants"] == {name: VERBATIM for name in VARIANT_AGENT_NAMES}
+        bank.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import sys
+import threading
+import types as pytypes
+from types import SimpleNamespace
+from typing import AsyncGenerator
+
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from agent import token_usage
+
+import runs
+from runs import RUN_STATUS_COMPLETED, RunManager
+
+
+class EchoAgent(BaseAgent):
+    """입력을 그대로 돌려주고 모델 호출 한 번의 토큰 사용량을 기록하는 테스트용 에이전트"""
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        text = ctx.user_content.parts[0].text
+        await asyncio.sleep(0.01)
+        token_usage.record_token_usage(
+            SimpleNamespace(agent_name=self.name, invocation_id=ctx.invocation_id),
+            LlmResponse(usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=len(text), candidates_token_count=1,
+            )),
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            content=types.Content(role="model", parts=[types.Part(text=f"{self.name}: {text}")]),
+        )
+
+
+fake_agent = pytypes.ModuleType("fake_run_agent")
+fake_agent.root_agent = EchoAgent(name="root_agent", sub_agents=[EchoAgent(name="grammar_vocabulary_error_agent")])
+sys.modules["fake_run_agent"] = fake_agent
+
+
+def _manager(tmp_path) -> RunManager:
+    return RunManager(app_name="agent", agent_module="fake_run_agent", runs_dir=str(tmp_path))
+
+
+async def _wait(manager: RunManager, run_id: str) -> dict:
+    async for _ in manager.stream_events(run_id):
+        pass
+    while manager.running_count:
+        await asyncio.sleep(0)
+    return manager.get_run(run_id)["meta"]
+
+
+async def _sessions(manager: RunManager, user_id: str) -> list:
+    listed = await manager.session_service.list_sessions(app_name="agent", user_id=user_id)
+    return sorted(session.id for session in listed.sessions)
+
+
+def test_regenerate_sessions_are_deleted_when_the_run_finishes(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        parent = await _wait(manager, manager.start_run("u1", "chat-1", "passage")["run_id"])
+        assert parent["status"] == RUN_STATUS_COMPLETED
+        child = manager.regenerate_variant(parent["run_id"], "grammar_vocabulary_error_agent")
+        meta = await _wait(manager, child["run_id"])
+        assert meta["status"] == RUN_STATUS_COMPLETED
+        # 채팅 세션은 다음 대화를 위해 남고 유형 다시 생성 세션은 지워짐
+        assert await _sessions(manager, "u1") == ["chat-1"]
+
+    asyncio.run(scenario())
+
+
+def test_idle_chat_sessions_are_deleted(tmp_path, monkeypatch):
+    async def scenario():
+        manager = _manager(tmp_path)
+        await _wait(manager, manager.start_run("u1", "chat-1", "first")["run_id"])
+        monkeypatch.setattr(runs, "SESSION_IDLE_SECONDS", -1)
+        await _wait(manager, manager.start_run("u1", "chat-2", "second")["run_id"])
+        assert await _sessions(manager, "u1") == []
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_runs_on_one_session_keep_their_own_token_usage(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        first = manager.start_run("u1", "chat-1", "short")
+        second = manager.start_run("u1", "chat-1", "a longer passage")
+        metas = [await _wait(manager, meta["run_id"]) for meta in (first, second)]
+        totals = [meta["token_usage"]["total"] for meta in metas]
+        assert [total["calls"] for total in totals] == [1, 1]
+        assert [total["prompt_tokens"] for total in totals] == [len("short"), len("a longer passage")]
+
+    asyncio.run(scenario())
+
+
+def test_event_lines_are_written_in_order_off_the_event_loop(tmp_path, monkeypatch):
+    written = []
+    append_line = runs._append_line
+
+    def recording_append_line(path, line):
+        written.append((threading.get_ident(), json.loads(line)["id"]))
+        append_line(path, line)
+
+    monkeypatch.setattr(runs, "_append_line", recording_append_line)
+
+    async def scenario():
+        manager = _manager(tmp_path)
+        meta = await _wait(manager, manager.start_run("u1", "chat-1", "passage")["run_id"])
+        assert [record_id for _, record_id in written] == list(range(1, meta["event_count"] + 1))
+        assert threading.get_ident() not in {thread for thread, _ in written}
+
+    asyncio.run(scenario())
@@ -0,0 +1,127 @@
+import asyncio
+from types import SimpleNamespace
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from scheduler import FairScheduler, ScheduledLlm, _make_callbacks, schedule_agent_tree, wrap_scheduled_models
+
+
+class StubLlm(BaseLlm):
+    """부분 응답 하나를 보낸 뒤 hold가 풀릴 때까지 응답을 끝내지 않는 테스트용 모델"""
+
+    started: asyncio.Event
+    hold: asyncio.Event
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.started.set()
+        text = types.Content(role="model", parts=[types.Part(text="done")])
+        if stream:
+            yield LlmResponse(content=text, partial=True)
+        await self.hold.wait()
+        yield LlmResponse(content=text)
+
+
+def _setup(fair_scheduler):
+    model = StubLlm(model="stub", started=asyncio.Event(), hold=asyncio.Event())
+    agent = LlmAgent(name="stub_agent", model=model, instruction="test")
+    schedule_agent_tree(agent, f"test-{id(fair_scheduler)}", fair_scheduler)
+    assert wrap_scheduled_models(agent) == 1 and isinstance(agent.model, ScheduledLlm)
+    runner = Runner(app_name="test", agent=agent, session_service=InMemorySessionService())
+    return model, runner
+
+
+async def _run(runner, streaming=False):
+    session = await runner.session_service.create_session(app_name="test", user_id="u1")
+    message = types.Content(role="user", parts=[types.Part(text="hi")])
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
+    return runner.run_async(user_id="u1", session_id=session.id, new_message=message, run_config=run_config)
+
+
+def test_slot_is_released_after_a_normal_call():
+    async def scenario():
+        fair_scheduler = FairScheduler(max_concurrent=2, per_user_concurrent=2, weights={})
+        model, runner = _setup(fair_scheduler)
+        model.hold.set()
+        events = [event async for event in await _run(runner)]
+        assert events[-1].content.parts[0].text == "done"
+        assert fair_scheduler.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slot_is_released_when_the_call_is_cancelled():
+    async def scenario():
+        fair_scheduler = FairScheduler(max_concurrent=2, per_user_concurrent=2, weights={})
+        model, runner = _setup(fair_scheduler)
+
+        async def consume():
+            async for _ in await _run(runner):
+                pass
+
+        task = asyncio.create_task(consume())
+        await model.started.wait()
+        assert fair_scheduler.active == 1
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert fair_scheduler.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_slot_is_released_when_the_client_disconnects_mid_stream():
+    async def scenario():
+        fair_scheduler = FairScheduler(max_concurrent=2, per_user_concurrent=2, weights={})
+        model, runner = _setup(fair_scheduler)
+        events = await _run(runner, streaming=True)
+        first = await events.__anext__()
+        assert first.partial and fair_scheduler.active == 1
+        # 연결이 끊긴 SSE 응답처럼 이벤트 스트림을 닫음 (GeneratorExit)
+        await events.aclose()
+        assert fair_scheduler.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_scheduled_llm_releases_the_slot_without_model_callbacks():
+    async def scenario():
+        fair_scheduler = FairScheduler(max_concurrent=2, per_user_concurrent=2, weights={})
+        before_model = _make_callbacks("test", fair_scheduler)["before_model"]
+        context = SimpleNamespace(_invocation_context=SimpleNamespace(user_id="u1"))
+        model = StubLlm(model="stub", started=asyncio.Event(), hold=asyncio.Event())
+        wrapped = ScheduledLlm(model="stub", inner=model)
+
+        # after_model/on_model_error/after_agent 콜백 없이 모델 호출만 중간에 닫힘
+        await before_model(context, LlmRequest())
+        responses = wrapped.generate_content_async(LlmRequest(), stream=True)
+        await responses.__anext__()
+        assert fair_scheduler.active == 1
+        await responses.aclose()
+        assert fair_scheduler.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_users_take_turns():
+    async def scenario():
+        fair_scheduler = FairScheduler(max_concurrent=1, per_user_concurrent=1, weights={"heavy": 1, "light": 1})
+        order = []
+
+        async def call(user_id):
+            await fair_scheduler.acquire(user_id)
+            order.append(user_id)
+            await asyncio.sleep(0)
+            fair_scheduler.release(user_id)
+
+        await asyncio.gather(*([call("heavy") for _ in range(3)] + [call("light")]))
+        assert order.index("light") <= 1
+        assert fair_scheduler.active == 0 and fair_scheduler.waiting == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+import json
+
+from startup import AppReadiness, ReadinessGate, StartupPhases, path_prefix
+
+
+def test_failed_load_is_retried_on_the_next_wait():
+    async def scenario():
+        attempts = []
+
+        async def loader():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("boom")
+
+        phases = StartupPhases()
+        readiness = AppReadiness(phases)
+        readiness.register("agent", loader)
+        assert await readiness.wait("agent") is False
+        assert readiness.status()["agent"] == {"status": "failed", "error": "boom"}
+        assert await readiness.wait("agent") is True
+        assert len(attempts) == 2 and readiness.all_ready
+        assert [phase["name"] for phase in phases.report()] == ["load agent"]
+
+    asyncio.run(scenario())
+
+
+def test_wait_times_out_without_cancelling_the_load():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def loader():
+            await release.wait()
+
+        readiness = AppReadiness()
+        readiness.register("pdf_agent", loader)
+        assert await readiness.wait("pdf_agent", timeout=0.01) is False
+        assert readiness.status()["pdf_agent"]["status"] == "loading"
+        release.set()
+        assert await readiness.wait("pdf_agent", timeout=1) is True
+
+    asyncio.run(scenario())
+
+
+def test_readiness_gate_returns_503_for_unready_routes_only():
+    async def scenario():
+        async def loader():
+            raise RuntimeError("not yet")
+
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        async def call(path):
+            messages = []
+
+            async def send(message):
+                messages.append(message)
+
+            await gate({"type": "http", "method": "POST", "path": path}, None, send)
+            return messages
+
+        readiness = AppReadiness()
+        readiness.register("agent", loader)
+        gate = ReadinessGate(app, readiness, [(path_prefix("/run", methods=("POST",)), "agent")])
+
+        start, body = await call("/run_sse")
+        assert start["status"] == 503
+        assert dict(start["headers"])[b"retry-after"] == b"5"
+        payload = json.loads(body["body"])
+        assert payload["success"] is False and payload["retryAfter"] == 5
+
+        start, body = await call("/health")
+        assert start["status"] == 200 and body["body"] == b"ok"
+
+    asyncio.run(scenario())
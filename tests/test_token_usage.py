@@ -0,0 +1,56 @@
+import contextvars
+import logging
+from types import SimpleNamespace
+
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from agent import root_agent, token_usage
+
+
+def _record(agent_name: str, invocation_id: str, prompt_tokens: int, cached_tokens: int = 0) -> None:
+    token_usage.record_token_usage(
+        SimpleNamespace(agent_name=agent_name, invocation_id=invocation_id),
+        LlmResponse(usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, cached_content_token_count=cached_tokens, candidates_token_count=1,
+        )),
+    )
+
+
+def test_direct_request_is_keyed_by_root_invocation_and_popped_when_root_ends(caplog):
+    def scenario():
+        root = SimpleNamespace(agent_name="root_agent", invocation_id="direct-root")
+        token_usage.bind_request_token_usage(root)
+        _record("root_agent", "direct-root", 100)
+        # AgentTool 하위 에이전트는 다른 invocation_id로 실행됨
+        _record("master_agent", "direct-tool", 200, cached_tokens=100)
+        token_usage.report_request_token_usage(root)
+        assert token_usage.current_run_id.get() is None
+
+    with caplog.at_level(logging.INFO, logger=token_usage.__name__):
+        contextvars.copy_context().run(scenario)
+    assert "요청 토큰 합계 [direct-root] 호출 2회, 입력 300 (캐시 100, 33%)" in caplog.text
+    assert token_usage.pop_token_usage("direct-root") is None
+    assert token_usage.pop_token_usage("direct-tool") is None
+
+
+def test_server_runs_are_left_for_the_run_manager():
+    def scenario():
+        token_usage.current_run_id.set("run-1")
+        root = SimpleNamespace(agent_name="root_agent", invocation_id="run-root")
+        token_usage.bind_request_token_usage(root)
+        _record("root_agent", "run-root", 10)
+        token_usage.report_request_token_usage(root)
+        assert token_usage.current_run_id.get() == "run-1"
+
+    contextvars.copy_context().run(scenario)
+    summary = token_usage.pop_token_usage("run-1")
+    assert summary["total"]["prompt_tokens"] == 10
+
+
+def test_root_agent_binds_and_reports_request_usage():
+    def callbacks(value):
+        return value if isinstance(value, list) else [value]
+
+    assert token_usage.bind_request_token_usage in callbacks(root_agent.before_agent_callback)
+    assert token_usage.report_request_token_usage in callbacks(root_agent.after_agent_callback)
@@ -0,0 +1,115 @@
+import asyncio
+from typing import AsyncGenerator, List
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.adk.tools.agent_tool import AgentTool
+from google.genai import types
+
+import tracing
+from tracing import SPAN_KIND_HTTP, critical_path, span, to_otlp, trace_agent_tree
+
+
+class ScriptedLlm(BaseLlm):
+    """정해 둔 응답을 차례로 돌려주는 테스트용 모델 (HTTP 없음)"""
+
+    responses: List[LlmResponse] = []
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(0.001)
+        yield self.responses.pop(0)
+
+
+def _text(text):
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]),
+                       usage_metadata=types.GenerateContentResponseUsageMetadata(
+                           prompt_token_count=10, candidates_token_count=2))
+
+
+@pytest.fixture
+def exported(monkeypatch):
+    records = []
+    monkeypatch.setattr(tracing.exporter, "export", lambda value: records.append(value.to_dict()))
+    return records
+
+
+def test_spans_nest_from_http_through_agent_tool_to_models(exported):
+    master = LlmAgent(name="master_agent", model=ScriptedLlm(model="stub", responses=[_text("master result")]))
+    call = types.Part(function_call=types.FunctionCall(id="call-1", name="master_agent", args={"request": "지문"}))
+    root = LlmAgent(name="root_agent", tools=[AgentTool(agent=master)], model=ScriptedLlm(
+        model="stub", responses=[LlmResponse(content=types.Content(role="model", parts=[call])), _text("done")]))
+    assert trace_agent_tree(root, "agent") == 2
+    assert trace_agent_tree(root, "agent") == 0
+
+    async def scenario():
+        runner = Runner(app_name="agent", agent=root, session_service=InMemorySessionService())
+        await runner.session_service.create_session(app_name="agent", user_id="u1", session_id="s1")
+        with span("POST /run_sse", SPAN_KIND_HTTP):
+            async for _ in runner.run_async(user_id="u1", session_id="s1", new_message=types.Content(
+                    role="user", parts=[types.Part(text="지문")])):
+                pass
+
+    asyncio.run(scenario())
+    by_name = {}
+    for record in exported:
+        by_name.setdefault(record["name"], []).append(record)
+    http, = by_name["POST /run_sse"]
+    root_span, = by_name["root_agent"]
+    tool_span, = [record for record in by_name["master_agent"] if record["kind"] == "tool"]
+    master_span, = [record for record in by_name["master_agent"] if record["kind"] == "agent"]
+    root_models = by_name["root_agent model"]
+    master_model, = by_name["master_agent model"]
+
+    assert len({record["trace_id"] for record in exported}) == 1
+    assert root_span["parent_span_id"] == http["span_id"]
+    assert [record["parent_span_id"] for record in root_models] == [root_span["span_id"]] * 2
+    assert tool_span["parent_span_id"] == root_span["span_id"]
+    assert master_span["parent_span_id"] == tool_span["span_id"]
+    assert master_model["parent_span_id"] == master_span["span_id"]
+    assert master_model["attributes"]["output_tokens"] == 2 and master_model["attributes"]["model"] == "stub"
+
+
+def _record(span_id, parent, start, end, kind="agent", status="ok", **attributes):
+    return {"trace_id": "t" * 32, "span_id": span_id, "parent_span_id": parent, "name": span_id, "kind": kind,
+            "start_time": start, "end_time": end, "duration": end - start, "status": status,
+            "attributes": attributes}
+
+
+def test_critical_path_follows_the_latest_finishing_children():
+    records = [
+        _record("http", None, 0.0, 1.0, kind="http"),
+        # HTTP 응답(1.0) 뒤에도 계속된 run이 부모 구간을 늘림
+        _record("run", "http", 0.5, 4.0, kind="run"),
+        _record("fast", "run", 0.6, 1.5),
+        _record("slow", "run", 0.6, 3.0),
+        _record("model", "slow", 1.0, 2.8, kind="model"),
+        _record("orphan", "missing-parent", 0.0, 0.1),
+    ]
+    segments = critical_path(records)
+    path = [segment["span"]["span_id"] for segment in segments]
+    assert path == ["http", "run", "slow", "model"]
+    self_times = {segment["span"]["span_id"]: round(segment["self_time"], 6) for segment in segments}
+    assert self_times == {"http": 0.5, "run": 1.1, "slow": 0.6, "model": 1.8}
+    assert round(sum(self_times.values()), 6) == 4.0
+    assert "임계 경로 4.000s" in tracing.format_critical_path(records)
+
+
+def test_to_otlp_field_shapes():
+    records = [_record("a1b2", None, 1.5, 2.0, kind="http", path="/run", count=3, ratio=0.5, ok=True),
+               _record("c3d4", "a1b2", 1.6, 1.9, kind="model", status="error")]
+    body = to_otlp(records)
+    resource = body["resourceSpans"][0]
+    assert resource["resource"]["attributes"] == [{"key": "service.name", "value": {"stringValue": "problem-forge"}}]
+    parent, child = resource["scopeSpans"][0]["spans"]
+    assert parent["kind"] == 2 and child["kind"] == 3
+    assert parent["startTimeUnixNano"] == "1500000000" and parent["endTimeUnixNano"] == "2000000000"
+    assert "parentSpanId" not in parent and child["parentSpanId"] == "a1b2"
+    assert parent["status"] == {"code": 1} and child["status"] == {"code": 2}
+    values = {item["key"]: item["value"] for item in parent["attributes"]}
+    assert values == {"problem_forge.kind": {"stringValue": "http"}, "path": {"stringValue": "/run"},
+                      "count": {"intValue": "3"}, "ratio": {"doubleValue": 0.5}, "ok": {"boolValue": True}}
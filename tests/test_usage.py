@@ -0,0 +1,166 @@
+import asyncio
+import contextvars
+import sys
+import types as pytypes
+from types import SimpleNamespace
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.agents import BaseAgent
+from google.adk.events import Event
+from google.adk.models import LlmResponse
+from google.genai import types
+
+import usage
+from model_router import FALLBACKS_METADATA_KEY, ROUTED_MODEL_METADATA_KEY
+from runs import RUN_STATUS_COMPLETED, RunManager
+from usage import (
+    BUDGET_MODE_CACHE_ONLY, BUDGET_MODE_FULL, BUDGET_MODE_REDUCED, REDUCED_VARIANT_TYPES, BudgetExceeded, UsageMeter,
+    current_budget_mode, token_cost,
+)
+from variants import VARIANT_AGENT_NAMES
+
+MODEL = "gemini-2.0-flash"
+
+
+def _meter(tmp_path, budgets=None) -> UsageMeter:
+    return UsageMeter(str(tmp_path / "usage.sqlite3"), budgets=budgets or {})
+
+
+def _spend(meter: UsageMeter, user_id: str, dollars: float) -> None:
+    # gemini-2.0-flash 입력 100만 토큰 = $0.10
+    meter.record(user_id, "s", "agent", "root_agent", MODEL, round(dollars * 10_000_000), 0, 0)
+
+
+def _context(user_id: str, agent_name: str = "root_agent", state=None):
+    invocation = SimpleNamespace(user_id=user_id, agent=SimpleNamespace(model=MODEL), session=SimpleNamespace(id="chat-1"))
+    return SimpleNamespace(_invocation_context=invocation, agent_name=agent_name, state=state or {})
+
+
+def test_budget_modes_follow_monthly_spend(tmp_path):
+    meter = _meter(tmp_path, budgets={"teacher1": 1.0, "*": 10.0})
+    assert meter.budget_status("teacher1")["mode"] == BUDGET_MODE_FULL
+    _spend(meter, "teacher1", 0.85)
+    status = meter.budget_status("teacher1")
+    assert status["mode"] == BUDGET_MODE_REDUCED
+    assert status["allowed_variants"] == [name for name in VARIANT_AGENT_NAMES if name in REDUCED_VARIANT_TYPES]
+    _spend(meter, "teacher1", 0.2)
+    assert meter.budget_status("teacher1")["mode"] == BUDGET_MODE_CACHE_ONLY
+    with pytest.raises(BudgetExceeded):
+        meter.check_budget("teacher1")
+    # 다른 사용자는 "*" 기본 예산, 예산이 없으면 제한 없음
+    assert meter.check_budget("teacher2")["budget_usd"] == 10.0
+    assert _meter(tmp_path).budget_status("teacher1")["mode"] == BUDGET_MODE_FULL
+
+
+def test_monthly_spend_survives_a_restart(tmp_path):
+    meter = _meter(tmp_path, budgets={"teacher1": 1.0})
+    _spend(meter, "teacher1", 1.5)
+    meter.flush()
+    assert _meter(tmp_path, budgets={"teacher1": 1.0}).budget_status("teacher1")["mode"] == BUDGET_MODE_CACHE_ONLY
+
+
+def test_usage_is_accumulated_into_daily_rows(tmp_path):
+    meter = _meter(tmp_path)
+    meter.record("teacher1", "s1", "agent", "root_agent", MODEL, 1000, 200, 100)
+    meter.record("teacher1", "s1", "agent", "root_agent", MODEL, 1000, 0, 100)
+    meter.record("teacher1", "s2", "pdf", "pdf_agent", "gemini-2.5-flash", 500, 0, 50)
+    assert meter.flush() == 2
+    rows = meter.query(period="month", user_id="teacher1", group_by=("app",))
+    by_app = {row["app"]: row for row in rows}
+    assert by_app["agent"]["calls"] == 2 and by_app["agent"]["prompt_tokens"] == 2000
+    assert by_app["agent"]["cost_usd"] == round(
+        token_cost(MODEL, 1000, 200, 100) + token_cost(MODEL, 1000, 0, 100), 6)
+    assert by_app["pdf"]["output_tokens"] == 50
+    with pytest.raises(ValueError):
+        meter.query(group_by=("color",))
+
+
+def test_callbacks_block_models_and_variants_by_budget(tmp_path):
+    meter = _meter(tmp_path, budgets={"teacher1": 1.0})
+    callbacks = usage._make_callbacks("agent", meter)
+    assert callbacks["before_model"](_context("teacher1"), None) is None
+
+    _spend(meter, "teacher1", 0.9)
+    allowed, skipped = REDUCED_VARIANT_TYPES[0], next(
+        name for name in VARIANT_AGENT_NAMES if name not in REDUCED_VARIANT_TYPES)
+    assert callbacks["before_variant_agent"](_context("teacher1", allowed)) is None
+    assert callbacks["before_variant_agent"](_context("teacher1", skipped)) is not None
+
+    _spend(meter, "teacher1", 0.2)
+    blocked = callbacks["before_model"](_context("teacher1"), None)
+    assert blocked.error_code == "BUDGET_EXCEEDED" and blocked.content is None
+
+
+def test_after_model_records_the_routed_model_and_fallback_attempts(tmp_path):
+    meter = _meter(tmp_path)
+    response = LlmResponse(
+        usage_metadata=types.GenerateContentResponseUsageMetadata(prompt_token_count=100, candidates_token_count=10),
+        custom_metadata={
+            ROUTED_MODEL_METADATA_KEY: "gemini-2.5-flash",
+            FALLBACKS_METADATA_KEY: [{"model": "gemini-2.0-flash-lite", "prompt_tokens": 100,
+                                      "cached_tokens": 0, "output_tokens": 5}],
+        },
+    )
+    usage._make_callbacks("agent", meter)["after_model"](_context("teacher1"), response)
+    rows = meter.query(period="day", group_by=("model", "session"))
+    assert {row["model"]: row["output_tokens"] for row in rows} == {"gemini-2.0-flash-lite": 5, "gemini-2.5-flash": 10}
+    assert {row["session_id"] for row in rows} == {"chat-1"}
+
+
+def test_run_budget_mode_applies_only_to_its_own_invocation(tmp_path):
+    meter = _meter(tmp_path, budgets={"teacher1": 1.0})
+    before_model = usage._make_callbacks("agent", meter)["before_model"]
+    _spend(meter, "teacher1", 1.5)
+
+    def run_started_in_full_mode():
+        current_budget_mode.set(BUDGET_MODE_FULL)
+        return before_model(_context("teacher1"), None)
+
+    # 시작할 때 full이던 run은 도중에 예산을 넘어도 끝까지 실행
+    assert contextvars.copy_context().run(run_started_in_full_mode) is None
+    # 같은 세션의 다음 요청은 이전 run의 단계를 물려받지 않음 (세션 상태에 남은 값도 무시)
+    blocked = before_model(_context("teacher1", state={"budget_mode": BUDGET_MODE_FULL}), None)
+    assert blocked.error_code == "BUDGET_EXCEEDED"
+
+
+class ModeAgent(BaseAgent):
+    """실행 중에 보이는 예산 단계를 응답으로 돌려주는 테스트용 에이전트"""
+
+    async def _run_async_impl(self, ctx) -> AsyncGenerator[Event, None]:
+        await asyncio.sleep(0.01)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            content=types.Content(role="model", parts=[types.Part(text=str(current_budget_mode.get()))]),
+        )
+
+
+fake_agent = pytypes.ModuleType("fake_budget_agent")
+fake_agent.root_agent = ModeAgent(name="root_agent")
+sys.modules["fake_budget_agent"] = fake_agent
+
+
+def test_run_manager_keeps_budget_mode_out_of_session_state(tmp_path):
+    async def scenario():
+        meter = _meter(tmp_path, budgets={"teacher1": 1.0})
+        manager = RunManager(app_name="agent", agent_module="fake_budget_agent", runs_dir=str(tmp_path / "runs"),
+                             usage_meter=meter)
+        _spend(meter, "teacher1", 0.9)
+        reduced = manager.start_run("teacher1", "chat-1", "passage")
+        meter.budgets["teacher1"] = 10.0
+        full = manager.start_run("teacher1", "chat-1", "passage")
+        for meta in (reduced, full):
+            async for _ in manager.stream_events(meta["run_id"]):
+                pass
+        while manager.running_count:
+            await asyncio.sleep(0)
+        results = {meta["budget_mode"]: manager.get_run(meta["run_id"])["meta"] for meta in (reduced, full)}
+        assert all(meta["status"] == RUN_STATUS_COMPLETED for meta in results.values())
+        assert {mode: meta["result"] for mode, meta in results.items()} == {
+            BUDGET_MODE_REDUCED: BUDGET_MODE_REDUCED, BUDGET_MODE_FULL: BUDGET_MODE_FULL}
+        session = await manager.session_service.get_session(app_name="agent", user_id="teacher1", session_id="chat-1")
+        assert "budget_mode" not in session.state
+        assert current_budget_mode.get() is None
+
+    asyncio.run(scenario())
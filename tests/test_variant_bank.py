@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from runs import RUN_STATUS_COMPLETED, RunManager
+from variant_bank import VariantBank, find_item_code, fts_query, passage_id_for
+from variants import VARIANT_AGENT_NAMES
+
+PASSAGE = "23005-0011\n01 다음 글의 목적으로 가장 적절한 것은?\nDear Mr. Carter, thank you for your order of anniversary mugs."
+
+
+def _result(question, answer="2"):
+    return json.dumps({"question": question, "choices": ["1.a", "2.b"], "answer": answer, "explanation": "e"},
+                      ensure_ascii=False)
+
+
+@pytest.fixture
+def bank():
+    bank = VariantBank(":memory:")
+    yield bank
+    bank.close()
+
+
+def test_passage_ids_ignore_whitespace():
+    assert passage_id_for(PASSAGE) == passage_id_for("  " + PASSAGE.replace("\n", " \n  "))
+    assert find_item_code(PASSAGE) == "23005-0011"
+    assert fts_query('anniversary "mug') == '"anniversary"* """mug"*'
+
+
+def test_add_lookup_and_completeness(bank):
+    passage_id = bank.add_passage(PASSAGE, source="workbook.pdf", page=3)
+    assert bank.add_passage(PASSAGE) == passage_id
+    assert bank.add_variants(passage_id, {"emotion_atmosphere_agent": _result("Q1"), "unknown_agent": "x"}) == 1
+    assert bank.has_passage(PASSAGE, complete=False) and not bank.has_passage(PASSAGE)
+
+    bank.add_variants(passage_id, {name: _result(f"{name} question") for name in VARIANT_AGENT_NAMES})
+    found = bank.lookup(PASSAGE.replace("\n", " "))
+    assert found["item_code"] == "23005-0011" and found["source"] == "workbook.pdf"
+    assert set(found["variants"]) == set(VARIANT_AGENT_NAMES)
+    assert bank.has_passage(PASSAGE)
+    assert bank.stats() == {"passages": 1, "variants": len(VARIANT_AGENT_NAMES)}
+
+    with pytest.raises(KeyError):
+        bank.add_variants("missing", {"emotion_atmosphere_agent": _result("Q")})
+
+
+def test_search_by_item_code_type_and_keyword(bank):
+    passage_id = bank.add_passage(PASSAGE)
+    bank.add_variants(passage_id, {
+        "emotion_atmosphere_agent": _result("Carter feels grateful", answer="3"),
+        "grammar_vocabulary_error_agent": _result("어법상 틀린 것은?"),
+    })
+    assert len(bank.search(item_code="23005-")) == 2
+    rows = bank.search(variant_type="emotion_atmosphere_agent")
+    assert [row["answer"] for row in rows] == ["3"]
+    assert [row["variant_type"] for row in bank.search(keyword="grate")] == ["emotion_atmosphere_agent"]
+    assert bank.search(item_code="99999") == []
+
+
+def test_run_manager_completes_banked_passages_without_running_the_agent(tmp_path, bank):
+    passage_id = bank.add_passage(PASSAGE)
+    bank.add_variants(passage_id, {name: _result(f"{name} question") for name in VARIANT_AGENT_NAMES})
+    manager = RunManager(agent_module="missing_agent_module", runs_dir=str(tmp_path), variant_bank=bank)
+
+    meta = manager.start_run("u1", "chat-1", PASSAGE)
+    assert meta["status"] == RUN_STATUS_COMPLETED and meta["source"] == "variant_bank"
+    assert meta["item_code"] == "23005-0011" and set(meta["variants"]) == set(VARIANT_AGENT_NAMES)
+    assert manager.running_count == 0
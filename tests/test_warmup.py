@@ -0,0 +1,129 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from google.adk.agents import LlmAgent
+from google.adk.models import LlmRequest
+from google.genai import types
+
+import warmup
+from warmup import ModelWarmer
+
+
+class StubModelApi(BaseHTTPRequestHandler):
+    """모델 메타데이터 조회와 generateContent에 고정 응답을 주는 로컬 스텁 모델 API"""
+
+    protocol_version = "HTTP/1.1"
+    requests = []
+
+    def _reply(self, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path, self.client_address[1]))
+        self._reply({"name": self.path.rsplit("/", 1)[-1]})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.requests.append(("POST", self.path, self.client_address[1]))
+        self._reply({"candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}}],
+                     "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": 1}})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    # conftest는 서버 import 시 워밍업을 끄므로 이 테스트에서만 켬
+    monkeypatch.setattr(warmup, "WARMUP_ENABLED", True)
+    monkeypatch.setenv("GOOGLE_API_KEY", "stub-key")
+    monkeypatch.delenv("GOOGLE_GENAI_USE_VERTEXAI", raising=False)
+    StubModelApi.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubModelApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", StubModelApi.requests
+    server.shutdown()
+    server.server_close()
+
+
+def _tree():
+    first = LlmAgent(name="first", model="gemini-2.0-flash")
+    second = LlmAgent(name="second", model="gemini-2.0-flash")
+    lite = LlmAgent(name="lite", model="gemini-2.0-flash-lite")
+    return LlmAgent(name="root_agent", model="gemini-2.0-flash", sub_agents=[first, second, lite])
+
+
+def test_share_models_replaces_string_models_with_shared_objects(stub_api):
+    base_url, _ = stub_api
+    warmer = ModelWarmer(base_url=base_url)
+    root = _tree()
+    assert warmer.share_models(root) == ["gemini-2.0-flash", "gemini-2.0-flash-lite"]
+    first, second, lite = root.sub_agents
+    assert root.model is first.model is second.model is warmer.models["gemini-2.0-flash"]
+    assert lite.model is warmer.models["gemini-2.0-flash-lite"] and lite.model.base_url == base_url
+    # 다시 묶어도 호출 시각 기록 콜백은 한 번만 붙음
+    callbacks = list(first.before_model_callback or [])
+    warmer.share_models(root)
+    assert list(first.before_model_callback or []) == callbacks
+
+
+def test_warm_up_sends_one_metadata_request_per_shared_model(stub_api):
+    base_url, requests = stub_api
+    warmer = ModelWarmer(base_url=base_url)
+    warmer.share_models(_tree())
+
+    async def scenario():
+        await warmer.warm_up()
+        warmed = list(requests)
+        # 워밍업으로 열어 둔 연결을 첫 생성 요청이 그대로 사용 (새 연결 없이 정상 상태와 같은 경로)
+        request = LlmRequest(model="gemini-2.0-flash",
+                             contents=[types.Content(role="user", parts=[types.Part(text="hi")])])
+        responses = [response async for response in
+                     warmer.models["gemini-2.0-flash"].generate_content_async(request)]
+        return warmed, responses
+
+    warmed, responses = asyncio.run(scenario())
+    assert sorted(path for _, path, _ in warmed) == [
+        "/v1beta/models/gemini-2.0-flash", "/v1beta/models/gemini-2.0-flash-lite"]
+    assert all(method == "GET" for method, _, _ in warmed)
+    assert responses[-1].content.parts[0].text == "ok"
+    warmed_port = next(port for _, path, port in warmed if path.endswith("gemini-2.0-flash"))
+    assert requests[-1][0] == "POST" and requests[-1][2] == warmed_port
+    assert warmer.warmups == 1
+
+
+def test_warm_up_is_skipped_without_credentials(stub_api, monkeypatch):
+    base_url, requests = stub_api
+    monkeypatch.delenv("GOOGLE_API_KEY")
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    warmer = ModelWarmer(base_url=base_url)
+    warmer.share_models(_tree())
+    asyncio.run(warmer.warm_up())
+    assert requests == [] and warmer.warmups == 0
+
+
+def test_keep_warm_rewarms_after_the_idle_time(stub_api):
+    base_url, requests = stub_api
+    warmer = ModelWarmer(idle_seconds=0.1, base_url=base_url)
+    warmer.share_models(LlmAgent(name="root_agent", model="gemini-2.0-flash"))
+
+    async def scenario():
+        task = asyncio.create_task(warmer.keep_warm())
+        await asyncio.sleep(0.05)
+        assert warmer.warmups == 0
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert warmer.warmups >= 2
+    assert len(requests) == warmer.warmups
@@ -0,0 +1,63 @@
+import json
+
+from starlette.testclient import TestClient
+
+from worksheet import iter_worksheet_html
+
+
+def _variant(question, answer, explanation="해설"):
+    return json.dumps({"question": question, "choices": ["1. <b>bold</b>", "2. plain"], "answer": answer,
+                       "explanation": explanation}, ensure_ascii=False)
+
+
+ITEMS = [
+    {"label": "23005-0011", "original_text": "Dear Mr. Carter & <team>",
+     "variants": {"emotion_atmosphere_agent": _variant("심경은?", "2", "<script>x</script>")}},
+    None,
+    {"label": "raw", "original_text": "Second passage", "variants": {}, "result": "결과 <그대로>"},
+]
+
+
+def _render(**kwargs):
+    return "".join(iter_worksheet_html(lambda: iter(ITEMS), **kwargs))
+
+
+def test_worksheet_escapes_text_and_numbers_only_found_problems():
+    page = _render(title="1학기 <중간>")
+    assert "<title>1학기 &lt;중간&gt;</title>" in page
+    assert "Dear Mr. Carter &amp; &lt;team&gt;" in page
+    assert "<li>&lt;b&gt;bold&lt;/b&gt;</li>" in page
+    assert "<script>" not in page
+    assert "결과 &lt;그대로&gt;" in page
+    # 찾을 수 없는 run은 건너뛰고 번호를 이어서 매김
+    assert "문제 1. 23005-0011" in page and "문제 2. raw" in page and "문제 3." not in page
+
+
+def test_answer_key_section():
+    page = _render()
+    answer_key = page.split('<section class="answer-key">')[1]
+    assert '<span class="answer">2</span>' in answer_key
+    assert "&lt;script&gt;x&lt;/script&gt;" in answer_key
+    assert "문제 2. raw" in answer_key
+    assert '<span class="answer">2</span>' not in page.split('<section class="answer-key">')[0]
+    assert 'class="answer-key"' not in _render(answer_key=False)
+
+
+def test_export_endpoint_rejects_bad_input_before_streaming():
+    from server import app
+
+    client = TestClient(app)
+    cases = [
+        ("not json", "JSON"),
+        (json.dumps(["run1"]), "JSON"),
+        (json.dumps({"runIds": []}), "runIds"),
+        (json.dumps({"runIds": ["run1"], "labels": 3}), "labels"),
+        (json.dumps({"runIds": ["run1"], "labels": [{"a": 1}]}), "labels"),
+    ]
+    for body, message in cases:
+        response = client.post("/api/export/worksheet", content=body, headers={"content-type": "application/json"})
+        assert response.status_code == 400, body
+        assert message in response.json()["error"]
+
+    response = client.post("/api/export/worksheet", json={"runIds": ["missingrun"], "labels": ["A"]})
+    assert response.status_code == 200 and response.text.endswith("</body></html>\n")